@@ -0,0 +1 @@
+"""性能基准模块 - 数据转换与导出的吞吐量测试"""
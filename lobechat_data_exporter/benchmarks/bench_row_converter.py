@@ -0,0 +1,116 @@
+"""
+行转换吞吐量基准
+对比 DatabaseParser._convert_row（逐键转换）与编译后的 RowConverter（元组行）
+
+运行方式:
+    python -m lobechat_data_exporter.benchmarks.bench_row_converter --rows 200000
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+
+from ..core.db_parser import DatabaseParser
+from ..core.row_converter import RowConverter
+
+
+# 与 LobeChat messages 表一致的列（timestamptz 的 OID 为 1184）
+MESSAGE_DESCRIPTION = [
+    ("id", 1043), ("role", 1043), ("content", 25), ("reasoning", 3802),
+    ("search", 3802), ("metadata", 3802), ("model", 1043), ("provider", 1043),
+    ("favorite", 16), ("error", 3802), ("tools", 3802), ("trace_id", 1043),
+    ("observation_id", 1043), ("client_id", 1043), ("user_id", 25),
+    ("session_id", 1043), ("topic_id", 1043), ("thread_id", 1043),
+    ("parent_id", 1043), ("quota_id", 1043), ("agent_id", 1043), ("group_id", 1043),
+    ("target_id", 1043), ("message_group_id", 1043),
+    ("accessed_at", 1184), ("created_at", 1184), ("updated_at", 1184),
+]
+
+
+def generate_rows(count: int) -> Tuple[List[Tuple[str, int]], List[tuple]]:
+    """生成模拟的消息元组行"""
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(count):
+        created = base + timedelta(seconds=i)
+        rows.append((
+            f"msg_{i:08d}", "assistant" if i % 2 else "user",
+            f"这是第 {i} 条消息的内容，" * 8, None,
+            None, {"totalTokens": 1200, "tps": 42.5}, "gpt-4o", "openai",
+            False, None, None, None,
+            None, None, "user_0001",
+            f"ssn_{i // 500:05d}", f"tpc_{i // 50:06d}", None,
+            f"msg_{i - 1:08d}" if i else None, None, None, None,
+            None, None,
+            created, created, created + timedelta(seconds=5),
+        ))
+    return MESSAGE_DESCRIPTION, rows
+
+
+def _time_it(func, repeat: int) -> float:
+    """多次执行取最短耗时"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(row_count: int = 200000, repeat: int = 3) -> Dict:
+    """
+    运行行转换基准
+
+    Args:
+        row_count: 行数
+        repeat: 重复次数（取最好成绩）
+
+    Returns:
+        基准结果字典（rows/sec）
+    """
+    description, rows = generate_rows(row_count)
+    columns = [col[0] for col in description]
+    dict_rows = [dict(zip(columns, row)) for row in rows]
+
+    parser = DatabaseParser(connector=None)
+
+    def legacy():
+        return [parser._convert_row(r) for r in dict_rows]
+
+    def compiled():
+        converter = RowConverter.from_description(description)
+        return converter.convert_all(rows)
+
+    # 校验两种方式结果一致
+    assert legacy()[:100] == compiled()[:100], "转换结果不一致"
+
+    legacy_seconds = _time_it(legacy, repeat)
+    compiled_seconds = _time_it(compiled, repeat)
+
+    return {
+        "benchmark": "row_converter",
+        "rows": row_count,
+        "columns": len(columns),
+        "legacyRowsPerSec": row_count / legacy_seconds,
+        "compiledRowsPerSec": row_count / compiled_seconds,
+        "speedup": legacy_seconds / compiled_seconds,
+    }
+
+
+def main():
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description="行转换吞吐量基准")
+    arg_parser.add_argument("--rows", type=int, default=200000, help="模拟行数")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="重复次数")
+    args = arg_parser.parse_args()
+
+    result = run_benchmark(args.rows, args.repeat)
+    print(f"行数: {result['rows']}, 列数: {result['columns']}")
+    print(f"逐键转换 (_convert_row): {result['legacyRowsPerSec']:,.0f} 行/秒")
+    print(f"编译转换 (RowConverter): {result['compiledRowsPerSec']:,.0f} 行/秒")
+    print(f"加速比: {result['speedup']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
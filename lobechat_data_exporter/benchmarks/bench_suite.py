@@ -0,0 +1,343 @@
+"""
+端到端基准套件
+用合成数据集计时 JSON 解析、各导出模式，以及（指定数据库时）DatabaseParser.parse、
+对话树懒加载查询和搜索查询，结果写为 JSON 供回归对比
+
+运行方式:
+    python -m lobechat_data_exporter.benchmarks.bench_suite --preset small --output results.json
+    PGPASSWORD=... python -m lobechat_data_exporter.benchmarks.bench_suite --preset medium \\
+        --pg-database lobechat_bench --load --users 2
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from ..config import VERSION
+from ..core.parser import LobeChatParser
+from ..core.index_advisor import CANONICAL_QUERIES
+from ..exporters.json_exporter import JSONExporter
+from ..exporters.markdown_writer import (
+    export_markdown_single_file, export_markdown_agent_files,
+    export_markdown_directory, export_markdown_message_files
+)
+from .synthetic_data import (
+    DatasetSpec, SIZE_PRESETS, generate_backup, make_user_ids, write_backup,
+    create_schema, load_backup
+)
+
+
+# 与 ui/db_tab.py 的 _search_database 一致的搜索查询
+SEARCH_QUERIES = {
+    "messages": "SELECT 'message' as type, id, LEFT(content, 200) as content, created_at "
+                "FROM messages WHERE content ILIKE %s",
+    "topics": "SELECT 'topic' as type, id, title as content, created_at FROM topics WHERE title ILIKE %s",
+    "agents": "SELECT 'agent' as type, id, title as content, created_at "
+              "FROM agents WHERE (title ILIKE %s OR system_role ILIKE %s)",
+}
+
+# Markdown 导出模式（与 main_window 的 md_export_mode 对应）
+MARKDOWN_MODES = {
+    "single_file": export_markdown_single_file,
+    "agent_file": export_markdown_agent_files,
+    "topic_file": export_markdown_directory,
+    "message_file": export_markdown_message_files,
+}
+
+
+def _measure(results: List[Dict], group: str, name: str, func: Callable,
+             repeat: int = 1, setup: Optional[Callable] = None, **extra) -> object:
+    """
+    计时并记录结果（多次执行取最短耗时）
+
+    Args:
+        results: 结果列表
+        group: 分组（file / db）
+        name: 名称
+        func: 被测函数，返回值为 dict 时合并到结果中（如 rows / files）
+        repeat: 重复次数
+        setup: 每次执行前调用（不计时，如清理输出目录）
+
+    Returns:
+        最后一次执行的返回值
+    """
+    times = []
+    value = None
+    for _ in range(max(1, repeat)):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        value = func()
+        times.append(time.perf_counter() - start)
+
+    record = {"group": group, "name": name, "seconds": min(times),
+              "meanSeconds": sum(times) / len(times), "runs": len(times), **extra}
+    if isinstance(value, dict):
+        record.update({k: v for k, v in value.items() if isinstance(v, (int, float, str))})
+    if record.get("rows") and record["seconds"] > 0:
+        record["rowsPerSecond"] = record["rows"] / record["seconds"]
+    results.append(record)
+    print(f"[{group}] {name}: {record['seconds'] * 1000:.1f} ms"
+          + (f", {record['rows']} 行" if "rows" in record else "")
+          + (f", {record['files']} 个文件" if "files" in record else ""))
+    return value
+
+
+def _dir_size(path: Path) -> int:
+    """目录总大小（字节）"""
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+
+
+def run_file_benchmarks(spec: DatasetSpec, workdir: Path, repeat: int = 1) -> List[Dict]:
+    """
+    文件模式基准：生成、写入、读取、解析和各导出模式
+
+    Args:
+        spec: 数据集规模
+        workdir: 临时工作目录
+        repeat: 重复次数
+
+    Returns:
+        结果列表
+    """
+    results = []
+    backup = _measure(results, "file", "generate", lambda: generate_backup(spec))
+    message_count = len(backup["data"]["messages"])
+
+    backup_path = workdir / "bench_backup.json"
+    _measure(results, "file", "write_backup",
+             lambda: write_backup(backup, str(backup_path)), repeat)
+
+    def load():
+        with open(backup_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    raw = _measure(results, "file", "json_load", load, repeat,
+                   bytes=backup_path.stat().st_size)
+
+    parser = LobeChatParser()
+    state = {}
+
+    def parse():
+        state["parsed"] = parser.parse(raw, str(backup_path))
+        return {"rows": message_count}
+
+    _measure(results, "file", "parse", parse, repeat)
+    parsed_data = state["parsed"]
+
+    export_root = workdir / "exports"
+
+    def clean():
+        shutil.rmtree(export_root, ignore_errors=True)
+        export_root.mkdir(parents=True)
+
+    def custom_json():
+        modules = list(parsed_data["raw"]["data"].keys())
+        with open(export_root / "custom.json", "w", encoding="utf-8") as f:
+            JSONExporter(parsed_data).write_custom_json(f, modules)
+        return {"rows": message_count, "files": 1, "bytes": _dir_size(export_root)}
+
+    _measure(results, "file", "export_custom_json", custom_json, repeat, setup=clean)
+
+    for mode, export_func in MARKDOWN_MODES.items():
+        def run_export(export_func=export_func, mode=mode):
+            target = export_root / (f"{mode}.md" if mode == "single_file" else mode)
+            files = export_func(parsed_data, target, True, True)
+            return {"rows": message_count, "files": files, "bytes": _dir_size(export_root)}
+
+        _measure(results, "file", f"export_markdown_{mode}", run_export, repeat, setup=clean)
+
+    shutil.rmtree(export_root, ignore_errors=True)
+    return results
+
+
+def _pick_samples(backup: Dict) -> Dict:
+    """从数据集中挑选懒加载查询的示例参数（主题最多的助手、消息最多的主题）"""
+    data = backup["data"]
+    session_agent = {r["sessionId"]: r["agentId"] for r in data["agentsToSessions"]}
+    topics_per_agent = {}
+    for topic in data["topics"]:
+        agent_id = session_agent.get(topic.get("sessionId"))
+        if agent_id:
+            topics_per_agent[agent_id] = topics_per_agent.get(agent_id, 0) + 1
+    messages_per_topic = {}
+    for msg in data["messages"]:
+        if msg.get("topicId"):
+            messages_per_topic[msg["topicId"]] = messages_per_topic.get(msg["topicId"], 0) + 1
+    return {
+        "agent_id": max(topics_per_agent, key=topics_per_agent.get) if topics_per_agent else None,
+        "topic_id": max(messages_per_topic, key=messages_per_topic.get) if messages_per_topic else None,
+    }
+
+
+def run_db_benchmarks(db_config, spec: DatasetSpec, users: int = 1, load: bool = False,
+                      repeat: int = 1, keyword: str = "优化") -> List[Dict]:
+    """
+    数据库模式基准：写入数据、DatabaseParser.parse、对话树懒加载查询和搜索
+
+    Args:
+        db_config: DBConfig
+        spec: 数据集规模（用于写入数据和挑选示例参数）
+        users: 用户数
+        load: 是否先重建表并写入合成数据
+        repeat: 重复次数
+        keyword: 搜索关键词
+
+    Returns:
+        结果列表
+    """
+    from ..core.db_connector import PostgreSQLConnector
+    from ..core.db_parser import DatabaseParser
+
+    results = []
+    connector = PostgreSQLConnector(db_config)
+    if not connector.connect():
+        raise ConnectionError("无法连接数据库")
+
+    try:
+        user_ids = make_user_ids(max(1, users))
+        backups = {user_id: generate_backup(spec, user_id) for user_id in user_ids}
+
+        if load:
+            _measure(results, "db", "create_schema", lambda: create_schema(connector, drop=True))
+            for i, user_id in enumerate(user_ids):
+                _measure(results, "db", "load_backup", lambda: {
+                    "rows": load_backup(connector, backups[user_id], user_id,
+                                        email=f"bench{i + 1}@example.com")["messages"]
+                }, user=user_id)
+            connector.execute_command("ANALYZE")
+
+        user_id = user_ids[0]
+        message_count = len(backups[user_id]["data"]["messages"])
+        db_parser = DatabaseParser(connector)
+
+        _measure(results, "db", "db_parse",
+                 lambda: {"rows": db_parser.parse(user_id)["stats"]["messageCount"]}, repeat,
+                 expectedRows=message_count)
+
+        # 对话树懒加载（index_advisor 的典型查询与 db_tab 一致）
+        samples = _pick_samples(backups[user_id])
+        for query in CANONICAL_QUERIES:
+            if query.get("user_only"):
+                continue
+            params = []
+            if query["sample"]:
+                if not samples.get(query["sample"]):
+                    continue
+                params.append(samples[query["sample"]])
+            sql = query["sql"] + query["user_filter"] + query["order"]
+            params.append(user_id)
+            _measure(results, "db", f"tree:{query['name']}",
+                     lambda sql=sql, params=tuple(params): {"rows": len(connector.execute_query(sql, params))},
+                     repeat)
+
+        # 搜索（与 db_tab 的分页搜索一致，取第一页）
+        for scope, sql in SEARCH_QUERIES.items():
+            pattern = f"%{keyword}%"
+            params = [pattern, pattern] if scope == "agents" else [pattern]
+            full_sql = sql + " AND user_id = %s ORDER BY created_at DESC LIMIT %s OFFSET %s"
+            params.extend([user_id, 100, 0])
+            _measure(results, "db", f"search:{scope}",
+                     lambda full_sql=full_sql, params=tuple(params): {
+                         "rows": len(connector.execute_query(full_sql, params))
+                     }, repeat, keyword=keyword)
+
+        if connector.query_stats.enabled:
+            results.append({"group": "db", "name": "query_stats", "seconds": 0.0,
+                            "summary": connector.query_stats.get_summary(),
+                            "queries": connector.query_stats.get_stats()})
+    finally:
+        connector.disconnect()
+
+    return results
+
+
+def run_suite(spec: DatasetSpec, db_config=None, users: int = 1, load: bool = False,
+              repeat: int = 1, workdir: Optional[str] = None) -> Dict:
+    """
+    运行完整基准套件
+
+    Args:
+        spec: 数据集规模
+        db_config: DBConfig，None 表示跳过数据库基准
+        users: 数据库用户数
+        load: 是否写入合成数据
+        repeat: 重复次数
+        workdir: 工作目录（默认使用临时目录）
+
+    Returns:
+        机器可读的结果字典
+    """
+    temp_dir = None
+    if workdir is None:
+        temp_dir = tempfile.mkdtemp(prefix="lobechat_bench_")
+        workdir = temp_dir
+    workdir = Path(workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    started = time.perf_counter()
+    try:
+        results = run_file_benchmarks(spec, workdir, repeat)
+        if db_config is not None:
+            results.extend(run_db_benchmarks(db_config, spec, users, load, repeat))
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return {
+        "benchmark": "suite",
+        "version": VERSION,
+        "timestamp": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "spec": spec.to_dict(),
+        "repeat": repeat,
+        "database": db_config is not None,
+        "totalSeconds": time.perf_counter() - started,
+        "results": results,
+    }
+
+
+def main():
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description="LobeChat 数据导出工具基准套件")
+    arg_parser.add_argument("--preset", default="small", choices=list(SIZE_PRESETS), help="规模预设")
+    arg_parser.add_argument("--agents", type=int, help="助手数（覆盖预设）")
+    arg_parser.add_argument("--messages-per-topic", type=int, help="每个主题的平均消息数（覆盖预设）")
+    arg_parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="重复次数（取最短耗时）")
+    arg_parser.add_argument("--output", default="bench_results.json", help="结果 JSON 路径")
+    arg_parser.add_argument("--workdir", help="工作目录（默认临时目录）")
+    arg_parser.add_argument("--pg-host", default="localhost", help="PostgreSQL 主机")
+    arg_parser.add_argument("--pg-port", type=int, default=5432, help="PostgreSQL 端口")
+    arg_parser.add_argument("--pg-database", help="PostgreSQL 数据库（指定后运行数据库基准）")
+    arg_parser.add_argument("--pg-user", default="postgres", help="PostgreSQL 用户")
+    arg_parser.add_argument("--load", action="store_true", help="重建表并写入合成数据（会删除已有的表）")
+    arg_parser.add_argument("--users", type=int, default=1, help="写入的用户数")
+    args = arg_parser.parse_args()
+
+    spec = DatasetSpec.from_preset(args.preset, agents=args.agents,
+                                   messages_per_topic=args.messages_per_topic, seed=args.seed)
+
+    db_config = None
+    if args.pg_database:
+        from ..core.db_connector import DBConfig
+        db_config = DBConfig(host=args.pg_host, port=args.pg_port, database=args.pg_database,
+                             user=args.pg_user, password=os.environ.get("PGPASSWORD", ""))
+
+    report = run_suite(spec, db_config, args.users, args.load, args.repeat, args.workdir)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+    print(f"结果已写入: {args.output}（总耗时 {report['totalSeconds']:.1f} 秒）")
+
+
+if __name__ == "__main__":
+    main()
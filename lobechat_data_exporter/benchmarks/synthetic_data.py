@@ -0,0 +1,624 @@
+"""
+合成 LobeChat 数据集
+按可配置规模生成逼真的 LobeChat 备份数据（助手、会话、主题、带元数据/推理的消息，
+以及默认对话、孤立主题等 LobeChatParser.build_agent_groups 处理的边界情况），
+并可把同一份数据写入本地 PostgreSQL，表结构与 core/db_connector.py 的查询一致
+
+运行方式:
+    python -m lobechat_data_exporter.benchmarks.synthetic_data --preset medium --output bench.json
+    python -m lobechat_data_exporter.benchmarks.synthetic_data --preset small --users 3 \\
+        --pg-database lobechat_bench --pg-user postgres
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from ..core.row_converter import snake_to_camel
+
+
+# 规模预设（每个用户）
+SIZE_PRESETS = {
+    "tiny": {"agents": 3, "sessions_per_agent": 2, "topics_per_session": 5, "messages_per_topic": 10},
+    "small": {"agents": 10, "sessions_per_agent": 3, "topics_per_session": 10, "messages_per_topic": 20},
+    "medium": {"agents": 30, "sessions_per_agent": 4, "topics_per_session": 25, "messages_per_topic": 30},
+    "large": {"agents": 80, "sessions_per_agent": 5, "topics_per_session": 40, "messages_per_topic": 40},
+}
+
+# 与 LobeChat 数据库一致的表结构（列名, 类型）；备份 JSON 的键名为列名的驼峰形式
+TABLE_SCHEMAS = {
+    "users": [
+        ("id", "text PRIMARY KEY"), ("username", "text"), ("email", "text"), ("full_name", "text"),
+        ("created_at", "timestamptz"), ("updated_at", "timestamptz"),
+    ],
+    "user_settings": [
+        ("id", "text PRIMARY KEY"), ("general", "jsonb"), ("language_model", "jsonb"),
+        ("system_agent", "jsonb"), ("default_agent", "jsonb"), ("tool", "jsonb"),
+    ],
+    "ai_providers": [
+        ("id", "varchar(64)"), ("name", "text"), ("enabled", "boolean"), ("sort", "integer"),
+        ("key_vaults", "text"), ("settings", "jsonb"), ("config", "jsonb"), ("user_id", "text"),
+        ("created_at", "timestamptz"), ("updated_at", "timestamptz"),
+    ],
+    "ai_models": [
+        ("id", "varchar(150)"), ("display_name", "varchar(200)"), ("provider_id", "varchar(64)"),
+        ("type", "varchar(20)"), ("enabled", "boolean"), ("sort", "integer"),
+        ("context_window_tokens", "integer"), ("pricing", "jsonb"), ("parameters", "jsonb"),
+        ("abilities", "jsonb"), ("user_id", "text"),
+        ("created_at", "timestamptz"), ("updated_at", "timestamptz"),
+    ],
+    "agents": [
+        ("id", "text PRIMARY KEY"), ("slug", "varchar(100)"), ("title", "varchar(255)"),
+        ("description", "varchar(1000)"), ("tags", "jsonb"), ("avatar", "text"),
+        ("background_color", "text"), ("plugins", "jsonb"), ("client_id", "text"),
+        ("chat_config", "jsonb"), ("few_shots", "jsonb"), ("model", "text"), ("params", "jsonb"),
+        ("provider", "text"), ("system_role", "text"), ("tts", "jsonb"), ("virtual", "boolean"),
+        ("opening_message", "text"), ("opening_questions", "jsonb"), ("user_id", "text"),
+        ("accessed_at", "timestamptz"), ("created_at", "timestamptz"), ("updated_at", "timestamptz"),
+    ],
+    "session_groups": [
+        ("id", "text PRIMARY KEY"), ("name", "text"), ("sort", "integer"), ("client_id", "text"),
+        ("user_id", "text"), ("created_at", "timestamptz"), ("updated_at", "timestamptz"),
+    ],
+    "sessions": [
+        ("id", "text PRIMARY KEY"), ("slug", "varchar(100)"), ("title", "text"), ("description", "text"),
+        ("avatar", "text"), ("background_color", "text"), ("type", "text"), ("group_id", "text"),
+        ("client_id", "text"), ("pinned", "boolean"), ("user_id", "text"),
+        ("accessed_at", "timestamptz"), ("created_at", "timestamptz"), ("updated_at", "timestamptz"),
+    ],
+    "agents_to_sessions": [
+        ("agent_id", "text"), ("session_id", "text"), ("user_id", "text"),
+    ],
+    "topics": [
+        ("id", "text PRIMARY KEY"), ("title", "text"), ("favorite", "boolean"), ("session_id", "text"),
+        ("group_id", "text"), ("client_id", "text"), ("history_summary", "text"), ("metadata", "jsonb"),
+        ("user_id", "text"),
+        ("accessed_at", "timestamptz"), ("created_at", "timestamptz"), ("updated_at", "timestamptz"),
+    ],
+    "messages": [
+        ("id", "text PRIMARY KEY"), ("role", "varchar(255)"), ("content", "text"), ("reasoning", "jsonb"),
+        ("search", "jsonb"), ("metadata", "jsonb"), ("model", "text"), ("provider", "text"),
+        ("favorite", "boolean"), ("error", "jsonb"), ("tools", "jsonb"), ("trace_id", "text"),
+        ("observation_id", "text"), ("client_id", "text"), ("user_id", "text"), ("session_id", "text"),
+        ("topic_id", "text"), ("thread_id", "text"), ("parent_id", "text"), ("quota_id", "text"),
+        ("agent_id", "text"), ("group_id", "text"), ("target_id", "text"), ("message_group_id", "text"),
+        ("accessed_at", "timestamptz"), ("created_at", "timestamptz"), ("updated_at", "timestamptz"),
+    ],
+    "message_plugins": [
+        ("id", "text PRIMARY KEY"), ("tool_call_id", "text"), ("type", "text"), ("api_name", "text"),
+        ("arguments", "text"), ("identifier", "text"), ("state", "jsonb"), ("error", "jsonb"),
+        ("client_id", "text"), ("user_id", "text"),
+    ],
+    "message_translates": [
+        ("id", "text PRIMARY KEY"), ("content", "text"), ("from", "text"), ("to", "text"),
+        ("client_id", "text"), ("user_id", "text"),
+    ],
+    "threads": [
+        ("id", "text PRIMARY KEY"), ("title", "text"), ("type", "text"), ("status", "text"),
+        ("topic_id", "text"), ("source_message_id", "text"), ("parent_thread_id", "text"),
+        ("client_id", "text"), ("user_id", "text"), ("last_active_at", "timestamptz"),
+        ("created_at", "timestamptz"), ("updated_at", "timestamptz"),
+    ],
+    "user_installed_plugins": [
+        ("user_id", "text"), ("identifier", "text"), ("type", "text"), ("manifest", "jsonb"),
+        ("settings", "jsonb"), ("custom_params", "jsonb"),
+        ("created_at", "timestamptz"), ("updated_at", "timestamptz"),
+    ],
+}
+
+# 数据库表名 → 备份 JSON 中 data 的键名
+TABLE_DATA_KEYS = {
+    "user_settings": "userSettings",
+    "ai_providers": "aiProviders",
+    "ai_models": "aiModels",
+    "agents": "agents",
+    "session_groups": "sessionGroups",
+    "sessions": "sessions",
+    "agents_to_sessions": "agentsToSessions",
+    "topics": "topics",
+    "messages": "messages",
+    "message_plugins": "messagePlugins",
+    "message_translates": "messageTranslates",
+    "threads": "threads",
+    "user_installed_plugins": "userInstalledPlugins",
+}
+
+# 与 db_tab / index_advisor 查询对应的索引（LobeChat 迁移中已有的索引）
+TABLE_INDEXES = [
+    ("messages", ("topic_id", "created_at")),
+    ("messages", ("session_id",)),
+    ("messages", ("user_id", "created_at")),
+    ("topics", ("session_id", "created_at")),
+    ("topics", ("user_id", "created_at")),
+    ("agents", ("user_id", "created_at")),
+    ("sessions", ("user_id",)),
+    ("agents_to_sessions", ("agent_id", "session_id")),
+    ("agents_to_sessions", ("session_id",)),
+]
+
+_AGENT_TITLES = [
+    "翻译助手", "代码审查", "写作教练", "产品经理", "SQL 专家", "英语老师", "旅行规划",
+    "健身教练", "法律顾问", "数据分析师", "Python 导师", "周报生成器", "面试官", "小红书文案",
+]
+_TOPIC_TITLES = [
+    "如何优化数据库查询", "周末去哪儿玩", "解释一下这段代码", "帮我润色这封邮件", "论文摘要",
+    "年度总结", "Rust 所有权", "学习计划", "Docker 部署问题", "读书笔记", "正则表达式",
+    "React 性能优化", "英语作文批改", "旅行预算", "产品需求评审",
+]
+_SENTENCES = [
+    "这是一个很好的问题，我们可以从几个方面来分析。",
+    "首先需要明确目标和约束条件。",
+    "The key idea is to avoid repeated work by caching intermediate results.",
+    "在大多数情况下，默认配置已经足够使用。",
+    "如果数据量很大，建议分批处理并记录进度。",
+    "Let me walk through the trade-offs step by step.",
+    "你可以先尝试最简单的方案，再根据结果逐步调整。",
+    "需要注意的是，这种做法在并发场景下可能存在问题。",
+    "总结一下：保持简单，测量之后再优化。",
+    "下面给出一个完整的示例。",
+]
+_CODE_BLOCKS = [
+    "```python\ndef fib(n):\n    a, b = 0, 1\n    for _ in range(n):\n        a, b = b, a + b\n    return a\n```",
+    "```sql\nSELECT id, title FROM topics WHERE session_id = $1 ORDER BY created_at DESC;\n```",
+    "```bash\ndocker compose up -d && docker compose logs -f\n```",
+]
+_MODELS = [
+    ("openai", "gpt-4o", 128000), ("openai", "gpt-4o-mini", 128000),
+    ("anthropic", "claude-3-5-sonnet", 200000), ("deepseek", "deepseek-reasoner", 64000),
+]
+
+
+@dataclass
+class DatasetSpec:
+    """合成数据集规模（每个用户）"""
+    agents: int = 10
+    sessions_per_agent: int = 3
+    topics_per_session: int = 10
+    messages_per_topic: int = 20
+    default_session_ratio: float = 0.3  # 含默认对话（topicId 为空的消息）的会话比例
+    orphan_topics: int = 5              # 没有 sessionId 的孤立主题数
+    reasoning_ratio: float = 0.2        # 带推理过程的助手消息比例
+    tool_ratio: float = 0.05            # 带工具调用的助手消息比例
+    seed: int = 42
+
+    @classmethod
+    def from_preset(cls, name: str, **overrides) -> 'DatasetSpec':
+        """从预设创建规模定义"""
+        if name not in SIZE_PRESETS:
+            raise ValueError(f"未知的规模预设: {name}（可选: {', '.join(SIZE_PRESETS)}）")
+        values = dict(SIZE_PRESETS[name])
+        values["orphan_topics"] = max(2, values["topics_per_session"] // 2)
+        values.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**values)
+
+    def to_dict(self) -> Dict:
+        """转换为字典"""
+        return asdict(self)
+
+
+def _iso(dt: datetime) -> str:
+    """ISO 8601 时间（与 LobeChat 备份格式一致）"""
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+
+class _Generator:
+    """按规模生成单个用户的备份数据"""
+
+    def __init__(self, spec: DatasetSpec, user_id: str):
+        self.spec = spec
+        self.user_id = user_id
+        # 种子与用户相关，多个用户的数据不同但可复现
+        seed_text = f"{spec.seed}:{user_id}"
+        self.rng = random.Random(int(hashlib.md5(seed_text.encode()).hexdigest()[:12], 16))
+        self.tag = hashlib.md5(user_id.encode()).hexdigest()[:6]
+        self.clock = datetime(2024, 6, 1, 8, 0, tzinfo=timezone.utc)
+        self.counters = {}
+
+    def _id(self, prefix: str) -> str:
+        """生成带前缀的唯一ID"""
+        n = self.counters.get(prefix, 0) + 1
+        self.counters[prefix] = n
+        return f"{prefix}_{self.tag}{n:07d}"
+
+    def _tick(self, min_seconds: int = 5, max_seconds: int = 600) -> str:
+        """推进时钟并返回时间"""
+        self.clock += timedelta(seconds=self.rng.randint(min_seconds, max_seconds),
+                                milliseconds=self.rng.randint(0, 999))
+        return _iso(self.clock)
+
+    def _paragraphs(self, min_count: int, max_count: int) -> str:
+        """生成若干段文本，偶尔夹带列表和代码块"""
+        rng = self.rng
+        parts = []
+        for _ in range(rng.randint(min_count, max_count)):
+            roll = rng.random()
+            if roll < 0.1:
+                parts.append(rng.choice(_CODE_BLOCKS))
+            elif roll < 0.2:
+                parts.append("\n".join(f"{i + 1}. {rng.choice(_SENTENCES)}" for i in range(rng.randint(2, 5))))
+            else:
+                parts.append("".join(rng.choice(_SENTENCES) for _ in range(rng.randint(1, 4))))
+        return "\n\n".join(parts)
+
+    def _timestamps(self, created: str) -> Dict:
+        """创建/更新/访问时间"""
+        return {"accessedAt": created, "createdAt": created, "updatedAt": created}
+
+    def user_settings(self) -> List[Dict]:
+        return [{
+            "id": self.user_id,
+            "general": {"fontSize": 14, "themeMode": "auto"},
+            "languageModel": {"openai": {"enabled": True}},
+            "systemAgent": {"topic": {"model": "gpt-4o-mini", "provider": "openai"}},
+            "defaultAgent": {"config": {"model": "gpt-4o", "provider": "openai"}},
+            "tool": None,
+        }]
+
+    def providers_and_models(self):
+        providers = []
+        models = []
+        created = self._tick()
+        for sort, provider in enumerate(sorted({p for p, _, _ in _MODELS})):
+            providers.append({
+                "id": provider, "name": provider.title(), "enabled": True, "sort": sort,
+                "keyVaults": None, "settings": {}, "config": {"enableResponseApi": False},
+                "userId": self.user_id, "createdAt": created, "updatedAt": created,
+            })
+        for sort, (provider, model, window) in enumerate(_MODELS):
+            models.append({
+                "id": model, "displayName": model.upper(), "providerId": provider, "type": "chat",
+                "enabled": True, "sort": sort, "contextWindowTokens": window,
+                "pricing": {"input": 2.5, "output": 10}, "parameters": {},
+                "abilities": {"functionCall": True, "reasoning": "reasoner" in model},
+                "userId": self.user_id, "createdAt": created, "updatedAt": created,
+            })
+        return providers, models
+
+    def agent(self, index: int) -> Dict:
+        rng = self.rng
+        created = self._tick(60, 86400)
+        provider, model, _ = rng.choice(_MODELS)
+        if index == 0:
+            # 默认助手：没有 title（build_agent_groups 把孤立主题挂到这里）
+            title, slug = None, "inbox"
+        elif index == 1:
+            # 随机 slug 助手（DatabaseParser.AGENT_NAME_MAPPING 会替换名称）
+            title, slug = None, "buffalo-under-own-plane"
+        else:
+            title = _AGENT_TITLES[(index - 2) % len(_AGENT_TITLES)]
+            if index - 2 >= len(_AGENT_TITLES):
+                title = f"{title} {index}"
+            slug = f"agent-{index}"
+        return {
+            "id": self._id("agt"), "slug": slug, "title": title,
+            "description": self._paragraphs(1, 1)[:200] if title else None,
+            "tags": rng.sample(["写作", "编程", "学习", "工作", "生活"], 2),
+            "avatar": rng.choice(["🤖", "📝", "🧑‍💻", "🌍", None]), "backgroundColor": None,
+            "plugins": [], "clientId": None,
+            "chatConfig": {
+                "searchMode": "off", "displayMode": "chat", "historyCount": 20,
+                "enableReasoning": "reasoner" in model, "enableStreaming": True,
+                "enableHistoryCount": True, "enableAutoCreateTopic": True,
+                "enableCompressHistory": True, "autoCreateTopicThreshold": 2,
+            },
+            "fewShots": None, "model": model,
+            "params": {"top_p": 1, "temperature": round(rng.uniform(0.2, 1.2), 2),
+                       "presence_penalty": 0, "frequency_penalty": 0},
+            "provider": provider,
+            "systemRole": self._paragraphs(1, 6) if title else "",
+            "tts": {"voice": {"openai": "alloy"}, "sttLocale": "auto", "ttsService": "openai"},
+            "virtual": False, "openingMessage": None, "openingQuestions": [],
+            "userId": self.user_id, **self._timestamps(created),
+        }
+
+    def session(self, group_id: Optional[str]) -> Dict:
+        created = self._tick(60, 3600)
+        session_id = self._id("ssn")
+        return {
+            "id": session_id, "slug": session_id.replace("ssn_", "session-"),
+            "title": None, "description": None, "avatar": None, "backgroundColor": None,
+            "type": "agent", "groupId": group_id, "clientId": None,
+            "pinned": self.rng.random() < 0.1, "userId": self.user_id, **self._timestamps(created),
+        }
+
+    def topic(self, session_id: Optional[str]) -> Dict:
+        rng = self.rng
+        created = self._tick(60, 7200)
+        title = rng.choice(_TOPIC_TITLES) if rng.random() > 0.05 else None  # 少量无标题主题
+        return {
+            "id": self._id("tpc"), "title": title, "favorite": rng.random() < 0.1,
+            "sessionId": session_id, "groupId": None, "clientId": None,
+            "historySummary": self._paragraphs(1, 2) if rng.random() < 0.1 else None,
+            "metadata": {"model": rng.choice(_MODELS)[1]} if rng.random() < 0.3 else None,
+            "userId": self.user_id, **self._timestamps(created),
+        }
+
+    def messages(self, count: int, session_id: Optional[str], topic_id: Optional[str],
+                 agent: Optional[Dict]) -> List[Dict]:
+        """生成一段对话：用户/助手交替，偶尔带推理、搜索、工具调用和错误"""
+        rng = self.rng
+        spec = self.spec
+        messages = []
+        parent_id = None
+        provider = agent.get("provider") if agent else "openai"
+        model = agent.get("model") if agent else "gpt-4o"
+        while len(messages) < count:
+            role = "user" if len(messages) % 2 == 0 else "assistant"
+            created = self._tick(3, 300)
+            msg = {
+                "id": self._id("msg"), "role": role, "content": None,
+                "reasoning": None, "search": None, "metadata": None,
+                "model": None, "provider": None, "favorite": False, "error": None, "tools": None,
+                "traceId": None, "observationId": None, "clientId": None, "userId": self.user_id,
+                "sessionId": session_id, "topicId": topic_id, "threadId": None,
+                "parentId": parent_id, "quotaId": None, "agentId": None, "groupId": None,
+                "targetId": None, "messageGroupId": None, **self._timestamps(created),
+            }
+            if role == "user":
+                msg["content"] = self._paragraphs(1, 2)
+            else:
+                msg["content"] = self._paragraphs(1, 8)
+                msg["model"] = model
+                msg["provider"] = provider
+                output_tokens = len(msg["content"]) // 2
+                input_tokens = rng.randint(20, 4000)
+                msg["metadata"] = {
+                    "tps": round(rng.uniform(20, 120), 2), "cost": round(output_tokens * 1e-5, 6),
+                    "ttft": rng.randint(200, 5000), "latency": rng.randint(500, 20000),
+                    "duration": rng.randint(300, 15000), "totalTokens": input_tokens + output_tokens,
+                    "inputTextTokens": input_tokens, "outputTextTokens": output_tokens,
+                    "totalInputTokens": input_tokens, "totalOutputTokens": output_tokens,
+                }
+                if rng.random() < spec.reasoning_ratio:
+                    msg["reasoning"] = {"content": self._paragraphs(1, 4), "duration": rng.randint(1000, 30000)}
+                if rng.random() < 0.05:
+                    msg["search"] = {"citations": [
+                        {"title": rng.choice(_TOPIC_TITLES), "url": f"https://example.com/{rng.randint(1, 9999)}"}
+                        for _ in range(rng.randint(1, 3))
+                    ]}
+                if rng.random() < 0.01:
+                    msg["error"] = {"type": "ProviderBizError", "message": "rate limit exceeded"}
+                if rng.random() < spec.tool_ratio and len(messages) + 1 < count:
+                    call_id = f"call_{self._id('tool')}"
+                    msg["tools"] = [{
+                        "id": call_id, "type": "default", "apiName": "search",
+                        "arguments": json.dumps({"query": rng.choice(_TOPIC_TITLES)}, ensure_ascii=False),
+                        "identifier": "lobe-web-browsing",
+                    }]
+                    messages.append(msg)
+                    parent_id = msg["id"]
+                    tool_created = self._tick(1, 10)
+                    msg = dict(msg, **{
+                        "id": self._id("msg"), "role": "tool", "content": self._paragraphs(1, 2),
+                        "reasoning": None, "search": None, "metadata": None, "tools": None,
+                        "error": None, "parentId": parent_id, **self._timestamps(tool_created),
+                    })
+            messages.append(msg)
+            parent_id = msg["id"]
+        return messages[:count]
+
+    def build(self) -> Dict:
+        """生成完整的备份数据"""
+        spec = self.spec
+        rng = self.rng
+        providers, models = self.providers_and_models()
+        session_groups = []
+        for i, name in enumerate(["工作", "学习"]):
+            created = self._tick()
+            session_groups.append({
+                "id": self._id("sg"), "name": name, "sort": i, "clientId": None,
+                "userId": self.user_id, "createdAt": created, "updatedAt": created,
+            })
+
+        agents, sessions, relations, topics, messages = [], [], [], [], []
+        for a in range(max(1, spec.agents)):
+            agent = self.agent(a)
+            agents.append(agent)
+            for _ in range(spec.sessions_per_agent):
+                group_id = rng.choice([None, None, session_groups[0]["id"], session_groups[1]["id"]])
+                session = self.session(group_id)
+                sessions.append(session)
+                relations.append({"agentId": agent["id"], "sessionId": session["id"], "userId": self.user_id})
+
+                # 默认对话：topicId 为空、sessionId 不为空的消息
+                if rng.random() < spec.default_session_ratio:
+                    messages.extend(self.messages(spec.messages_per_topic, session["id"], None, agent))
+
+                for _ in range(spec.topics_per_session):
+                    topic = self.topic(session["id"])
+                    topics.append(topic)
+                    # 消息数在平均值附近浮动
+                    count = max(1, int(rng.gauss(spec.messages_per_topic, spec.messages_per_topic * 0.3)))
+                    messages.extend(self.messages(count, session["id"], topic["id"], agent))
+
+        # 孤立主题：没有 sessionId（如"随便聊聊"）
+        for _ in range(spec.orphan_topics):
+            topic = self.topic(None)
+            topics.append(topic)
+            messages.extend(self.messages(spec.messages_per_topic, None, topic["id"], agents[0]))
+
+        return {
+            "mode": "postgres",
+            "schemaHash": hashlib.md5(json.dumps(sorted(TABLE_SCHEMAS)).encode()).hexdigest(),
+            "data": {
+                "userSettings": self.user_settings(),
+                "aiProviders": providers,
+                "aiModels": models,
+                "agents": agents,
+                "sessionGroups": session_groups,
+                "sessions": sessions,
+                "agentsToSessions": relations,
+                "topics": topics,
+                "messages": messages,
+                "messagePlugins": [],
+                "messageTranslates": [],
+                "threads": [],
+                "userInstalledPlugins": [],
+            },
+        }
+
+
+def generate_backup(spec: DatasetSpec, user_id: str = "00000000-0000-4000-8000-000000000001") -> Dict:
+    """
+    生成单个用户的 LobeChat 备份数据
+
+    Args:
+        spec: 数据集规模
+        user_id: 用户ID（影响生成的ID和随机种子，多个用户的数据互不冲突）
+
+    Returns:
+        与 LobeChat 导出格式一致的备份字典
+    """
+    return _Generator(spec, user_id).build()
+
+
+def make_user_ids(count: int) -> List[str]:
+    """生成确定的用户ID列表（UUID 格式）"""
+    return [f"00000000-0000-4000-8000-{i + 1:012d}" for i in range(count)]
+
+
+def write_backup(backup: Dict, path: str):
+    """写入备份 JSON 文件"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(backup, f, ensure_ascii=False)
+
+
+# ==================== PostgreSQL ====================
+
+def _quote(name: str) -> str:
+    """引用标识符（from / to 等列名是保留字）"""
+    return f'"{name}"'
+
+
+def create_schema(connector, drop: bool = False):
+    """
+    在数据库中创建与 LobeChat 一致的表结构和索引
+
+    Args:
+        connector: 已连接的 PostgreSQLConnector
+        drop: 是否先删除已有的表（会清空数据）
+    """
+    for table, columns in TABLE_SCHEMAS.items():
+        if drop:
+            connector.execute_command(f"DROP TABLE IF EXISTS {_quote(table)}")
+        column_sql = ", ".join(f"{_quote(name)} {col_type}" for name, col_type in columns)
+        connector.execute_command(f"CREATE TABLE IF NOT EXISTS {_quote(table)} ({column_sql})")
+    for table, columns in TABLE_INDEXES:
+        name = f"bench_{table}_{'_'.join(columns)}_idx"
+        connector.execute_command(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {_quote(table)} ({', '.join(columns)})"
+        )
+
+
+def load_backup(connector, backup: Dict, user_id: str, email: Optional[str] = None,
+                batch_size: int = 1000) -> Dict[str, int]:
+    """
+    把备份数据写入数据库（表结构需已创建）
+
+    Args:
+        connector: 已连接的 PostgreSQLConnector
+        backup: generate_backup() 的结果
+        user_id: 用户ID
+        email: 用户邮箱
+        batch_size: 每批插入的行数
+
+    Returns:
+        {表名: 插入行数}
+    """
+    psycopg2 = connector._import_psycopg2()
+    from psycopg2.extras import execute_values, Json
+
+    data = backup["data"]
+    now = _iso(datetime.now(timezone.utc))
+    tables = {"users": [{"id": user_id, "username": email or user_id, "email": email,
+                         "fullName": None, "createdAt": now, "updatedAt": now}]}
+    for table, key in TABLE_DATA_KEYS.items():
+        tables[table] = data.get(key, [])
+
+    counts = {}
+    connection = connector.connection
+    try:
+        with connection.cursor() as cursor:
+            for table, rows in tables.items():
+                columns = TABLE_SCHEMAS[table]
+                json_columns = {name for name, col_type in columns if col_type.startswith("jsonb")}
+                keys = [(name, snake_to_camel(name)) for name, _ in columns]
+                sql = (f"INSERT INTO {_quote(table)} ({', '.join(_quote(name) for name, _ in columns)}) "
+                       f"VALUES %s ON CONFLICT DO NOTHING")
+                for start in range(0, len(rows), batch_size):
+                    values = []
+                    for row in rows[start:start + batch_size]:
+                        record = []
+                        for name, key in keys:
+                            value = row.get(key)
+                            if name == "user_id" and value is None:
+                                value = user_id
+                            if name in json_columns and value is not None:
+                                value = Json(value)
+                            record.append(value)
+                        values.append(tuple(record))
+                    execute_values(cursor, sql, values, page_size=batch_size)
+                counts[table] = len(rows)
+        connection.commit()
+    except psycopg2.Error:
+        connection.rollback()
+        raise
+    return counts
+
+
+def main():
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description="生成合成 LobeChat 数据集")
+    arg_parser.add_argument("--preset", default="small", choices=list(SIZE_PRESETS), help="规模预设")
+    arg_parser.add_argument("--agents", type=int, help="助手数（覆盖预设）")
+    arg_parser.add_argument("--topics-per-session", type=int, help="每个会话的主题数（覆盖预设）")
+    arg_parser.add_argument("--messages-per-topic", type=int, help="每个主题的平均消息数（覆盖预设）")
+    arg_parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    arg_parser.add_argument("--users", type=int, default=1, help="用户数（写入数据库时使用）")
+    arg_parser.add_argument("--output", help="备份 JSON 输出路径（只写第一个用户）")
+    arg_parser.add_argument("--pg-host", default="localhost", help="PostgreSQL 主机")
+    arg_parser.add_argument("--pg-port", type=int, default=5432, help="PostgreSQL 端口")
+    arg_parser.add_argument("--pg-database", help="PostgreSQL 数据库（指定后写入数据库）")
+    arg_parser.add_argument("--pg-user", default="postgres", help="PostgreSQL 用户")
+    arg_parser.add_argument("--drop", action="store_true", help="写入前删除已有的表")
+    args = arg_parser.parse_args()
+
+    spec = DatasetSpec.from_preset(
+        args.preset, agents=args.agents, topics_per_session=args.topics_per_session,
+        messages_per_topic=args.messages_per_topic, seed=args.seed
+    )
+    user_ids = make_user_ids(max(1, args.users))
+
+    backups = [generate_backup(spec, user_id) for user_id in user_ids]
+    for user_id, backup in zip(user_ids, backups):
+        data = backup["data"]
+        print(f"{user_id}: {len(data['agents'])}助手, {len(data['sessions'])}会话, "
+              f"{len(data['topics'])}主题, {len(data['messages'])}消息")
+
+    if args.output:
+        write_backup(backups[0], args.output)
+        print(f"已写入: {args.output}")
+
+    if args.pg_database:
+        from ..core.db_connector import DBConfig, PostgreSQLConnector
+        config = DBConfig(host=args.pg_host, port=args.pg_port, database=args.pg_database,
+                          user=args.pg_user, password=os.environ.get("PGPASSWORD", ""))
+        connector = PostgreSQLConnector(config, log_callback=lambda m, level: print(f"[{level}] {m}"))
+        if not connector.connect():
+            raise SystemExit(1)
+        try:
+            create_schema(connector, drop=args.drop)
+            for i, (user_id, backup) in enumerate(zip(user_ids, backups)):
+                counts = load_backup(connector, backup, user_id, email=f"bench{i + 1}@example.com")
+                print(f"{user_id}: 已写入 {counts['messages']} 条消息")
+        finally:
+            connector.disconnect()
+
+
+if __name__ == "__main__":
+    main()
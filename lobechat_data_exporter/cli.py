@@ -0,0 +1,420 @@
+"""
+命令行导出（无界面）
+不导入 tkinter / ttkbootstrap，可在没有显示器的服务器上由 cron 定时运行：
+从备份文件（JSON / JSON Lines / SQLite）或 PostgreSQL 数据库读取数据，按参数执行任意导出模式
+
+运行方式:
+    python -m lobechat_data_exporter.cli backup.json -f md-topics -f json -o exports/
+    PGPASSWORD=... python -m lobechat_data_exporter.cli --pg-database lobechat --user-id USER \\
+        -f ndjson -f sqlite -o /backup/lobechat
+    PGPASSWORD=... python -m lobechat_data_exporter.cli --pg-database lobechat --all-users \\
+        -f json -f md-topics -o /backup/lobechat
+
+退出码: 0 成功，1 失败，2 参数错误，130 已取消（Ctrl+C / SIGTERM，再次发送时立即中断）
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .config import VERSION, LONG_OPERATION_STATEMENT_TIMEOUT_MS, MULTI_USER_EXPORT_WORKERS
+from .core.cancellation import CancelToken, OperationCancelled
+from .core.db_connector import DBConfig, PostgreSQLConnector
+from .core.db_parser import DatabaseParser
+from .core.export_progress import (
+    ExportProgress, ProgressWriter, activate, record_file, format_bytes, format_duration
+)
+from .core.ndjson_reader import is_ndjson_file, load_ndjson
+from .core.parser import LobeChatParser
+from .core.sqlite_source import is_sqlite_file, load_sqlite
+from .exporters.archive_writer import ARCHIVE_FORMATS, archive_path_for
+from .exporters.json_exporter import JSONExporter
+from .exporters.markdown_writer import (
+    export_markdown_single_file, export_markdown_agent_files,
+    export_markdown_directory, export_markdown_message_files
+)
+from .exporters.ndjson_writer import export_ndjson
+from .exporters.parquet_writer import export_parquet
+from .exporters.sqlite_writer import export_sqlite
+from .utils.file_utils import safe_filename
+
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_CANCELLED = 130
+
+# 导出格式 → 说明（输出名与界面导出的默认名称一致，{name} 为数据源名称）
+EXPORT_FORMATS = {
+    "md-single": "全部对话合并为一个Markdown文件: {name}_all.md",
+    "md-agents": "每个助手一个Markdown文件: {name}_agents/助手.md",
+    "md-topics": "每个主题一个Markdown文件: {name}_markdown/助手/主题.md",
+    "md-messages": "每个对话一个Markdown文件: {name}_messages/助手/主题/对话.md",
+    "json": "自定义JSON（--modules 选择模块）: {name}_custom.json",
+    "ndjson": "JSON Lines: {name}_export.jsonl",
+    "parquet": "消息/主题/助手的Parquet文件: {name}_parquet/",
+    "sqlite": "带全文索引的SQLite文件: {name}.sqlite",
+}
+
+# Markdown 导出模式 → (导出函数, 输出名后缀)
+MARKDOWN_MODES = {
+    "md-single": (export_markdown_single_file, "_all.md"),
+    "md-agents": (export_markdown_agent_files, "_agents"),
+    "md-topics": (export_markdown_directory, "_markdown"),
+    "md-messages": (export_markdown_message_files, "_messages"),
+}
+
+# 多用户导出（MultiUserExporter）支持的格式
+MULTI_USER_FORMATS = {
+    "json": "json", "ndjson": "ndjson", "parquet": "parquet", "sqlite": "sqlite", "md-topics": "markdown",
+}
+
+# 日志级别 → 显示优先级
+LOG_LEVELS = {"DEBUG": 0, "INFO": 1, "SUCCESS": 1, "WARNING": 2, "ERROR": 3}
+
+
+def make_logger(quiet: bool = False, verbose: bool = False) -> Callable:
+    """
+    创建输出到标准错误的日志回调（标准输出留给 --list-users 等结果）
+
+    Args:
+        quiet: 只输出警告和错误
+        verbose: 同时输出 DEBUG 日志
+
+    Returns:
+        日志回调函数 log(message, level)
+    """
+    min_level = LOG_LEVELS["WARNING"] if quiet else (LOG_LEVELS["DEBUG"] if verbose else LOG_LEVELS["INFO"])
+
+    def log(message: str, level: str = "INFO"):
+        if LOG_LEVELS.get(level, 1) < min_level:
+            return
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        print(f"[{timestamp}] [{level}] {message}", file=sys.stderr, flush=True)
+
+    return log
+
+
+def install_signal_handlers(cancel_token: CancelToken, log: Callable):
+    """Ctrl+C / SIGTERM 取消导出（在下一次写文件或查询时停止），再次收到信号时立即中断"""
+    def handle(signum, frame):
+        if cancel_token.is_cancelled:
+            raise KeyboardInterrupt
+        log("收到中断信号，正在取消导出（再次发送将立即中断）...", "WARNING")
+        cancel_token.cancel()
+
+    signal.signal(signal.SIGINT, handle)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, handle)
+
+
+# ==================== 数据源 ====================
+
+def load_backup(file_path: str, log: Callable) -> Dict:
+    """读取并解析备份文件（JSON / JSON Lines / SQLite，与界面的文件解析相同）"""
+    log(f"开始解析文件: {os.path.basename(file_path)}", "INFO")
+    if is_ndjson_file(file_path):
+        # JSON Lines 导出（分卷时自动读取同组全部分卷）
+        raw_data = load_ndjson(file_path)
+    elif is_sqlite_file(file_path):
+        raw_data = load_sqlite(file_path)
+    else:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            raw_data = json.load(f)
+    return LobeChatParser(log_callback=log).parse(raw_data, file_path)
+
+
+def db_config_from_args(args) -> DBConfig:
+    """命令行参数 → 数据库配置（密码从 PGPASSWORD 环境变量读取，不出现在进程列表中）"""
+    return DBConfig(host=args.pg_host, port=args.pg_port, database=args.pg_database,
+                    user=args.pg_user, password=os.environ.get("PGPASSWORD", ""), ssl=args.pg_ssl)
+
+
+def connect_database(args, log: Callable) -> PostgreSQLConnector:
+    """连接数据库，失败时抛出 ConnectionError"""
+    connector = PostgreSQLConnector(db_config_from_args(args), log_callback=log)
+    if not connector.connect():
+        raise ConnectionError(f"无法连接数据库 {args.pg_host}:{args.pg_port}/{args.pg_database}")
+    return connector
+
+
+# ==================== 导出 ====================
+
+def _write_json_file(file_path: Path, write: Callable):
+    """先写临时文件再替换，取消或失败时不覆盖已有文件"""
+    partial_path = file_path.with_name(file_path.name + ".partial")
+    try:
+        with open(partial_path, 'w', encoding='utf-8') as f:
+            write(ProgressWriter(f))
+        os.replace(partial_path, file_path)
+        record_file()
+    except BaseException:
+        partial_path.unlink(missing_ok=True)
+        raise
+
+
+def output_path(fmt: str, output_dir: Path, name: str, archive_format: Optional[str] = None) -> Path:
+    """导出格式的输出路径（Markdown 指定压缩包格式时为同名压缩包）"""
+    if fmt in MARKDOWN_MODES:
+        path = output_dir / f"{name}{MARKDOWN_MODES[fmt][1]}"
+        return archive_path_for(path, archive_format) if archive_format else path
+    suffixes = {"json": "_custom.json", "ndjson": "_export.jsonl", "parquet": "_parquet", "sqlite": ".sqlite"}
+    return output_dir / f"{name}{suffixes[fmt]}"
+
+
+def export_parsed(parsed_data: Dict, fmt: str, output_dir: Path, name: str, args, log: Callable) -> Path:
+    """
+    把解析后的数据按一种格式导出
+
+    Args:
+        parsed_data: 解析后的数据
+        fmt: 导出格式（EXPORT_FORMATS 的键）
+        output_dir: 输出目录
+        name: 输出名称
+        args: 命令行参数（Markdown 选项、JSON 模块）
+        log: 日志回调函数
+
+    Returns:
+        输出路径
+    """
+    raw = parsed_data.get("raw", {})
+    if fmt in MARKDOWN_MODES:
+        export_func, suffix = MARKDOWN_MODES[fmt]
+        export_func(parsed_data, output_dir / f"{name}{suffix}",
+                    include_metadata=not args.no_metadata,
+                    include_system_prompt=not args.no_system_prompt,
+                    log_callback=log, archive_format=args.archive)
+    elif fmt == "json":
+        modules = args.modules or list(raw.get("data", {}).keys())
+        exporter = JSONExporter(parsed_data)
+        _write_json_file(output_path(fmt, output_dir, name),
+                         lambda f: exporter.write_custom_json(f, modules))
+    elif fmt == "ndjson":
+        export_ndjson(output_path(fmt, output_dir, name), raw.get("mode"), raw.get("schemaHash"),
+                      raw.get("data", {}).items(), log_callback=log)
+    elif fmt == "parquet":
+        export_parquet(output_path(fmt, output_dir, name), raw.get("data", {}).items(), log_callback=log)
+    elif fmt == "sqlite":
+        export_sqlite(output_path(fmt, output_dir, name), raw.get("mode"), raw.get("schemaHash"),
+                      raw.get("data", {}).items(), log_callback=log)
+    return output_path(fmt, output_dir, name, args.archive)
+
+
+def export_database_streaming(db_parser: DatabaseParser, fmt: str, output_dir: Path, name: str,
+                              user_id: Optional[str]) -> Path:
+    """不需要 Markdown 时直接从数据库游标流式写出（不在内存中构建数据，需在快照中调用）"""
+    path = output_path(fmt, output_dir, name)
+    if fmt == "json":
+        _write_json_file(path, lambda f: db_parser.export_raw_json(f, user_id))
+    elif fmt == "ndjson":
+        db_parser.export_raw_ndjson(path, user_id)
+    elif fmt == "parquet":
+        db_parser.export_parquet(path, user_id)
+    elif fmt == "sqlite":
+        db_parser.export_sqlite(path, user_id)
+    return path
+
+
+def run_exports(args, formats: List[str], output_dir: Path, cancel_token: CancelToken,
+                log: Callable) -> List[Path]:
+    """
+    读取数据源并依次执行各导出格式
+
+    数据库数据源只导出 JSON / JSON Lines / Parquet / SQLite（且未指定 --modules）时，
+    在一个快照中直接从游标流式写出；否则先读取到内存再导出（与界面相同）。
+
+    Returns:
+        输出路径列表
+    """
+    outputs = []
+    if args.input:
+        parsed_data = load_backup(args.input, log)
+        name = args.name or Path(args.input).stem
+    else:
+        default_name = f"lobechat_{args.pg_database}" + (f"_{args.user_id}" if args.user_id else "")
+        name = args.name or safe_filename(default_name, "lobechat")
+        connector = connect_database(args, log)
+        try:
+            db_parser = DatabaseParser(connector, log_callback=log)
+            with connector.operation(cancel_token, LONG_OPERATION_STATEMENT_TIMEOUT_MS):
+                if any(fmt in MARKDOWN_MODES for fmt in formats) or args.modules:
+                    parsed_data = db_parser.parse(args.user_id)
+                else:
+                    # 多种格式共用同一个快照，保证内容一致
+                    with connector.snapshot():
+                        for fmt in formats:
+                            log(f"开始导出 {fmt}...", "INFO")
+                            outputs.append(export_database_streaming(db_parser, fmt, output_dir, name, args.user_id))
+                    return outputs
+        finally:
+            connector.disconnect()
+
+    for fmt in formats:
+        cancel_token.raise_if_cancelled()
+        log(f"开始导出 {fmt}...", "INFO")
+        outputs.append(export_parsed(parsed_data, fmt, output_dir, name, args, log))
+    return outputs
+
+
+def run_multi_user(args, formats: List[str], output_dir: Path, cancel_token: CancelToken,
+                   log: Callable) -> int:
+    """按用户分别导出到独立目录（MultiUserExporter），返回退出码"""
+    from .core.multi_user_export import MultiUserExporter, list_users, STATUS_FAILED, STATUS_CANCELLED
+
+    connector = connect_database(args, log)
+    try:
+        users = list_users(connector)
+    finally:
+        connector.disconnect()
+    if args.user_id:
+        wanted = set(args.user_id.split(","))
+        users = [user for user in users if str(user.get("id")) in wanted]
+    if not users:
+        log("没有找到可导出的用户", "WARNING")
+        return EXIT_FAILED
+
+    exporter = MultiUserExporter(
+        db_config_from_args(args), str(output_dir), workers=args.workers,
+        formats=[MULTI_USER_FORMATS[fmt] for fmt in formats],
+        include_metadata=not args.no_metadata, include_system_prompt=not args.no_system_prompt,
+        log_callback=log
+    )
+    summary = exporter.run(users, cancel_token, resume=args.resume)
+    if summary["counts"].get(STATUS_CANCELLED) or cancel_token.is_cancelled:
+        return EXIT_CANCELLED
+    return EXIT_FAILED if summary["counts"].get(STATUS_FAILED) else EXIT_OK
+
+
+def output_size(path: Path) -> int:
+    """输出文件（或目录下全部文件）的总字节数"""
+    if path.is_dir():
+        return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+    return path.stat().st_size if path.exists() else 0
+
+
+def print_users(args, log: Callable) -> int:
+    """输出用户列表（制表符分隔：ID、邮箱、消息数），供编写定时任务时选择 --user-id"""
+    from .core.multi_user_export import list_users
+
+    connector = connect_database(args, log)
+    try:
+        users = list_users(connector)
+    finally:
+        connector.disconnect()
+    for user in users:
+        print(f"{user.get('id')}\t{user.get('email') or ''}\t{user.get('message_count') or 0}")
+    return EXIT_OK
+
+
+# ==================== 命令行 ====================
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """命令行参数"""
+    format_help = "\n".join(f"  {key:<12}{desc}" for key, desc in EXPORT_FORMATS.items())
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m lobechat_data_exporter.cli",
+        description="LobeChat 数据导出工具（命令行，无界面）",
+        epilog=f"导出格式:\n{format_help}\n\n退出码: 0 成功, 1 失败, 2 参数错误, 130 已取消",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    arg_parser.add_argument("input", nargs="?", help="备份文件（.json / .jsonl / .sqlite），与 --pg-database 二选一")
+    arg_parser.add_argument("-f", "--format", dest="formats", action="append", choices=list(EXPORT_FORMATS),
+                            help="导出格式，可重复指定（默认 md-topics）")
+    arg_parser.add_argument("-o", "--output-dir", default=".", help="输出目录（默认当前目录）")
+    arg_parser.add_argument("--name", help="输出名称（默认取自备份文件名或数据库名）")
+    arg_parser.add_argument("--archive", choices=list(ARCHIVE_FORMATS), help="Markdown 输出为压缩包")
+    arg_parser.add_argument("--no-metadata", action="store_true", help="Markdown 不包含元数据")
+    arg_parser.add_argument("--no-system-prompt", action="store_true", help="Markdown 不包含系统提示词")
+    arg_parser.add_argument("--modules", type=lambda text: [m for m in text.split(",") if m],
+                            help="JSON 导出的模块（逗号分隔，默认全部），如 agents,sessions,topics,messages")
+
+    db_group = arg_parser.add_argument_group("数据库（密码使用 PGPASSWORD 环境变量）")
+    db_group.add_argument("--pg-host", default="localhost", help="PostgreSQL 主机")
+    db_group.add_argument("--pg-port", type=int, default=5432, help="PostgreSQL 端口")
+    db_group.add_argument("--pg-database", help="PostgreSQL 数据库（指定后从数据库导出）")
+    db_group.add_argument("--pg-user", default="postgres", help="PostgreSQL 用户")
+    db_group.add_argument("--pg-ssl", action="store_true", help="使用 SSL 连接")
+    db_group.add_argument("--user-id", help="只导出该用户的数据（--all-users 时可用逗号分隔多个用户）")
+    db_group.add_argument("--all-users", action="store_true", help="每个用户分别导出到独立目录")
+    db_group.add_argument("--workers", type=int, default=MULTI_USER_EXPORT_WORKERS, help="多用户导出的并行连接数")
+    db_group.add_argument("--resume", action="store_true",
+                          help="多用户导出时续跑上次中断的导出，跳过其中已完成且数据未变化的用户")
+    db_group.add_argument("--list-users", action="store_true", help="列出用户（ID、邮箱、消息数）后退出")
+
+    log_group = arg_parser.add_argument_group("日志")
+    log_group.add_argument("-q", "--quiet", action="store_true", help="只输出警告和错误")
+    log_group.add_argument("-v", "--verbose", action="store_true", help="输出调试日志")
+    arg_parser.add_argument("--version", action="version", version=f"%(prog)s {VERSION}")
+    return arg_parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口，返回退出码"""
+    arg_parser = build_arg_parser()
+    args = arg_parser.parse_args(argv)
+
+    if bool(args.input) == bool(args.pg_database):
+        arg_parser.error("请指定备份文件或 --pg-database（二选一）")
+    if args.input and (args.all_users or args.list_users):
+        arg_parser.error("--all-users / --list-users 只能用于数据库")
+    formats = list(dict.fromkeys(args.formats or ["md-topics"]))
+    if args.all_users:
+        unsupported = [fmt for fmt in formats if fmt not in MULTI_USER_FORMATS]
+        if unsupported:
+            arg_parser.error(f"--all-users 不支持的格式: {', '.join(unsupported)}"
+                             f"（可用: {', '.join(MULTI_USER_FORMATS)}）")
+
+    log = make_logger(args.quiet, args.verbose)
+    cancel_token = CancelToken()
+    install_signal_handlers(cancel_token, log)
+
+    if args.list_users:
+        try:
+            return print_users(args, log)
+        except Exception as e:
+            log(f"查询用户失败: {str(e)}", "ERROR")
+            return EXIT_FAILED
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    if args.all_users:
+        try:
+            return run_multi_user(args, formats, output_dir, cancel_token, log)
+        except Exception as e:
+            log(f"多用户导出失败: {str(e)}", "ERROR")
+            return EXIT_FAILED
+
+    # 登记进度：写文件的公共函数据此统计文件数/字节数，并在收到中断信号后停止
+    progress = ExportProgress(cancel_token)
+    activate(progress)
+    try:
+        outputs = run_exports(args, formats, output_dir, cancel_token, log)
+    except (OperationCancelled, KeyboardInterrupt):
+        log(f"导出已取消（用时 {format_duration(progress.elapsed)}）", "WARNING")
+        return EXIT_CANCELLED
+    except Exception as e:
+        if cancel_token.is_cancelled:
+            log(f"导出已取消: {str(e)}", "WARNING")
+            return EXIT_CANCELLED
+        log(f"导出失败: {str(e)}", "ERROR")
+        return EXIT_FAILED
+    finally:
+        activate(None)
+
+    total_bytes = 0
+    for path in outputs:
+        size = output_size(path)
+        total_bytes += size
+        log(f"已导出: {path}（{format_bytes(size)}）", "SUCCESS")
+    log(f"✅ 导出完成: {len(outputs)}项输出, {format_bytes(total_bytes)}, "
+        f"用时 {format_duration(progress.elapsed)}", "SUCCESS")
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -32,6 +32,7 @@ CONFIG_FILE_NAME = "lobechat_data_exporter_config.json"  # 配置文件名
 LOG_FILE_NAME = "lobechat_data_exporter.log"  # 日志文件名
 LOG_MAX_SIZE = 10 * 1024 * 1024  # 日志文件最大大小（10MB）
 LOG_BACKUP_COUNT = 3  # 日志文件备份数量
+STREAM_WRITE_CHUNK_LINES = 1000  # 流式写出时每次合并写入的行数（峰值内存与单个文档大小无关）
 
 # ========== UI组件设置 ==========
 BUTTON_WIDTH = 15  # 按钮默认宽度
@@ -43,3 +44,84 @@ TREE_ROW_HEIGHT = 25  # Treeview行高
 MAX_RECENT_FILES = 10  # 最近文件列表最大数量
 INVALID_FILENAME_CHARS = r'[<>:"/\\|?*]+'  # 无效文件名字符
 MAX_FILENAME_LENGTH = 80  # 最大文件名长度
+
+# ========== 数据库查询统计 ==========
+ENABLE_QUERY_STATS = True  # 查询统计开关
+SLOW_QUERY_THRESHOLD_MS = 500  # 慢查询阈值（毫秒）
+SLOW_QUERY_LOG_FILE_NAME = "lobechat_data_exporter_slow_query.log"  # 慢查询日志文件名
+QUERY_STATS_WINDOW = 1000  # 每类查询保留的最近耗时样本数（用于滚动百分位）
+
+# ========== 索引建议 ==========
+INDEX_ADVISOR_LARGE_TABLE_ROWS = 10000  # 超过该行数的表出现顺序扫描时给出建议
+INDEX_ADVISOR_SORT_ROWS = 1000  # 排序节点输入行数超过该值时给出建议
+
+# ========== 数据库缓存 ==========
+DB_CACHE_BUDGET_MB = 256  # 数据库标签页懒加载缓存内存预算（MB），超出后按LRU淘汰主题/消息分组
+
+# ========== 对话树预取 ==========
+ENABLE_PREFETCH = True  # 对话树推测性预取开关
+PREFETCH_TOPIC_COUNT = 5  # 助手主题加载后预取前N个主题的消息
+PREFETCH_ADJACENT_AGENTS = 1  # 选中助手时预取前后各N个相邻助手的主题
+PREFETCH_QUEUE_SIZE = 32  # 预取队列上限（超出时丢弃最早的任务）
+
+# ========== 查询取消 ==========
+LONG_OPERATION_STATEMENT_TIMEOUT_MS = 600000  # 全部加载/导出读取时单条语句超时（毫秒），0 表示不限制
+SEARCH_STATEMENT_TIMEOUT_MS = 30000  # 数据库搜索单条语句超时（毫秒）
+CANCELLABLE_POLL_MS = 50  # 可取消的数据库操作执行期间，界面线程检查后台线程状态的间隔（毫秒）
+
+# ========== 全部加载分批 ==========
+LOAD_ALL_INITIAL_BATCH = 500  # 全部加载的初始批大小
+LOAD_ALL_MIN_BATCH = 100  # 最小批大小
+LOAD_ALL_MAX_BATCH = 50000  # 最大批大小
+LOAD_ALL_TARGET_BATCH_SECONDS = 1.0  # 每批目标耗时（秒），批大小据此自适应调整
+LOAD_ALL_BATCH_MEMORY_MB = 64  # 单批数据的内存上限（MB）
+
+# ========== 多用户导出 ==========
+MULTI_USER_EXPORT_WORKERS = 4  # 多用户并行导出的数据库连接数
+
+# ========== 一致性快照 ==========
+ENABLE_SNAPSHOT_EXPORT = True  # 导出时的多条查询在同一个 REPEATABLE READ 只读事务中执行，保证数据引用一致
+
+# ========== 并行写文件 ==========
+PARALLEL_WRITER_WORKERS = 8  # 按主题/按对话导出时并发写文件的线程数
+PARALLEL_WRITER_QUEUE_SIZE = 256  # 等待写出的文件数上限（队列满时渲染暂停，限制内存占用）
+
+# ========== 导出清单 ==========
+ENABLE_EXPORT_MANIFEST = True  # 目录导出时写入清单，重新导出跳过未变化的文件、删除过期文件，中断后可续导
+EXPORT_MANIFEST_CHECKPOINT_SECONDS = 10  # 导出过程中保存清单检查点的间隔（秒）
+
+# ========== 压缩包导出 ==========
+ARCHIVE_ZSTD_LEVEL = 3  # tar.zst 压缩级别（需要 zstandard 库）
+ARCHIVE_SPOOL_MAX_MB = 16  # tar 条目写入前在内存中缓冲的上限（MB），超出后转存临时文件
+
+# ========== 渲染缓存 ==========
+ENABLE_RENDER_CACHE = True  # 缓存消息渲染出的 Markdown 片段，重复导出同一份数据时跳过重新渲染
+RENDER_CACHE_BUDGET_MB = 128  # 渲染缓存内存预算（MB），超出后按LRU淘汰
+RENDER_CACHE_PERSIST = False  # 退出时把渲染缓存保存到磁盘，下次启动后继续使用
+RENDER_CACHE_FILE_NAME = "lobechat_data_exporter_render_cache.json"  # 渲染缓存文件名
+
+# ========== 流式JSON ==========
+JSON_EXPORT_COMPACT = False  # JSON 导出使用紧凑格式（无缩进，文件更小、写出更快）
+DB_STREAM_FETCH_ROWS = 2000  # 直接从数据库流式导出时服务端游标每次取回的行数
+
+# ========== JSON Lines ==========
+NDJSON_MAX_FILE_MB = 0  # JSON Lines 导出的分卷大小（MB），超过后写入下一个分卷；0 表示不分卷
+
+# ========== 列式导出 ==========
+PARQUET_ROW_GROUP_ROWS = 50000  # Parquet 每个行组的行数（写出时内存中最多缓冲这么多行）
+PARQUET_COMPRESSION = "zstd"  # Parquet 压缩算法（zstd / snappy / gzip / none，需要 pyarrow 库）
+
+# ========== SQLite 导出 ==========
+SQLITE_BATCH_ROWS = 5000  # SQLite 导出时每次 executemany 写入的行数
+SQLITE_FTS_TOKENIZER = "trigram"  # 消息全文索引（FTS5）的分词器，trigram 支持中文子串搜索（SQLite 3.34+）
+
+# ========== Excel 导出 ==========
+EXCEL_MAX_ROWS_PER_SHEET = 1048576  # 每个工作表的最大行数（含表头，Excel 上限为 1048576），超出后自动拆分到新工作表
+
+# ========== CSV 导出 ==========
+CSV_EXPORT_ENCODING = "utf-8-sig"  # CSV 文件编码（utf-8-sig 带 BOM，Excel 可直接识别中文）
+CSV_EXPORT_COLUMNS = {}  # 按表指定导出的列及顺序 {表键: [列ID, ...]}，表键为数据库标签页的表名（如 "messages"）或数据标签页的表键（如 "messages_view"）；未指定的表导出全部列
+
+# ========== 后台导出任务 ==========
+EXPORT_JOB_POLL_MS = 200  # 导出任务窗口刷新进度的间隔（毫秒）
+EXPORT_JOB_RATE_WINDOW_SECONDS = 5  # 计算导出速度（文件/秒、字节/秒）的时间窗口（秒）
@@ -0,0 +1,114 @@
+"""
+自适应分批
+根据每批的实际耗时和行大小调整批大小，使每批耗时接近目标值，
+同时限制单批数据的内存占用，并给出吞吐量和剩余时间估算
+"""
+
+import time
+from typing import Optional
+
+
+class AdaptiveBatcher:
+    """
+    自适应批大小控制器
+
+    每批完成后调用 record()，下一批的大小 = 本批吞吐量 × 目标耗时，
+    单次调整幅度限制在 1/4 ~ 4 倍之间，避免网络抖动时大起大落；
+    批大小同时受 [min_size, max_size] 和内存上限约束。
+    """
+
+    # 单次调整的最大倍数
+    MAX_GROWTH = 4.0
+    # 吞吐量平滑系数（指数移动平均）
+    SMOOTHING = 0.3
+
+    def __init__(self, target_seconds: float = 1.0, initial_size: int = 500,
+                 min_size: int = 100, max_size: int = 50000,
+                 max_batch_bytes: Optional[int] = None):
+        """
+        初始化自适应批大小控制器
+
+        Args:
+            target_seconds: 每批的目标耗时（秒）
+            initial_size: 初始批大小
+            min_size: 最小批大小
+            max_size: 最大批大小
+            max_batch_bytes: 单批数据的内存上限（字节），None 表示不限制
+        """
+        self.target_seconds = target_seconds
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_batch_bytes = max_batch_bytes
+
+        self.total_rows = 0
+        self.total_bytes = 0
+        self.batches = 0
+        self.rows_per_second = 0.0   # 平滑后的吞吐量（行/秒）
+        self.bytes_per_second = 0.0  # 平滑后的吞吐量（字节/秒）
+        self.avg_row_bytes = 0.0
+        self.started_at = time.perf_counter()
+
+        self.batch_size = self._clamp(initial_size)
+
+    def _clamp(self, size: float) -> int:
+        """把批大小限制在允许范围内"""
+        size = int(max(self.min_size, min(self.max_size, size)))
+        if self.max_batch_bytes and self.avg_row_bytes > 0:
+            memory_limit = int(self.max_batch_bytes / self.avg_row_bytes)
+            size = min(size, max(self.min_size, memory_limit))
+        return size
+
+    def next_size(self) -> int:
+        """获取下一批的大小"""
+        return self.batch_size
+
+    def record(self, rows: int, seconds: float, size_bytes: int = 0):
+        """
+        记录一批的结果并调整批大小
+
+        Args:
+            rows: 本批行数
+            seconds: 本批耗时（秒）
+            size_bytes: 本批数据的近似大小（字节）
+        """
+        self.batches += 1
+        self.total_rows += rows
+        self.total_bytes += size_bytes
+        if self.total_rows:
+            self.avg_row_bytes = self.total_bytes / self.total_rows
+
+        if rows <= 0 or seconds <= 0:
+            return
+
+        rate = rows / seconds
+        byte_rate = size_bytes / seconds
+        if self.rows_per_second:
+            self.rows_per_second += self.SMOOTHING * (rate - self.rows_per_second)
+            self.bytes_per_second += self.SMOOTHING * (byte_rate - self.bytes_per_second)
+        else:
+            self.rows_per_second = rate
+            self.bytes_per_second = byte_rate
+
+        # 用本批的实际吞吐量推算目标批大小，并限制调整幅度
+        ideal = rate * self.target_seconds
+        ideal = max(self.batch_size / self.MAX_GROWTH, min(self.batch_size * self.MAX_GROWTH, ideal))
+        self.batch_size = self._clamp(ideal)
+
+    def eta_seconds(self, remaining_rows: int) -> Optional[float]:
+        """
+        估算剩余时间
+
+        Args:
+            remaining_rows: 剩余行数
+
+        Returns:
+            剩余秒数，尚无吞吐量数据时返回 None
+        """
+        if not self.rows_per_second:
+            return None
+        return max(remaining_rows, 0) / self.rows_per_second
+
+    @property
+    def elapsed(self) -> float:
+        """已用时间（秒）"""
+        return time.perf_counter() - self.started_at
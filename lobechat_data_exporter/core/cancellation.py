@@ -0,0 +1,65 @@
+"""
+取消令牌
+长时间操作（全部加载、导出、搜索）与取消按钮之间的桥梁，
+取消时依次触发登记的回调（如向数据库服务器发送取消请求）
+"""
+
+import threading
+from typing import Callable, List
+
+
+class OperationCancelled(Exception):
+    """操作已被用户取消"""
+    pass
+
+
+class CancelToken:
+    """取消令牌（线程安全，可在任意线程调用 cancel）"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable] = []
+
+    @property
+    def is_cancelled(self) -> bool:
+        """是否已取消"""
+        return self._event.is_set()
+
+    def cancel(self):
+        """取消操作并触发回调（只触发一次）"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def add_callback(self, callback: Callable) -> Callable:
+        """
+        登记取消回调，令牌已取消时立即调用
+
+        Returns:
+            传入的回调（便于之后移除）
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return callback
+        callback()
+        return callback
+
+    def remove_callback(self, callback: Callable):
+        """移除取消回调"""
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def raise_if_cancelled(self):
+        """已取消时抛出 OperationCancelled"""
+        if self._event.is_set():
+            raise OperationCancelled("操作已取消")
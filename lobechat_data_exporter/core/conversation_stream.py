@@ -0,0 +1,237 @@
+"""
+选中对话的流式读取
+按 助手 → 主题 → 消息 的顺序用服务端游标读取对话树中选中的数据：
+主题和消息各用一个游标，按同一个编号的主题选择集排序后逐个主题合并，
+内存占用只与单个主题的消息数有关（需要在 connector.snapshot() 中使用）
+"""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..config import DB_STREAM_FETCH_ROWS
+
+
+# 游标行：(主题序号, 所属助手ID, 行字典)
+StreamRow = Tuple[Optional[int], Optional[str], Dict]
+
+
+def _plain_value(value: Any) -> Any:
+    """时间转为 ISO 字符串（可直接写入 JSON，也可按字符串比较先后）"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class _PeekableRows:
+    """可预读一行的游标行迭代器"""
+
+    _END = object()
+
+    def __init__(self, rows: Iterator[StreamRow]):
+        self._rows = rows
+        self._next = self._END
+
+    def peek(self) -> Optional[StreamRow]:
+        """预读下一行（不消费），没有更多行时返回 None"""
+        if self._next is self._END:
+            self._next = next(self._rows, None)
+        return self._next
+
+    def take_while(self, predicate: Callable[[StreamRow], bool]) -> Iterator[StreamRow]:
+        """逐行取出满足条件的连续行，遇到第一行不满足条件的行时停止（该行保留）"""
+        while True:
+            row = self.peek()
+            if row is None or not predicate(row):
+                return
+            self._next = self._END
+            yield row
+
+    def skip_while(self, predicate: Callable[[StreamRow], bool]):
+        """丢弃满足条件的连续行"""
+        for _ in self.take_while(predicate):
+            pass
+
+
+class LatestTime:
+    """记录行中最新的修改时间（updated_at，没有时用 created_at），用于设置导出文件的修改时间"""
+
+    def __init__(self, initial: Optional[str] = None):
+        self.value = initial
+
+    def update(self, row: Dict):
+        row_time = row.get("updated_at") or row.get("created_at")
+        if row_time and (not self.value or row_time > self.value):
+            self.value = row_time
+
+    def track(self, rows: Iterator[Dict]) -> Iterator[Dict]:
+        """边迭代边记录"""
+        for row in rows:
+            self.update(row)
+            yield row
+
+
+class ConversationStream:
+    """
+    选中对话的流式读取器
+
+    选择集与对话树的选择相同：选中的助手（按选中顺序，主题按创建时间倒序）、
+    默认对话的主题、单独选中的主题（已包含在前两者中的跳过）以及单独选中的消息。
+    所有主题在 SQL 中统一编号（lce_seq），主题游标和消息游标都按编号排序，
+    因此可以只预读一行就把消息合并到所属主题。行使用数据库的下划线字段名。
+    """
+
+    def __init__(self, connector, ids: Dict, user_id: Optional[str] = None,
+                 batch_size: int = DB_STREAM_FETCH_ROWS):
+        """
+        初始化读取器
+
+        Args:
+            connector: 数据库连接器
+            ids: 选中的ID {"agents": [...], "topics": [...], "messages": [...], "default": bool}
+            user_id: 用户ID（为空时不过滤）
+            batch_size: 服务端游标每批行数
+        """
+        self.connector = connector
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.params = {
+            "agents": list(ids.get("agents") or []),
+            "topics": list(ids.get("topics") or []),
+            "messages": list(ids.get("messages") or []),
+            "default": bool(ids.get("default")),
+            "user_id": user_id,
+        }
+
+    def _user_filter(self, alias: str) -> str:
+        return f" AND {alias}.user_id = %(user_id)s" if self.user_id else ""
+
+    def _selection_cte(self) -> str:
+        """选中主题的编号选择集（selected: lce_seq, lce_agent_id, topic_id）"""
+        return f"""
+            WITH agent_topics AS (
+                SELECT 0 AS part, array_position(%(agents)s::text[], ats.agent_id) AS pos,
+                       ats.agent_id AS agent_id, t.id AS topic_id, t.created_at
+                FROM topics t
+                JOIN agents_to_sessions ats ON ats.session_id = t.session_id
+                WHERE ats.agent_id = ANY(%(agents)s::text[]){self._user_filter("t")}
+            ), default_topics AS (
+                SELECT 1 AS part, 0 AS pos, NULL::text AS agent_id, t.id AS topic_id, t.created_at
+                FROM topics t
+                WHERE %(default)s AND (t.session_id IS NULL OR NOT EXISTS (
+                    SELECT 1 FROM agents_to_sessions ats WHERE ats.session_id = t.session_id
+                )){self._user_filter("t")}
+            ), picked_topics AS (
+                SELECT 2 AS part, array_position(%(topics)s::text[], t.id) AS pos,
+                       NULL::text AS agent_id, t.id AS topic_id, t.created_at
+                FROM topics t
+                WHERE t.id = ANY(%(topics)s::text[]){self._user_filter("t")}
+                  AND t.id NOT IN (SELECT topic_id FROM agent_topics
+                                   UNION ALL SELECT topic_id FROM default_topics)
+            ), selected AS (
+                SELECT row_number() OVER (ORDER BY part, pos, created_at DESC, topic_id) AS lce_seq,
+                       agent_id AS lce_agent_id, topic_id
+                FROM (SELECT * FROM agent_topics
+                      UNION ALL SELECT * FROM default_topics
+                      UNION ALL SELECT * FROM picked_topics) s
+            )
+        """
+
+    def _iter_rows(self, query: str) -> Iterator[StreamRow]:
+        """用服务端游标逐行读取，前两列为 lce_seq 和 lce_agent_id，其余列转为行字典"""
+        for description, rows in self.connector.iter_query_tuples(query, self.params, self.batch_size):
+            names = [col[0] for col in description[2:]]
+            for row in rows:
+                yield row[0], row[1], {name: _plain_value(value) for name, value in zip(names, row[2:])}
+
+    def _iter_topics(self) -> Iterator[StreamRow]:
+        return self._iter_rows(self._selection_cte() + """
+            SELECT s.lce_seq, s.lce_agent_id, t.* FROM selected s
+            JOIN topics t ON t.id = s.topic_id
+            ORDER BY s.lce_seq
+        """)
+
+    def _iter_topic_messages(self) -> Iterator[StreamRow]:
+        return self._iter_rows(self._selection_cte() + f"""
+            SELECT s.lce_seq, s.lce_agent_id, m.* FROM selected s
+            JOIN messages m ON m.topic_id = s.topic_id{self._user_filter("m")}
+            ORDER BY s.lce_seq, m.created_at, m.id
+        """)
+
+    def _iter_picked_messages(self) -> Iterator[StreamRow]:
+        """单独选中、且所属主题不在选择集中的消息（按选中顺序）"""
+        if not self.params["messages"]:
+            return iter(())
+        return self._iter_rows(self._selection_cte() + f"""
+            SELECT NULL::bigint AS lce_seq, NULL::text AS lce_agent_id, m.* FROM messages m
+            WHERE m.id = ANY(%(messages)s::text[]){self._user_filter("m")}
+              AND NOT EXISTS (SELECT 1 FROM selected s WHERE s.topic_id = m.topic_id)
+            ORDER BY array_position(%(messages)s::text[], m.id)
+        """)
+
+    def agents(self) -> List[Dict]:
+        """选中的助手（按选中顺序）"""
+        if not self.params["agents"]:
+            return []
+        query = "SELECT * FROM agents a WHERE a.id = ANY(%(agents)s::text[])"
+        query += self._user_filter("a")
+        query += " ORDER BY array_position(%(agents)s::text[], a.id)"
+        rows = self.connector.execute_query(query, self.params)
+        return [{key: _plain_value(value) for key, value in row.items()} for row in rows]
+
+    def topic_groups(self) -> Iterator[Tuple[Optional[str], Dict, List[Dict]]]:
+        """
+        逐个主题产出 (所属助手ID, 主题, 消息列表)
+
+        默认对话和单独选中的主题的助手ID为 None；同一主题属于多个选中的助手时按每个助手各产出一次。
+        """
+        messages = _PeekableRows(self._iter_topic_messages())
+        for seq, agent_id, topic in self._iter_topics():
+            # 两个游标按同一编号排序，编号小于当前主题的消息不会出现
+            group = [msg for _, _, msg in messages.take_while(lambda row: row[0] == seq)]
+            yield agent_id, topic, group
+
+    def agent_topic_groups(self) -> Iterator[Tuple[Dict, Iterator[Tuple[Dict, List[Dict]]]]]:
+        """
+        逐个助手产出 (助手, (主题, 消息列表) 的迭代器)
+
+        每个助手的迭代器需要在取下一个助手之前用完（未用完的部分会被跳过）。
+        """
+        agents = self.agents()
+        present = {agent.get("id") for agent in agents}
+        groups = _PeekableRows((None, agent_id, (topic, msgs)) for agent_id, topic, msgs in self.topic_groups())
+        for agent in agents:
+            agent_id = agent.get("id")
+            # 跳过已不存在的助手的主题（按选中顺序排在当前助手之前）
+            groups.skip_while(lambda row: row[1] not in present)
+            yield agent, (group for _, _, group in groups.take_while(lambda row: row[1] == agent_id))
+            groups.skip_while(lambda row: row[1] == agent_id)
+
+    def agent_rows(self) -> Iterator[Tuple[Dict, Iterator[Dict], Iterator[Dict]]]:
+        """
+        逐个助手产出 (助手, 主题迭代器, 消息迭代器)
+
+        主题和消息来自两个独立的游标，可以先写完该助手的全部主题再写消息；
+        两个迭代器都需要在取下一个助手之前用完（未用完的部分会被跳过）。
+        """
+        agents = self.agents()
+        present = {agent.get("id") for agent in agents}
+        topics = _PeekableRows(self._iter_topics())
+        messages = _PeekableRows(self._iter_topic_messages())
+        for agent in agents:
+            agent_id = agent.get("id")
+            for rows in (topics, messages):
+                rows.skip_while(lambda row: row[1] not in present)
+            yield (
+                agent,
+                (topic for _, _, topic in topics.take_while(lambda row: row[1] == agent_id)),
+                (msg for _, _, msg in messages.take_while(lambda row: row[1] == agent_id)),
+            )
+            for rows in (topics, messages):
+                rows.skip_while(lambda row: row[1] == agent_id)
+
+    def messages(self) -> Iterator[Dict]:
+        """选中的全部消息：先按主题顺序输出各主题的消息，再输出单独选中的消息"""
+        for _, _, msg in self._iter_topic_messages():
+            yield msg
+        for _, _, msg in self._iter_picked_messages():
+            yield msg
@@ -0,0 +1,97 @@
+"""
+解析数据索引
+为解析后的数据建立 消息ID→消息、会话→主题、助手/会话/主题→分组 的查找表，
+每份解析数据只构建一次，批量导出和时间信息查询不再逐项扫描全部数据
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+# 索引在解析数据中的键
+INDEX_KEY = "index"
+
+_build_lock = threading.Lock()
+
+
+class ParsedDataIndex:
+    """解析数据的查找索引（构建后只读）"""
+
+    def __init__(self, parsed_data: Dict):
+        """
+        构建索引
+
+        Args:
+            parsed_data: 解析后的数据
+        """
+        # 消息ID → 消息（同一ID出现多次时保留按主题顺序最先出现的一条）
+        self.messages_by_id: Dict[str, Dict] = {}
+        for messages in parsed_data["messagesByTopic"].values():
+            self._add_messages(messages)
+
+        # 会话ID → [(主题ID, 主题)]，保持 topics 中的顺序
+        self.topics_by_session: Dict[str, List[Tuple[str, Dict]]] = {}
+        for topic_id, topic in parsed_data["topics"].items():
+            session_id = topic.get("sessionId")
+            self.topics_by_session.setdefault(session_id, []).append((topic_id, topic))
+
+        # 助手ID → 分组，会话ID → (分组, 会话分组)，主题ID → (分组, 会话分组, 主题分组)
+        # 同一ID出现多次时只取按分组顺序最先出现的一个
+        self.groups_by_agent: Dict[str, Dict] = {}
+        self.session_groups_by_id: Dict[str, Tuple[Dict, Dict]] = {}
+        self.topic_groups_by_id: Dict[str, Tuple[Dict, Dict, Dict]] = {}
+        for group in parsed_data["groups"]:
+            self.groups_by_agent.setdefault(group["agentId"], group)
+            for session_group in group["sessions"]:
+                self.session_groups_by_id.setdefault(session_group["sessionId"], (group, session_group))
+                for topic_group in session_group["topics"]:
+                    self.topic_groups_by_id.setdefault(topic_group["topicId"], (group, session_group, topic_group))
+                    # 默认对话的消息不在 messagesByTopic 中，从分组补充
+                    self._add_messages(topic_group.get("messages", []))
+
+    def _add_messages(self, messages: List[Dict]):
+        """登记消息（已登记的ID不覆盖）"""
+        for msg in messages:
+            msg_id = msg.get("id")
+            if msg_id and msg_id not in self.messages_by_id:
+                self.messages_by_id[msg_id] = msg
+
+    def get_message(self, msg_id: str) -> Optional[Dict]:
+        """按ID获取消息"""
+        return self.messages_by_id.get(msg_id)
+
+    def get_session_topics(self, session_id: str) -> List[Tuple[str, Dict]]:
+        """获取会话下的主题 [(主题ID, 主题)]"""
+        return self.topics_by_session.get(session_id, [])
+
+    def get_agent_group(self, agent_id: str) -> Optional[Dict]:
+        """获取助手的分组"""
+        return self.groups_by_agent.get(agent_id)
+
+    def get_session_group(self, session_id: str) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """获取会话所在的 (分组, 会话分组)"""
+        return self.session_groups_by_id.get(session_id, (None, None))
+
+    def get_topic_group(self, topic_id: str) -> Tuple[Optional[Dict], Optional[Dict], Optional[Dict]]:
+        """获取主题所在的 (分组, 会话分组, 主题分组)"""
+        return self.topic_groups_by_id.get(topic_id, (None, None, None))
+
+
+def get_data_index(parsed_data: Dict) -> ParsedDataIndex:
+    """
+    获取解析数据的索引（首次调用时构建并保存在解析数据中，随解析数据一起释放）
+
+    Args:
+        parsed_data: 解析后的数据
+
+    Returns:
+        ParsedDataIndex
+    """
+    index = parsed_data.get(INDEX_KEY)
+    if index is None:
+        with _build_lock:
+            index = parsed_data.get(INDEX_KEY)
+            if index is None:
+                index = ParsedDataIndex(parsed_data)
+                parsed_data[INDEX_KEY] = index
+    return index
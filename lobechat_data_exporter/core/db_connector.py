@@ -4,9 +4,18 @@ PostgreSQL 数据库连接器
 """
 
 import json
-from typing import Dict, List, Any, Optional
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Any, Iterator, Optional, Tuple
 from dataclasses import dataclass
 
+from ..config import ENABLE_QUERY_STATS, ENABLE_SNAPSHOT_EXPORT, DB_STREAM_FETCH_ROWS
+from .cancellation import CancelToken, OperationCancelled
+from .query_stats import (
+    QueryStatsCollector, QueryRecord, estimate_rows_bytes, get_call_site
+)
+
 
 @dataclass
 class DBConfig:
@@ -54,7 +63,25 @@ class PostgreSQLConnector:
         self.config = config
         self.log_callback = log_callback
         self.connection = None
+        self.backend_pid = None
         self._psycopg2 = None
+        
+        # 当前线程所属操作的取消令牌（见 operation()）
+        self._local = threading.local()
+        
+        # 一致性快照状态（见 snapshot()），快照事务属于打开它的线程
+        self._snapshot_owner = None
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_depth = 0
+        self._snapshot_id = None
+        self._snapshot_lost = False
+        
+        # 服务端游标序号（游标名在连接内唯一）
+        self._stream_seq = 0
+        
+        # 查询统计（耗时、行数、数据量、调用位置、慢查询日志）
+        self.query_stats = QueryStatsCollector(log_callback=log_callback)
+        self.query_stats.enabled = ENABLE_QUERY_STATS
     
     def log(self, message: str, level: str = "INFO"):
         """记录日志"""
@@ -88,19 +115,8 @@ class PostgreSQLConnector:
             
             self.log(f"正在连接数据库 {self.config.host}:{self.config.port}...", "INFO")
             
-            conn_params = {
-                "host": self.config.host,
-                "port": self.config.port,
-                "database": self.config.database,
-                "user": self.config.user,
-                "password": self.config.password,
-                "connect_timeout": 10
-            }
-            
-            if self.config.ssl:
-                conn_params["sslmode"] = "require"
-            
-            self.connection = psycopg2.connect(**conn_params)
+            self.connection = psycopg2.connect(**self._connection_params())
+            self.backend_pid = self.connection.get_backend_pid()
             self.log("✅ 数据库连接成功!", "SUCCESS")
             return True
             
@@ -108,17 +124,60 @@ class PostgreSQLConnector:
             self.log(f"❌ 数据库连接失败: {str(e)}", "ERROR")
             return False
     
+    def _connection_params(self, connect_timeout: int = 10) -> Dict:
+        """构建连接参数"""
+        conn_params = {
+            "host": self.config.host,
+            "port": self.config.port,
+            "database": self.config.database,
+            "user": self.config.user,
+            "password": self.config.password,
+            "connect_timeout": connect_timeout
+        }
+        
+        if self.config.ssl:
+            conn_params["sslmode"] = "require"
+        
+        return conn_params
+    
     def disconnect(self):
         """断开数据库连接"""
         if self.connection:
             self.connection.close()
             self.connection = None
+            self.backend_pid = None
             self.log("数据库连接已关闭", "INFO")
     
     def is_connected(self) -> bool:
         """检查是否已连接"""
         return self.connection is not None and not self.connection.closed
     
+    @contextmanager
+    def clone(self):
+        """
+        在同配置的独立连接上执行操作，退出时关闭该连接
+        
+        后台导出使用独立连接：其快照事务和服务端游标不受界面连接上其他查询
+        （预取、搜索、浏览）的影响，导出期间界面也可以继续查询。
+        
+        Yields:
+            已连接的新连接器（共用本连接器的日志回调和查询统计）
+        
+        Raises:
+            ConnectionError: 无法建立连接
+        """
+        connector = PostgreSQLConnector(self.config)
+        if not connector.connect():
+            raise ConnectionError("无法建立独立的数据库连接")
+        connector.log_callback = self.log_callback
+        connector.query_stats = self.query_stats
+        try:
+            yield connector
+        finally:
+            # 关闭独立连接不记录日志，避免与界面连接的断开混淆
+            connector.log_callback = None
+            connector.disconnect()
+    
     def execute_query(self, query: str, params: tuple = None) -> List[Dict]:
         """
         执行查询并返回结果
@@ -132,17 +191,432 @@ class PostgreSQLConnector:
         """
         if not self.is_connected():
             raise ConnectionError("数据库未连接")
+        self._check_snapshot_owner()
+        self._check_cancelled()
         
         psycopg2 = self._import_psycopg2()
         
+        start = time.perf_counter()
+        executed = start
+        rows = []
+        error = None
         try:
             with self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
                 cursor.execute(query, params)
+                executed = time.perf_counter()
                 results = cursor.fetchall()
-                return [dict(row) for row in results]
+                rows = [dict(row) for row in results]
+                return rows
+        except Exception as e:
+            error = str(e).replace("\n", " ").strip()
+            self._raise_query_error(e)
+        finally:
+            self._record_query(query, start, executed, rows, error)
+    
+    def execute_query_tuples(self, query: str, params: tuple = None) -> Tuple[List[Tuple[str, int]], List[tuple]]:
+        """
+        执行查询并返回列描述和元组行（不构建字典，供编译行转换器使用）
+        
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+        
+        Returns:
+            ([(列名, 类型OID), ...], [元组行, ...])
+        """
+        if not self.is_connected():
+            raise ConnectionError("数据库未连接")
+        self._check_snapshot_owner()
+        self._check_cancelled()
+        
+        start = time.perf_counter()
+        executed = start
+        rows = []
+        error = None
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(query, params)
+                executed = time.perf_counter()
+                rows = cursor.fetchall()
+                description = [(col[0], col[1]) for col in (cursor.description or [])]
+                return description, rows
+        except Exception as e:
+            error = str(e).replace("\n", " ").strip()
+            self._raise_query_error(e)
+        finally:
+            self._record_query(query, start, executed, rows, error)
+    
+    def iter_query_tuples(self, query: str, params: tuple = None,
+                          batch_size: int = DB_STREAM_FETCH_ROWS) -> Iterator[Tuple[List[Tuple[str, int]], List[tuple]]]:
+        """
+        用服务端游标分批读取，逐批返回 (列描述, 元组行)
+        
+        结果集不会一次取回客户端，内存占用只与批大小有关。服务端游标需要在事务中使用
+        （如 snapshot() 内），读完或生成器关闭时游标随之关闭。
+        
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            batch_size: 每批行数
+        
+        Yields:
+            ([(列名, 类型OID), ...], [元组行, ...])
+        """
+        if not self.is_connected():
+            raise ConnectionError("数据库未连接")
+        self._check_snapshot_owner()
+        self._check_cancelled()
+        
+        start = time.perf_counter()
+        executed = start
+        busy = 0.0  # 只累计 execute/fetchmany 的耗时，不含调用方处理各批的时间
+        row_count = 0
+        byte_count = 0
+        error = None
+        self._stream_seq += 1
+        try:
+            with self.connection.cursor(name=f"lce_stream_{self._stream_seq}") as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(query, params)
+                busy = time.perf_counter() - start
+                while True:
+                    fetch_start = time.perf_counter()
+                    rows = cursor.fetchmany(batch_size)
+                    fetch_end = time.perf_counter()
+                    busy += fetch_end - fetch_start
+                    if executed == start:
+                        executed = fetch_end
+                    if not rows:
+                        break
+                    row_count += len(rows)
+                    byte_count += estimate_rows_bytes(rows)
+                    description = [(col[0], col[1]) for col in (cursor.description or [])]
+                    yield description, rows
+                    self._check_cancelled()
+        except OperationCancelled:
+            raise
+        except Exception as e:
+            error = str(e).replace("\n", " ").strip()
+            self._raise_query_error(e)
+        finally:
+            if executed == start:
+                # execute 失败或未取到第一批
+                busy = time.perf_counter() - start
+            self._record_query(query, start, executed, [], error, row_count, byte_count, busy)
+    
+    def _fetch(self, query: str, params: tuple = None, as_tuples: bool = False, stream: bool = False):
+        """按需返回字典行、(列描述, 元组行) 或分批的 (列描述, 元组行) 迭代器"""
+        if stream:
+            return self.iter_query_tuples(query, params)
+        if as_tuples:
+            return self.execute_query_tuples(query, params)
+        return self.execute_query(query, params)
+    
+    def execute_command(self, command: str, params: tuple = None, autocommit: bool = False) -> int:
+        """
+        执行不返回结果集的语句（如 CREATE INDEX）
+
+        Args:
+            command: SQL语句
+            params: 参数
+            autocommit: 是否在自动提交模式下执行（CREATE INDEX CONCURRENTLY 需要）
+
+        Returns:
+            受影响的行数
+        """
+        if not self.is_connected():
+            raise ConnectionError("数据库未连接")
+        self._check_snapshot_owner()
+        self._check_cancelled()
+
+        start = time.perf_counter()
+        error = None
+        old_autocommit = self.connection.autocommit
+        try:
+            if autocommit:
+                # 切换自动提交前必须结束当前事务
+                self.connection.rollback()
+                self.connection.autocommit = True
+            with self.connection.cursor() as cursor:
+                cursor.execute(command, params)
+                rowcount = cursor.rowcount
+            if not self.connection.autocommit:
+                self.connection.commit()
+            return rowcount
+        except Exception as e:
+            error = str(e).replace("\n", " ").strip()
+            if not self.connection.autocommit:
+                self.connection.rollback()
+            if self._is_cancel_error(e):
+                self.log("语句已取消", "WARNING")
+                raise OperationCancelled("语句已取消") from e
+            self.log(f"语句执行失败: {str(e)}", "ERROR")
+            raise
+        finally:
+            if autocommit:
+                self.connection.autocommit = old_autocommit
+            self._record_query(command, start, time.perf_counter(), [], error)
+
+    # ==================== 取消与超时 ====================
+    
+    def _current_token(self) -> Optional[CancelToken]:
+        """获取当前线程所属操作的取消令牌"""
+        return getattr(self._local, "cancel_token", None)
+    
+    def _check_cancelled(self):
+        """当前操作已取消时不再发出新的查询"""
+        token = self._current_token()
+        if token is not None:
+            token.raise_if_cancelled()
+    
+    def _is_cancel_error(self, error: Exception) -> bool:
+        """是否为当前操作被用户取消导致的错误（57014 query_canceled）"""
+        token = self._current_token()
+        return (getattr(error, "pgcode", None) == "57014"
+                and token is not None and token.is_cancelled)
+    
+    def _raise_query_error(self, error: Exception):
+        """
+        处理查询错误：回滚中止的事务，使连接可以继续使用；
+        用户取消导致的错误转换为 OperationCancelled
+        """
+        if self.is_connected() and not self.connection.autocommit:
+            try:
+                self.connection.rollback()
+            except Exception:
+                pass
+            if self._snapshot_depth and not self._is_cancel_error(error):
+                # 回滚同时结束了快照事务，之后的查询不再保证一致
+                self._snapshot_lost = True
+        if self._is_cancel_error(error):
+            self.log("查询已取消", "WARNING")
+            raise OperationCancelled("查询已取消") from error
+        if getattr(error, "pgcode", None) == "57014":
+            self.log(f"查询超时: {str(error)}", "ERROR")
+        else:
+            self.log(f"查询执行失败: {str(error)}", "ERROR")
+        raise error
+    
+    def cancel(self) -> bool:
+        """
+        取消连接上正在执行的语句（可从任意线程调用）
+        
+        优先使用 libpq 的取消请求（connection.cancel），
+        失败时通过独立连接执行 pg_cancel_backend。
+        
+        Returns:
+            是否已发送取消请求
+        """
+        if not self.is_connected():
+            return False
+        try:
+            self.connection.cancel()
+            self.log("已向服务器发送取消请求", "INFO")
+            return True
         except Exception as e:
-            self.log(f"查询执行失败: {str(e)}", "ERROR")
+            self.log(f"取消请求失败，改用 pg_cancel_backend: {str(e)}", "DEBUG")
+        return self._cancel_backend()
+    
+    def _cancel_backend(self) -> bool:
+        """通过独立连接执行 pg_cancel_backend"""
+        if not self.backend_pid:
+            return False
+        psycopg2 = self._import_psycopg2()
+        conn = None
+        try:
+            conn = psycopg2.connect(**self._connection_params(connect_timeout=5))
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT pg_cancel_backend(%s)", (self.backend_pid,))
+                cancelled = bool(cursor.fetchone()[0])
+            self.log(f"pg_cancel_backend({self.backend_pid}): {cancelled}", "INFO")
+            return cancelled
+        except Exception as e:
+            self.log(f"pg_cancel_backend 失败: {str(e)}", "WARNING")
+            return False
+        finally:
+            if conn is not None:
+                conn.close()
+    
+    def _set_statement_timeout(self, value: str) -> str:
+        """
+        设置会话级 statement_timeout
+        
+        Args:
+            value: 超时设置（毫秒数或带单位的字符串，"0" 表示不限制）
+        
+        Returns:
+            原来的设置
+        """
+        self._check_snapshot_owner()
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT current_setting('statement_timeout'), set_config('statement_timeout', %s, false)",
+                (value,)
+            )
+            previous = cursor.fetchone()[0]
+        # 提交使设置在后续事务回滚后仍然有效（快照事务中不能提交，随快照结束一起提交）
+        if not self.connection.autocommit and not self._snapshot_depth:
+            self.connection.commit()
+        return previous
+    
+    @contextmanager
+    def operation(self, cancel_token: Optional[CancelToken] = None,
+                  statement_timeout_ms: Optional[int] = None):
+        """
+        在可取消的操作上下文中执行查询
+        
+        - 上下文内当前线程发出的查询会检查取消令牌，令牌取消后不再发出新查询
+        - 令牌取消时立即向服务器发送取消请求，正在执行的查询以 OperationCancelled 结束
+        - statement_timeout_ms 为本次操作设置单条语句超时，退出时恢复原设置
+        
+        Args:
+            cancel_token: 取消令牌
+            statement_timeout_ms: 单条语句超时（毫秒），None 表示不修改
+        """
+        previous_token = self._current_token()
+        self._local.cancel_token = cancel_token
+        callback = cancel_token.add_callback(self.cancel) if cancel_token else None
+        previous_timeout = None
+        try:
+            if statement_timeout_ms is not None and self.is_connected():
+                previous_timeout = self._set_statement_timeout(str(int(statement_timeout_ms)))
+            yield self
+        finally:
+            if callback:
+                cancel_token.remove_callback(callback)
+            self._local.cancel_token = previous_token
+            if previous_timeout is not None and self.is_connected():
+                try:
+                    self._set_statement_timeout(previous_timeout)
+                except Exception as e:
+                    self.log(f"恢复 statement_timeout 失败: {str(e)}", "DEBUG")
+    
+    # ==================== 一致性快照 ====================
+    
+    @property
+    def in_snapshot(self) -> bool:
+        """当前是否处于一致性快照事务中"""
+        return self._snapshot_depth > 0
+    
+    def _check_snapshot_owner(self):
+        """
+        其他线程的快照事务进行中时拒绝查询
+        
+        事务属于连接而不是线程：其他线程的查询会加入快照事务，
+        出错回滚或提交都会提前结束它，正在读取的服务端游标随之失效。
+        """
+        owner = self._snapshot_owner
+        if owner is not None and owner != threading.get_ident():
+            raise ConnectionError("连接正被其他线程的一致性快照导出占用，请等待导出完成")
+    
+    @contextmanager
+    def snapshot(self, snapshot_id: Optional[str] = None, export: bool = False):
+        """
+        在一致性快照中执行多条查询
+        
+        上下文内的查询运行在同一个 REPEATABLE READ READ ONLY DEFERRABLE 事务中，
+        只看到事务开始时刻的数据，导出期间的新写入不会造成"消息所属主题缺失"之类的不一致。
+        同一线程的嵌套调用复用外层快照；快照期间其他线程不能使用本连接
+        （见 _check_snapshot_owner，并行导出请使用 clone() 的独立连接）；
+        ENABLE_SNAPSHOT_EXPORT 关闭时不做任何事。
+        
+        Args:
+            snapshot_id: 导入其他连接导出的快照（SET TRANSACTION SNAPSHOT），
+                         并行读取的多个连接由此看到同一时刻的数据
+            export: 是否导出本快照（pg_export_snapshot）供其他连接导入，
+                    导出的快照在本上下文退出前有效
+        
+        Yields:
+            快照ID（export=True 时为导出的ID，否则为传入的 snapshot_id）
+        """
+        if not ENABLE_SNAPSHOT_EXPORT or not self.is_connected():
+            yield snapshot_id
+            return
+        
+        with self._snapshot_lock:
+            self._check_snapshot_owner()
+            nested = self._snapshot_depth > 0
+            # 先占用连接，建立快照期间其他线程的查询同样被拒绝
+            self._snapshot_owner = threading.get_ident()
+            self._snapshot_depth += 1
+        
+        if nested:
+            try:
+                yield self._snapshot_id
+            finally:
+                self._snapshot_depth -= 1
+            return
+        
+        # 快照设置必须是事务中的第一条语句，先结束当前事务
+        try:
+            self.connection.rollback()
+            with self.connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY DEFERRABLE")
+                if snapshot_id:
+                    cursor.execute("SET TRANSACTION SNAPSHOT %s", (snapshot_id,))
+                if export:
+                    cursor.execute("SELECT pg_export_snapshot()")
+                    snapshot_id = cursor.fetchone()[0]
+        except Exception as e:
+            self.connection.rollback()
+            self._snapshot_depth = 0
+            self._snapshot_owner = None
+            self.log(f"建立一致性快照失败: {str(e)}", "WARNING")
             raise
+        
+        self._snapshot_id = snapshot_id
+        self._snapshot_lost = False
+        self.log(f"已建立一致性快照{f' ({snapshot_id})' if snapshot_id else ''}", "DEBUG")
+        try:
+            yield snapshot_id
+        finally:
+            self._snapshot_id = None
+            if self._snapshot_lost:
+                self.log("快照事务因查询错误提前结束，部分数据可能不是同一时刻的", "WARNING")
+            try:
+                if self.is_connected():
+                    try:
+                        # 只读事务，提交仅用于结束事务并保留其中的会话设置
+                        self.connection.commit()
+                    except Exception:
+                        self.connection.rollback()
+            finally:
+                # 事务结束后才释放连接
+                self._snapshot_depth = 0
+                self._snapshot_owner = None
+    
+    def _record_query(self, query: str, start: float, executed: float,
+                      rows: List, error: Optional[str],
+                      row_count: Optional[int] = None, byte_count: Optional[int] = None,
+                      busy: Optional[float] = None):
+        """
+        记录查询统计
+        
+        psycopg2 普通游标在 execute() 时即取回全部结果，
+        因此 execute 阶段耗时视为服务器耗时（含网络传输），
+        其后的 fetch/转换阶段为客户端耗时。
+        服务端游标（iter_query_tuples）以取回第一批为服务器耗时，行数和数据量由调用方累计后传入；
+        busy 为其 execute/fetchmany 的累计耗时（秒），作为总耗时，不计入调用方处理各批的时间。
+        """
+        if not self.query_stats.enabled:
+            return
+        end = time.perf_counter()
+        server = executed - start
+        wall = end - start if busy is None else max(busy, server)
+        try:
+            self.query_stats.record(QueryRecord(
+                query=query,
+                call_site=get_call_site(),
+                wall_ms=wall * 1000,
+                server_ms=server * 1000,
+                fetch_ms=(wall - server) * 1000 if executed > start else 0.0,
+                rows=len(rows) if row_count is None else row_count,
+                bytes=estimate_rows_bytes(rows) if byte_count is None else byte_count,
+                error=error
+            ))
+        except Exception as e:
+            self.log(f"记录查询统计失败: {str(e)}", "DEBUG")
     
     def get_table_count(self, table_name: str) -> int:
         """获取表的行数"""
@@ -150,8 +624,10 @@ class PostgreSQLConnector:
         return result[0]["count"] if result else 0
     
     # ==================== 数据获取方法 ====================
+    # as_tuples=True 时返回 (列描述, 元组行)，配合 core.row_converter 使用；
+    # stream=True 时用服务端游标分批返回 (列描述, 元组行) 的迭代器（见 iter_query_tuples）
     
-    def get_all_agents(self, user_id: str = None) -> List[Dict]:
+    def get_all_agents(self, user_id: str = None, as_tuples: bool = False, stream: bool = False) -> List[Dict]:
         """获取所有助手"""
         query = "SELECT * FROM agents"
         params = None
@@ -159,9 +635,9 @@ class PostgreSQLConnector:
             query += " WHERE user_id = %s"
             params = (user_id,)
         query += " ORDER BY created_at"
-        return self.execute_query(query, params)
+        return self._fetch(query, params, as_tuples, stream)
     
-    def get_all_sessions(self, user_id: str = None) -> List[Dict]:
+    def get_all_sessions(self, user_id: str = None, as_tuples: bool = False, stream: bool = False) -> List[Dict]:
         """获取所有会话"""
         query = "SELECT * FROM sessions"
         params = None
@@ -169,9 +645,9 @@ class PostgreSQLConnector:
             query += " WHERE user_id = %s"
             params = (user_id,)
         query += " ORDER BY created_at"
-        return self.execute_query(query, params)
+        return self._fetch(query, params, as_tuples, stream)
     
-    def get_all_topics(self, user_id: str = None) -> List[Dict]:
+    def get_all_topics(self, user_id: str = None, as_tuples: bool = False, stream: bool = False) -> List[Dict]:
         """获取所有主题"""
         query = "SELECT * FROM topics"
         params = None
@@ -179,9 +655,9 @@ class PostgreSQLConnector:
             query += " WHERE user_id = %s"
             params = (user_id,)
         query += " ORDER BY created_at"
-        return self.execute_query(query, params)
+        return self._fetch(query, params, as_tuples, stream)
     
-    def get_all_messages(self, user_id: str = None) -> List[Dict]:
+    def get_all_messages(self, user_id: str = None, as_tuples: bool = False, stream: bool = False) -> List[Dict]:
         """获取所有消息"""
         query = "SELECT * FROM messages"
         params = None
@@ -189,18 +665,18 @@ class PostgreSQLConnector:
             query += " WHERE user_id = %s"
             params = (user_id,)
         query += " ORDER BY created_at"
-        return self.execute_query(query, params)
+        return self._fetch(query, params, as_tuples, stream)
     
-    def get_agents_to_sessions(self, user_id: str = None) -> List[Dict]:
+    def get_agents_to_sessions(self, user_id: str = None, as_tuples: bool = False, stream: bool = False) -> List[Dict]:
         """获取助手与会话的关联"""
         query = "SELECT * FROM agents_to_sessions"
         params = None
         if user_id:
             query += " WHERE user_id = %s"
             params = (user_id,)
-        return self.execute_query(query, params)
+        return self._fetch(query, params, as_tuples, stream)
     
-    def get_all_ai_models(self, user_id: str = None) -> List[Dict]:
+    def get_all_ai_models(self, user_id: str = None, as_tuples: bool = False, stream: bool = False) -> List[Dict]:
         """获取所有AI模型"""
         query = "SELECT * FROM ai_models"
         params = None
@@ -208,9 +684,9 @@ class PostgreSQLConnector:
             query += " WHERE user_id = %s"
             params = (user_id,)
         query += " ORDER BY sort, id"
-        return self.execute_query(query, params)
+        return self._fetch(query, params, as_tuples, stream)
     
-    def get_all_ai_providers(self, user_id: str = None) -> List[Dict]:
+    def get_all_ai_providers(self, user_id: str = None, as_tuples: bool = False, stream: bool = False) -> List[Dict]:
         """获取所有AI提供商"""
         query = "SELECT * FROM ai_providers"
         params = None
@@ -218,18 +694,18 @@ class PostgreSQLConnector:
             query += " WHERE user_id = %s"
             params = (user_id,)
         query += " ORDER BY sort, id"
-        return self.execute_query(query, params)
+        return self._fetch(query, params, as_tuples, stream)
     
-    def get_user_settings(self, user_id: str = None) -> List[Dict]:
+    def get_user_settings(self, user_id: str = None, as_tuples: bool = False, stream: bool = False) -> List[Dict]:
         """获取用户设置"""
         query = "SELECT * FROM user_settings"
         params = None
         if user_id:
             query += " WHERE id = %s"
             params = (user_id,)
-        return self.execute_query(query, params)
+        return self._fetch(query, params, as_tuples, stream)
     
-    def get_session_groups(self, user_id: str = None) -> List[Dict]:
+    def get_session_groups(self, user_id: str = None, as_tuples: bool = False, stream: bool = False) -> List[Dict]:
         """获取会话分组"""
         query = "SELECT * FROM session_groups"
         params = None
@@ -237,43 +713,43 @@ class PostgreSQLConnector:
             query += " WHERE user_id = %s"
             params = (user_id,)
         query += " ORDER BY sort"
-        return self.execute_query(query, params)
+        return self._fetch(query, params, as_tuples, stream)
     
-    def get_message_plugins(self, user_id: str = None) -> List[Dict]:
+    def get_message_plugins(self, user_id: str = None, as_tuples: bool = False, stream: bool = False) -> List[Dict]:
         """获取消息插件"""
         query = "SELECT * FROM message_plugins"
         params = None
         if user_id:
             query += " WHERE user_id = %s"
             params = (user_id,)
-        return self.execute_query(query, params)
+        return self._fetch(query, params, as_tuples, stream)
     
-    def get_message_translates(self, user_id: str = None) -> List[Dict]:
+    def get_message_translates(self, user_id: str = None, as_tuples: bool = False, stream: bool = False) -> List[Dict]:
         """获取消息翻译"""
         query = "SELECT * FROM message_translates"
         params = None
         if user_id:
             query += " WHERE user_id = %s"
             params = (user_id,)
-        return self.execute_query(query, params)
+        return self._fetch(query, params, as_tuples, stream)
     
-    def get_threads(self, user_id: str = None) -> List[Dict]:
+    def get_threads(self, user_id: str = None, as_tuples: bool = False, stream: bool = False) -> List[Dict]:
         """获取对话线程"""
         query = "SELECT * FROM threads"
         params = None
         if user_id:
             query += " WHERE user_id = %s"
             params = (user_id,)
-        return self.execute_query(query, params)
+        return self._fetch(query, params, as_tuples, stream)
     
-    def get_user_installed_plugins(self, user_id: str = None) -> List[Dict]:
+    def get_user_installed_plugins(self, user_id: str = None, as_tuples: bool = False, stream: bool = False) -> List[Dict]:
         """获取用户安装的插件"""
         query = "SELECT * FROM user_installed_plugins"
         params = None
         if user_id:
             query += " WHERE user_id = %s"
             params = (user_id,)
-        return self.execute_query(query, params)
+        return self._fetch(query, params, as_tuples, stream)
     
     def get_all_users(self) -> List[Dict]:
         """获取所有用户"""
@@ -1,7 +1,10 @@
 from collections import defaultdict
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Iterator, Optional, TextIO, Tuple
 from datetime import datetime
 from .db_connector import PostgreSQLConnector, DBConfig
+from .row_converter import RowConverter, snake_to_camel
+from ..config import JSON_EXPORT_COMPACT
+from ..utils.json_stream import write_export_json
 
 
 class DatabaseParser:
@@ -53,41 +56,176 @@ class DatabaseParser:
     
     def _snake_to_camel(self, snake_str: str) -> str:
         """将下划线命名转换为驼峰命名"""
-        components = snake_str.split('_')
-        return components[0] + ''.join(x.title() for x in components[1:])
+        return snake_to_camel(snake_str)
     
-    def parse(self, user_id: str = None) -> Dict:
+    def _fetch_converted(self, fetch_method, user_id: str = None) -> List[Dict]:
+        """
+        以元组行读取数据并用编译后的行转换器转换
+        
+        Args:
+            fetch_method: 连接器的 get_* 方法
+            user_id: 用户ID
+        
+        Returns:
+            驼峰键名的字典列表
+        """
+        description, rows = fetch_method(user_id, as_tuples=True)
+        converter = RowConverter.from_description(description)
+        return converter.convert_all(rows)
+    
+    def _iter_converted(self, fetch_method, user_id: str = None) -> Iterator[Dict]:
+        """
+        用服务端游标分批读取并逐行转换（转换器按第一批的列描述编译一次）
+        
+        Args:
+            fetch_method: 连接器的 get_* 方法
+            user_id: 用户ID
+        
+        Yields:
+            驼峰键名的字典
+        """
+        converter = None
+        for description, rows in fetch_method(user_id, stream=True):
+            if converter is None:
+                converter = RowConverter.from_description(description)
+            yield from converter.convert_all(rows)
+    
+    def iter_raw_modules(self, user_id: str = None) -> Iterator[Tuple[str, Any]]:
+        """
+        按原始数据（raw）的模块顺序逐个生成 (模块键, 行迭代器)，行直接来自数据库游标
+        
+        需要在 connector.snapshot() 中使用；每个模块的游标在写到它时才打开。
+        
+        Args:
+            user_id: 用户ID
+        """
+        yield "userSettings", []
+        yield "aiProviders", self._iter_converted(self.connector.get_all_ai_providers, user_id)
+        yield "aiModels", self._iter_converted(self.connector.get_all_ai_models, user_id)
+        yield "agents", self._iter_converted(self.connector.get_all_agents, user_id)
+        yield "sessions", self._iter_converted(self.connector.get_all_sessions, user_id)
+        yield "sessionGroups", []
+        yield "topics", self._iter_converted(self.connector.get_all_topics, user_id)
+        yield "messages", self._iter_converted(self.connector.get_all_messages, user_id)
+        yield "messageBlocks", []
+        yield "messagePlugins", []
+        yield "messageTranslates", []
+        yield "threads", []
+        yield "agentsToSessions", self._iter_converted(self.connector.get_agents_to_sessions, user_id)
+        yield "userInstalledPlugins", []
+    
+    def export_raw_json(self, f: TextIO, user_id: str = None, snapshot_id: str = None,
+                        compact: bool = JSON_EXPORT_COMPACT) -> Dict[str, int]:
+        """
+        直接从数据库游标流式写出原始数据JSON（内容与 parse() 的 raw 相同，不在内存中构建数据）
+        
+        Args:
+            f: 文本文件对象
+            user_id: 用户ID，如果指定则只导出该用户的数据
+            snapshot_id: 导入的快照ID
+            compact: 紧凑模式（无缩进）
+        
+        Returns:
+            各模块的行数
+        """
+        self.log("开始从数据库流式导出JSON...", "INFO")
+        with self.connector.snapshot(snapshot_id):
+            counts = write_export_json(f, "db", None, self.iter_raw_modules(user_id), compact)
+        self.log(f"✅ JSON流式导出完成 - 助手:{counts.get('agents', 0)}, 会话:{counts.get('sessions', 0)}, "
+                 f"主题:{counts.get('topics', 0)}, 消息:{counts.get('messages', 0)}", "SUCCESS")
+        return counts
+    
+    def export_raw_ndjson(self, file_path, user_id: str = None, snapshot_id: str = None,
+                          max_bytes: Optional[int] = None) -> Tuple[Dict[str, int], List]:
+        """
+        直接从数据库游标流式写出 JSON Lines（每行一个实体，可分卷）
+        
+        Args:
+            file_path: 输出文件路径
+            user_id: 用户ID，如果指定则只导出该用户的数据
+            snapshot_id: 导入的快照ID
+            max_bytes: 分卷大小（字节），None 时使用配置
+        
+        Returns:
+            (各模块行数, 写出的文件列表)
+        """
+        from ..exporters.ndjson_writer import export_ndjson
+        
+        self.log("开始从数据库流式导出JSON Lines...", "INFO")
+        with self.connector.snapshot(snapshot_id):
+            counts, files = export_ndjson(
+                file_path, "db", None, self.iter_raw_modules(user_id), max_bytes, self.log_callback
+            )
+        self.log(f"✅ JSON Lines导出完成 - 消息:{counts.get('messages', 0)}, {len(files)}个文件", "SUCCESS")
+        return counts, files
+    
+    def export_parquet(self, output_dir, user_id: str = None, snapshot_id: str = None) -> Dict[str, int]:
+        """
+        直接从数据库游标按行组写出 Parquet（消息、主题、助手，只查询这三张表）
+        
+        Args:
+            output_dir: 输出目录
+            user_id: 用户ID，如果指定则只导出该用户的数据
+            snapshot_id: 导入的快照ID
+        
+        Returns:
+            各表的行数
+        """
+        from ..exporters.parquet_writer import export_parquet
+        
+        self.log("开始从数据库流式导出Parquet...", "INFO")
+        with self.connector.snapshot(snapshot_id):
+            counts = export_parquet(output_dir, self.iter_raw_modules(user_id), log_callback=self.log_callback)
+        self.log(f"✅ Parquet导出完成 - 消息:{counts.get('messages', 0)}", "SUCCESS")
+        return counts
+    
+    def export_sqlite(self, file_path, user_id: str = None, snapshot_id: str = None) -> Dict[str, int]:
+        """
+        直接从数据库游标分批写入 SQLite 文件（带索引和消息全文索引）
+        
+        Args:
+            file_path: 输出文件路径
+            user_id: 用户ID，如果指定则只导出该用户的数据
+            snapshot_id: 导入的快照ID
+        
+        Returns:
+            各模块行数
+        """
+        from ..exporters.sqlite_writer import export_sqlite
+        
+        self.log("开始从数据库流式导出SQLite...", "INFO")
+        with self.connector.snapshot(snapshot_id):
+            counts = export_sqlite(file_path, "db", None, self.iter_raw_modules(user_id), self.log_callback)
+        self.log(f"✅ SQLite导出完成 - 消息:{counts.get('messages', 0)}", "SUCCESS")
+        return counts
+    
+    def parse(self, user_id: str = None, snapshot_id: str = None) -> Dict:
         """
         从数据库解析数据
         
+        所有读取在同一个一致性快照中执行，导出期间的新写入不会破坏引用关系。
+        
         Args:
             user_id: 用户ID，如果指定则只解析该用户的数据
+            snapshot_id: 导入的快照ID（并行导出时多个连接共享同一时刻的数据）
         
         Returns:
             与JSON解析器兼容的数据结构
         """
         self.log("开始从数据库读取数据...", "INFO")
         
-        # 获取原始数据
-        raw_agents = self.connector.get_all_agents(user_id)
-        raw_sessions = self.connector.get_all_sessions(user_id)
-        raw_topics = self.connector.get_all_topics(user_id)
-        raw_messages = self.connector.get_all_messages(user_id)
-        raw_agents_to_sessions = self.connector.get_agents_to_sessions(user_id)
-        raw_ai_models = self.connector.get_all_ai_models(user_id)
-        raw_ai_providers = self.connector.get_all_ai_providers(user_id)
-        
-        self.log(f"读取到: {len(raw_agents)}个助手, {len(raw_sessions)}个会话, "
-                 f"{len(raw_topics)}个主题, {len(raw_messages)}条消息", "INFO")
-        
-        # 转换数据格式
-        agents_list = [self._convert_row(a) for a in raw_agents]
-        sessions_list = [self._convert_row(s) for s in raw_sessions]
-        topics_list = [self._convert_row(t) for t in raw_topics]
-        messages_list = [self._convert_row(m) for m in raw_messages]
-        agents_to_sessions_list = [self._convert_row(a) for a in raw_agents_to_sessions]
-        ai_models_list = [self._convert_row(m) for m in raw_ai_models]
-        ai_providers_list = [self._convert_row(p) for p in raw_ai_providers]
+        # 获取原始数据并转换格式（元组行 + 编译后的行转换器）
+        with self.connector.snapshot(snapshot_id):
+            agents_list = self._fetch_converted(self.connector.get_all_agents, user_id)
+            sessions_list = self._fetch_converted(self.connector.get_all_sessions, user_id)
+            topics_list = self._fetch_converted(self.connector.get_all_topics, user_id)
+            messages_list = self._fetch_converted(self.connector.get_all_messages, user_id)
+            agents_to_sessions_list = self._fetch_converted(self.connector.get_agents_to_sessions, user_id)
+            ai_models_list = self._fetch_converted(self.connector.get_all_ai_models, user_id)
+            ai_providers_list = self._fetch_converted(self.connector.get_all_ai_providers, user_id)
+        
+        self.log(f"读取到: {len(agents_list)}个助手, {len(sessions_list)}个会话, "
+                 f"{len(topics_list)}个主题, {len(messages_list)}条消息", "INFO")
         
         # 构建字典索引
         agents = {agent["id"]: agent for agent in agents_list}
@@ -0,0 +1,348 @@
+"""
+实体缓存
+按 ID 只保存一份行数据，按分组（如 主题→消息列表）做 LRU 淘汰，
+并统计近似内存占用和命中/未命中/淘汰次数
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, List, Optional, Iterator, Tuple
+
+from .query_stats import estimate_value_bytes
+
+
+# 单行字典的近似固定开销和每个字段的开销（字节）
+ROW_OVERHEAD_BYTES = 232
+FIELD_OVERHEAD_BYTES = 80
+
+
+def estimate_row_size(row: Dict) -> int:
+    """估算单行字典的内存占用"""
+    size = ROW_OVERHEAD_BYTES
+    for value in row.values():
+        size += FIELD_OVERHEAD_BYTES + estimate_value_bytes(value)
+    return size
+
+
+class EntityCache:
+    """
+    内存预算受控的实体缓存（线程安全）
+
+    - 行数据按 (类型, ID) 只存一份，不同查询返回的同一行会合并到同一个字典
+    - 分组（命名空间 + 键）引用行数据，超出预算时按最近最少使用淘汰分组
+    - 固定集合（pin）用于"全部加载"等显式加载的数据，不参与淘汰
+    """
+
+    def __init__(self, budget_bytes: int, log_callback: Optional[callable] = None):
+        """
+        初始化实体缓存
+
+        Args:
+            budget_bytes: 可淘汰分组的内存预算（字节）
+            log_callback: 日志回调函数
+        """
+        self.budget_bytes = budget_bytes
+        self.log_callback = log_callback
+        self._lock = threading.RLock()
+        # {(kind, id): [row, size, refcount]}
+        self._rows: Dict[Tuple[str, str], list] = {}
+        # {(namespace, key): (kind, [ids], bytes)}，按访问顺序排列
+        self._groups: "OrderedDict[Tuple[str, str], Tuple[str, List[str], int]]" = OrderedDict()
+        # {name: (kind, [ids])}
+        self._pinned: Dict[str, Tuple[str, List[str]]] = {}
+        self._group_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def log(self, message: str, level: str = "INFO"):
+        """记录日志"""
+        if self.log_callback:
+            self.log_callback(message, level)
+
+    # ==================== 行存储 ====================
+
+    @staticmethod
+    def _merge_row(existing: Dict, new: Dict, preview_fields: Iterable[str] = ()):
+        """
+        合并同一行的新数据
+
+        不同查询的列不同，合并时 None 不覆盖已有值；
+        preview_fields 中的列是截断的预览（如分批加载只取 LEFT(content, 200)），
+        是已缓存字符串的前缀时不覆盖完整值。其他列总是使用新值（内容可能被编辑变短）。
+        """
+        for key, value in new.items():
+            if value is None and existing.get(key) is not None:
+                continue
+            if key in preview_fields:
+                old = existing.get(key)
+                if (isinstance(value, str) and isinstance(old, str)
+                        and len(value) < len(old) and old.startswith(value)):
+                    continue
+            existing[key] = value
+
+    def _intern(self, kind: str, row: Dict, preview_fields: Iterable[str] = ()) -> Tuple[str, Dict]:
+        """登记一行并返回 (id, 规范行)，引用计数加一"""
+        row_id = row.get("id")
+        if row_id is None:
+            row_id = f"__anon_{id(row)}"
+        key = (kind, row_id)
+        entry = self._rows.get(key)
+        if entry is None:
+            entry = [row, estimate_row_size(row), 0]
+            self._rows[key] = entry
+        elif entry[0] is not row:
+            self._merge_row(entry[0], row, preview_fields)
+            entry[1] = estimate_row_size(entry[0])
+        entry[2] += 1
+        return row_id, entry[0]
+
+    def _release(self, kind: str, ids: List[str]):
+        """引用计数减一，无引用的行被释放"""
+        for row_id in ids:
+            key = (kind, row_id)
+            entry = self._rows.get(key)
+            if entry is None:
+                continue
+            entry[2] -= 1
+            if entry[2] <= 0:
+                del self._rows[key]
+
+    def _group_size(self, kind: str, ids: List[str]) -> int:
+        """计算分组引用的行数据大小"""
+        size = 0
+        for row_id in ids:
+            entry = self._rows.get((kind, row_id))
+            if entry:
+                size += entry[1]
+        return size
+
+    # ==================== 分组（可淘汰） ====================
+
+    def put_group(self, namespace: str, key: str, kind: str, rows: List[Dict],
+                  preview_fields: Iterable[str] = ()) -> List[Dict]:
+        """
+        缓存一个分组
+
+        Args:
+            namespace: 命名空间（如 "messages"）
+            key: 分组键（如 topic_id）
+            kind: 行类型（如 "message"）
+            rows: 行数据列表
+            preview_fields: 行中截断为预览的列（见 _merge_row）
+
+        Returns:
+            规范行列表（与缓存共享同一批字典）
+        """
+        with self._lock:
+            ids = []
+            canonical = []
+            for row in rows:
+                row_id, row = self._intern(kind, row, preview_fields)
+                ids.append(row_id)
+                canonical.append(row)
+            # 先登记新行再释放旧分组，避免同一行被释放后重建
+            self.pop_group(namespace, key)
+            size = self._group_size(kind, ids)
+            self._groups[(namespace, key)] = (kind, ids, size)
+            self._group_bytes += size
+            self._evict((namespace, key))
+            return canonical
+
+    def _materialize(self, kind: str, ids: List[str]) -> List[Dict]:
+        """根据ID列表取回规范行"""
+        rows = []
+        for row_id in ids:
+            entry = self._rows.get((kind, row_id))
+            if entry:
+                rows.append(entry[0])
+        return rows
+
+    def get_group(self, namespace: str, key: str, touch: bool = True) -> Optional[List[Dict]]:
+        """
+        读取分组
+
+        Args:
+            namespace: 命名空间
+            key: 分组键
+            touch: 是否计入命中统计并刷新LRU顺序
+
+        Returns:
+            行列表，不存在时返回 None
+        """
+        with self._lock:
+            group = self._groups.get((namespace, key))
+            if group is None:
+                if touch:
+                    self.misses += 1
+                return None
+            if touch:
+                self.hits += 1
+                self._groups.move_to_end((namespace, key))
+            return self._materialize(group[0], group[1])
+
+    def has_group(self, namespace: str, key: str) -> bool:
+        """分组是否存在（不影响统计）"""
+        with self._lock:
+            return (namespace, key) in self._groups
+
+    def pop_group(self, namespace: str, key: str) -> bool:
+        """移除分组"""
+        with self._lock:
+            group = self._groups.pop((namespace, key), None)
+            if group is None:
+                return False
+            kind, ids, size = group
+            self._group_bytes -= size
+            self._release(kind, ids)
+            return True
+
+    def group_keys(self, namespace: str) -> List[str]:
+        """获取命名空间下的所有分组键"""
+        with self._lock:
+            return [k for (ns, k) in self._groups.keys() if ns == namespace]
+
+    def clear_namespace(self, namespace: str):
+        """清空命名空间"""
+        with self._lock:
+            for key in self.group_keys(namespace):
+                self.pop_group(namespace, key)
+
+    def _evict(self, protect: Tuple[str, str] = None):
+        """超出预算时淘汰最近最少使用的分组"""
+        if not self.budget_bytes:
+            return
+        evicted = 0
+        while self._group_bytes > self.budget_bytes:
+            # 刚写入的分组不淘汰
+            oldest = next((k for k in self._groups if k != protect), None)
+            if oldest is None:
+                break
+            self.pop_group(*oldest)
+            evicted += 1
+        if evicted:
+            self.evictions += evicted
+            self.log(f"缓存超出预算，已淘汰{evicted}个分组", "DEBUG")
+
+    # ==================== 固定集合（不淘汰） ====================
+
+    def pin(self, name: str, kind: str, rows: List[Dict],
+            preview_fields: Iterable[str] = ()) -> List[Dict]:
+        """
+        登记固定集合（替换同名集合），行数据与分组共享
+
+        Args:
+            name: 集合名称
+            kind: 行类型
+            rows: 行数据列表
+            preview_fields: 行中截断为预览的列（见 _merge_row）
+
+        Returns:
+            规范行列表
+        """
+        with self._lock:
+            ids = []
+            canonical = []
+            for row in rows:
+                row_id, row = self._intern(kind, row, preview_fields)
+                ids.append(row_id)
+                canonical.append(row)
+            self.unpin(name)
+            self._pinned[name] = (kind, ids)
+            return canonical
+
+    def unpin(self, name: str):
+        """释放固定集合"""
+        with self._lock:
+            pinned = self._pinned.pop(name, None)
+            if pinned:
+                self._release(*pinned)
+
+    # ==================== 统计 ====================
+
+    def namespace(self, namespace: str, kind: str) -> "CacheNamespace":
+        """获取命名空间的字典视图"""
+        return CacheNamespace(self, namespace, kind)
+
+    def clear(self):
+        """清空全部缓存（保留统计计数）"""
+        with self._lock:
+            self._rows.clear()
+            self._groups.clear()
+            self._pinned.clear()
+            self._group_bytes = 0
+
+    def get_stats(self) -> Dict:
+        """获取缓存统计"""
+        with self._lock:
+            total_bytes = sum(entry[1] for entry in self._rows.values())
+            lookups = self.hits + self.misses
+            return {
+                "rows": len(self._rows),
+                "groups": len(self._groups),
+                "groupBytes": self._group_bytes,
+                "totalBytes": total_bytes,
+                "budgetBytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+class CacheNamespace(MutableMapping):
+    """
+    实体缓存命名空间的字典视图
+
+    兼容原来 {topic_id: [messages]} 形式的用法；
+    下标读取计入命中并刷新LRU，items()/values() 遍历不影响统计。
+    """
+
+    def __init__(self, cache: EntityCache, namespace: str, kind: str):
+        self._cache = cache
+        self._namespace = namespace
+        self._kind = kind
+
+    def __getitem__(self, key):
+        rows = self._cache.get_group(self._namespace, key)
+        if rows is None:
+            raise KeyError(key)
+        return rows
+
+    def __setitem__(self, key, rows):
+        self._cache.put_group(self._namespace, key, self._kind, rows)
+
+    def __delitem__(self, key):
+        if not self._cache.pop_group(self._namespace, key):
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return self._cache.has_group(self._namespace, key)
+
+    def __iter__(self) -> Iterator:
+        return iter(self._cache.group_keys(self._namespace))
+
+    def __len__(self) -> int:
+        return len(self._cache.group_keys(self._namespace))
+
+    def put(self, key, rows: List[Dict]) -> List[Dict]:
+        """写入分组并返回规范行列表"""
+        return self._cache.put_group(self._namespace, key, self._kind, rows)
+
+    def replace(self, groups: Dict[str, List[Dict]], preview_fields: Iterable[str] = ()):
+        """用新的分组整体替换命名空间内容（preview_fields 见 EntityCache._merge_row）"""
+        self._cache.clear_namespace(self._namespace)
+        for key, rows in groups.items():
+            self._cache.put_group(self._namespace, key, self._kind, rows, preview_fields)
+
+    def items(self):
+        result = []
+        for key in self._cache.group_keys(self._namespace):
+            rows = self._cache.get_group(self._namespace, key, touch=False)
+            if rows is not None:
+                result.append((key, rows))
+        return result
+
+    def values(self):
+        return [rows for _, rows in self.items()]
@@ -0,0 +1,152 @@
+"""
+导出进度
+后台导出任务执行期间登记一个全局的进度记录：写文件的公共函数（file_utils、导出清单、压缩包、并行写出器）
+在写出时累计文件数和字节数，并在导出线程中检查取消；没有导出任务时这些调用不做任何事
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Optional, Tuple
+
+from .cancellation import CancelToken, OperationCancelled
+
+
+class ExportProgress:
+    """单个导出任务的进度（文件数、字节数、速度）和取消令牌"""
+
+    def __init__(self, cancel_token: Optional[CancelToken] = None, rate_window: float = 5.0):
+        """
+        初始化进度记录
+
+        Args:
+            cancel_token: 取消令牌
+            rate_window: 计算当前速度的时间窗口（秒）
+        """
+        self.cancel_token = cancel_token or CancelToken()
+        self.rate_window = rate_window
+        self.files = 0
+        self.bytes = 0
+        self.status = ""
+        self.started = time.monotonic()
+        self.thread_id: Optional[int] = None  # 导出线程（只在该线程中因取消抛出异常）
+        self._lock = threading.Lock()
+        self._samples = deque([(self.started, 0, 0)])  # (时间, 文件数, 字节数)
+
+    def start(self):
+        """任务开始执行：从此刻起计算耗时和速度（不计排队等待的时间）"""
+        with self._lock:
+            self.started = time.monotonic()
+            self._samples = deque([(self.started, self.files, self.bytes)])
+
+    def add(self, files: int = 0, nbytes: int = 0):
+        """累计写出的文件数和字节数（可在写出线程中调用）"""
+        with self._lock:
+            self.files += files
+            self.bytes += nbytes
+
+    def raise_if_cancelled(self):
+        """在导出线程中检查取消"""
+        if self.cancel_token.is_cancelled and threading.get_ident() == self.thread_id:
+            raise OperationCancelled("导出已取消")
+
+    def rates(self) -> Tuple[float, float]:
+        """
+        最近时间窗口内的速度（主线程定时调用）
+
+        Returns:
+            (文件/秒, 字节/秒)
+        """
+        now = time.monotonic()
+        with self._lock:
+            files, nbytes = self.files, self.bytes
+        self._samples.append((now, files, nbytes))
+        while len(self._samples) > 2 and now - self._samples[1][0] >= self.rate_window:
+            self._samples.popleft()
+        start, start_files, start_bytes = self._samples[0]
+        elapsed = now - start
+        if elapsed <= 0:
+            return 0.0, 0.0
+        return (files - start_files) / elapsed, (nbytes - start_bytes) / elapsed
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+
+def format_bytes(nbytes: float) -> str:
+    """字节数 → 可读文本"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if nbytes < 1024 or unit == "GB":
+            return f"{nbytes:,.0f} {unit}" if unit == "B" else f"{nbytes:,.1f} {unit}"
+        nbytes /= 1024
+
+
+def format_duration(seconds: float) -> str:
+    """格式化时长为 mm:ss 或 h:mm:ss"""
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, secs = divmod(remainder, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes:02d}:{secs:02d}"
+
+
+# 当前执行中的导出任务（导出任务按队列依次执行，同一时间最多一个）
+_active: Optional[ExportProgress] = None
+
+
+def activate(progress: Optional[ExportProgress]):
+    """登记（或用 None 清除）当前导出任务的进度，登记时记录导出线程并开始计时"""
+    global _active
+    if progress is not None:
+        progress.thread_id = threading.get_ident()
+        progress.start()
+    _active = progress
+
+
+def active_progress() -> Optional[ExportProgress]:
+    """当前导出任务的进度，没有时为 None"""
+    return _active
+
+
+def record_bytes(nbytes: int):
+    """记录写出的字节数（由实际编码写出的一方统计），并在导出线程中检查取消"""
+    progress = _active
+    if progress is not None:
+        progress.add(nbytes=nbytes)
+        progress.raise_if_cancelled()
+
+
+def record_file(nbytes: int = 0):
+    """记录写完（或确认无需重写）的一个文件，nbytes 为尚未通过 record_bytes 记录的字节数"""
+    progress = _active
+    if progress is not None:
+        progress.add(1, nbytes)
+        progress.raise_if_cancelled()
+
+
+def check_cancelled():
+    """在导出线程中检查取消（用于没有写出动作的循环）"""
+    progress = _active
+    if progress is not None:
+        progress.raise_if_cancelled()
+
+
+def set_status(text: str):
+    """更新当前导出任务的状态文本"""
+    progress = _active
+    if progress is not None:
+        progress.status = text
+
+
+class ProgressWriter:
+    """包装文本文件对象：写入时按文件编码记录字节数并检查取消（用于直接写入文本文件的流式写出）"""
+
+    def __init__(self, f):
+        self.f = f
+        self.encoding = getattr(f, "encoding", None) or "utf-8"
+
+    def write(self, text: str):
+        self.f.write(text)
+        record_bytes(len(text.encode(self.encoding, "surrogatepass")))
@@ -0,0 +1,315 @@
+"""
+索引建议器
+对数据库标签页使用的典型查询执行 EXPLAIN (FORMAT JSON)，
+标记大表上的顺序扫描和排序，并给出覆盖索引建议
+"""
+
+import re
+import json
+from typing import Dict, List, Any, Optional, Tuple
+
+from ..config import INDEX_ADVISOR_LARGE_TABLE_ROWS, INDEX_ADVISOR_SORT_ROWS
+
+
+# 典型查询定义（与 ui/db_tab.py 的懒加载查询保持一致）
+# sample: 需要的示例参数类型; indexes: (表名, 有用户过滤时的索引列, 无用户过滤时的索引列)
+CANONICAL_QUERIES = [
+    {
+        "name": "主题消息懒加载",
+        "sql": "SELECT id, role, content, model, created_at FROM messages WHERE topic_id = %s",
+        "user_filter": " AND user_id = %s",
+        "order": " ORDER BY created_at",
+        "sample": "topic_id",
+        "indexes": [("messages", ("topic_id", "created_at"), ("topic_id", "created_at"))],
+    },
+    {
+        "name": "助手主题懒加载",
+        "sql": (
+            "SELECT t.id, t.title, t.favorite, t.created_at FROM topics t "
+            "JOIN agents_to_sessions ats ON t.session_id = ats.session_id "
+            "WHERE ats.agent_id = %s"
+        ),
+        "user_filter": " AND t.user_id = %s",
+        "order": " ORDER BY t.created_at DESC",
+        "sample": "agent_id",
+        "indexes": [
+            ("agents_to_sessions", ("agent_id", "session_id"), ("agent_id", "session_id")),
+            ("topics", ("session_id", "created_at"), ("session_id", "created_at")),
+        ],
+    },
+    {
+        "name": "默认对话",
+        "sql": (
+            "SELECT t.id, t.title, t.favorite, t.created_at FROM topics t "
+            "WHERE (t.session_id IS NULL OR NOT EXISTS ("
+            "SELECT 1 FROM agents_to_sessions ats WHERE ats.session_id = t.session_id))"
+        ),
+        "user_filter": " AND t.user_id = %s",
+        "order": " ORDER BY t.created_at DESC",
+        "sample": None,
+        "indexes": [
+            ("agents_to_sessions", ("session_id",), ("session_id",)),
+            ("topics", ("user_id", "created_at"), ("created_at",)),
+        ],
+    },
+    {
+        "name": "助手列表",
+        "sql": "SELECT id, title, slug, model, provider, created_at FROM agents WHERE TRUE",
+        "user_filter": " AND user_id = %s",
+        "order": " ORDER BY created_at DESC",
+        "sample": None,
+        "indexes": [("agents", ("user_id", "created_at"), ("created_at",))],
+    },
+    {
+        "name": "主题分批加载",
+        "sql": "SELECT id, title, session_id, created_at FROM topics WHERE TRUE",
+        "user_filter": " AND user_id = %s",
+        "order": " ORDER BY created_at DESC, id DESC LIMIT 100",
+        "sample": None,
+        "indexes": [("topics", ("user_id", "created_at"), ("created_at",))],
+    },
+    {
+        "name": "消息分批加载",
+        "sql": "SELECT id, role, LEFT(content, 200) as content, topic_id, created_at FROM messages WHERE TRUE",
+        "user_filter": " AND user_id = %s",
+        "order": " ORDER BY created_at DESC, id DESC LIMIT 100",
+        "sample": None,
+        "indexes": [("messages", ("user_id", "created_at"), ("created_at",))],
+    },
+    {
+        "name": "用户数据过滤",
+        "sql": "SELECT id FROM sessions WHERE TRUE",
+        "user_filter": " AND user_id = %s",
+        "order": "",
+        "sample": None,
+        "user_only": True,
+        "indexes": [("sessions", ("user_id",), ("user_id",))],
+    },
+]
+
+
+def parse_index_columns(indexdef: str) -> Tuple[str, ...]:
+    """
+    从 pg_indexes.indexdef 中解析索引列
+
+    Args:
+        indexdef: 索引定义，如 "CREATE INDEX x ON public.messages USING btree (topic_id, created_at)"
+
+    Returns:
+        列名元组
+    """
+    match = re.search(r"USING\s+\w+\s*\((.*?)\)(?:\s+INCLUDE|\s+WHERE|\s*$)", indexdef)
+    if not match:
+        return ()
+    columns = []
+    for part in match.group(1).split(","):
+        col = part.strip().split(" ")[0].strip('"')
+        columns.append(col)
+    return tuple(columns)
+
+
+class IndexAdvisor:
+    """索引建议器"""
+
+    def __init__(self, connector, log_callback: Optional[callable] = None):
+        """
+        初始化索引建议器
+
+        Args:
+            connector: PostgreSQLConnector 实例
+            log_callback: 日志回调函数
+        """
+        self.connector = connector
+        self.log_callback = log_callback
+
+    def log(self, message: str, level: str = "INFO"):
+        """记录日志"""
+        if self.log_callback:
+            self.log_callback(message, level)
+
+    # ==================== 元数据 ====================
+
+    def get_table_rows(self) -> Dict[str, int]:
+        """获取各表的估算行数（pg_class.reltuples）"""
+        rows = self.connector.execute_query(
+            "SELECT c.relname, c.reltuples::bigint AS reltuples "
+            "FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE c.relkind = 'r' AND n.nspname = current_schema()"
+        )
+        return {row["relname"]: max(int(row["reltuples"] or 0), 0) for row in rows}
+
+    def get_existing_indexes(self) -> Dict[str, List[Tuple[str, Tuple[str, ...]]]]:
+        """获取现有索引 {表名: [(索引名, 列元组)]}"""
+        rows = self.connector.execute_query(
+            "SELECT tablename, indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema()"
+        )
+        indexes = {}
+        for row in rows:
+            indexes.setdefault(row["tablename"], []).append(
+                (row["indexname"], parse_index_columns(row["indexdef"]))
+            )
+        return indexes
+
+    def _get_samples(self, user_id: Optional[str]) -> Dict[str, Any]:
+        """获取 EXPLAIN 使用的示例参数（让计划器按真实分布估算）"""
+        samples = {"topic_id": "", "agent_id": ""}
+        try:
+            query = "SELECT topic_id FROM messages WHERE topic_id IS NOT NULL"
+            params = []
+            if user_id:
+                query += " AND user_id = %s"
+                params.append(user_id)
+            rows = self.connector.execute_query(query + " LIMIT 1", tuple(params))
+            if rows:
+                samples["topic_id"] = rows[0]["topic_id"]
+
+            rows = self.connector.execute_query("SELECT agent_id FROM agents_to_sessions LIMIT 1")
+            if rows:
+                samples["agent_id"] = rows[0]["agent_id"]
+        except Exception as e:
+            self.log(f"获取示例参数失败: {str(e)}", "DEBUG")
+        return samples
+
+    # ==================== 分析 ====================
+
+    def explain(self, sql: str, params: tuple) -> Dict:
+        """执行 EXPLAIN (FORMAT JSON) 并返回根计划节点"""
+        rows = self.connector.execute_query(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = rows[0]["QUERY PLAN"] if rows else []
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]["Plan"] if plan else {}
+
+    def _walk_plan(self, node: Dict, table_rows: Dict[str, int], issues: List[Dict]):
+        """递归遍历计划树，收集顺序扫描和排序问题"""
+        node_type = node.get("Node Type", "")
+        relation = node.get("Relation Name")
+
+        if node_type == "Seq Scan" and relation:
+            table_size = table_rows.get(relation, 0)
+            if table_size >= INDEX_ADVISOR_LARGE_TABLE_ROWS:
+                issues.append({
+                    "type": "seq_scan",
+                    "table": relation,
+                    "detail": f"顺序扫描 {relation}（约{table_size}行）",
+                })
+        elif node_type in ("Sort", "Incremental Sort"):
+            child_rows = 0
+            for child in node.get("Plans", []):
+                child_rows = max(child_rows, int(child.get("Plan Rows", 0)))
+            if child_rows >= INDEX_ADVISOR_SORT_ROWS:
+                sort_key = ", ".join(node.get("Sort Key", []))
+                issues.append({
+                    "type": "sort",
+                    "table": None,
+                    "detail": f"排序 {sort_key}（约{child_rows}行）",
+                })
+
+        for child in node.get("Plans", []):
+            self._walk_plan(child, table_rows, issues)
+
+    @staticmethod
+    def _is_covered(columns: Tuple[str, ...], existing: List[Tuple[str, Tuple[str, ...]]]) -> Optional[str]:
+        """检查是否已有前缀匹配的索引，返回覆盖该列组合的索引名"""
+        for index_name, index_columns in existing:
+            if index_columns[:len(columns)] == columns:
+                return index_name
+        return None
+
+    def analyze(self, user_id: Optional[str] = None) -> List[Dict]:
+        """
+        分析所有典型查询
+
+        Args:
+            user_id: 用户ID（与数据库标签页的过滤条件一致）
+
+        Returns:
+            分析结果列表，每项包含 name/cost/issues/proposals
+        """
+        table_rows = self.get_table_rows()
+        existing_indexes = self.get_existing_indexes()
+        samples = self._get_samples(user_id)
+
+        results = []
+        for spec in CANONICAL_QUERIES:
+            if spec.get("user_only") and not user_id:
+                continue
+
+            sql = spec["sql"]
+            params = []
+            if spec["sample"]:
+                params.append(samples.get(spec["sample"], ""))
+            if user_id:
+                sql += spec["user_filter"]
+                params.append(user_id)
+            sql += spec["order"]
+
+            result = {
+                "name": spec["name"],
+                "sql": sql,
+                "cost": 0.0,
+                "issues": [],
+                "proposals": [],
+                "error": None,
+            }
+
+            try:
+                plan = self.explain(sql, tuple(params))
+                result["cost"] = float(plan.get("Total Cost", 0.0))
+                self._walk_plan(plan, table_rows, result["issues"])
+            except Exception as e:
+                result["error"] = str(e)
+                results.append(result)
+                continue
+
+            if result["issues"]:
+                flagged_tables = {i["table"] for i in result["issues"] if i["table"]}
+                has_sort = any(i["type"] == "sort" for i in result["issues"])
+                for table, user_columns, plain_columns in spec["indexes"]:
+                    if table not in flagged_tables and not has_sort:
+                        continue
+                    columns = user_columns if user_id else plain_columns
+                    covered_by = self._is_covered(columns, existing_indexes.get(table, []))
+                    if covered_by:
+                        continue
+                    result["proposals"].append(self.build_proposal(table, columns))
+
+            results.append(result)
+
+        # 不同查询可能建议同一索引，去重
+        seen = set()
+        for result in results:
+            unique = []
+            for proposal in result["proposals"]:
+                if proposal["name"] not in seen:
+                    seen.add(proposal["name"])
+                    unique.append(proposal)
+            result["proposals"] = unique
+
+        self.log(f"索引分析完成: {len(results)}个查询, "
+                 f"{sum(len(r['proposals']) for r in results)}条建议", "INFO")
+        return results
+
+    @staticmethod
+    def build_proposal(table: str, columns: Tuple[str, ...]) -> Dict:
+        """生成索引建议"""
+        name = f"idx_{table}_{'_'.join(columns)}"
+        column_list = ", ".join(columns)
+        return {
+            "name": name,
+            "table": table,
+            "columns": columns,
+            "sql": f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({column_list})",
+        }
+
+    def apply_proposal(self, proposal: Dict):
+        """
+        创建建议的索引（CONCURRENTLY，不阻塞写入）
+
+        Args:
+            proposal: build_proposal 返回的建议
+        """
+        self.log(f"正在创建索引: {proposal['name']}...", "INFO")
+        self.connector.execute_command(proposal["sql"], autocommit=True)
+        self.log(f"✅ 索引已创建: {proposal['name']}", "SUCCESS")
@@ -0,0 +1,572 @@
+"""
+多用户并行导出
+为共享部署中的每个用户分别导出数据到独立目录：
+多个数据库连接并行读取，单个用户失败不影响其他用户，
+完成标记支持中断后续跑（仅跳过本轮已导出且源数据未变化的用户）
+"""
+
+import json
+import queue
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Callable, Iterable
+
+from ..config import (
+    MULTI_USER_EXPORT_WORKERS, LONG_OPERATION_STATEMENT_TIMEOUT_MS, ENABLE_SNAPSHOT_EXPORT,
+    JSON_EXPORT_COMPACT
+)
+from .db_connector import DBConfig, PostgreSQLConnector
+from .db_parser import DatabaseParser
+from .cancellation import CancelToken, OperationCancelled
+from ..exporters.markdown_writer import export_markdown_directory
+from ..exporters.ndjson_writer import export_ndjson
+from ..exporters.parquet_writer import export_parquet
+from ..exporters.sqlite_writer import export_sqlite
+from ..utils.file_utils import safe_filename
+from ..utils.json_stream import write_json_stream
+
+
+# 每个用户目录中的完成标记，存在即表示该用户已完整导出
+MARKER_FILE_NAME = ".export_complete.json"
+# 导出根目录中的汇总文件
+SUMMARY_FILE_NAME = "export_summary.json"
+# 导出根目录中的运行记录，一轮导出全部成功后删除；存在即表示上一轮被中断，可续跑
+RUN_FILE_NAME = ".export_run.json"
+# 导出过程中的临时目录后缀，成功后才重命名为正式目录
+PARTIAL_SUFFIX = ".partial"
+
+# 支持的导出格式
+EXPORT_FORMATS = ("json", "ndjson", "parquet", "sqlite", "markdown")
+
+# 用户导出状态
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+
+
+def list_users(connector: PostgreSQLConnector) -> List[Dict]:
+    """
+    查询用户列表（按消息数降序）
+
+    users 表不存在或查询失败时，从 messages 表推断用户。
+
+    Args:
+        connector: 已连接的数据库连接器
+
+    Returns:
+        用户列表，包含 id/email/full_name/created_at/message_count
+    """
+    try:
+        query = """
+            SELECT u.id, u.email, u.full_name, u.created_at,
+                   COUNT(DISTINCT m.id) as message_count
+            FROM users u
+            LEFT JOIN messages m ON u.id = m.user_id
+            GROUP BY u.id
+            ORDER BY message_count DESC
+        """
+        return connector.execute_query(query)
+    except Exception:
+        try:
+            query = """
+                SELECT user_id as id,
+                       user_id as email,
+                       '' as full_name,
+                       MIN(created_at) as created_at,
+                       COUNT(*) as message_count
+                FROM messages
+                WHERE user_id IS NOT NULL
+                GROUP BY user_id
+                ORDER BY message_count DESC
+            """
+            return connector.execute_query(query)
+        except Exception:
+            return []
+
+
+def user_source_updated_at(connector: PostgreSQLConnector, user_id: str) -> Optional[str]:
+    """
+    用户源数据的最后修改时间（助手、会话、主题、消息的 max(updated_at)）
+
+    Args:
+        connector: 已连接的数据库连接器
+        user_id: 用户ID
+
+    Returns:
+        ISO 格式时间，用户没有数据时返回 None
+    """
+    query = """
+        SELECT GREATEST(
+            (SELECT MAX(updated_at) FROM agents WHERE user_id = %s),
+            (SELECT MAX(updated_at) FROM sessions WHERE user_id = %s),
+            (SELECT MAX(updated_at) FROM topics WHERE user_id = %s),
+            (SELECT MAX(updated_at) FROM messages WHERE user_id = %s)
+        ) AS updated_at
+    """
+    rows = connector.execute_query(query, (user_id,) * 4)
+    value = rows[0]["updated_at"] if rows else None
+    if value is None:
+        return None
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def user_dir_name(user: Dict) -> str:
+    """
+    用户导出目录名（稳定且唯一：可读标签 + 用户ID）
+
+    Args:
+        user: 用户信息
+
+    Returns:
+        目录名
+    """
+    user_id = str(user.get("id", ""))
+    id_part = safe_filename(user_id, "user")
+    label = user.get("email") or user.get("full_name") or ""
+    if not label or label == user_id:
+        return id_part
+    return f"{safe_filename(label, id_part)}__{id_part}"
+
+
+class MultiUserExporter:
+    """多用户并行导出器"""
+
+    def __init__(self, db_config: DBConfig, output_dir: str,
+                 workers: int = MULTI_USER_EXPORT_WORKERS,
+                 formats: Iterable[str] = EXPORT_FORMATS,
+                 include_metadata: bool = True,
+                 include_system_prompt: bool = True,
+                 log_callback: Optional[Callable] = None,
+                 progress_callback: Optional[Callable] = None):
+        """
+        初始化多用户导出器
+
+        Args:
+            db_config: 数据库配置（每个工作线程使用独立连接）
+            output_dir: 导出根目录
+            workers: 并行连接数
+            formats: 导出格式（json / ndjson / parquet / sqlite / markdown，parquet 需要安装 pyarrow）
+            include_metadata: Markdown 是否包含元数据
+            include_system_prompt: Markdown 是否包含系统提示词
+            log_callback: 日志回调函数
+            progress_callback: 进度回调，签名为 (user_id, status, detail)，在工作线程中调用
+        """
+        self.db_config = db_config
+        self.output_dir = Path(output_dir)
+        self.workers = max(1, int(workers))
+        self.formats = [f for f in formats if f in EXPORT_FORMATS]
+        self.include_metadata = include_metadata
+        self.include_system_prompt = include_system_prompt
+        self.log_callback = log_callback
+        self.progress_callback = progress_callback
+
+        self._pool: "queue.Queue[PostgreSQLConnector]" = queue.Queue()
+        self._connectors: List[PostgreSQLConnector] = []
+        self._pool_lock = threading.Lock()
+
+    def log(self, message: str, level: str = "INFO"):
+        """记录日志"""
+        if self.log_callback:
+            self.log_callback(message, level)
+
+    def _report(self, user_id: str, status: str, detail: str = ""):
+        """报告单个用户的进度"""
+        if self.progress_callback:
+            try:
+                self.progress_callback(user_id, status, detail)
+            except Exception:
+                pass
+
+    # ==================== 连接池 ====================
+
+    def _acquire_connector(self) -> PostgreSQLConnector:
+        """从连接池取出连接，不足 workers 个时新建"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._pool_lock:
+            can_create = len(self._connectors) < self.workers
+            if can_create:
+                connector = PostgreSQLConnector(self.db_config)
+                self._connectors.append(connector)
+        if can_create:
+            if not connector.connect():
+                with self._pool_lock:
+                    self._connectors.remove(connector)
+                raise ConnectionError("无法建立数据库连接")
+            return connector
+        return self._pool.get()
+
+    def _release_connector(self, connector: PostgreSQLConnector):
+        """归还连接；已断开的连接直接丢弃"""
+        if connector.is_connected():
+            self._pool.put(connector)
+        else:
+            with self._pool_lock:
+                if connector in self._connectors:
+                    self._connectors.remove(connector)
+
+    def _close_pool(self):
+        """关闭所有连接"""
+        with self._pool_lock:
+            connectors = list(self._connectors)
+            self._connectors.clear()
+        for connector in connectors:
+            try:
+                connector.disconnect()
+            except Exception:
+                pass
+        while not self._pool.empty():
+            self._pool.get_nowait()
+
+    # ==================== 完成标记 ====================
+
+    def read_marker(self, user: Dict) -> Optional[Dict]:
+        """读取用户的完成标记，不存在或损坏时返回 None"""
+        marker_path = self.output_dir / user_dir_name(user) / MARKER_FILE_NAME
+        if not marker_path.exists():
+            return None
+        try:
+            return json.loads(marker_path.read_text(encoding="utf-8"))
+        except Exception:
+            return None
+
+    def is_complete(self, user: Dict, run_id: str, source_updated_at: Optional[str]) -> bool:
+        """
+        用户是否已在本轮导出中按当前选项完整导出
+
+        完成标记须来自同一轮导出（run_id），源数据在此之后没有修改，
+        且格式和 Markdown 选项与本次一致；其他轮次留下的标记一律视为过期。
+
+        Args:
+            user: 用户信息
+            run_id: 本轮导出ID（续跑时沿用被中断那一轮的ID）
+            source_updated_at: 用户源数据当前的最后修改时间
+
+        Returns:
+            是否可以跳过
+        """
+        marker = self.read_marker(user)
+        if not marker or marker.get("runId") != run_id:
+            return False
+        if marker.get("sourceUpdatedAt") != source_updated_at:
+            return False
+        if not set(self.formats).issubset(set(marker.get("formats", []))):
+            return False
+        if "markdown" in self.formats:
+            return (marker.get("includeMetadata") == self.include_metadata
+                    and marker.get("includeSystemPrompt") == self.include_system_prompt)
+        return True
+
+    def _begin_run(self, resume: bool) -> str:
+        """
+        开始一轮导出，返回本轮导出ID
+
+        resume=True 且上一轮被中断（运行记录仍在）时沿用其ID，
+        否则生成新ID，之前的完成标记都不再匹配。
+        """
+        run_path = self.output_dir / RUN_FILE_NAME
+        if resume and run_path.exists():
+            try:
+                run_id = json.loads(run_path.read_text(encoding="utf-8")).get("runId")
+            except Exception:
+                run_id = None
+            if run_id:
+                self.log(f"续跑中断的导出 {run_id}", "INFO")
+                return run_id
+        run_id = uuid.uuid4().hex
+        run_path.write_text(json.dumps({
+            "runId": run_id,
+            "startedAt": datetime.now().isoformat(),
+        }, indent=2), encoding="utf-8")
+        return run_id
+
+    # ==================== 导出 ====================
+
+    def export_user(self, user: Dict, cancel_token: Optional[CancelToken] = None,
+                    resume: bool = False, snapshot_id: Optional[str] = None,
+                    run_id: Optional[str] = None) -> Dict:
+        """
+        导出单个用户（失败时抛出异常，由调用方隔离）
+
+        先写入临时目录，全部完成后写入完成标记并重命名为正式目录，
+        中途失败或取消不会留下看似完整的导出。
+
+        Args:
+            user: 用户信息
+            cancel_token: 取消令牌
+            resume: 本轮已导出且源数据未变化时跳过（见 is_complete）
+            snapshot_id: 共享快照ID，所有用户读取同一时刻的数据
+            run_id: 本轮导出ID，写入完成标记
+
+        Returns:
+            导出结果
+        """
+        user_id = str(user.get("id", ""))
+        dir_name = user_dir_name(user)
+        final_dir = self.output_dir / dir_name
+        result = {"userId": user_id, "dir": dir_name, "status": STATUS_DONE,
+                  "files": 0, "stats": {}, "error": None, "seconds": 0.0}
+
+        if cancel_token:
+            cancel_token.raise_if_cancelled()
+
+        start = time.perf_counter()
+        self._report(user_id, STATUS_RUNNING, "正在读取数据库...")
+
+        def user_log(message: str, level: str = "INFO"):
+            # 并行时各用户的普通日志降级为 DEBUG，避免刷屏
+            self.log(f"[{dir_name}] {message}", "DEBUG" if level in ("INFO", "SUCCESS") else level)
+
+        partial_dir = self.output_dir / f"{dir_name}{PARTIAL_SUFFIX}"
+        file_count = 0
+        json_path = partial_dir / f"lobechat_{dir_name}.json"
+        ndjson_path = partial_dir / f"lobechat_{dir_name}.jsonl"
+        sqlite_path = partial_dir / f"lobechat_{dir_name}.sqlite"
+        parsed_data = None
+        connector = self._acquire_connector()
+        try:
+            connector.log_callback = user_log
+            db_parser = DatabaseParser(connector, log_callback=user_log)
+            # 源数据版本与导出内容在同一个快照中读取，多种格式也共用这个快照，保证内容一致
+            with connector.operation(cancel_token, LONG_OPERATION_STATEMENT_TIMEOUT_MS), \
+                    connector.snapshot(snapshot_id):
+                source_updated_at = user_source_updated_at(connector, user_id)
+                if resume and run_id and self.is_complete(user, run_id, source_updated_at):
+                    result["status"] = STATUS_SKIPPED
+                    self._report(user_id, STATUS_SKIPPED, "已完成（跳过）")
+                    return result
+
+                if partial_dir.exists():
+                    shutil.rmtree(partial_dir)
+                partial_dir.mkdir(parents=True)
+
+                if "markdown" in self.formats:
+                    parsed_data = db_parser.parse(user_id, snapshot_id)
+                    stats = parsed_data["stats"]
+                else:
+                    # 不导出 Markdown：直接从数据库游标流式写出，不在内存中构建数据
+                    counts = {}
+                    if "json" in self.formats:
+                        self._report(user_id, STATUS_RUNNING, "正在写入JSON...")
+                        with open(json_path, "w", encoding="utf-8") as f:
+                            counts = db_parser.export_raw_json(f, user_id, snapshot_id)
+                        file_count += 1
+                    if "ndjson" in self.formats:
+                        if cancel_token:
+                            cancel_token.raise_if_cancelled()
+                        self._report(user_id, STATUS_RUNNING, "正在写入JSON Lines...")
+                        counts, files = db_parser.export_raw_ndjson(ndjson_path, user_id, snapshot_id)
+                        file_count += len(files)
+                    if "parquet" in self.formats:
+                        if cancel_token:
+                            cancel_token.raise_if_cancelled()
+                        self._report(user_id, STATUS_RUNNING, "正在写入Parquet...")
+                        parquet_counts = db_parser.export_parquet(partial_dir / "parquet", user_id, snapshot_id)
+                        counts = {**counts, **parquet_counts}
+                        file_count += len(parquet_counts)
+                    if "sqlite" in self.formats:
+                        if cancel_token:
+                            cancel_token.raise_if_cancelled()
+                        self._report(user_id, STATUS_RUNNING, "正在写入SQLite...")
+                        counts = db_parser.export_sqlite(sqlite_path, user_id, snapshot_id)
+                        file_count += 1
+                    stats = {
+                        "agentCount": counts.get("agents", 0),
+                        "sessionCount": counts.get("sessions", 0),
+                        "topicCount": counts.get("topics", 0),
+                        "messageCount": counts.get("messages", 0),
+                    }
+        finally:
+            self._release_connector(connector)
+
+        if parsed_data is not None and "json" in self.formats:
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
+            self._report(user_id, STATUS_RUNNING, "正在写入JSON...")
+            with open(json_path, "w", encoding="utf-8") as f:
+                write_json_stream(f, parsed_data["raw"], JSON_EXPORT_COMPACT)
+            file_count += 1
+
+        if parsed_data is not None and "ndjson" in self.formats:
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
+            self._report(user_id, STATUS_RUNNING, "正在写入JSON Lines...")
+            raw = parsed_data["raw"]
+            _, files = export_ndjson(ndjson_path, raw.get("mode"), raw.get("schemaHash"),
+                                     raw.get("data", {}).items(), log_callback=user_log)
+            file_count += len(files)
+
+        if parsed_data is not None and "parquet" in self.formats:
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
+            self._report(user_id, STATUS_RUNNING, "正在写入Parquet...")
+            file_count += len(export_parquet(partial_dir / "parquet", parsed_data["raw"].get("data", {}).items(),
+                                             log_callback=user_log))
+
+        if parsed_data is not None and "sqlite" in self.formats:
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
+            self._report(user_id, STATUS_RUNNING, "正在写入SQLite...")
+            raw = parsed_data["raw"]
+            export_sqlite(sqlite_path, raw.get("mode"), raw.get("schemaHash"),
+                          raw.get("data", {}).items(), log_callback=user_log)
+            file_count += 1
+
+        if "markdown" in self.formats:
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
+            self._report(user_id, STATUS_RUNNING, "正在写入Markdown...")
+            file_count += export_markdown_directory(
+                parsed_data, partial_dir / "markdown",
+                self.include_metadata, self.include_system_prompt
+            )
+
+        result["files"] = file_count
+        result["stats"] = stats
+        result["seconds"] = round(time.perf_counter() - start, 2)
+
+        marker = {
+            "userId": user_id,
+            "email": user.get("email"),
+            "runId": run_id,
+            "sourceUpdatedAt": source_updated_at,
+            "formats": list(self.formats),
+            "includeMetadata": self.include_metadata,
+            "includeSystemPrompt": self.include_system_prompt,
+            "files": file_count,
+            "stats": stats,
+            "seconds": result["seconds"],
+            "snapshotId": snapshot_id,
+            "finishedAt": datetime.now().isoformat(),
+        }
+        (partial_dir / MARKER_FILE_NAME).write_text(
+            json.dumps(marker, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+
+        # 替换旧的（不完整或格式不同的）导出
+        if final_dir.exists():
+            shutil.rmtree(final_dir)
+        partial_dir.rename(final_dir)
+
+        self._report(user_id, STATUS_DONE,
+                     f"{stats['topicCount']}主题, {stats['messageCount']}消息, {result['seconds']}秒")
+        return result
+
+    def _export_isolated(self, user: Dict, cancel_token: Optional[CancelToken], resume: bool,
+                         snapshot_id: Optional[str], run_id: str) -> Dict:
+        """导出单个用户并捕获所有异常（失败隔离）"""
+        user_id = str(user.get("id", ""))
+        try:
+            return self.export_user(user, cancel_token, resume, snapshot_id, run_id)
+        except OperationCancelled:
+            self._report(user_id, STATUS_CANCELLED, "已取消")
+            return {"userId": user_id, "dir": user_dir_name(user), "status": STATUS_CANCELLED,
+                    "files": 0, "stats": {}, "error": None, "seconds": 0.0}
+        except Exception as e:
+            self.log(f"用户 {user_id} 导出失败: {str(e)}", "ERROR")
+            self._report(user_id, STATUS_FAILED, str(e))
+            return {"userId": user_id, "dir": user_dir_name(user), "status": STATUS_FAILED,
+                    "files": 0, "stats": {}, "error": str(e), "seconds": 0.0}
+
+    def _open_shared_snapshot(self, stack: ExitStack) -> Optional[str]:
+        """
+        在独立的主连接上建立并导出一致性快照，各工作连接导入后读取同一时刻的数据
+
+        主连接在 stack 退出前保持事务打开（导入快照要求导出事务仍然存在）。
+
+        Returns:
+            快照ID，无法导出时返回 None（各用户分别使用独立快照）
+        """
+        if not ENABLE_SNAPSHOT_EXPORT:
+            return None
+        leader = PostgreSQLConnector(self.db_config)
+        if not leader.connect():
+            self.log("无法建立快照主连接，各用户将分别使用独立快照", "WARNING")
+            return None
+        stack.callback(leader.disconnect)
+        try:
+            snapshot_id = stack.enter_context(leader.snapshot(export=True))
+        except Exception as e:
+            self.log(f"导出共享快照失败，各用户将分别使用独立快照: {str(e)}", "WARNING")
+            return None
+        self.log(f"已导出共享快照 {snapshot_id}，所有用户读取同一时刻的数据", "INFO")
+        return snapshot_id
+
+    def run(self, users: List[Dict], cancel_token: Optional[CancelToken] = None,
+            resume: bool = False) -> Dict:
+        """
+        并行导出多个用户
+
+        Args:
+            users: 用户列表
+            cancel_token: 取消令牌
+            resume: 续跑上一轮中断的导出，跳过其中已导出且源数据未变化的用户；
+                    默认重新导出所有用户
+
+        Returns:
+            导出汇总（同时写入导出根目录的 export_summary.json）
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+
+        for user in users:
+            self._report(str(user.get("id", "")), STATUS_PENDING, "等待中")
+
+        self.log(f"开始多用户导出: {len(users)}个用户, {self.workers}个并行连接", "INFO")
+
+        run_id = self._begin_run(resume)
+        snapshot_id = None
+        try:
+            with ExitStack() as stack:
+                snapshot_id = self._open_shared_snapshot(stack)
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    results = list(executor.map(
+                        lambda u: self._export_isolated(u, cancel_token, resume, snapshot_id, run_id), users
+                    ))
+        finally:
+            self._close_pool()
+
+        counts = {status: 0 for status in (STATUS_DONE, STATUS_SKIPPED, STATUS_FAILED, STATUS_CANCELLED)}
+        for result in results:
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+
+        summary = {
+            "finishedAt": datetime.now().isoformat(),
+            "seconds": round(time.perf_counter() - start, 2),
+            "workers": self.workers,
+            "formats": list(self.formats),
+            "runId": run_id,
+            "snapshotId": snapshot_id,
+            "counts": counts,
+            "users": results,
+        }
+        try:
+            (self.output_dir / SUMMARY_FILE_NAME).write_text(
+                json.dumps(summary, indent=2, ensure_ascii=False, default=str), encoding="utf-8"
+            )
+        except Exception as e:
+            self.log(f"写入导出汇总失败: {str(e)}", "WARNING")
+
+        if not counts[STATUS_FAILED] and not counts[STATUS_CANCELLED]:
+            # 本轮全部完成，没有可续跑的内容
+            (self.output_dir / RUN_FILE_NAME).unlink(missing_ok=True)
+
+        level = "SUCCESS" if not counts[STATUS_FAILED] else "WARNING"
+        self.log(
+            f"多用户导出完成: 成功{counts[STATUS_DONE]}, 跳过{counts[STATUS_SKIPPED]}, "
+            f"失败{counts[STATUS_FAILED]}, 取消{counts[STATUS_CANCELLED]}, 耗时{summary['seconds']}秒",
+            level
+        )
+        return summary
@@ -0,0 +1,108 @@
+"""
+JSON Lines 读取
+把 JSON Lines 导出（每行一个带类型标记的实体）还原为与 LobeChat 备份 JSON 相同的原始数据结构，
+分卷导出时自动读取同一组的全部分卷
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, List
+
+
+# 格式标识和版本（写在每个文件的第一行 meta 中）
+NDJSON_FORMAT = "lobechat-ndjson"
+NDJSON_VERSION = 1
+# meta 行（每个文件第一行）和模块结束行（每个模块写完后一行，记录模块键和行数）的类型标记
+META_TYPE = "meta"
+MODULE_TYPE = "module"
+# 支持的扩展名
+NDJSON_EXTENSIONS = (".jsonl", ".ndjson")
+# 分卷文件名：<名称>.<5位序号><扩展名>
+PART_NAME_RE = re.compile(r"^(?P<stem>.+)\.(?P<part>\d{5})(?P<ext>\.jsonl|\.ndjson)$", re.IGNORECASE)
+
+
+def is_ndjson_file(file_path) -> bool:
+    """按扩展名判断是否为 JSON Lines 文件"""
+    return str(file_path).lower().endswith(NDJSON_EXTENSIONS)
+
+
+def part_file_name(stem: str, part: int, ext: str = ".jsonl") -> str:
+    """分卷文件名"""
+    return f"{stem}.{part:05d}{ext}"
+
+
+def find_part_files(file_path) -> List[Path]:
+    """
+    找到与指定文件同一组的全部分卷（不是分卷文件时只返回它本身）
+
+    Args:
+        file_path: 任意一个分卷或单个文件的路径
+
+    Returns:
+        按序号排列的文件列表
+    """
+    path = Path(file_path)
+    match = PART_NAME_RE.match(path.name)
+    if not match:
+        return [path]
+
+    stem, ext = match.group("stem"), match.group("ext")
+    parts = []
+    for candidate in path.parent.iterdir():
+        m = PART_NAME_RE.match(candidate.name)
+        if m and m.group("stem") == stem and m.group("ext").lower() == ext.lower():
+            parts.append((int(m.group("part")), candidate))
+    return [p for _, p in sorted(parts)]
+
+
+def load_ndjson(file_path) -> Dict:
+    """
+    读取 JSON Lines 导出并还原为原始数据结构 {"mode", "schemaHash", "data": {模块: [...]}}
+
+    Args:
+        file_path: JSON Lines 文件（分卷时为任意一个分卷）
+
+    Returns:
+        与备份 JSON 相同结构的字典
+
+    Raises:
+        ValueError: 文件格式错误（含文件名和行号）
+    """
+    raw = {"mode": None, "schemaHash": None, "data": {}}
+    data = raw["data"]
+    meta_seen = False
+
+    for path in find_part_files(file_path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    entity_type = record["type"]
+                    value = record.get("data")
+                except (ValueError, KeyError, TypeError) as e:
+                    raise ValueError(f"{path.name} 第{line_no}行格式错误: {str(e)}")
+
+                if entity_type == META_TYPE:
+                    if not isinstance(value, dict) or value.get("format") != NDJSON_FORMAT:
+                        raise ValueError(f"{path.name} 不是 LobeChat JSON Lines 导出")
+                    if not meta_seen:
+                        raw["mode"] = value.get("mode")
+                        raw["schemaHash"] = value.get("schemaHash")
+                        meta_seen = True
+                elif entity_type == MODULE_TYPE:
+                    # 空模块只有结束行
+                    if isinstance(value, dict) and value.get("key"):
+                        data.setdefault(value["key"], [])
+                elif record.get("object"):
+                    # 非数组模块整体占一行
+                    data[entity_type] = value
+                else:
+                    data.setdefault(entity_type, []).append(value)
+
+    if not meta_seen:
+        raise ValueError(f"{Path(file_path).name} 缺少 meta 行，不是 LobeChat JSON Lines 导出")
+    return raw
@@ -0,0 +1,154 @@
+"""
+预取调度器
+在后台单线程中按顺序执行推测性加载任务（如对话树子节点），
+队列有上限，用户切换位置时可整体取消尚未执行的任务
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+
+class PrefetchScheduler:
+    """
+    预取调度器
+
+    - 任务按键去重，同一个键排队中只保留一份
+    - 队列满时丢弃最早加入的任务（越新的任务越贴近用户当前位置）
+    - cancel() 清空队列并使旧批次任务失效，正在执行的任务会跑完但不再继续
+    """
+
+    def __init__(self, max_queue: int = 32, log_callback: Optional[Callable] = None):
+        """
+        初始化预取调度器
+
+        Args:
+            max_queue: 队列最大任务数
+            log_callback: 日志回调函数
+        """
+        self.max_queue = max_queue
+        self.log_callback = log_callback
+        self.enabled = True
+
+        self._cond = threading.Condition()
+        # {key: (generation, func, args)}
+        self._queue: "OrderedDict[Hashable, Tuple[int, Callable, tuple]]" = OrderedDict()
+        self._generation = 0
+        self._running_key = None
+        self._running_done = None  # 当前任务完成事件
+        self._worker = None
+        self._stopped = False
+
+        self.completed = 0
+        self.dropped = 0
+        self.cancelled = 0
+        self.failed = 0
+
+    def log(self, message: str, level: str = "INFO"):
+        """记录日志"""
+        if self.log_callback:
+            self.log_callback(message, level)
+
+    def _ensure_worker(self):
+        """按需启动后台线程"""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, daemon=True)
+            self._worker.start()
+
+    def submit(self, key: Hashable, func: Callable, *args) -> bool:
+        """
+        提交预取任务
+
+        Args:
+            key: 任务键（用于去重和等待，如 ("messages", topic_id)）
+            func: 任务函数
+            *args: 任务参数
+
+        Returns:
+            是否加入队列（已在队列中或正在执行时返回 False）
+        """
+        if not self.enabled:
+            return False
+        with self._cond:
+            if self._stopped or key in self._queue or key == self._running_key:
+                return False
+            while len(self._queue) >= self.max_queue:
+                self._queue.popitem(last=False)
+                self.dropped += 1
+            self._queue[key] = (self._generation, func, args)
+            self._ensure_worker()
+            self._cond.notify()
+            return True
+
+    def cancel(self):
+        """取消所有排队中的任务（用户离开当前位置时调用）"""
+        with self._cond:
+            self.cancelled += len(self._queue)
+            self._queue.clear()
+            self._generation += 1
+
+    def wait(self, key: Hashable, timeout: float = 10.0) -> bool:
+        """
+        等待指定键的任务执行完毕（若正在执行）
+
+        用于用户展开的节点恰好正在预取时，避免重复查询。
+        排队中尚未执行的同键任务会被移除，由调用方直接加载。
+
+        Args:
+            key: 任务键
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            是否等到了正在执行的任务
+        """
+        with self._cond:
+            self._queue.pop(key, None)
+            if key != self._running_key:
+                return False
+            done = self._running_done
+        return done.wait(timeout)
+
+    def stop(self):
+        """停止后台线程"""
+        with self._cond:
+            self._stopped = True
+            self._queue.clear()
+            self._cond.notify_all()
+
+    def get_stats(self) -> Dict:
+        """获取预取统计"""
+        with self._cond:
+            return {
+                "queued": len(self._queue),
+                "completed": self.completed,
+                "dropped": self.dropped,
+                "cancelled": self.cancelled,
+                "failed": self.failed,
+            }
+
+    def _run(self):
+        """后台线程：逐个执行任务"""
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                key, (generation, func, args) = self._queue.popitem(last=False)
+                if generation != self._generation:
+                    continue
+                self._running_key = key
+                self._running_done = threading.Event()
+                done = self._running_done
+
+            try:
+                func(*args)
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                self.log(f"预取失败 {key}: {str(e)}", "DEBUG")
+            finally:
+                with self._cond:
+                    self._running_key = None
+                    self._running_done = None
+                done.set()
@@ -0,0 +1,281 @@
+"""
+数据库查询统计
+记录每次查询的耗时、行数、数据量和调用位置，维护滚动百分位并写入慢查询日志
+"""
+
+import os
+import re
+import sys
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Deque
+
+from ..config import (
+    SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_LOG_FILE_NAME, QUERY_STATS_WINDOW
+)
+
+
+# 查询指纹规范化：去除字面量，合并空白
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL_RE = re.compile(r"\b\d+\b")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# 统计调用位置时跳过的模块文件
+_SKIP_CALLER_FILES = ("db_connector.py", "query_stats.py")
+
+
+def normalize_query(query: str, max_length: int = 200) -> str:
+    """
+    生成查询指纹（相同结构的查询归为一类）
+
+    Args:
+        query: SQL查询语句
+        max_length: 指纹最大长度
+
+    Returns:
+        规范化后的查询文本
+    """
+    text = _STRING_LITERAL_RE.sub("?", query or "")
+    text = _NUMBER_LITERAL_RE.sub("?", text)
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    if len(text) > max_length:
+        text = text[:max_length] + "..."
+    return text
+
+
+def estimate_value_bytes(value: Any) -> int:
+    """估算单个字段值的字节数"""
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, (dict, list)):
+        return len(str(value))
+    return 8
+
+
+def estimate_rows_bytes(rows: List[Any]) -> int:
+    """
+    估算结果集的近似数据量
+
+    Args:
+        rows: 查询结果（字典行或元组行）
+
+    Returns:
+        近似字节数
+    """
+    total = 0
+    for row in rows:
+        values = row.values() if isinstance(row, dict) else row
+        for value in values:
+            total += estimate_value_bytes(value)
+    return total
+
+
+def get_call_site() -> str:
+    """获取发起查询的调用位置（跳过连接器内部帧）"""
+    try:
+        frame = sys._getframe(1)
+    except ValueError:
+        return "unknown"
+
+    while frame is not None:
+        filename = os.path.basename(frame.f_code.co_filename)
+        if filename not in _SKIP_CALLER_FILES:
+            return f"{filename}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """计算已排序列表的百分位（最近秩法）"""
+    if not sorted_values:
+        return 0.0
+    index = int(round(pct / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[max(0, min(index, len(sorted_values) - 1))]
+
+
+@dataclass
+class QueryRecord:
+    """单次查询记录"""
+    query: str
+    call_site: str
+    wall_ms: float
+    server_ms: float
+    fetch_ms: float
+    rows: int
+    bytes: int
+    error: Optional[str] = None
+    timestamp: datetime = field(default_factory=datetime.now)
+
+
+class QueryStatsEntry:
+    """同一查询指纹的聚合统计"""
+
+    def __init__(self, fingerprint: str, window: int):
+        self.fingerprint = fingerprint
+        self.call_sites: Dict[str, int] = {}
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.total_server_ms = 0.0
+        self.max_ms = 0.0
+        self.total_rows = 0
+        self.total_bytes = 0
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.last_time: Optional[datetime] = None
+
+    def add(self, record: QueryRecord):
+        """累加一次查询记录"""
+        self.count += 1
+        if record.error:
+            self.errors += 1
+        self.total_ms += record.wall_ms
+        self.total_server_ms += record.server_ms
+        self.max_ms = max(self.max_ms, record.wall_ms)
+        self.total_rows += record.rows
+        self.total_bytes += record.bytes
+        self.samples.append(record.wall_ms)
+        self.call_sites[record.call_site] = self.call_sites.get(record.call_site, 0) + 1
+        self.last_time = record.timestamp
+
+    def to_dict(self) -> Dict:
+        """导出为统计行"""
+        sorted_samples = sorted(self.samples)
+        top_site = max(self.call_sites.items(), key=lambda x: x[1])[0] if self.call_sites else ""
+        return {
+            "query": self.fingerprint,
+            "callSite": top_site,
+            "callSiteCount": len(self.call_sites),
+            "count": self.count,
+            "errors": self.errors,
+            "avgMs": self.total_ms / self.count if self.count else 0.0,
+            "avgServerMs": self.total_server_ms / self.count if self.count else 0.0,
+            "p50Ms": percentile(sorted_samples, 50),
+            "p95Ms": percentile(sorted_samples, 95),
+            "p99Ms": percentile(sorted_samples, 99),
+            "maxMs": self.max_ms,
+            "totalMs": self.total_ms,
+            "rows": self.total_rows,
+            "bytes": self.total_bytes,
+            "lastTime": self.last_time.strftime('%Y-%m-%d %H:%M:%S') if self.last_time else "",
+        }
+
+
+class QueryStatsCollector:
+    """查询统计收集器（线程安全）"""
+
+    def __init__(self, slow_threshold_ms: float = SLOW_QUERY_THRESHOLD_MS,
+                 window: int = QUERY_STATS_WINDOW,
+                 slow_log_path: Optional[str] = None,
+                 log_callback: Optional[callable] = None):
+        """
+        初始化统计收集器
+
+        Args:
+            slow_threshold_ms: 慢查询阈值（毫秒）
+            window: 每类查询保留的最近样本数
+            slow_log_path: 慢查询日志文件路径（None 时使用程序目录下的默认文件）
+            log_callback: 日志回调函数
+        """
+        self.slow_threshold_ms = slow_threshold_ms
+        self.window = window
+        self.slow_log_path = slow_log_path
+        self.log_callback = log_callback
+        self.enabled = True
+        self._entries: Dict[str, QueryStatsEntry] = {}
+        self._lock = threading.Lock()
+        self.slow_count = 0
+
+    def log(self, message: str, level: str = "INFO"):
+        """记录日志"""
+        if self.log_callback:
+            self.log_callback(message, level)
+
+    def _get_slow_log_path(self) -> str:
+        """获取慢查询日志路径"""
+        if self.slow_log_path:
+            return self.slow_log_path
+        from ..utils.file_utils import get_app_path
+        return str(get_app_path() / SLOW_QUERY_LOG_FILE_NAME)
+
+    def record(self, record: QueryRecord):
+        """
+        记录一次查询
+
+        Args:
+            record: 查询记录
+        """
+        if not self.enabled:
+            return
+
+        fingerprint = normalize_query(record.query)
+        slow = bool(self.slow_threshold_ms) and record.wall_ms >= self.slow_threshold_ms
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                entry = QueryStatsEntry(fingerprint, self.window)
+                self._entries[fingerprint] = entry
+            entry.add(record)
+            if slow:
+                self.slow_count += 1
+
+        if slow:
+            self._write_slow_log(record, fingerprint)
+
+    def _write_slow_log(self, record: QueryRecord, fingerprint: str):
+        """写入慢查询日志"""
+        self.log(
+            f"🐢 慢查询 {record.wall_ms:.0f}ms ({record.rows}行) @ {record.call_site}",
+            "WARNING"
+        )
+        parts = [
+            record.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            f"wall={record.wall_ms:.1f}ms",
+            f"server={record.server_ms:.1f}ms",
+            f"fetch={record.fetch_ms:.1f}ms",
+            f"rows={record.rows}",
+            f"bytes={record.bytes}",
+            f"site={record.call_site}",
+        ]
+        if record.error:
+            parts.append(f"error={record.error}")
+        parts.append(f"query={fingerprint}")
+        line = "\t".join(parts) + "\n"
+        try:
+            with self._lock:
+                with open(self._get_slow_log_path(), 'a', encoding='utf-8') as f:
+                    f.write(line)
+        except Exception as e:
+            self.log(f"写入慢查询日志失败: {str(e)}", "DEBUG")
+
+    def get_stats(self) -> List[Dict]:
+        """获取所有查询指纹的聚合统计"""
+        with self._lock:
+            return [entry.to_dict() for entry in self._entries.values()]
+
+    def get_summary(self) -> Dict:
+        """获取总体统计摘要"""
+        with self._lock:
+            entries = list(self._entries.values())
+        count = sum(e.count for e in entries)
+        total_ms = sum(e.total_ms for e in entries)
+        return {
+            "queries": count,
+            "fingerprints": len(entries),
+            "totalMs": total_ms,
+            "rows": sum(e.total_rows for e in entries),
+            "bytes": sum(e.total_bytes for e in entries),
+            "errors": sum(e.errors for e in entries),
+            "slow": self.slow_count,
+        }
+
+    def reset(self):
+        """清空统计"""
+        with self._lock:
+            self._entries.clear()
+            self.slow_count = 0
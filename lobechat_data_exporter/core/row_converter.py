@@ -0,0 +1,137 @@
+"""
+数据库行转换器
+按游标列描述一次性编译列索引→驼峰键名和逐列值转换器，直接转换元组行
+"""
+
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Any, Sequence, Tuple
+
+
+# PostgreSQL 时间类型 OID（timestamp / timestamptz）
+DATETIME_TYPE_OIDS = {1114, 1184}
+
+
+@lru_cache(maxsize=1024)
+def snake_to_camel(snake_str: str) -> str:
+    """将下划线命名转换为驼峰命名（带缓存）"""
+    components = snake_str.split('_')
+    return components[0] + ''.join(x.title() for x in components[1:])
+
+
+def _convert_datetime_value(value: Any) -> Any:
+    """时间列转换：datetime → ISO 字符串，其余原样返回"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class RowConverter:
+    """
+    编译后的行转换器
+
+    每个结果集只编译一次：列名在编译时转换为驼峰键名，
+    只有时间列会在转换时做额外处理，其余列直接透传。
+    """
+
+    def __init__(self, columns: Sequence[str], datetime_columns: Sequence[int] = ()):
+        """
+        初始化行转换器
+
+        Args:
+            columns: 列名列表（下划线命名）
+            datetime_columns: 需要转换为 ISO 字符串的列索引
+        """
+        self.columns = list(columns)
+        self.keys = tuple(snake_to_camel(c) for c in self.columns)
+        self.datetime_columns = tuple(datetime_columns)
+        self._datetime_pairs = tuple((i, self.keys[i]) for i in self.datetime_columns)
+
+    @classmethod
+    def from_description(cls, description: Sequence[Tuple[str, Any]]) -> 'RowConverter':
+        """
+        根据游标描述编译转换器
+
+        Args:
+            description: [(列名, 类型OID), ...]，即 cursor.description 的前两项
+
+        Returns:
+            行转换器
+        """
+        columns = [col[0] for col in description]
+        datetime_columns = [
+            i for i, col in enumerate(description)
+            if len(col) > 1 and col[1] in DATETIME_TYPE_OIDS
+        ]
+        return cls(columns, datetime_columns)
+
+    @classmethod
+    def from_rows(cls, columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> 'RowConverter':
+        """
+        根据样本数据推断时间列并编译转换器（无类型信息时使用）
+
+        Args:
+            columns: 列名列表
+            rows: 元组行
+
+        Returns:
+            行转换器
+        """
+        datetime_columns = []
+        unresolved = set(range(len(columns)))
+        for row in rows:
+            for i in list(unresolved):
+                value = row[i]
+                if value is None:
+                    continue
+                if isinstance(value, datetime):
+                    datetime_columns.append(i)
+                unresolved.discard(i)
+            if not unresolved:
+                break
+        return cls(columns, sorted(datetime_columns))
+
+    def convert(self, row: Sequence[Any]) -> Dict:
+        """转换单行元组"""
+        result = dict(zip(self.keys, row))
+        for index, key in self._datetime_pairs:
+            value = row[index]
+            if value is not None:
+                result[key] = _convert_datetime_value(value)
+        return result
+
+    def convert_all(self, rows: Sequence[Sequence[Any]]) -> List[Dict]:
+        """批量转换元组行"""
+        keys = self.keys
+        pairs = self._datetime_pairs
+        if not pairs:
+            return [dict(zip(keys, row)) for row in rows]
+
+        results = []
+        append = results.append
+        for row in rows:
+            result = dict(zip(keys, row))
+            for index, key in pairs:
+                value = row[index]
+                if value is not None:
+                    result[key] = _convert_datetime_value(value)
+            append(result)
+        return results
+
+
+def convert_result(description: Sequence[Tuple[str, Any]], rows: Sequence[Sequence[Any]]) -> List[Dict]:
+    """
+    一次性转换查询结果
+
+    Args:
+        description: [(列名, 类型OID), ...]
+        rows: 元组行
+
+    Returns:
+        驼峰键名的字典列表
+    """
+    converter = RowConverter.from_description(description)
+    if not converter.datetime_columns and rows and not any(len(col) > 1 and col[1] for col in description):
+        # 没有类型信息时按样本推断
+        converter = RowConverter.from_rows(converter.columns, rows)
+    return converter.convert_all(rows)
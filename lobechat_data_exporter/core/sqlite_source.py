@@ -0,0 +1,120 @@
+"""
+SQLite 数据源
+读取 SQLite 导出并还原为与 LobeChat 备份 JSON 相同的原始数据结构，
+并用导出时建立的 FTS5 索引搜索消息内容
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+
+# 格式标识和版本（写在 lce_meta 表中）
+SQLITE_FORMAT = "lobechat-sqlite"
+SQLITE_VERSION = 1
+# 支持的扩展名
+SQLITE_EXTENSIONS = (".sqlite", ".sqlite3", ".db")
+# 元数据表、模块表、消息全文索引表
+META_TABLE = "lce_meta"
+MODULES_TABLE = "lce_modules"
+MESSAGES_FTS_TABLE = "messages_fts"
+# trigram 分词器只能匹配至少 3 个字符的关键词
+TRIGRAM_MIN_CHARS = 3
+
+
+def is_sqlite_file(file_path) -> bool:
+    """按扩展名判断是否为 SQLite 文件"""
+    return str(file_path).lower().endswith(SQLITE_EXTENSIONS)
+
+
+def _connect_readonly(file_path) -> sqlite3.Connection:
+    """只读打开数据库"""
+    return sqlite3.connect(Path(file_path).resolve().as_uri() + "?mode=ro", uri=True)
+
+
+def _read_meta(conn: sqlite3.Connection) -> Dict:
+    """读取元数据 {键: 值}"""
+    try:
+        rows = conn.execute(f"SELECT key, value FROM {META_TABLE}").fetchall()
+    except sqlite3.DatabaseError:
+        return {}
+    return {key: json.loads(value) for key, value in rows}
+
+
+def load_sqlite(file_path) -> Dict:
+    """
+    读取 SQLite 导出并还原为原始数据结构 {"mode", "schemaHash", "data": {模块: [...]}}
+
+    Args:
+        file_path: SQLite 文件路径
+
+    Returns:
+        与备份 JSON 相同结构的字典（模块顺序与导出时相同）
+
+    Raises:
+        ValueError: 不是本程序导出的 SQLite 文件
+    """
+    conn = _connect_readonly(file_path)
+    try:
+        meta = _read_meta(conn)
+        if meta.get("format") != SQLITE_FORMAT:
+            raise ValueError(f"{Path(file_path).name} 不是 LobeChat SQLite 导出")
+
+        data = {}
+        modules = conn.execute(
+            f"SELECT key, table_name, data FROM {MODULES_TABLE} ORDER BY position"
+        ).fetchall()
+        for key, table_name, module_data in modules:
+            if table_name == "messages":
+                # 消息内容只保存在 content 列中
+                rows = conn.execute('SELECT data, content FROM messages ORDER BY rowid')
+                messages = []
+                for row_data, content in rows:
+                    msg = json.loads(row_data)
+                    if content is not None and msg.get("content") is None:
+                        msg["content"] = content
+                    messages.append(msg)
+                data[key] = messages
+            elif table_name:
+                rows = conn.execute(f'SELECT data FROM "{table_name}" ORDER BY rowid')
+                data[key] = [json.loads(row[0]) for row in rows]
+            else:
+                data[key] = json.loads(module_data)
+    finally:
+        conn.close()
+
+    return {"mode": meta.get("mode"), "schemaHash": meta.get("schemaHash"), "data": data}
+
+
+def search_message_ids(file_path, keyword: str) -> Optional[Set[str]]:
+    """
+    用 FTS5 索引搜索内容包含关键词（不区分大小写的子串）的消息
+
+    Args:
+        file_path: SQLite 文件路径
+        keyword: 关键词
+
+    Returns:
+        匹配的消息ID集合；索引不可用或关键词太短时返回 None（由调用方逐条匹配）
+    """
+    if len(keyword) < TRIGRAM_MIN_CHARS:
+        return None
+    try:
+        conn = _connect_readonly(file_path)
+    except sqlite3.Error:
+        return None
+    try:
+        if _read_meta(conn).get("ftsTokenizer") != "trigram":
+            return None
+        phrase = '"' + keyword.replace('"', '""') + '"'
+        rows = conn.execute(
+            f"SELECT m.id FROM {MESSAGES_FTS_TABLE} f JOIN messages m ON m.rowid = f.rowid "
+            f"WHERE {MESSAGES_FTS_TABLE} MATCH ?",
+            (phrase,)
+        )
+        return {row[0] for row in rows if row[0]}
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
@@ -0,0 +1,273 @@
+"""
+压缩包导出
+把导出的文件逐个流式写入 .zip / .tar.zst，不在磁盘上生成中间文件，
+条目的修改时间与目录导出时设置的文件时间一致
+"""
+
+import io
+import json
+import os
+import tarfile
+import tempfile
+import time
+import zipfile
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from ..config import ARCHIVE_ZSTD_LEVEL, ARCHIVE_SPOOL_MAX_MB
+from ..core import export_progress
+from ..utils.file_utils import parse_datetime_str, write_lines
+from .export_manifest import ExportManifest
+
+
+# 支持的压缩包格式 {格式: 扩展名}
+ARCHIVE_FORMATS = {
+    "zip": ".zip",
+    "tar.zst": ".tar.zst",
+}
+PARTIAL_SUFFIX = ".partial"
+
+# zip 能表示的最早时间
+_ZIP_MIN_DATE = datetime(1980, 1, 1)
+
+
+def archive_path_for(export_path: Path, archive_format: str) -> Path:
+    """导出目录对应的压缩包路径（目录名 + 扩展名）"""
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"不支持的压缩包格式: {archive_format}")
+    export_path = Path(export_path)
+    return export_path.with_name(export_path.name + ARCHIVE_FORMATS[archive_format])
+
+
+def _entry_time(created_at: Optional[str], modified_at: Optional[str]) -> datetime:
+    """条目的修改时间（与 set_file_times 的取值规则一致，都没有时使用当前时间）"""
+    return parse_datetime_str(modified_at) or parse_datetime_str(created_at) or datetime.now()
+
+
+class _TextEntry:
+    """把文本按指定编码写入二进制条目流，并记录导出进度的字节数（供 write_lines 使用）"""
+
+    def __init__(self, raw, encoding: str):
+        self.raw = raw
+        self.encoding = encoding
+
+    def write(self, text: str):
+        data = text.encode(self.encoding)
+        self.raw.write(data)
+        export_progress.record_bytes(len(data))
+
+
+class ArchiveWriter:
+    """
+    压缩包写出器
+
+    接口与 ExportManifest 相同（write_text / write_json / write_lines / finish），
+    导出函数不需要区分输出到目录还是压缩包。条目按写入顺序依次压缩，内存占用与条目数量无关
+    （zip 的中央目录除外，每个条目约几百字节）。
+    """
+
+    def __init__(self, root_dir: Path, archive_path: Path, archive_format: str = "zip",
+                 arc_prefix: str = "", log_callback: Optional[Callable] = None):
+        """
+        初始化并创建压缩包（先写入 .partial，完成后替换为正式文件）
+
+        Args:
+            root_dir: 导出函数使用的根目录，条目路径相对于该目录
+            archive_path: 压缩包路径
+            archive_format: 压缩包格式（zip / tar.zst）
+            arc_prefix: 压缩包内的顶层目录名（为空时条目直接放在根下）
+            log_callback: 日志回调函数
+        """
+        if archive_format not in ARCHIVE_FORMATS:
+            raise ValueError(f"不支持的压缩包格式: {archive_format}")
+
+        self.root_dir = Path(root_dir)
+        self.archive_path = Path(archive_path)
+        self.archive_format = archive_format
+        self.arc_prefix = f"{arc_prefix.strip('/')}/" if arc_prefix else ""
+        self.log_callback = log_callback
+        self.entry_count = 0
+
+        self._prefix = os.path.join(str(self.root_dir), "")
+        self._partial_path = self.archive_path.with_name(self.archive_path.name + PARTIAL_SUFFIX)
+        self._closed = False
+        self._zip = None
+        self._tar = None
+        self._zst = None
+
+        self.archive_path.parent.mkdir(parents=True, exist_ok=True)
+        if archive_format == "zip":
+            self._zip = zipfile.ZipFile(
+                self._partial_path, "w",
+                compression=zipfile.ZIP_DEFLATED,
+                allowZip64=True
+            )
+        else:
+            try:
+                import zstandard
+            except ImportError:
+                raise ImportError("导出 tar.zst 需要 zstandard 库，请运行: pip install zstandard")
+            fh = open(self._partial_path, "wb")
+            self._zst = zstandard.ZstdCompressor(level=ARCHIVE_ZSTD_LEVEL).stream_writer(fh)
+            self._tar = tarfile.open(fileobj=self._zst, mode="w|", format=tarfile.PAX_FORMAT)
+
+    def __enter__(self) -> 'ArchiveWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.finish()
+        else:
+            self.abort()
+        return False
+
+    def log(self, message: str, level: str = "INFO"):
+        """记录日志"""
+        if self.log_callback:
+            self.log_callback(message, level)
+
+    def parallel_writer(self):
+        """压缩包只能顺序写入，不使用并行写出器"""
+        return nullcontext(None)
+
+    def _arcname(self, file_path) -> str:
+        """条目在压缩包内的路径"""
+        path = str(file_path)
+        if path.startswith(self._prefix):
+            path = path[len(self._prefix):]
+        else:
+            path = os.path.relpath(path, str(self.root_dir))
+        return self.arc_prefix + path.replace(os.sep, "/")
+
+    def _zip_info(self, arcname: str, mtime: datetime) -> zipfile.ZipInfo:
+        """构建 zip 条目信息"""
+        info = zipfile.ZipInfo(arcname, date_time=max(mtime, _ZIP_MIN_DATE).timetuple()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0o644 << 16
+        return info
+
+    def _tar_info(self, arcname: str, mtime: datetime, size: int) -> tarfile.TarInfo:
+        """构建 tar 条目信息"""
+        info = tarfile.TarInfo(arcname)
+        info.size = size
+        info.mode = 0o644
+        try:
+            info.mtime = int(mtime.timestamp())
+        except (OverflowError, OSError, ValueError):
+            info.mtime = int(time.time())
+        return info
+
+    def write_bytes(self, file_path, data: bytes,
+                    created_at: Optional[str] = None,
+                    modified_at: Optional[str] = None):
+        """写入一个二进制条目"""
+        arcname = self._arcname(file_path)
+        mtime = _entry_time(created_at, modified_at)
+        if self._zip is not None:
+            self._zip.writestr(self._zip_info(arcname, mtime), data)
+        else:
+            self._tar.addfile(self._tar_info(arcname, mtime, len(data)), io.BytesIO(data))
+        self.entry_count += 1
+        export_progress.record_file(len(data))
+
+    def write_text(self, file_path, content: str,
+                   created_at: Optional[str] = None,
+                   modified_at: Optional[str] = None,
+                   sources: Optional[List[str]] = None,
+                   updated_at: Optional[str] = None,
+                   writer=None, encoding: str = 'utf-8') -> bool:
+        """写入文本条目（参数与 ExportManifest.write_text 相同，sources/updated_at/writer 不使用）"""
+        self.write_bytes(file_path, content.encode(encoding), created_at, modified_at)
+        return True
+
+    def write_json(self, file_path, data: Dict,
+                   created_at: Optional[str] = None,
+                   modified_at: Optional[str] = None,
+                   sources: Optional[List[str]] = None,
+                   updated_at: Optional[str] = None,
+                   writer=None) -> bool:
+        """写入JSON条目（格式与 write_json_with_timestamp 相同）"""
+        content = json.dumps(data, indent=2, ensure_ascii=False)
+        return self.write_text(file_path, content, created_at, modified_at)
+
+    def write_lines(self, file_path, lines: Iterable[str],
+                    created_at: Optional[str] = None,
+                    modified_at: Optional[str] = None,
+                    sources: Optional[List[str]] = None,
+                    updated_at: Optional[str] = None,
+                    encoding: str = 'utf-8') -> bool:
+        """
+        流式写入逐行生成的条目
+
+        zip 直接边压缩边写；tar 需要事先知道条目大小，先写入内存缓冲，超过 ARCHIVE_SPOOL_MAX_MB 时转存临时文件。
+        """
+        arcname = self._arcname(file_path)
+        mtime = _entry_time(created_at, modified_at)
+
+        if self._zip is not None:
+            with self._zip.open(self._zip_info(arcname, mtime), "w", force_zip64=True) as raw:
+                write_lines(_TextEntry(raw, encoding), lines)
+        else:
+            with tempfile.SpooledTemporaryFile(max_size=ARCHIVE_SPOOL_MAX_MB * 1024 * 1024) as spool:
+                write_lines(_TextEntry(spool, encoding), lines)
+                size = spool.tell()
+                spool.seek(0)
+                self._tar.addfile(self._tar_info(arcname, mtime, size), spool)
+        self.entry_count += 1
+        export_progress.record_file()
+        return True
+
+    def _close_archive(self):
+        """关闭压缩包文件"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._zip is not None:
+            self._zip.close()
+        else:
+            self._tar.close()
+            self._zst.close()
+
+    def finish(self):
+        """写完中央目录/结束块，并把 .partial 替换为正式文件"""
+        if self._closed:
+            return
+        self._close_archive()
+        os.replace(self._partial_path, self.archive_path)
+        self.log(f"已写入压缩包: {self.archive_path}（{self.entry_count}个条目）", "INFO")
+
+    def abort(self):
+        """导出失败：关闭并删除未完成的压缩包"""
+        try:
+            self._close_archive()
+        except Exception:
+            pass
+        try:
+            self._partial_path.unlink()
+        except OSError:
+            pass
+
+
+def open_export_target(export_path: Path, archive_format: Optional[str] = None,
+                       log_callback: Optional[Callable] = None):
+    """
+    打开导出目标：不指定压缩包格式时输出到目录（带导出清单），否则输出到同名压缩包
+
+    Args:
+        export_path: 导出目录
+        archive_format: 压缩包格式（zip / tar.zst），为空时导出到目录
+        log_callback: 日志回调函数
+
+    Returns:
+        ExportManifest 或 ArchiveWriter
+    """
+    export_path = Path(export_path)
+    if archive_format:
+        return ArchiveWriter(
+            export_path, archive_path_for(export_path, archive_format), archive_format,
+            arc_prefix=export_path.name, log_callback=log_callback
+        )
+    export_path.mkdir(parents=True, exist_ok=True)
+    return ExportManifest(export_path, log_callback=log_callback)
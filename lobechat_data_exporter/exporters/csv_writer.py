@@ -0,0 +1,93 @@
+"""
+CSV 导出
+直接从原始数据或数据库游标逐行写出完整的值（不经过表格控件，不受显示截断影响），
+可以按表配置导出的列和顺序
+"""
+
+import csv
+import json
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+from ..config import CSV_EXPORT_ENCODING, CSV_EXPORT_COLUMNS
+from ..core import export_progress
+
+
+def csv_value(value: Any) -> Any:
+    """值 → CSV 字段（空值为空字符串，时间为 ISO 格式，对象和数组为 JSON，布尔为 true/false）"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def select_columns(columns: List[tuple], column_ids: Optional[Sequence[str]] = None) -> Tuple[List[tuple], List[int]]:
+    """
+    按列ID选择导出的列
+
+    Args:
+        columns: 列配置 [(列ID, 标题, ...)]
+        column_ids: 导出的列ID及顺序，None 或空时导出全部列（不存在的列ID忽略）
+
+    Returns:
+        (选中的列配置, 对应的行内位置)
+    """
+    if not column_ids:
+        return list(columns), list(range(len(columns)))
+    positions = {col[0]: i for i, col in enumerate(columns)}
+    selected = [positions[col_id] for col_id in column_ids if col_id in positions]
+    return [columns[i] for i in selected], selected
+
+
+def configured_columns(table_key: str) -> Optional[List[str]]:
+    """配置中指定的表导出列（CSV_EXPORT_COLUMNS）"""
+    return CSV_EXPORT_COLUMNS.get(table_key) or None
+
+
+def export_csv(file_path: Path, columns: List[tuple], rows: Iterable[Sequence[Any]],
+               column_ids: Optional[Sequence[str]] = None,
+               encoding: str = CSV_EXPORT_ENCODING,
+               log_callback: Optional[Callable] = None) -> int:
+    """
+    把行流式写出为 CSV 文件（写入临时文件，完成后替换目标文件）
+
+    作为后台导出任务执行时逐行响应取消（不留下不完整的文件），完成后记录写出的文件。
+
+    Args:
+        file_path: 输出文件路径
+        columns: 列配置 [(列ID, 标题, ...)]，与行中的值一一对应
+        rows: 行（可以是迭代器，如数据库游标）
+        column_ids: 导出的列ID及顺序，None 时导出全部列
+        encoding: 文件编码
+        log_callback: 日志回调函数
+
+    Returns:
+        写出的数据行数
+    """
+    file_path = Path(file_path)
+    selected_columns, positions = select_columns(columns, column_ids)
+    partial_path = file_path.with_name(file_path.name + ".partial")
+    count = 0
+    try:
+        with open(partial_path, 'w', newline='', encoding=encoding) as f:
+            writer = csv.writer(f)
+            writer.writerow([col[1] if len(col) > 1 else col[0] for col in selected_columns])
+            for row in rows:
+                writer.writerow([csv_value(row[i]) if i < len(row) else "" for i in positions])
+                count += 1
+                export_progress.check_cancelled()
+        partial_path.replace(file_path)
+    except BaseException:
+        partial_path.unlink(missing_ok=True)
+        raise
+    export_progress.record_file(file_path.stat().st_size)
+
+    if log_callback:
+        log_callback(f"CSV已写出 {count} 行: {file_path.name}", "INFO")
+    return count
@@ -0,0 +1,186 @@
+"""
+Excel 导出
+用 openpyxl 的只写（流式）模式逐行写出带类型的值（数值、日期时间、完整文本），
+内存占用不随行数增长；超过工作表行数上限时自动拆分到新的工作表
+"""
+
+import json
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from ..config import EXCEL_MAX_ROWS_PER_SHEET
+
+
+# Excel 单元格最多 32767 个字符
+EXCEL_MAX_CELL_CHARS = 32767
+# 工作表名称最长 31 个字符，且不能包含以下字符
+SHEET_NAME_MAX_CHARS = 31
+SHEET_NAME_INVALID_CHARS = '[]:*?/\\'
+
+
+def _import_openpyxl():
+    """延迟导入 openpyxl（可选依赖）"""
+    try:
+        import openpyxl
+    except ImportError:
+        raise ImportError("需要安装openpyxl库: pip install openpyxl")
+    return openpyxl
+
+
+def excel_value(value: Any, illegal_chars_re=None) -> Any:
+    """
+    值 → 单元格值
+
+    数值和布尔原样保留；带时区的时间转为 UTC 后去掉时区（Excel 不支持时区）；
+    字典和列表转为 JSON；文本去掉 Excel 不允许的控制字符并截断到单元格上限。
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    if isinstance(value, date):
+        return value
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    elif not isinstance(value, str):
+        value = str(value)
+    if illegal_chars_re is not None:
+        value = illegal_chars_re.sub("", value)
+    if len(value) > EXCEL_MAX_CELL_CHARS:
+        value = value[:EXCEL_MAX_CELL_CHARS - 3] + "..."
+    return value
+
+
+def _sheet_title(name: str, part: int, used: Set[str]) -> str:
+    """工作表名称（去掉非法字符、截断，拆分的工作表加序号，与已有名称不重复）"""
+    base = "".join("_" if ch in SHEET_NAME_INVALID_CHARS else ch for ch in name) or "Sheet"
+    suffix = f" ({part})" if part > 1 else ""
+    title = base[:SHEET_NAME_MAX_CHARS - len(suffix)] + suffix
+    counter = 1
+    while title.lower() in used:
+        counter += 1
+        extra = f"_{counter}"
+        title = base[:SHEET_NAME_MAX_CHARS - len(suffix) - len(extra)] + extra + suffix
+    used.add(title.lower())
+    return title
+
+
+class ExcelStreamWriter:
+    """
+    只写模式的 Excel 写出器
+
+    add_table(名称, 列配置, 行) 逐行写出一个表，列配置与表格视图相同 [(列ID, 标题, 宽度, ...)]；
+    单个工作表写满 max_rows 行（含表头）后在新工作表中继续，新工作表同样带表头。
+    """
+
+    def __init__(self, max_rows: int = EXCEL_MAX_ROWS_PER_SHEET,
+                 log_callback: Optional[Callable] = None):
+        """
+        初始化写出器
+
+        Args:
+            max_rows: 每个工作表的最大行数（含表头）
+            log_callback: 日志回调函数
+        """
+        openpyxl = _import_openpyxl()
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+        from openpyxl.styles import Font, Alignment, PatternFill
+        from openpyxl.utils import get_column_letter
+
+        self._get_column_letter = get_column_letter
+        self._write_only_cell = WriteOnlyCell
+        self._illegal_chars_re = ILLEGAL_CHARACTERS_RE
+        self._header_font = Font(bold=True)
+        self._header_fill = PatternFill(start_color="DAEEF3", end_color="DAEEF3", fill_type="solid")
+        self._header_alignment = Alignment(horizontal="center")
+
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.max_rows = max(2, min(max_rows, EXCEL_MAX_ROWS_PER_SHEET))
+        self.log_callback = log_callback
+        self.counts: Dict[str, int] = {}  # 各表的数据行数
+        self._used_titles: Set[str] = set()
+
+    def log(self, message: str, level: str = "INFO"):
+        """记录日志"""
+        if self.log_callback:
+            self.log_callback(message, level)
+
+    def _new_sheet(self, name: str, part: int, columns: List[tuple]):
+        """创建工作表：设置列宽并写入表头"""
+        ws = self.workbook.create_sheet(title=_sheet_title(name, part, self._used_titles))
+        for col_idx, col in enumerate(columns, 1):
+            width = col[2] if len(col) > 2 else 100
+            ws.column_dimensions[self._get_column_letter(col_idx)].width = max(width // 7, 10)
+
+        header_cells = []
+        for col in columns:
+            cell = self._write_only_cell(ws, value=col[1] if len(col) > 1 else col[0])
+            cell.font = self._header_font
+            cell.fill = self._header_fill
+            cell.alignment = self._header_alignment
+            header_cells.append(cell)
+        ws.append(header_cells)
+        return ws
+
+    def add_table(self, name: str, columns: List[tuple], rows: Iterable[Sequence[Any]]) -> int:
+        """
+        写出一个表
+
+        Args:
+            name: 表名（工作表名称）
+            columns: 列配置 [(列ID, 标题, 宽度, ...)]
+            rows: 行（每行为与列对应的值序列），可以是迭代器
+
+        Returns:
+            写出的数据行数
+        """
+        part = 1
+        ws = self._new_sheet(name, part, columns)
+        sheet_rows = 1
+        count = 0
+        illegal_chars_re = self._illegal_chars_re
+
+        for row in rows:
+            if sheet_rows >= self.max_rows:
+                part += 1
+                ws = self._new_sheet(name, part, columns)
+                sheet_rows = 1
+            ws.append([excel_value(value, illegal_chars_re) for value in row])
+            sheet_rows += 1
+            count += 1
+
+        if part > 1:
+            self.log(f"{name} 共 {count} 行，已拆分为 {part} 个工作表", "INFO")
+        self.counts[name] = count
+        return count
+
+    def save(self, file_path: str):
+        """保存文件（只写模式的工作簿只能保存一次）"""
+        if not self.workbook.worksheets:
+            self.workbook.create_sheet(title="Sheet1")
+        self.workbook.save(file_path)
+
+
+def export_tables_to_excel(file_path: str, tables: Iterable[Tuple[str, List[tuple], Iterable[Sequence[Any]]]],
+                           max_rows: int = EXCEL_MAX_ROWS_PER_SHEET,
+                           log_callback: Optional[Callable] = None) -> Dict[str, int]:
+    """
+    把多个表流式写入一个 Excel 文件（每个表一个或多个工作表）
+
+    Args:
+        file_path: 输出文件路径
+        tables: (表名, 列配置, 行) 的可迭代对象
+        max_rows: 每个工作表的最大行数（含表头）
+        log_callback: 日志回调函数
+
+    Returns:
+        各表的数据行数
+    """
+    writer = ExcelStreamWriter(max_rows, log_callback)
+    for name, columns, rows in tables:
+        writer.add_table(name, columns, rows)
+    writer.save(file_path)
+    return writer.counts
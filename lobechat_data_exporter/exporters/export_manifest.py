@@ -0,0 +1,341 @@
+"""
+导出清单
+记录导出目录中每个文件的来源ID、更新时间和内容哈希：
+重新导出时跳过内容未变化的文件、删除已不再导出的过期文件，中断后再次导出可从检查点续导
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..config import VERSION, ENABLE_EXPORT_MANIFEST, EXPORT_MANIFEST_CHECKPOINT_SECONDS
+from ..core import export_progress
+from ..utils.file_utils import set_file_times, write_file_with_timestamp, write_lines
+from ..utils.parallel_writer import ParallelFileWriter
+
+
+MANIFEST_FILE_NAME = ".export_manifest.json"
+MANIFEST_VERSION = 1
+PARTIAL_SUFFIX = ".partial"
+
+# 文本模式写入时每个 "\n" 在磁盘上占用的额外字节（Windows 上为 \r\n）
+_NEWLINE_EXTRA = len(os.linesep) - 1
+
+
+class _HashingWriter:
+    """包装文本文件对象，写入的同时计算内容哈希和磁盘大小，并记录导出进度的字节数"""
+
+    def __init__(self, f, encoding: str):
+        self.f = f
+        self.encoding = encoding
+        self.hasher = hashlib.sha256()
+        self.size = 0
+
+    def write(self, text: str):
+        data = text.encode(self.encoding)
+        self.hasher.update(data)
+        nbytes = len(data) + _NEWLINE_EXTRA * text.count("\n")
+        self.size += nbytes
+        self.f.write(text)
+        export_progress.record_bytes(nbytes)
+
+
+class ExportManifest:
+    """
+    导出清单
+
+    写文件统一通过 write_text / write_json / write_lines，内容与上次导出相同且磁盘上的文件完整时跳过写入。
+    导出结束后调用 finish()：删除上次导出过、本次没有再导出的文件并保存清单；
+    用作上下文管理器时正常退出自动 finish()，异常退出保存检查点。
+    """
+
+    def __init__(self, export_dir: Path, enabled: bool = True,
+                 log_callback: Optional[Callable] = None):
+        """
+        初始化导出清单（读取目录中已有的清单）
+
+        Args:
+            export_dir: 导出目录（清单保存在该目录下，结束时删除目录中的过期文件）
+            enabled: 是否使用清单（还需开启 ENABLE_EXPORT_MANIFEST）；只在导出器自己的输出目录中使用，
+                     导出单个文件到用户选择的目录时关闭，不在该目录中留下清单
+            log_callback: 日志回调函数
+        """
+        self.export_dir = Path(export_dir)
+        self.log_callback = log_callback
+        self.enabled = enabled and ENABLE_EXPORT_MANIFEST
+        self.path = self.export_dir / MANIFEST_FILE_NAME
+
+        self.entries: Dict[str, Dict] = {}  # 本次导出的文件 {相对路径: 条目}
+        self.previous: Dict[str, Dict] = self._load() if self.enabled else {}
+        self.written = 0
+        self.skipped = 0
+        self.removed = 0
+        self._lock = threading.Lock()  # 条目和计数可能在写出线程中更新
+        self._prefix = os.path.join(str(self.export_dir), "")
+        self._last_checkpoint = time.monotonic()
+
+    def __enter__(self) -> 'ExportManifest':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.finish()
+        elif self.enabled:
+            # 导出中断：保存检查点，再次导出时跳过已写出的文件
+            try:
+                self.save(complete=False)
+            except OSError:
+                pass
+        return False
+
+    def parallel_writer(self) -> ParallelFileWriter:
+        """目录导出使用并行写出器"""
+        return ParallelFileWriter()
+
+    def log(self, message: str, level: str = "INFO"):
+        """记录日志"""
+        if self.log_callback:
+            self.log_callback(message, level)
+
+    def _load(self) -> Dict[str, Dict]:
+        """读取已有清单（不存在或损坏时视为空）"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return {}
+        if not data.get("complete", True):
+            self.log("检测到上次导出未完成，将从检查点继续", "INFO")
+        return data.get("files") or {}
+
+    def _rel(self, file_path) -> str:
+        """文件相对导出目录的路径（统一使用 / 分隔）"""
+        path = str(file_path)
+        if path.startswith(self._prefix):
+            path = path[len(self._prefix):]
+        else:
+            path = os.path.relpath(path, str(self.export_dir))
+        return path.replace(os.sep, "/")
+
+    def _unchanged(self, rel: str, digest: str, size: int) -> bool:
+        """上次导出的内容相同，且磁盘上的文件完整"""
+        old = self.previous.get(rel)
+        if not old or old.get("hash") != digest or old.get("size") != size:
+            return False
+        try:
+            return os.path.getsize(self.export_dir / rel) == size
+        except OSError:
+            return False
+
+    def _record(self, rel: str, digest: str, size: int,
+                sources: Optional[List[str]], updated_at: Optional[str]):
+        """记录本次导出的文件条目"""
+        entry = {
+            "sources": [s for s in (sources or []) if s],
+            "updatedAt": updated_at,
+            "hash": digest,
+            "size": size,
+        }
+        with self._lock:
+            self.entries[rel] = entry
+
+    @staticmethod
+    def _digest(content: str, encoding: str) -> Tuple[str, int]:
+        """计算内容写入后的哈希和文件大小"""
+        data = content.encode(encoding)
+        size = len(data) + _NEWLINE_EXTRA * content.count("\n")
+        return hashlib.sha256(data).hexdigest(), size
+
+    def _skip_unchanged(self, rel: str, digest: str, size: int,
+                        sources: Optional[List[str]], updated_at: Optional[str]) -> bool:
+        """内容与上次导出相同时记录条目并跳过写入"""
+        if not (self.enabled and self._unchanged(rel, digest, size)):
+            return False
+        self._record(rel, digest, size, sources, updated_at)
+        with self._lock:
+            self.skipped += 1
+        return True
+
+    def _mark_written(self, rel: str, digest: str, size: int,
+                      sources: Optional[List[str]], updated_at: Optional[str]):
+        """文件确认写入后才记录条目，写入失败的文件不会在下次导出时被当作已完成跳过"""
+        self._record(rel, digest, size, sources, updated_at)
+        with self._lock:
+            self.written += 1
+
+    def write_text(self, file_path, content: str,
+                   created_at: Optional[str] = None,
+                   modified_at: Optional[str] = None,
+                   sources: Optional[List[str]] = None,
+                   updated_at: Optional[str] = None,
+                   writer=None, encoding: str = 'utf-8') -> bool:
+        """
+        写入文本文件（内容未变化时跳过）
+
+        Args:
+            file_path: 文件路径
+            content: 文件内容
+            created_at: 创建时间（ISO格式字符串）
+            modified_at: 修改时间（ISO格式字符串）
+            sources: 文件内容来源的数据ID
+            updated_at: 来源数据的最后更新时间
+            writer: ParallelFileWriter，提供时哈希比较和写入都在写出线程中进行
+            encoding: 文件编码
+
+        Returns:
+            是否写入（False 表示内容未变化已跳过或写入失败；交给 writer 时总是返回 True）
+        """
+        rel = self._rel(file_path)
+        updated_at = updated_at or modified_at
+
+        if writer is not None:
+            checked = {}
+
+            def before_write(_path, text):
+                checked["digest"] = self._digest(text, encoding)
+                return not self._skip_unchanged(rel, *checked["digest"], sources, updated_at)
+
+            writer.submit(
+                str(file_path), content, created_at, modified_at,
+                before_write=before_write,
+                after_write=lambda _path: self._mark_written(rel, *checked["digest"], sources, updated_at)
+            )
+            self._maybe_checkpoint()
+            return True
+
+        digest, size = self._digest(content, encoding)
+        if self._skip_unchanged(rel, digest, size, sources, updated_at):
+            export_progress.record_file()
+            return False
+        Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+        if not write_file_with_timestamp(str(file_path), content, created_at, modified_at, encoding):
+            return False
+        self._mark_written(rel, digest, size, sources, updated_at)
+        self._maybe_checkpoint()
+        return True
+
+    def write_json(self, file_path, data: Dict,
+                   created_at: Optional[str] = None,
+                   modified_at: Optional[str] = None,
+                   sources: Optional[List[str]] = None,
+                   updated_at: Optional[str] = None,
+                   writer=None) -> bool:
+        """写入JSON文件（格式与 write_json_with_timestamp 相同，内容未变化时跳过）"""
+        content = json.dumps(data, indent=2, ensure_ascii=False)
+        return self.write_text(file_path, content, created_at, modified_at, sources, updated_at, writer)
+
+    def write_lines(self, file_path, lines: Iterable[str],
+                    created_at: Optional[str] = None,
+                    modified_at: Optional[str] = None,
+                    sources: Optional[List[str]] = None,
+                    updated_at: Optional[str] = None,
+                    encoding: str = 'utf-8') -> bool:
+        """
+        流式写入逐行生成的内容（先写到临时文件并计算哈希，内容未变化时丢弃临时文件）
+
+        Returns:
+            是否写入（False 表示内容未变化已跳过）
+        """
+        file_path = Path(file_path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        partial_path = file_path.with_name(file_path.name + PARTIAL_SUFFIX)
+
+        try:
+            with open(partial_path, 'w', encoding=encoding) as f:
+                hashing = _HashingWriter(f, encoding)
+                write_lines(hashing, lines)
+            digest = hashing.hasher.hexdigest()
+            rel = self._rel(file_path)
+            updated_at = updated_at or modified_at
+
+            if self._skip_unchanged(rel, digest, hashing.size, sources, updated_at):
+                export_progress.record_file()
+                return False
+
+            os.replace(partial_path, file_path)
+        finally:
+            if partial_path.exists():
+                partial_path.unlink()
+
+        set_file_times(str(file_path), created_at, modified_at)
+        self._mark_written(rel, digest, hashing.size, sources, updated_at)
+        export_progress.record_file()
+        self._maybe_checkpoint()
+        return True
+
+    def _maybe_checkpoint(self):
+        """定期保存检查点，中断后再次导出时已写出的文件可以跳过"""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now - self._last_checkpoint >= EXPORT_MANIFEST_CHECKPOINT_SECONDS:
+            self._last_checkpoint = now
+            self.save(complete=False)
+
+    def save(self, complete: bool = True):
+        """
+        保存清单（先写临时文件再替换，避免中断时留下损坏的清单）
+
+        Args:
+            complete: 导出是否已完成；检查点保留上次清单中尚未处理到的条目
+        """
+        with self._lock:
+            if complete:
+                files = dict(self.entries)
+            else:
+                files = {**self.previous, **self.entries}
+
+        data = {
+            "version": MANIFEST_VERSION,
+            "appVersion": VERSION,
+            "complete": complete,
+            "savedAt": datetime.now().isoformat(),
+            "fileCount": len(files),
+            "files": files,
+        }
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + PARTIAL_SUFFIX)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def _remove_orphans(self):
+        """删除上次导出过、本次没有再导出的文件，以及因此变空的目录"""
+        for rel in set(self.previous) - set(self.entries):
+            path = self.export_dir / rel
+            try:
+                path.unlink()
+                self.removed += 1
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                self.log(f"删除过期文件失败: {rel}: {str(e)}", "WARNING")
+                continue
+
+            parent = path.parent
+            while parent != self.export_dir and self.export_dir in parent.parents:
+                try:
+                    parent.rmdir()
+                except OSError:
+                    break
+                parent = parent.parent
+
+    def finish(self):
+        """导出完成：删除过期文件并保存清单"""
+        if not self.enabled:
+            return
+        self._remove_orphans()
+        self.save(complete=True)
+
+        if self.skipped or self.removed:
+            self.log(
+                f"导出清单: 写入{self.written}个文件, 跳过未变化的{self.skipped}个, 删除过期的{self.removed}个",
+                "INFO"
+            )
@@ -3,9 +3,13 @@ JSON 导出器
 负责构建自定义 JSON 导出结构
 """
 
-from typing import Dict, List, Set
+from typing import Any, Dict, Iterator, List, Set, TextIO, Tuple
 from collections import defaultdict
 
+from ..config import JSON_EXPORT_COMPACT
+from ..core.data_index import get_data_index
+from ..utils.json_stream import write_export_json
+
 
 class JSONExporter:
     """JSON 导出器 - 负责构建自定义JSON导出数据"""
@@ -18,6 +22,7 @@ class JSONExporter:
             parsed_data: 解析后的数据
         """
         self.parsed_data = parsed_data
+        self.index = get_data_index(parsed_data)
     
     def build_custom_json(self, selected_modules: List[str]) -> Dict:
         """
@@ -30,20 +35,39 @@ class JSONExporter:
             自定义导出的JSON数据
         """
         raw_data = self.parsed_data["raw"]
-        original_data = raw_data.get("data", {})
-        
-        new_data = {}
-        
-        for module_key in selected_modules:
-            if module_key in original_data:
-                new_data[module_key] = original_data[module_key]
         
         return {
             "mode": raw_data.get("mode", "postgres"),
             "schemaHash": raw_data.get("schemaHash", ""),
-            "data": new_data
+            "data": dict(self.iter_custom_modules(selected_modules))
         }
     
+    def iter_custom_modules(self, selected_modules: List[str]) -> Iterator[Tuple[str, Any]]:
+        """按选中顺序逐个生成 (模块键, 数据)，原始数据中没有的模块跳过"""
+        original_data = self.parsed_data["raw"].get("data", {})
+        for module_key in selected_modules:
+            if module_key in original_data:
+                yield module_key, original_data[module_key]
+    
+    def write_custom_json(self, f: TextIO, selected_modules: List[str],
+                          compact: bool = JSON_EXPORT_COMPACT) -> Dict[str, int]:
+        """
+        流式写出自定义JSON（内容与 build_custom_json 的结果相同，不构建完整的输出字典）
+        
+        Args:
+            f: 文本文件对象
+            selected_modules: 选中的模块列表
+            compact: 紧凑模式（无缩进）
+        
+        Returns:
+            各模块数组的元素数量
+        """
+        raw_data = self.parsed_data["raw"]
+        return write_export_json(
+            f, raw_data.get("mode", "postgres"), raw_data.get("schemaHash", ""),
+            self.iter_custom_modules(selected_modules), compact
+        )
+    
     def get_selected_item_data(self, item_type: str, item_id: str) -> Dict:
         """
         获取选中项的完整数据（包含子级数据）
@@ -68,15 +92,14 @@ class JSONExporter:
     
     def _get_message_data(self, msg_id: str) -> Dict:
         """获取单条消息数据"""
-        for topic_id, messages in self.parsed_data["messagesByTopic"].items():
-            for msg in messages:
-                if msg.get("id") == msg_id:
-                    return {
-                        "mode": "postgres",
-                        "schemaHash": self.parsed_data["raw"].get("schemaHash", ""),
-                        "data": {"messages": [msg]}
-                    }
-        return None
+        msg = self.index.get_message(msg_id)
+        if not msg:
+            return None
+        return {
+            "mode": "postgres",
+            "schemaHash": self.parsed_data["raw"].get("schemaHash", ""),
+            "data": {"messages": [msg]}
+        }
     
     def _get_topic_data(self, topic_id: str) -> Dict:
         """获取主题数据"""
@@ -104,11 +127,10 @@ class JSONExporter:
         session_topics = []
         session_messages = []
         
-        for topic_id, topic in self.parsed_data["topics"].items():
-            if topic.get("sessionId") == session_id:
-                session_topics.append(topic)
-                topic_messages = self.parsed_data["messagesByTopic"].get(topic_id, [])
-                session_messages.extend(topic_messages)
+        for topic_id, topic in self.index.get_session_topics(session_id):
+            session_topics.append(topic)
+            topic_messages = self.parsed_data["messagesByTopic"].get(topic_id, [])
+            session_messages.extend(topic_messages)
         
         return {
             "mode": "postgres",
@@ -131,28 +153,26 @@ class JSONExporter:
         agent_messages = []
         agents_to_sessions = []
         
-        for group in self.parsed_data["groups"]:
-            if group["agentId"] == agent_id:
-                for session_group in group["sessions"]:
-                    session_id = session_group["sessionId"]
-                    session = session_group.get("session")
-                    
-                    if session:
-                        agent_sessions.append(session)
-                    
-                    agents_to_sessions.append({
-                        "agentId": agent_id,
-                        "sessionId": session_id
-                    })
-                    
-                    for topic_group in session_group["topics"]:
-                        topic = topic_group.get("topic")
-                        if topic:
-                            agent_topics.append(topic)
-                        
-                        messages = topic_group.get("messages", [])
-                        agent_messages.extend(messages)
-                break
+        group = self.index.get_agent_group(agent_id)
+        for session_group in (group["sessions"] if group else []):
+            session_id = session_group["sessionId"]
+            session = session_group.get("session")
+            
+            if session:
+                agent_sessions.append(session)
+            
+            agents_to_sessions.append({
+                "agentId": agent_id,
+                "sessionId": session_id
+            })
+            
+            for topic_group in session_group["topics"]:
+                topic = topic_group.get("topic")
+                if topic:
+                    agent_topics.append(topic)
+                
+                messages = topic_group.get("messages", [])
+                agent_messages.extend(messages)
         
         return {
             "mode": "postgres",
@@ -186,6 +206,7 @@ class JSONExporter:
         sessions_set = set()
         topics_set = set()
         messages_set = set()
+        relations_set = set()  # 已添加的 (助手ID, 会话ID)
         
         for item_type, item_id in item_list:
             if item_type == "主题":
@@ -197,7 +218,8 @@ class JSONExporter:
             elif item_type == "助手":
                 self._add_agent_to_batch(item_id, all_agents, all_sessions, all_topics,
                                         all_messages, all_agents_to_sessions,
-                                        agents_set, sessions_set, topics_set, messages_set)
+                                        agents_set, sessions_set, topics_set, messages_set,
+                                        relations_set)
             elif item_type == "消息":
                 self._add_message_to_batch(item_id, all_messages, messages_set)
         
@@ -241,8 +263,8 @@ class JSONExporter:
             all_sessions.append(session)
             sessions_set.add(session_id)
         
-        for topic_id, topic in self.parsed_data["topics"].items():
-            if topic.get("sessionId") == session_id and topic_id not in topics_set:
+        for topic_id, topic in self.index.get_session_topics(session_id):
+            if topic_id not in topics_set:
                 all_topics.append(topic)
                 topics_set.add(topic_id)
                 
@@ -255,52 +277,48 @@ class JSONExporter:
     
     def _add_agent_to_batch(self, agent_id, all_agents, all_sessions, all_topics,
                            all_messages, all_agents_to_sessions,
-                           agents_set, sessions_set, topics_set, messages_set):
+                           agents_set, sessions_set, topics_set, messages_set, relations_set):
         """添加助手到批量数据"""
         agent = self.parsed_data["agents"].get(agent_id)
         if agent and agent_id not in agents_set:
             all_agents.append(agent)
             agents_set.add(agent_id)
         
-        for group in self.parsed_data["groups"]:
-            if group["agentId"] == agent_id:
-                for session_group in group["sessions"]:
-                    session_id = session_group["sessionId"]
-                    session = session_group.get("session")
-                    
-                    if session and session_id not in sessions_set:
-                        all_sessions.append(session)
-                        sessions_set.add(session_id)
-                    
-                    rel_key = f"{agent_id}_{session_id}"
-                    if rel_key not in {f"{r['agentId']}_{r['sessionId']}" for r in all_agents_to_sessions}:
-                        all_agents_to_sessions.append({
-                            "agentId": agent_id,
-                            "sessionId": session_id
-                        })
-                    
-                    for topic_group in session_group["topics"]:
-                        topic_id = topic_group["topicId"]
-                        topic = topic_group.get("topic")
-                        
-                        if topic and topic_id not in topics_set:
-                            all_topics.append(topic)
-                            topics_set.add(topic_id)
-                        
-                        messages = topic_group.get("messages", [])
-                        for msg in messages:
-                            msg_id = msg.get("id")
-                            if msg_id and msg_id not in messages_set:
-                                all_messages.append(msg)
-                                messages_set.add(msg_id)
-                break
+        group = self.index.get_agent_group(agent_id)
+        for session_group in (group["sessions"] if group else []):
+            session_id = session_group["sessionId"]
+            session = session_group.get("session")
+            
+            if session and session_id not in sessions_set:
+                all_sessions.append(session)
+                sessions_set.add(session_id)
+            
+            rel_key = (agent_id, session_id)
+            if rel_key not in relations_set:
+                relations_set.add(rel_key)
+                all_agents_to_sessions.append({
+                    "agentId": agent_id,
+                    "sessionId": session_id
+                })
+            
+            for topic_group in session_group["topics"]:
+                topic_id = topic_group["topicId"]
+                topic = topic_group.get("topic")
+                
+                if topic and topic_id not in topics_set:
+                    all_topics.append(topic)
+                    topics_set.add(topic_id)
+                
+                messages = topic_group.get("messages", [])
+                for msg in messages:
+                    msg_id = msg.get("id")
+                    if msg_id and msg_id not in messages_set:
+                        all_messages.append(msg)
+                        messages_set.add(msg_id)
     
     def _add_message_to_batch(self, msg_id, all_messages, messages_set):
         """添加消息到批量数据"""
-        for topic_id, messages in self.parsed_data["messagesByTopic"].items():
-            for msg in messages:
-                if msg.get("id") == msg_id:
-                    if msg_id not in messages_set:
-                        all_messages.append(msg)
-                        messages_set.add(msg_id)
-                    break
+        msg = self.index.get_message(msg_id)
+        if msg and msg_id not in messages_set:
+            all_messages.append(msg)
+            messages_set.add(msg_id)
@@ -5,21 +5,24 @@ Markdown 导出器
 
 import json
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 from ..utils.file_utils import safe_filename, ensure_unique_name, format_datetime
+from .render_cache import RenderCache, get_render_cache
 
 
 class MarkdownExporter:
     """Markdown 导出器 - 只负责构建 Markdown 内容"""
     
-    def __init__(self, parsed_data: Dict):
+    def __init__(self, parsed_data: Dict, render_cache: Optional[RenderCache] = None):
         """
         初始化导出器
         
         Args:
             parsed_data: 解析后的数据
+            render_cache: 消息渲染缓存（None 时使用程序共用的缓存）
         """
         self.parsed_data = parsed_data
+        self.render_cache = render_cache or get_render_cache()
     
     def build_agent_readme(self, group: Dict, include_metadata: bool, include_system_prompt: bool) -> str:
         """构建助手README内容"""
@@ -75,59 +78,56 @@ class MarkdownExporter:
     
     def build_agent_merged_markdown(self, group: Dict, include_metadata: bool, include_system_prompt: bool) -> str:
         """构建助手整合Markdown内容"""
-        lines = [f"# {group['agentLabel']} - 完整对话", ""]
+        return "\n".join(self.iter_agent_merged_markdown(group, include_metadata, include_system_prompt))
+    
+    def iter_agent_merged_markdown(self, group: Dict, include_metadata: bool,
+                                   include_system_prompt: bool) -> Iterator[str]:
+        """逐行生成助手整合Markdown内容（流式写出用，不在内存中拼接整个文档）"""
+        yield f"# {group['agentLabel']} - 完整对话"
+        yield ""
         
         agent = group.get("agent")
         
         if include_metadata and agent:
-            lines.append("## 助手信息")
-            lines.append("")
+            yield "## 助手信息"
+            yield ""
             if agent.get("id"):
-                lines.append(f"- **ID**: {agent['id']}")
+                yield f"- **ID**: {agent['id']}"
             if agent.get("model"):
-                lines.append(f"- **模型**: {agent['model']}")
+                yield f"- **模型**: {agent['model']}"
             if agent.get("provider"):
-                lines.append(f"- **提供商**: {agent['provider']}")
-            lines.append("")
+                yield f"- **提供商**: {agent['provider']}"
+            yield ""
         
         if include_system_prompt and agent and agent.get("systemRole"):
-            lines.append("## 系统提示词")
-            lines.append("")
-            lines.append("```")
-            lines.append(agent["systemRole"])
-            lines.append("```")
-            lines.append("")
+            yield "## 系统提示词"
+            yield ""
+            yield "```"
+            yield agent["systemRole"]
+            yield "```"
+            yield ""
         
-        lines.append("---")
-        lines.append("")
+        yield "---"
+        yield ""
         
         # 所有对话
         for session_group in group["sessions"]:
             for topic_group in session_group["topics"]:
-                lines.append(f"## {topic_group['topicLabel']}")
-                lines.append("")
+                yield f"## {topic_group['topicLabel']}"
+                yield ""
                 
                 if include_metadata:
                     if session_group.get("session"):
-                        lines.append(f"**会话**: {session_group['sessionLabel']}")
+                        yield f"**会话**: {session_group['sessionLabel']}"
                     if topic_group["topic"] and topic_group["topic"].get("createdAt"):
-                        lines.append(f"**创建时间**: {format_datetime(topic_group['topic']['createdAt'])}")
-                    lines.append("")
+                        yield f"**创建时间**: {format_datetime(topic_group['topic']['createdAt'])}"
+                    yield ""
                 
                 # 消息
-                for msg in topic_group["messages"]:
-                    role = msg.get("role", "").capitalize()
-                    timestamp = format_datetime(msg.get("createdAt") or msg.get("updatedAt"))
-                    
-                    lines.append(f"### {timestamp} - {role}")
-                    lines.append("")
-                    lines.extend(self.prettify_content(msg.get("content")))
-                    lines.append("")
+                yield from self.iter_messages(topic_group["messages"])
                 
-                lines.append("---")
-                lines.append("")
-        
-        return "\n".join(lines)
+                yield "---"
+                yield ""
     
     def build_topic_markdown(self, agent: Optional[Dict], session: Optional[Dict], 
                             topic_group: Dict, agent_label: str,
@@ -184,67 +184,85 @@ class MarkdownExporter:
         lines.append("")
         
         for msg in topic_group["messages"]:
-            role = msg.get("role", "").capitalize()
-            timestamp = format_datetime(msg.get("createdAt") or msg.get("updatedAt"))
-            
-            lines.append(f"### {timestamp} - {role}")
+            lines.append(self.render_cache.render("topic", msg, self._render_topic_message))
+        
+        return "\n".join(lines)
+    
+    def _render_topic_message(self, msg: Dict) -> str:
+        """渲染主题文档中的一条消息（含推理过程和搜索上下文）"""
+        role = msg.get("role", "").capitalize()
+        timestamp = format_datetime(msg.get("createdAt") or msg.get("updatedAt"))
+        
+        lines = [f"### {timestamp} - {role}", ""]
+        lines.extend(self.prettify_content(msg.get("content")))
+        
+        # 推理内容
+        if msg.get("reasoning"):
+            lines.append("**推理过程**:")
             lines.append("")
-            
-            lines.extend(self.prettify_content(msg.get("content")))
-            
-            # 推理内容
-            if msg.get("reasoning"):
-                lines.append("**推理过程**:")
-                lines.append("")
-                lines.extend(self.prettify_content(msg["reasoning"]))
-            
-            # 搜索内容
-            if msg.get("search"):
-                lines.append("**搜索上下文**:")
-                lines.append("")
-                lines.extend(self.prettify_content(msg["search"]))
-            
+            lines.extend(self.prettify_content(msg["reasoning"]))
+        
+        # 搜索内容
+        if msg.get("search"):
+            lines.append("**搜索上下文**:")
             lines.append("")
+            lines.extend(self.prettify_content(msg["search"]))
         
+        lines.append("")
         return "\n".join(lines)
     
     def build_session_markdown(self, group: Dict, session_group: Dict) -> str:
         """构建会话Markdown内容"""
-        lines = [f"# {session_group['sessionLabel']}", ""]
+        return "\n".join(self.iter_session_markdown(group, session_group))
+    
+    def iter_session_markdown(self, group: Dict, session_group: Dict) -> Iterator[str]:
+        """逐行生成会话Markdown内容（流式写出用）"""
+        yield f"# {session_group['sessionLabel']}"
+        yield ""
         
         agent = group.get("agent")
         
         if agent:
-            lines.append("## 助手信息")
-            lines.append("")
-            lines.append(f"- **助手**: {group['agentLabel']}")
+            yield "## 助手信息"
+            yield ""
+            yield f"- **助手**: {group['agentLabel']}"
             if agent.get("model"):
-                lines.append(f"- **模型**: {agent['model']}")
+                yield f"- **模型**: {agent['model']}"
             if agent.get("provider"):
-                lines.append(f"- **提供商**: {agent['provider']}")
-            lines.append("")
+                yield f"- **提供商**: {agent['provider']}"
+            yield ""
         
         # 所有主题
         for topic_group in session_group["topics"]:
-            lines.append(f"## {topic_group['topicLabel']}")
-            lines.append("")
+            yield f"## {topic_group['topicLabel']}"
+            yield ""
             
-            for msg in topic_group["messages"]:
-                role = msg.get("role", "").capitalize()
-                timestamp = format_datetime(msg.get("createdAt") or msg.get("updatedAt"))
-                
-                lines.append(f"### {timestamp} - {role}")
-                lines.append("")
-                lines.extend(self.prettify_content(msg.get("content")))
-                lines.append("")
+            yield from self.iter_messages(topic_group["messages"])
             
-            lines.append("---")
-            lines.append("")
+            yield "---"
+            yield ""
+    
+    def iter_messages(self, messages: List[Dict]) -> Iterator[str]:
+        """逐条生成消息片段（标题 + 内容，整合/会话导出共用，片段带缓存）"""
+        for msg in messages:
+            yield self.render_cache.render("merged", msg, self._render_merged_message)
+    
+    def _render_merged_message(self, msg: Dict) -> str:
+        """渲染整合/会话文档中的一条消息（多行片段）"""
+        role = msg.get("role", "").capitalize()
+        timestamp = format_datetime(msg.get("createdAt") or msg.get("updatedAt"))
         
+        lines = [f"### {timestamp} - {role}", ""]
+        lines.extend(self.prettify_content(msg.get("content")))
+        lines.append("")
         return "\n".join(lines)
     
     def build_single_message_markdown(self, msg: Dict) -> str:
         """构建单条消息的Markdown内容"""
+        return self.render_cache.render("single", msg, self._render_single_message)
+    
+    def _render_single_message(self, msg: Dict) -> str:
+        """渲染单条消息文档"""
         lines = ["# 单条消息", ""]
         
         # 消息基本信息
@@ -0,0 +1,483 @@
+"""
+Markdown 文件写出
+把解析后的数据按目录结构写成 Markdown 文件，不依赖界面，可在后台线程中使用
+"""
+
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .markdown_exporter import MarkdownExporter
+from .export_manifest import ExportManifest
+from .archive_writer import ArchiveWriter, open_export_target, archive_path_for
+from .render_cache import get_render_cache
+from ..utils.file_utils import (
+    safe_filename, ensure_unique_name, format_datetime,
+    get_time_range_from_messages
+)
+
+
+def _render_message(msg: Dict, include_metadata: bool) -> str:
+    """渲染主题中的一条消息（多行片段）"""
+    role = msg.get("role", "unknown")
+    content = msg.get("content", "")
+
+    role_label = "👤 用户" if role == "user" else "🤖 助手" if role == "assistant" else f"⚙️ {role}"
+
+    lines = [f"### {role_label}"]
+
+    if include_metadata:
+        created_at = msg.get("createdAt")
+        model = msg.get("model", "")
+        if created_at or model:
+            meta_parts = []
+            if created_at:
+                meta_parts.append(f"时间: {format_datetime(created_at)}")
+            if model:
+                meta_parts.append(f"模型: {model}")
+            lines.append(f"*{' | '.join(meta_parts)}*")
+
+    lines.append("")
+    lines.append(content if content else "(空)")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def _render_message_file_body(msg: Dict, include_metadata: bool) -> str:
+    """渲染单条消息文件中标题之后的部分（标题含序号，不放进缓存）"""
+    role = msg.get("role", "unknown")
+    content = msg.get("content", "")
+    created_at = msg.get("createdAt")
+    model = msg.get("model", "")
+
+    lines = [
+        "",
+        f"- **角色**: {role}",
+        f"- **时间**: {format_datetime(created_at) if created_at else '-'}",
+    ]
+    if model:
+        lines.append(f"- **模型**: {model}")
+
+    if include_metadata:
+        metadata = msg.get("metadata") or {}
+        tokens = metadata.get("totalTokens", 0)
+        if tokens:
+            lines.append(f"- **Token**: {tokens}")
+
+    lines.append("")
+    lines.append("## 内容")
+    lines.append("")
+    lines.append(content if content else "(空)")
+    return "\n".join(lines)
+
+
+def _iter_messages(messages: List[Dict], include_metadata: bool) -> Iterator[str]:
+    """逐条生成主题中的消息片段（单文件 / 助手文件模式共用，片段带缓存）"""
+    cache = get_render_cache()
+    kind = f"writer:{int(include_metadata)}"
+    render = partial(_render_message, include_metadata=include_metadata)
+    for msg in messages:
+        yield cache.render(kind, msg, render)
+
+
+def _iter_system_prompt(agent: Optional[Dict]) -> Iterator[str]:
+    """逐行生成助手系统提示词"""
+    if agent:
+        system_role = agent.get("systemRole", "")
+        if system_role:
+            yield "## 系统提示词"
+            yield ""
+            yield "```"
+            yield system_role
+            yield "```"
+            yield ""
+
+
+def _agent_time_range(group: Dict):
+    """助手的创建/修改时间（创建时间优先使用助手自身的 createdAt）"""
+    agent_all_messages = []
+    for session_group in group["sessions"]:
+        for topic_group in session_group["topics"]:
+            agent_all_messages.extend(topic_group.get("messages", []))
+
+    agent_created_at, agent_modified_at = get_time_range_from_messages(agent_all_messages)
+    agent = group.get("agent")
+    if agent and agent.get("createdAt"):
+        agent_created_at = agent.get("createdAt")
+    return agent_created_at, agent_modified_at
+
+
+def _iter_single_file_lines(parsed_data: Dict, include_metadata: bool,
+                            include_system_prompt: bool) -> Iterator[str]:
+    """逐行生成单文件导出的全部内容"""
+    yield "# LobeChat 全部对话"
+    yield ""
+    yield f"- **源文件**: `{parsed_data['sourceFileName']}`"
+    yield f"- **助手数**: {parsed_data['stats']['agentCount']}"
+    yield f"- **主题数**: {parsed_data['stats']['topicCount']}"
+    yield f"- **消息数**: {parsed_data['stats']['messageCount']}"
+    yield ""
+    yield "---"
+    yield ""
+
+    for group in parsed_data["groups"]:
+        # 助手标题
+        yield f"# 助手: {group['agentLabel']}"
+        yield ""
+
+        # 助手系统提示词
+        if include_system_prompt:
+            yield from _iter_system_prompt(group.get("agent"))
+
+        # 遍历主题
+        for session_group in group["sessions"]:
+            for topic_group in session_group["topics"]:
+                yield f"## 主题: {topic_group['topicLabel']}"
+                yield ""
+
+                yield from _iter_messages(topic_group.get("messages", []), include_metadata)
+
+                yield "---"
+                yield ""
+
+        yield ""
+
+
+def _iter_agent_file_lines(group: Dict, topic_count: int, message_count: int,
+                           include_metadata: bool, include_system_prompt: bool) -> Iterator[str]:
+    """逐行生成助手文件模式中单个助手的内容"""
+    yield f"# {group['agentLabel']}"
+    yield ""
+
+    # 助手系统提示词
+    if include_system_prompt:
+        yield from _iter_system_prompt(group.get("agent"))
+
+    # 统计信息
+    yield f"- **主题数**: {topic_count}"
+    yield f"- **消息数**: {message_count}"
+    yield ""
+    yield "---"
+    yield ""
+
+    # 遍历主题
+    for session_group in group["sessions"]:
+        for topic_group in session_group["topics"]:
+            yield f"## {topic_group['topicLabel']}"
+            yield ""
+
+            yield from _iter_messages(topic_group.get("messages", []), include_metadata)
+
+            yield "---"
+            yield ""
+
+
+def export_markdown_single_file(parsed_data: Dict, file_path: Path,
+                                include_metadata: bool = True,
+                                include_system_prompt: bool = True,
+                                log_callback: Optional[Callable] = None,
+                                archive_format: Optional[str] = None) -> int:
+    """
+    导出所有对话为单个Markdown文件
+
+    Args:
+        parsed_data: 解析后的数据
+        file_path: 输出文件路径
+        include_metadata: 是否包含元数据
+        include_system_prompt: 是否包含系统提示词
+        log_callback: 日志回调函数（输出导出清单的跳过/删除统计）
+        archive_format: 压缩包格式（zip / tar.zst），指定时输出到同名压缩包而不是目录
+
+    Returns:
+        写出的文件数
+    """
+    # 边生成边写入，不在内存中拼接整个文档；所在目录由用户选择，不使用导出清单
+    file_path = Path(file_path)
+    if archive_format:
+        target = ArchiveWriter(file_path.parent, archive_path_for(file_path, archive_format), archive_format,
+                               log_callback=log_callback)
+    else:
+        target = ExportManifest(file_path.parent, enabled=False, log_callback=log_callback)
+    with target:
+        target.write_lines(
+            file_path,
+            _iter_single_file_lines(parsed_data, include_metadata, include_system_prompt),
+            sources=[parsed_data['sourceFileName']]
+        )
+
+    return 1
+
+
+def export_markdown_agent_files(parsed_data: Dict, export_path: Path,
+                                include_metadata: bool = True,
+                                include_system_prompt: bool = True,
+                                log_callback: Optional[Callable] = None,
+                                archive_format: Optional[str] = None) -> int:
+    """
+    导出每个助手为单独的Markdown文件
+
+    Args:
+        parsed_data: 解析后的数据
+        export_path: 导出目录（不存在时创建）
+        include_metadata: 是否包含元数据
+        include_system_prompt: 是否包含系统提示词
+        log_callback: 日志回调函数（输出导出清单的跳过/删除统计）
+        archive_format: 压缩包格式（zip / tar.zst），指定时输出到同名压缩包而不是目录
+
+    Returns:
+        写出的文件数
+    """
+    export_path = Path(export_path)
+    with open_export_target(export_path, archive_format, log_callback) as target:
+        file_count = 0
+        index_lines = [
+            "# LobeChat 助手列表",
+            "",
+            f"- **源文件**: `{parsed_data['sourceFileName']}`",
+            ""
+        ]
+
+        used_names = set()
+        for group in parsed_data["groups"]:
+            # 文件名
+            filename = safe_filename(group["agentLabel"], group["agentId"])
+            filename = ensure_unique_name(filename, used_names)
+
+            topic_count = sum(len(s["topics"]) for s in group["sessions"])
+            message_count = sum(sum(len(t["messages"]) for t in s["topics"]) for s in group["sessions"])
+
+            # 写入文件
+            file_path = export_path / f"{filename}.md"
+            agent_created_at, agent_modified_at = _agent_time_range(group)
+            target.write_lines(
+                file_path,
+                _iter_agent_file_lines(group, topic_count, message_count, include_metadata, include_system_prompt),
+                agent_created_at, agent_modified_at,
+                sources=[group["agentId"]]
+            )
+            file_count += 1
+
+            # 索引
+            index_lines.append(f"- [{group['agentLabel']}]({filename}.md) - {topic_count}主题, {message_count}消息")
+
+        # 写入索引
+        target.write_text(export_path / "index.md", "\n".join(index_lines))
+        file_count += 1
+
+    return file_count
+
+
+def export_markdown_directory(parsed_data: Dict, export_path: Path,
+                              include_metadata: bool = True,
+                              include_system_prompt: bool = True,
+                              log_callback: Optional[Callable] = None,
+                              archive_format: Optional[str] = None) -> int:
+    """
+    按目录结构导出Markdown（每个主题一个文件：助手/主题.md）
+
+    Args:
+        parsed_data: 解析后的数据
+        export_path: 导出目录（不存在时创建）
+        include_metadata: 是否包含元数据
+        include_system_prompt: 是否包含系统提示词
+        log_callback: 日志回调函数（输出导出清单的跳过/删除统计）
+        archive_format: 压缩包格式（zip / tar.zst），指定时输出到同名压缩包而不是目录
+
+    Returns:
+        写出的文件数
+    """
+    export_path = Path(export_path)
+    with open_export_target(export_path, archive_format, log_callback) as target:
+        exporter = MarkdownExporter(parsed_data)
+
+        file_count = 0
+        index_lines = [
+            "# LobeChat 对话索引",
+            "",
+            f"- **源文件**: `{parsed_data['sourceFileName']}`",
+            ""
+        ]
+
+        # 渲染在当前线程按顺序进行，建目录、写入和设置时间戳交给写出线程并发完成
+        with target.parallel_writer() as writer:
+            for group in parsed_data["groups"]:
+                # 助手目录（由写出线程创建）
+                agent_dir_name = safe_filename(group["agentLabel"], group["agentId"])
+                agent_dir = export_path / agent_dir_name
+
+                # README - 使用助手的时间信息
+                readme_content = exporter.build_agent_readme(group, include_metadata, include_system_prompt)
+                readme_path = str(agent_dir / "README.md")
+
+                agent_created_at, agent_modified_at = _agent_time_range(group)
+                target.write_text(readme_path, readme_content, agent_created_at, agent_modified_at,
+                                  sources=[group["agentId"]], writer=writer)
+                file_count += 1
+
+                # 索引
+                session_count = len(group["sessions"])
+                topic_count = sum(len(s["topics"]) for s in group["sessions"])
+                message_count = sum(sum(len(t["messages"]) for t in s["topics"]) for s in group["sessions"])
+
+                index_lines.append(
+                    f"- [{group['agentLabel']}]({agent_dir_name}/README.md) - "
+                    f"{session_count}会话, {topic_count}主题, {message_count}消息"
+                )
+
+                # 导出主题
+                used_names = set()
+                for session_group in group["sessions"]:
+                    for topic_group in session_group["topics"]:
+                        filename = safe_filename(topic_group["topicLabel"], topic_group["topicId"])
+                        filename = ensure_unique_name(filename, used_names)
+
+                        content = exporter.build_topic_markdown(
+                            group.get("agent"), session_group["session"], topic_group,
+                            group["agentLabel"], include_metadata, include_system_prompt
+                        )
+
+                        file_path = str(agent_dir / f"{filename}.md")
+
+                        # 获取主题的时间信息
+                        topic = topic_group.get("topic")
+                        messages = topic_group.get("messages", [])
+                        created_at = topic.get("createdAt") if topic else None
+                        _, latest_modified = get_time_range_from_messages(messages)
+                        modified_at = latest_modified or (topic.get("updatedAt") if topic else None) or created_at
+
+                        target.write_text(file_path, content, created_at, modified_at,
+                                          sources=[topic_group["topicId"]], writer=writer)
+                        file_count += 1
+
+        # 写入索引
+        target.write_text(export_path / "index.md", "\n".join(index_lines))
+        file_count += 1
+
+    return file_count
+
+
+def export_markdown_message_files(parsed_data: Dict, export_path: Path,
+                                  include_metadata: bool = True,
+                                  include_system_prompt: bool = True,
+                                  log_callback: Optional[Callable] = None,
+                                  archive_format: Optional[str] = None) -> int:
+    """
+    按对话导出Markdown - 每个对话一个文件（三级目录结构：助手/主题/对话.md）
+
+    Args:
+        parsed_data: 解析后的数据
+        export_path: 导出目录（不存在时创建）
+        include_metadata: 是否包含元数据
+        include_system_prompt: 是否包含系统提示词
+        log_callback: 日志回调函数（输出导出清单的跳过/删除统计）
+        archive_format: 压缩包格式（zip / tar.zst），指定时输出到同名压缩包而不是目录
+
+    Returns:
+        写出的文件数
+    """
+    export_path = Path(export_path)
+    with open_export_target(export_path, archive_format, log_callback) as target:
+        exporter = MarkdownExporter(parsed_data)
+        render_cache = get_render_cache()
+        body_kind = f"message_file:{int(include_metadata)}"
+        render_body = partial(_render_message_file_body, include_metadata=include_metadata)
+
+        file_count = 0
+        index_lines = [
+            "# LobeChat 对话索引",
+            "",
+            f"- **源文件**: `{parsed_data['sourceFileName']}`",
+            "- **导出模式**: 每个对话一个文件",
+            ""
+        ]
+
+        # 渲染在当前线程按顺序进行，建目录、写入和设置时间戳交给写出线程并发完成
+        with target.parallel_writer() as writer:
+            for group in parsed_data["groups"]:
+                # 助手目录（由写出线程创建）
+                agent_dir_name = safe_filename(group["agentLabel"], group["agentId"])
+                agent_dir = export_path / agent_dir_name
+
+                # 助手 README
+                readme_content = exporter.build_agent_readme(group, include_metadata, include_system_prompt)
+                readme_path = str(agent_dir / "README.md")
+                agent_created_at, agent_modified_at = _agent_time_range(group)
+                target.write_text(readme_path, readme_content, agent_created_at, agent_modified_at,
+                                  sources=[group["agentId"]], writer=writer)
+                file_count += 1
+
+                # 索引
+                session_count = len(group["sessions"])
+                topic_count = sum(len(s["topics"]) for s in group["sessions"])
+                message_count = sum(sum(len(t["messages"]) for t in s["topics"]) for s in group["sessions"])
+
+                index_lines.append(
+                    f"- [{group['agentLabel']}]({agent_dir_name}/README.md) - "
+                    f"{session_count}会话, {topic_count}主题, {message_count}消息"
+                )
+
+                # 遍历主题
+                used_topic_names = set()
+                for session_group in group["sessions"]:
+                    for topic_group in session_group["topics"]:
+                        # 主题目录（由写出线程创建）
+                        topic_dir_name = safe_filename(topic_group["topicLabel"], topic_group["topicId"])
+                        topic_dir_name = ensure_unique_name(topic_dir_name, used_topic_names)
+                        topic_dir = agent_dir / topic_dir_name
+
+                        # 主题 README
+                        topic = topic_group.get("topic")
+                        messages = topic_group.get("messages", [])
+
+                        topic_readme_lines = [
+                            f"# {topic_group['topicLabel']}",
+                            "",
+                            f"- **消息数**: {len(messages)}",
+                        ]
+                        if topic and topic.get("createdAt"):
+                            topic_readme_lines.append(f"- **创建时间**: {format_datetime(topic.get('createdAt'))}")
+
+                        topic_readme_lines.append("")
+                        topic_readme_lines.append("## 对话列表")
+                        topic_readme_lines.append("")
+
+                        # 导出每条消息为单独文件
+                        for i, msg in enumerate(messages):
+                            role = msg.get("role", "unknown")
+                            content = msg.get("content", "")
+                            created_at = msg.get("createdAt")
+
+                            # 生成文件名：序号_角色_时间
+                            time_str = format_datetime(created_at).replace(":", "-").replace(" ", "_") if created_at else ""
+                            msg_filename = f"{i+1:04d}_{role}_{time_str}"
+                            msg_filename = safe_filename(msg_filename, msg.get("id", ""))
+
+                            # 构建消息内容
+                            msg_body = render_cache.render(body_kind, msg, render_body)
+
+                            # 写入文件
+                            msg_file_path = str(topic_dir / f"{msg_filename}.md")
+                            target.write_text(msg_file_path, f"# 消息 #{i+1}\n{msg_body}", created_at, created_at,
+                                              sources=[msg.get("id")], updated_at=msg.get("updatedAt"),
+                                              writer=writer)
+                            file_count += 1
+
+                            # 添加到主题README索引
+                            role_emoji = "👤" if role == "user" else "🤖" if role == "assistant" else "⚙️"
+                            preview = content[:50].replace("\n", " ") + "..." if len(content) > 50 else content.replace("\n", " ")
+                            topic_readme_lines.append(f"- {role_emoji} [{msg_filename}]({msg_filename}.md) - {preview}")
+
+                        # 写入主题README
+                        topic_readme_path = str(topic_dir / "README.md")
+                        topic_created = topic.get("createdAt") if topic else None
+                        _, topic_modified = get_time_range_from_messages(messages)
+                        target.write_text(topic_readme_path, "\n".join(topic_readme_lines),
+                                          topic_created, topic_modified,
+                                          sources=[topic_group["topicId"]], writer=writer)
+                        file_count += 1
+
+        # 写入总索引
+        target.write_text(export_path / "index.md", "\n".join(index_lines))
+        file_count += 1
+
+    return file_count
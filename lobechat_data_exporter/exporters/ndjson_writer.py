@@ -0,0 +1,170 @@
+"""
+JSON Lines 导出
+每行一个带类型标记的实体 {"type": 模块键, "data": 行数据}，便于下游工具流式读取、切分和并行处理；
+可按大小自动分卷，每个分卷的第一行都是 meta，可以单独处理
+"""
+
+import json
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..config import NDJSON_MAX_FILE_MB
+from ..core.ndjson_reader import (
+    NDJSON_FORMAT, NDJSON_VERSION, META_TYPE, MODULE_TYPE, part_file_name
+)
+
+
+def _encode_line(record: Dict) -> bytes:
+    """编码一行（紧凑格式 + 换行）"""
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class NDJSONWriter:
+    """
+    JSON Lines 写出器（可分卷）
+
+    max_bytes 为 0 时写入单个文件；否则写入 <名称>.00001.jsonl、<名称>.00002.jsonl ...，
+    当前分卷超过 max_bytes 后从下一行开始写新分卷（单行不拆分）。
+    用作上下文管理器时异常退出会删除已写出的文件。
+    """
+
+    def __init__(self, file_path: Path, mode: Any = None, schema_hash: Any = None,
+                 max_bytes: Optional[int] = None, log_callback: Optional[Callable] = None):
+        """
+        初始化写出器（第一个文件在写入第一行时创建）
+
+        Args:
+            file_path: 输出文件路径（分卷时作为分卷名称的基础）
+            mode: 导出模式（写入 meta）
+            schema_hash: 结构哈希（写入 meta）
+            max_bytes: 分卷大小（字节），None 时使用 NDJSON_MAX_FILE_MB，0 表示不分卷
+            log_callback: 日志回调函数
+        """
+        self.file_path = Path(file_path)
+        self.mode = mode
+        self.schema_hash = schema_hash
+        self.max_bytes = NDJSON_MAX_FILE_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self.log_callback = log_callback
+        self.files: List[Path] = []
+        self.counts: Dict[str, int] = {}  # 各模块行数
+        self._f = None
+        self._size = 0
+
+    def __enter__(self) -> 'NDJSONWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        if exc_type is not None:
+            for path in self.files:
+                path.unlink(missing_ok=True)
+        return False
+
+    def log(self, message: str, level: str = "INFO"):
+        """记录日志"""
+        if self.log_callback:
+            self.log_callback(message, level)
+
+    def _open_next(self):
+        """打开下一个文件并写入 meta 行"""
+        if self._f is not None:
+            self._f.close()
+        if self.max_bytes > 0:
+            ext = self.file_path.suffix or ".jsonl"
+            path = self.file_path.with_name(part_file_name(self.file_path.stem, len(self.files) + 1, ext))
+        else:
+            path = self.file_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = open(path, "wb")
+        self.files.append(path)
+        self._size = 0
+        self._write_line({
+            "type": META_TYPE,
+            "data": {
+                "format": NDJSON_FORMAT,
+                "version": NDJSON_VERSION,
+                "mode": self.mode,
+                "schemaHash": self.schema_hash,
+                "part": len(self.files),
+            }
+        })
+
+    def _write_line(self, record: Dict):
+        """写入一行"""
+        line = _encode_line(record)
+        self._f.write(line)
+        self._size += len(line)
+
+    def write(self, entity_type: str, data: Any, is_object: bool = False):
+        """
+        写入一个实体
+
+        Args:
+            entity_type: 类型标记（模块键）
+            data: 实体数据
+            is_object: 非数组模块的整体数据（读取时不追加到列表）
+        """
+        if self._f is None or (self.max_bytes > 0 and self._size >= self.max_bytes):
+            self._open_next()
+        record = {"type": entity_type, "data": data}
+        if is_object:
+            record["object"] = True
+        self._write_line(record)
+
+    def write_module(self, module_key: str, rows: Any) -> int:
+        """
+        写入一个模块的全部行（rows 可以是迭代器），最后写模块结束行
+
+        Returns:
+            写入的行数
+        """
+        count = 0
+        if isinstance(rows, (list, tuple, Iterator)):
+            for row in rows:
+                self.write(module_key, row)
+                count += 1
+        else:
+            self.write(module_key, rows, is_object=True)
+            count = 1
+        self.write(MODULE_TYPE, {"key": module_key, "count": count})
+        self.counts[module_key] = count
+        return count
+
+    def write_modules(self, modules: Iterable[Tuple[str, Any]]) -> Dict[str, int]:
+        """逐个写入 (模块键, 行) 并返回各模块行数"""
+        for module_key, rows in modules:
+            self.write_module(module_key, rows)
+        return self.counts
+
+    def close(self):
+        """关闭当前文件（没有写入任何内容时也生成只有 meta 的文件）"""
+        if self._f is None and not self.files:
+            self._open_next()
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+def export_ndjson(file_path: Path, mode: Any, schema_hash: Any,
+                  modules: Iterable[Tuple[str, Any]], max_bytes: Optional[int] = None,
+                  log_callback: Optional[Callable] = None) -> Tuple[Dict[str, int], List[Path]]:
+    """
+    把 (模块键, 行) 流式写出为 JSON Lines
+
+    Args:
+        file_path: 输出文件路径
+        mode: 导出模式
+        schema_hash: 结构哈希
+        modules: (模块键, 行) 的可迭代对象，行可以是迭代器（如数据库游标）
+        max_bytes: 分卷大小（字节），None 时使用配置，0 表示不分卷
+        log_callback: 日志回调函数
+
+    Returns:
+        (各模块行数, 写出的文件列表)
+    """
+    with NDJSONWriter(file_path, mode, schema_hash, max_bytes, log_callback) as writer:
+        counts = writer.write_modules(modules)
+    if len(writer.files) > 1:
+        writer.log(f"JSON Lines 已分为{len(writer.files)}个文件: {writer.files[0].name} ...", "INFO")
+    return counts, writer.files
@@ -0,0 +1,263 @@
+"""
+Parquet 列式导出
+把消息、主题、助手逐行写成带类型的 Parquet 文件（metadata 中的 Token、费用、速度、延迟等展开为独立列），
+按行组分批写出，数据可以来自解析数据也可以直接来自数据库游标；需要 pyarrow 库
+"""
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..config import PARQUET_ROW_GROUP_ROWS, PARQUET_COMPRESSION
+
+
+# 列定义：(列名, 类型, 来源字段路径)，路径中的 "." 表示嵌套字段
+MESSAGE_COLUMNS = [
+    ("id", "string", "id"),
+    ("role", "string", "role"),
+    ("content", "text", "content"),
+    ("model", "string", "model"),
+    ("provider", "string", "provider"),
+    ("sessionId", "string", "sessionId"),
+    ("topicId", "string", "topicId"),
+    ("threadId", "string", "threadId"),
+    ("parentId", "string", "parentId"),
+    ("favorite", "bool", "favorite"),
+    ("hasError", "flag", "error"),
+    ("createdAt", "timestamp", "createdAt"),
+    ("updatedAt", "timestamp", "updatedAt"),
+    ("totalTokens", "int64", "metadata.totalTokens"),
+    ("inputTokens", "int64", "metadata.totalInputTokens"),
+    ("outputTokens", "int64", "metadata.totalOutputTokens"),
+    ("inputTextTokens", "int64", "metadata.inputTextTokens"),
+    ("outputTextTokens", "int64", "metadata.outputTextTokens"),
+    ("cost", "float64", "metadata.cost"),
+    ("tps", "float64", "metadata.tps"),
+    ("latency", "int64", "metadata.latency"),
+    ("ttft", "int64", "metadata.ttft"),
+    ("duration", "int64", "metadata.duration"),
+]
+
+TOPIC_COLUMNS = [
+    ("id", "string", "id"),
+    ("title", "string", "title"),
+    ("sessionId", "string", "sessionId"),
+    ("favorite", "bool", "favorite"),
+    ("model", "string", "metadata.model"),
+    ("createdAt", "timestamp", "createdAt"),
+    ("updatedAt", "timestamp", "updatedAt"),
+]
+
+AGENT_COLUMNS = [
+    ("id", "string", "id"),
+    ("slug", "string", "slug"),
+    ("title", "string", "title"),
+    ("description", "string", "description"),
+    ("model", "string", "model"),
+    ("provider", "string", "provider"),
+    ("tags", "list<string>", "tags"),
+    ("createdAt", "timestamp", "createdAt"),
+    ("updatedAt", "timestamp", "updatedAt"),
+]
+
+# 模块键 → (文件名, 列定义)
+PARQUET_TABLES = {
+    "messages": ("messages.parquet", MESSAGE_COLUMNS),
+    "topics": ("topics.parquet", TOPIC_COLUMNS),
+    "agents": ("agents.parquet", AGENT_COLUMNS),
+}
+
+
+def _import_pyarrow():
+    """延迟导入 pyarrow（可选依赖）"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("导出 Parquet 需要 pyarrow 库，请运行: pip install pyarrow")
+    return pyarrow, pyarrow.parquet
+
+
+def _to_string(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return value if isinstance(value, str) else str(value)
+
+
+def _to_bool(value: Any) -> Optional[bool]:
+    return None if value is None else bool(value)
+
+
+def _to_flag(value: Any) -> bool:
+    """字段是否有值（如 error 不为空）"""
+    return value is not None and value != {} and value != ""
+
+
+def _to_int(value: Any) -> Optional[int]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return int(round(value))
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+def _to_timestamp(value: Any) -> Optional[datetime]:
+    """ISO 字符串 / datetime / 毫秒时间戳 → UTC datetime，无法识别时为空"""
+    if isinstance(value, datetime):
+        dt = value
+    elif isinstance(value, str):
+        try:
+            # Python 3.11 之前的 fromisoformat 不接受 "Z" 后缀
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+    else:
+        return None
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def _to_string_list(value: Any) -> Optional[List[str]]:
+    if not isinstance(value, list):
+        return None
+    return [str(v) for v in value if v is not None]
+
+
+_CONVERTERS = {
+    "string": _to_string,
+    "text": _to_string,
+    "bool": _to_bool,
+    "flag": _to_flag,
+    "int64": _to_int,
+    "float64": _to_float,
+    "timestamp": _to_timestamp,
+    "list<string>": _to_string_list,
+}
+
+
+def _arrow_type(pa, type_key: str):
+    """列类型 → pyarrow 类型"""
+    return {
+        "string": pa.string(),
+        "text": pa.large_string(),  # 消息内容：一个行组可能超过 2GB
+        "bool": pa.bool_(),
+        "flag": pa.bool_(),
+        "int64": pa.int64(),
+        "float64": pa.float64(),
+        "timestamp": pa.timestamp("ms", tz="UTC"),
+        "list<string>": pa.list_(pa.string()),
+    }[type_key]
+
+
+class ParquetTableWriter:
+    """
+    单个 Parquet 文件的分批写出器
+
+    逐行追加，缓冲满 row_group_rows 行时写出一个行组；文件在第一次写出时创建，没有数据时生成只有表结构的空文件。
+    """
+
+    def __init__(self, file_path: Path, columns: List[Tuple[str, str, str]],
+                 row_group_rows: int = PARQUET_ROW_GROUP_ROWS,
+                 compression: str = PARQUET_COMPRESSION):
+        """
+        初始化写出器
+
+        Args:
+            file_path: 输出文件路径
+            columns: 列定义 [(列名, 类型, 来源字段路径)]
+            row_group_rows: 每个行组的行数
+            compression: 压缩算法
+        """
+        self.pa, self.pq = _import_pyarrow()
+        self.file_path = Path(file_path)
+        self.columns = columns
+        self.row_group_rows = max(1, row_group_rows)
+        self.compression = compression
+        self.schema = self.pa.schema([(name, _arrow_type(self.pa, type_key)) for name, type_key, _ in columns])
+        self._getters = [
+            (_CONVERTERS[type_key], source.split(".")) for _, type_key, source in columns
+        ]
+        self._buffers: List[List[Any]] = [[] for _ in columns]
+        self._writer = None
+        self.row_count = 0
+
+    def append(self, row: Dict):
+        """追加一行（缺少的字段为空）"""
+        for buffer, (convert, path) in zip(self._buffers, self._getters):
+            value = row
+            for key in path:
+                value = value.get(key) if isinstance(value, dict) else None
+            buffer.append(convert(value))
+        self.row_count += 1
+        if len(self._buffers[0]) >= self.row_group_rows:
+            self.flush()
+
+    def _open(self):
+        if self._writer is None:
+            self.file_path.parent.mkdir(parents=True, exist_ok=True)
+            self._writer = self.pq.ParquetWriter(str(self.file_path), self.schema, compression=self.compression)
+
+    def flush(self):
+        """把缓冲的行写出为一个行组"""
+        self._open()
+        if not self._buffers[0]:
+            return
+        arrays = [self.pa.array(buffer, type=field.type) for buffer, field in zip(self._buffers, self.schema)]
+        self._writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+        self._buffers = [[] for _ in self.columns]
+
+    def close(self):
+        """写出剩余的行并关闭文件"""
+        self.flush()
+        self._writer.close()
+        self._writer = None
+
+
+def export_parquet(output_dir: Path, modules: Iterable[Tuple[str, Any]],
+                   row_group_rows: int = PARQUET_ROW_GROUP_ROWS,
+                   compression: str = PARQUET_COMPRESSION,
+                   log_callback: Optional[Callable] = None) -> Dict[str, int]:
+    """
+    把 (模块键, 行) 中的消息、主题、助手写出为 Parquet 文件（其他模块跳过，不读取）
+
+    Args:
+        output_dir: 输出目录（写入 messages.parquet、topics.parquet、agents.parquet）
+        modules: (模块键, 行) 的可迭代对象，行可以是迭代器（如数据库游标）
+        row_group_rows: 每个行组的行数
+        compression: 压缩算法
+        log_callback: 日志回调函数
+
+    Returns:
+        各表的行数 {模块键: 行数}
+    """
+    _import_pyarrow()
+    output_dir = Path(output_dir)
+    counts: Dict[str, int] = {}
+    written: List[Path] = []
+    try:
+        for module_key, rows in modules:
+            if module_key not in PARQUET_TABLES:
+                continue
+            file_name, columns = PARQUET_TABLES[module_key]
+            writer = ParquetTableWriter(output_dir / file_name, columns, row_group_rows, compression)
+            written.append(writer.file_path)
+            try:
+                for row in rows or []:
+                    if isinstance(row, dict):
+                        writer.append(row)
+            finally:
+                writer.close()
+            counts[module_key] = writer.row_count
+            if log_callback:
+                log_callback(f"已写出 {file_name}: {writer.row_count} 行", "INFO")
+    except BaseException:
+        # 不保留写了一半的文件
+        for path in written:
+            path.unlink(missing_ok=True)
+        raise
+    return counts
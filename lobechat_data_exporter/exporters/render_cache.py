@@ -0,0 +1,215 @@
+"""
+渲染缓存
+按 (渲染方式, 消息ID, 更新时间, 内容长度) 缓存消息渲染出的 Markdown 片段，
+重复导出同一份数据时跳过 JSON 美化和时间格式化，按最近最少使用淘汰，可选保存到磁盘
+"""
+
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from ..config import (
+    ENABLE_RENDER_CACHE, RENDER_CACHE_BUDGET_MB,
+    RENDER_CACHE_PERSIST, RENDER_CACHE_FILE_NAME
+)
+
+
+RENDER_CACHE_VERSION = 1
+
+# 每个条目除片段本身外的近似开销（键元组、OrderedDict 节点，字节）
+ENTRY_OVERHEAD_BYTES = 320
+
+
+def _cache_key(kind: str, msg: Dict) -> Optional[Tuple[str, str, str, int]]:
+    """
+    消息的缓存键，没有ID的消息不缓存
+
+    内容长度作为额外校验：同一ID、同一更新时间的内容在不同备份中被改动时不会命中旧片段。
+    """
+    msg_id = msg.get("id")
+    if not msg_id:
+        return None
+    stamp = msg.get("updatedAt") or msg.get("createdAt")
+    content = msg.get("content")
+    size = len(content) if isinstance(content, str) else -1
+    return (kind, str(msg_id), str(stamp or ""), size)
+
+
+class RenderCache:
+    """
+    消息渲染片段缓存（线程安全）
+
+    render(kind, msg, render_func) 命中时直接返回片段，未命中时调用 render_func(msg) 渲染并缓存。
+    kind 区分渲染方式和影响输出的选项（如是否包含元数据），同一条消息的不同渲染结果互不覆盖。
+    """
+
+    def __init__(self, budget_bytes: int = RENDER_CACHE_BUDGET_MB * 1024 * 1024,
+                 persist_path: Optional[Path] = None,
+                 log_callback: Optional[Callable] = None):
+        """
+        初始化渲染缓存
+
+        Args:
+            budget_bytes: 内存预算（字节），超出后按最近最少使用淘汰
+            persist_path: 持久化文件路径（None 时不保存到磁盘）
+            log_callback: 日志回调函数
+        """
+        self.budget_bytes = budget_bytes
+        self.persist_path = Path(persist_path) if persist_path else None
+        self.log_callback = log_callback
+        self.enabled = ENABLE_RENDER_CACHE
+        self._lock = threading.RLock()
+        # {键: (片段, 字节数)}，按访问顺序排列
+        self._entries: "OrderedDict[Tuple, Tuple[str, int]]" = OrderedDict()
+        self._bytes = 0
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def log(self, message: str, level: str = "INFO"):
+        """记录日志"""
+        if self.log_callback:
+            self.log_callback(message, level)
+
+    def render(self, kind: str, msg: Dict, render_func: Callable[[Dict], str]) -> str:
+        """
+        获取消息的渲染片段
+
+        Args:
+            kind: 渲染方式（含影响输出的选项）
+            msg: 消息数据
+            render_func: 未命中时调用的渲染函数
+
+        Returns:
+            渲染出的 Markdown 片段
+        """
+        key = _cache_key(kind, msg) if self.enabled else None
+        if key is None:
+            return render_func(msg)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        fragment = render_func(msg)
+        self._put(key, fragment)
+        return fragment
+
+    def _put(self, key: Tuple, fragment: str):
+        """写入一个片段，超出预算时淘汰最久未使用的条目"""
+        size = sys.getsizeof(fragment) + ENTRY_OVERHEAD_BYTES
+        if size > self.budget_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (fragment, size)
+            self._bytes += size
+            self._dirty = True
+            while self._bytes > self.budget_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._dirty = True
+
+    def stats(self) -> Dict:
+        """缓存统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    # ==================== 持久化 ====================
+
+    def load(self) -> int:
+        """
+        从磁盘读取缓存（文件不存在、损坏或版本不符时忽略）
+
+        Returns:
+            读取的条目数
+        """
+        if not self.persist_path:
+            return 0
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if not isinstance(data, dict) or data.get("version") != RENDER_CACHE_VERSION:
+            return 0
+
+        count = 0
+        for item in data.get("entries") or []:
+            try:
+                kind, msg_id, stamp, size, fragment = item
+            except (TypeError, ValueError):
+                continue
+            self._put((kind, msg_id, stamp, size), fragment)
+            count += 1
+        with self._lock:
+            self._dirty = False
+        return count
+
+    def save(self) -> bool:
+        """
+        保存缓存到磁盘（先写临时文件再替换，内容没有变化时不写）
+
+        Returns:
+            是否写入
+        """
+        if not self.persist_path or not self._dirty:
+            return False
+        with self._lock:
+            entries = [[*key, fragment] for key, (fragment, _) in self._entries.items()]
+            self._dirty = False
+
+        tmp_path = self.persist_path.with_name(self.persist_path.name + ".partial")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": RENDER_CACHE_VERSION, "entries": entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.persist_path)
+        except OSError as e:
+            self.log(f"保存渲染缓存失败: {str(e)}", "WARNING")
+            return False
+        return True
+
+
+_shared_cache: Optional[RenderCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_render_cache() -> RenderCache:
+    """获取程序共用的渲染缓存（开启持久化时首次获取会读取磁盘上的缓存）"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            persist_path = None
+            if RENDER_CACHE_PERSIST:
+                from ..utils.file_utils import get_app_path
+                persist_path = get_app_path() / RENDER_CACHE_FILE_NAME
+            _shared_cache = RenderCache(persist_path=persist_path)
+            _shared_cache.load()
+        return _shared_cache
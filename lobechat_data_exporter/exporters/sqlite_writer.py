@@ -0,0 +1,260 @@
+"""
+SQLite 导出
+把助手、会话、主题、消息、助手-会话关系、模型和服务商写入一个可直接查询的 SQLite 文件：
+常用字段展开为带索引的列，完整行以 JSON 保存在 data 列中（可还原为备份 JSON），消息内容建立 FTS5 全文索引
+"""
+
+import itertools
+import json
+import sqlite3
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from ..config import SQLITE_BATCH_ROWS, SQLITE_FTS_TOKENIZER
+from ..core.sqlite_source import (
+    SQLITE_FORMAT, SQLITE_VERSION, META_TABLE, MODULES_TABLE, MESSAGES_FTS_TABLE
+)
+
+
+# 模块键 → (表名, [(列名, 来源字段路径)], 索引列)；路径中的 "." 表示嵌套字段
+SQLITE_TABLES = {
+    "agents": ("agents", [
+        ("id", "id"), ("slug", "slug"), ("title", "title"), ("description", "description"),
+        ("model", "model"), ("provider", "provider"), ("system_role", "systemRole"),
+        ("created_at", "createdAt"), ("updated_at", "updatedAt"),
+    ], ["id"]),
+    "sessions": ("sessions", [
+        ("id", "id"), ("slug", "slug"), ("title", "title"), ("type", "type"),
+        ("group_id", "groupId"), ("pinned", "pinned"),
+        ("created_at", "createdAt"), ("updated_at", "updatedAt"),
+    ], ["id"]),
+    "agentsToSessions": ("agents_to_sessions", [
+        ("agent_id", "agentId"), ("session_id", "sessionId"),
+    ], ["agent_id", "session_id"]),
+    "topics": ("topics", [
+        ("id", "id"), ("title", "title"), ("session_id", "sessionId"), ("favorite", "favorite"),
+        ("created_at", "createdAt"), ("updated_at", "updatedAt"),
+    ], ["id", "session_id"]),
+    "messages": ("messages", [
+        ("id", "id"), ("role", "role"), ("content", "content"), ("model", "model"),
+        ("provider", "provider"), ("session_id", "sessionId"), ("topic_id", "topicId"),
+        ("thread_id", "threadId"), ("parent_id", "parentId"), ("favorite", "favorite"),
+        ("total_tokens", "metadata.totalTokens"), ("cost", "metadata.cost"),
+        ("created_at", "createdAt"), ("updated_at", "updatedAt"),
+    ], ["id", "topic_id", "session_id", "created_at"]),
+    "aiModels": ("ai_models", [
+        ("id", "id"), ("provider_id", "providerId"), ("display_name", "displayName"),
+        ("type", "type"), ("enabled", "enabled"),
+    ], ["provider_id"]),
+    "aiProviders": ("ai_providers", [
+        ("id", "id"), ("name", "name"), ("enabled", "enabled"),
+    ], ["id"]),
+}
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _column_value(value: Any) -> Any:
+    """字段值 → SQLite 值（布尔转整数，对象和数组转 JSON）"""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (dict, list)):
+        return _dumps(value)
+    return value
+
+
+class SQLiteExportWriter:
+    """
+    SQLite 导出写出器
+
+    先写入 <文件名>.partial，所有数据在一个事务中用 executemany 分批写入，
+    写完后再建索引和全文索引，最后替换目标文件；异常时删除临时文件。
+    """
+
+    def __init__(self, file_path: Path, mode: Any = None, schema_hash: Any = None,
+                 batch_rows: int = SQLITE_BATCH_ROWS,
+                 fts_tokenizer: str = SQLITE_FTS_TOKENIZER,
+                 log_callback: Optional[Callable] = None):
+        """
+        初始化写出器
+
+        Args:
+            file_path: 输出文件路径
+            mode: 导出模式（写入 lce_meta）
+            schema_hash: 结构哈希（写入 lce_meta）
+            batch_rows: 每次 executemany 写入的行数
+            fts_tokenizer: 消息全文索引的分词器
+            log_callback: 日志回调函数
+        """
+        self.file_path = Path(file_path)
+        self.partial_path = self.file_path.with_name(self.file_path.name + ".partial")
+        self.mode = mode
+        self.schema_hash = schema_hash
+        self.batch_rows = max(1, batch_rows)
+        self.fts_tokenizer = fts_tokenizer
+        self.log_callback = log_callback
+        self.counts: Dict[str, int] = {}
+        self._position = 0
+
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self.partial_path.unlink(missing_ok=True)
+        # 手动管理事务；临时文件在完成前不需要日志和同步
+        self.conn = sqlite3.connect(str(self.partial_path), isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=OFF")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute("BEGIN")
+        self.conn.execute(f"CREATE TABLE {META_TABLE} (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute(
+            f"CREATE TABLE {MODULES_TABLE} "
+            f"(position INTEGER PRIMARY KEY, key TEXT UNIQUE, table_name TEXT, data TEXT)"
+        )
+
+    def __enter__(self) -> 'SQLiteExportWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.finish()
+        else:
+            self.conn.close()
+            self.partial_path.unlink(missing_ok=True)
+        return False
+
+    def log(self, message: str, level: str = "INFO"):
+        """记录日志"""
+        if self.log_callback:
+            self.log_callback(message, level)
+
+    def _add_module(self, module_key: str, table_name: Optional[str], data: Any = None):
+        """登记模块（保持模块顺序，没有对应表的模块整体以 JSON 保存）"""
+        self._position += 1
+        self.conn.execute(
+            f"INSERT INTO {MODULES_TABLE} (position, key, table_name, data) VALUES (?, ?, ?, ?)",
+            (self._position, module_key, table_name, None if table_name else _dumps(data))
+        )
+
+    def write_module(self, module_key: str, rows: Any) -> int:
+        """
+        写入一个模块（rows 可以是迭代器）
+
+        Returns:
+            写入的行数
+        """
+        table = SQLITE_TABLES.get(module_key)
+        if table is None or isinstance(rows, dict):
+            if isinstance(rows, Iterator):
+                rows = list(rows)
+            self._add_module(module_key, None, rows)
+            count = len(rows) if isinstance(rows, list) else 1
+            self.counts[module_key] = count
+            return count
+
+        table_name, columns, _ = table
+        column_names = [name for name, _ in columns] + ["data"]
+        self.conn.execute(
+            f'CREATE TABLE "{table_name}" ({", ".join(column_names)})'
+        )
+        self._add_module(module_key, table_name)
+
+        paths = [source.split(".") for _, source in columns]
+        share_content = table_name == "messages"
+        sql = f'INSERT INTO "{table_name}" VALUES ({", ".join("?" * len(column_names))})'
+
+        def to_params(row: Dict) -> Tuple:
+            values = []
+            for path in paths:
+                value = row
+                for key in path:
+                    value = value.get(key) if isinstance(value, dict) else None
+                values.append(_column_value(value))
+            if share_content and isinstance(row.get("content"), str):
+                # 消息内容只保存在 content 列中，data 中留空（读取时填回）
+                row = {**row, "content": None}
+            values.append(_dumps(row))
+            return tuple(values)
+
+        count = 0
+        iterator = iter(rows or [])
+        while True:
+            batch = [to_params(row) for row in itertools.islice(iterator, self.batch_rows)]
+            if not batch:
+                break
+            self.conn.executemany(sql, batch)
+            count += len(batch)
+        self.counts[module_key] = count
+        return count
+
+    def write_modules(self, modules: Iterable[Tuple[str, Any]]) -> Dict[str, int]:
+        """逐个写入 (模块键, 行) 并返回各模块行数"""
+        for module_key, rows in modules:
+            self.write_module(module_key, rows)
+        return self.counts
+
+    def _create_fts(self) -> Optional[str]:
+        """建立消息内容全文索引，返回实际使用的分词器（FTS5 不可用时返回 None）"""
+        if "messages" not in self.counts:
+            return None
+        for tokenizer in dict.fromkeys([self.fts_tokenizer, "unicode61"]):
+            try:
+                self.conn.execute(
+                    f"CREATE VIRTUAL TABLE {MESSAGES_FTS_TABLE} USING fts5("
+                    f"content, content='messages', content_rowid='rowid', tokenize='{tokenizer}')"
+                )
+            except sqlite3.OperationalError:
+                continue
+            self.conn.execute(f"INSERT INTO {MESSAGES_FTS_TABLE}({MESSAGES_FTS_TABLE}) VALUES ('rebuild')")
+            return tokenizer
+        self.log("当前 SQLite 不支持 FTS5，未建立消息全文索引", "WARNING")
+        return None
+
+    def finish(self):
+        """建索引、写元数据、提交并替换目标文件"""
+        for module_key in self.counts:
+            table = SQLITE_TABLES.get(module_key)
+            if table is None:
+                continue
+            table_name, _, index_columns = table
+            for column in index_columns:
+                self.conn.execute(
+                    f'CREATE INDEX "idx_{table_name}_{column}" ON "{table_name}" ({column})'
+                )
+        tokenizer = self._create_fts()
+
+        meta = {
+            "format": SQLITE_FORMAT,
+            "version": SQLITE_VERSION,
+            "mode": self.mode,
+            "schemaHash": self.schema_hash,
+            "ftsTokenizer": tokenizer,
+        }
+        self.conn.executemany(
+            f"INSERT INTO {META_TABLE} (key, value) VALUES (?, ?)",
+            [(key, _dumps(value)) for key, value in meta.items()]
+        )
+        self.conn.execute("COMMIT")
+        self.conn.close()
+        self.partial_path.replace(self.file_path)
+
+
+def export_sqlite(file_path: Path, mode: Any, schema_hash: Any,
+                  modules: Iterable[Tuple[str, Any]],
+                  log_callback: Optional[Callable] = None) -> Dict[str, int]:
+    """
+    把 (模块键, 行) 写入 SQLite 文件
+
+    Args:
+        file_path: 输出文件路径
+        mode: 导出模式
+        schema_hash: 结构哈希
+        modules: (模块键, 行) 的可迭代对象，行可以是迭代器（如数据库游标）
+        log_callback: 日志回调函数
+
+    Returns:
+        各模块行数
+    """
+    with SQLiteExportWriter(file_path, mode, schema_hash, log_callback=log_callback) as writer:
+        counts = writer.write_modules(modules)
+    return counts
@@ -1,22 +1,34 @@
 """
 LobeChat 数据导出工具 - 程序入口
+带命令行参数运行时使用无界面的命令行导出（见 cli.py），否则启动图形界面
 """
 
-from .ui.main_window import LobeChatDataExporter
-from .utils.drag_drop import create_root_window
+import sys
 
 
 def main():
     """主函数"""
+    if len(sys.argv) > 1:
+        # 命令行导出：不导入 tkinter / ttkbootstrap
+        from .cli import main as cli_main
+        sys.exit(cli_main())
+
+    from .ui.main_window import LobeChatDataExporter
+    from .utils.drag_drop import create_root_window
+    from .exporters.render_cache import get_render_cache
+
     # 创建根窗口（支持拖拽）
     root = create_root_window()
-    
+
     # 创建应用实例
     app = LobeChatDataExporter(root)
-    
+
     # 启动主循环
     root.mainloop()
 
+    # 退出时保存渲染缓存（未开启持久化时不写）
+    get_render_cache().save()
+
 
 if __name__ == "__main__":
     main()
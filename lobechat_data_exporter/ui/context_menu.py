@@ -7,14 +7,17 @@ import tkinter as tk
 from tkinter import filedialog, messagebox
 import json
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
 from ..exporters.markdown_exporter import MarkdownExporter
 from ..exporters.json_exporter import JSONExporter
+from ..exporters.archive_writer import open_export_target, archive_path_for
+from ..core.data_index import get_data_index
+from ..core.export_progress import ProgressWriter, record_file
 from ..utils.file_utils import (
     safe_filename, ensure_unique_name, set_file_times, 
     get_time_range_from_messages, write_file_with_timestamp,
-    write_json_with_timestamp
+    write_json_with_timestamp, write_lines
 )
 
 
@@ -66,12 +69,11 @@ class ContextMenuManager:
         """
         if item_type == "message":
             # 单条消息
-            for topic_id, messages in self.app.parsed_data["messagesByTopic"].items():
-                for msg in messages:
-                    if msg.get("id") == item_id:
-                        created_at = msg.get("createdAt")
-                        modified_at = msg.get("updatedAt") or created_at
-                        return created_at, modified_at
+            msg = get_data_index(self.app.parsed_data).get_message(item_id)
+            if msg:
+                created_at = msg.get("createdAt")
+                modified_at = msg.get("updatedAt") or created_at
+                return created_at, modified_at
         
         elif item_type == "topic":
             # 主题：使用主题创建时间和消息的最晚修改时间
@@ -93,10 +95,9 @@ class ContextMenuManager:
                 
                 # 收集该会话所有主题的消息
                 all_messages = []
-                for topic_id, topic in self.app.parsed_data["topics"].items():
-                    if topic.get("sessionId") == item_id:
-                        messages = self.app.parsed_data["messagesByTopic"].get(topic_id, [])
-                        all_messages.extend(messages)
+                for topic_id, _ in get_data_index(self.app.parsed_data).get_session_topics(item_id):
+                    messages = self.app.parsed_data["messagesByTopic"].get(topic_id, [])
+                    all_messages.extend(messages)
                 
                 _, latest_modified = get_time_range_from_messages(all_messages)
                 modified_at = latest_modified or session.get("updatedAt") or created_at
@@ -110,12 +111,11 @@ class ContextMenuManager:
                 
                 # 收集该助手所有消息
                 all_messages = []
-                for group in self.app.parsed_data["groups"]:
-                    if group["agentId"] == item_id:
-                        for session_group in group["sessions"]:
-                            for topic_group in session_group["topics"]:
-                                all_messages.extend(topic_group.get("messages", []))
-                        break
+                group = get_data_index(self.app.parsed_data).get_agent_group(item_id)
+                if group:
+                    for session_group in group["sessions"]:
+                        for topic_group in session_group["topics"]:
+                            all_messages.extend(topic_group.get("messages", []))
                 
                 _, latest_modified = get_time_range_from_messages(all_messages)
                 modified_at = latest_modified or agent.get("updatedAt") or created_at
@@ -123,6 +123,16 @@ class ContextMenuManager:
         
         return None, None
     
+    def _archive_format(self) -> Optional[str]:
+        """导出选项中选择的压缩包格式（输出到文件夹时为 None）"""
+        var = getattr(self.app, "export_archive_format", None)
+        return (var.get() or None) if var is not None else None
+    
+    def _output_path(self, export_dir: Path) -> Path:
+        """分割导出的实际输出位置（选择了压缩包时为同名压缩包）"""
+        archive_format = self._archive_format()
+        return archive_path_for(export_dir, archive_format) if archive_format else export_dir
+    
     def _get_topic_time_info(self, topic_group):
         """
         获取主题组的时间信息
@@ -356,10 +366,22 @@ class ContextMenuManager:
                 
                 if file_path:
                     exporter = MarkdownExporter(self.app.parsed_data)
-                    content = exporter.build_agent_merged_markdown(group, True, True)
-                    Path(file_path).write_text(content, encoding='utf-8')
-                    self.app.log_message(f"✅ 助手对话已导出（整合版）: {file_path}", "SUCCESS")
-                    messagebox.showinfo("导出成功", f"助手所有对话已保存到:\n{file_path}")
+                    
+                    def run():
+                        try:
+                            with open(file_path, 'w', encoding='utf-8') as f:
+                                write_lines(ProgressWriter(f), exporter.iter_agent_merged_markdown(group, True, True))
+                        except BaseException:
+                            # 取消或失败时不保留写了一半的文件
+                            Path(file_path).unlink(missing_ok=True)
+                            raise
+                        record_file()
+                    
+                    def on_success(_):
+                        self.app.log_message(f"✅ 助手对话已导出（整合版）: {file_path}", "SUCCESS")
+                        messagebox.showinfo("导出成功", f"助手所有对话已保存到:\n{file_path}")
+                    
+                    self.app.export_jobs.submit(f"导出助手（整合版）: {agent_label}", run, on_success)
                 return
     
     def export_agent_separated_md(self):
@@ -381,33 +403,38 @@ class ContextMenuManager:
                     return
                 
                 agent_dir = Path(output_dir) / safe_filename(agent_label, agent_id)
-                agent_dir.mkdir(exist_ok=True)
-                
                 exporter = MarkdownExporter(self.app.parsed_data)
-                file_count = 0
-                used_names = set()
                 
-                for session_group in group["sessions"]:
-                    for topic_group in session_group["topics"]:
-                        filename = safe_filename(topic_group["topicLabel"], topic_group["topicId"])
-                        filename = ensure_unique_name(filename, used_names)
-                        
-                        content = exporter.build_topic_markdown(
-                            group.get("agent"),
-                            session_group.get("session"),
-                            topic_group,
-                            group["agentLabel"],
-                            True, True
-                        )
-                        
-                        file_path = str(agent_dir / f"{filename}.md")
-                        # 获取主题的时间信息并设置文件时间戳
-                        created_at, modified_at = self._get_topic_time_info(topic_group)
-                        write_file_with_timestamp(file_path, content, created_at, modified_at)
-                        file_count += 1
+                def run():
+                    agent_dir.mkdir(exist_ok=True)
+                    file_count = 0
+                    used_names = set()
+                    
+                    for session_group in group["sessions"]:
+                        for topic_group in session_group["topics"]:
+                            filename = safe_filename(topic_group["topicLabel"], topic_group["topicId"])
+                            filename = ensure_unique_name(filename, used_names)
+                            
+                            content = exporter.build_topic_markdown(
+                                group.get("agent"),
+                                session_group.get("session"),
+                                topic_group,
+                                group["agentLabel"],
+                                True, True
+                            )
+                            
+                            file_path = str(agent_dir / f"{filename}.md")
+                            # 获取主题的时间信息并设置文件时间戳
+                            created_at, modified_at = self._get_topic_time_info(topic_group)
+                            write_file_with_timestamp(file_path, content, created_at, modified_at)
+                            file_count += 1
+                    return file_count
+                
+                def on_success(file_count):
+                    self.app.log_message(f"✅ 助手对话已导出（分离版）: {file_count}个文件", "SUCCESS")
+                    messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{agent_dir}")
                 
-                self.app.log_message(f"✅ 助手对话已导出（分离版）: {file_count}个文件", "SUCCESS")
-                messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{agent_dir}")
+                self.app.export_jobs.submit(f"导出助手（分离版）: {agent_label}", run, on_success)
                 return
     
     def export_agent_json(self):
@@ -558,55 +585,59 @@ class ContextMenuManager:
         values = self.app.data_tree.item(item, "values")
         msg_id = self._get_item_id(values)
         
-        for topic_id, messages in self.app.parsed_data["messagesByTopic"].items():
-            for msg in messages:
-                if msg.get("id") == msg_id:
-                    content = msg.get("content", "")
-                    if isinstance(content, str):
-                        self.app.clipboard_manager.copy_to_clipboard(content)
-                        self.app.log_message("✅ 已复制消息内容到剪贴板", "SUCCESS")
-                    else:
-                        json_str = json.dumps(content, indent=2, ensure_ascii=False)
-                        self.app.clipboard_manager.copy_to_clipboard(json_str)
-                        self.app.log_message("✅ 已复制消息内容(JSON)到剪贴板", "SUCCESS")
-                    return
+        msg = get_data_index(self.app.parsed_data).get_message(msg_id)
+        if msg:
+            content = msg.get("content", "")
+            if isinstance(content, str):
+                self.app.clipboard_manager.copy_to_clipboard(content)
+                self.app.log_message("✅ 已复制消息内容到剪贴板", "SUCCESS")
+            else:
+                json_str = json.dumps(content, indent=2, ensure_ascii=False)
+                self.app.clipboard_manager.copy_to_clipboard(json_str)
+                self.app.log_message("✅ 已复制消息内容(JSON)到剪贴板", "SUCCESS")
     
     def _build_markdown_for_item(self, item, item_type: str):
         """构建项目的Markdown内容"""
         values = self.app.data_tree.item(item, "values")
-        item_id = self._get_item_id(values)
-        
-        exporter = MarkdownExporter(self.app.parsed_data)
+        return self._build_markdown_by_id(self._get_item_id(values), item_type)
+    
+    def _build_markdown_by_id(self, item_id: str, item_type: str, parsed_data: Optional[Dict] = None):
+        """
+        按ID构建项目的Markdown内容（不访问树形视图）
+
+        后台导出任务中调用时传入提交任务时取得的 parsed_data，
+        避免任务运行期间重新加载数据后读到另一份数据。
+        """
+        if parsed_data is None:
+            parsed_data = self.app.parsed_data
+        exporter = MarkdownExporter(parsed_data)
+        index = get_data_index(parsed_data)
         
         if item_type == "message":
-            for topic_id, messages in self.app.parsed_data["messagesByTopic"].items():
-                for msg in messages:
-                    if msg.get("id") == item_id:
-                        return exporter.build_single_message_markdown(msg)
+            msg = index.get_message(item_id)
+            if msg:
+                return exporter.build_single_message_markdown(msg)
         
         elif item_type == "topic":
-            for group in self.app.parsed_data["groups"]:
-                for session_group in group["sessions"]:
-                    for topic_group in session_group["topics"]:
-                        if topic_group["topicId"] == item_id:
-                            return exporter.build_topic_markdown(
-                                group.get("agent"),
-                                session_group.get("session"),
-                                topic_group,
-                                group["agentLabel"],
-                                True, True
-                            )
+            group, session_group, topic_group = index.get_topic_group(item_id)
+            if topic_group:
+                return exporter.build_topic_markdown(
+                    group.get("agent"),
+                    session_group.get("session"),
+                    topic_group,
+                    group["agentLabel"],
+                    True, True
+                )
         
         elif item_type == "session":
-            for group in self.app.parsed_data["groups"]:
-                for session_group in group["sessions"]:
-                    if session_group["sessionId"] == item_id:
-                        return exporter.build_session_markdown(group, session_group)
+            group, session_group = index.get_session_group(item_id)
+            if session_group:
+                return exporter.build_session_markdown(group, session_group)
         
         elif item_type == "agent":
-            for group in self.app.parsed_data["groups"]:
-                if group["agentId"] == item_id:
-                    return exporter.build_agent_merged_markdown(group, True, True)
+            group = index.get_agent_group(item_id)
+            if group:
+                return exporter.build_agent_merged_markdown(group, True, True)
         
         return None
     
@@ -640,34 +671,41 @@ class ContextMenuManager:
                             return
                         
                         topic_dir = Path(output_dir) / safe_filename(topic_label, topic_id)
-                        topic_dir.mkdir(exist_ok=True)
+                        archive_format = self._archive_format()
+                        output_path = self._output_path(topic_dir)
+                        schema_hash = self.app.parsed_data["raw"].get("schemaHash", "")
                         
-                        exporter = JSONExporter(self.app.parsed_data)
-                        file_count = 0
-                        used_names = set()
+                        def run():
+                            with open_export_target(topic_dir, archive_format, self.app.export_jobs.log) as target:
+                                file_count = 0
+                                used_names = set()
+                                
+                                for idx, msg in enumerate(messages, 1):
+                                    msg_id = msg.get("id", f"msg_{idx}")
+                                    role = msg.get("role", "unknown")
+                                    content_preview = str(msg.get("content", ""))[:30].replace("\n", " ")
+                                    
+                                    filename = safe_filename(f"{idx:03d}_{role}_{content_preview}", msg_id)
+                                    filename = ensure_unique_name(filename, used_names)
+                                    
+                                    msg_data = {
+                                        "mode": "postgres",
+                                        "schemaHash": schema_hash,
+                                        "data": {"messages": [msg]}
+                                    }
+                                    
+                                    file_path = str(topic_dir / f"{filename}.json")
+                                    created_at = msg.get("createdAt")
+                                    modified_at = msg.get("updatedAt") or created_at
+                                    target.write_json(file_path, msg_data, created_at, modified_at, sources=[msg.get("id")])
+                                    file_count += 1
+                            return file_count
                         
-                        for idx, msg in enumerate(messages, 1):
-                            msg_id = msg.get("id", f"msg_{idx}")
-                            role = msg.get("role", "unknown")
-                            content_preview = str(msg.get("content", ""))[:30].replace("\n", " ")
-                            
-                            filename = safe_filename(f"{idx:03d}_{role}_{content_preview}", msg_id)
-                            filename = ensure_unique_name(filename, used_names)
-                            
-                            msg_data = {
-                                "mode": "postgres",
-                                "schemaHash": self.app.parsed_data["raw"].get("schemaHash", ""),
-                                "data": {"messages": [msg]}
-                            }
-                            
-                            file_path = str(topic_dir / f"{filename}.json")
-                            created_at = msg.get("createdAt")
-                            modified_at = msg.get("updatedAt") or created_at
-                            write_json_with_timestamp(file_path, msg_data, created_at, modified_at)
-                            file_count += 1
+                        def on_success(file_count):
+                            self.app.log_message(f"✅ 主题已按消息分割导出: {file_count}个JSON文件", "SUCCESS")
+                            messagebox.showinfo("导出成功", f"已导出{file_count}个JSON文件到:\n{output_path}")
                         
-                        self.app.log_message(f"✅ 主题已按消息分割导出: {file_count}个JSON文件", "SUCCESS")
-                        messagebox.showinfo("导出成功", f"已导出{file_count}个JSON文件到:\n{topic_dir}")
+                        self.app.export_jobs.submit(f"主题按消息分割导出: {topic_label}", run, on_success)
                         return
     
     def export_topic_split_md(self):
@@ -696,30 +734,37 @@ class ContextMenuManager:
                             return
                         
                         topic_dir = Path(output_dir) / safe_filename(topic_label, topic_id)
-                        topic_dir.mkdir(exist_ok=True)
-                        
+                        archive_format = self._archive_format()
+                        output_path = self._output_path(topic_dir)
                         exporter = MarkdownExporter(self.app.parsed_data)
-                        file_count = 0
-                        used_names = set()
                         
-                        for idx, msg in enumerate(messages, 1):
-                            msg_id = msg.get("id", f"msg_{idx}")
-                            role = msg.get("role", "unknown")
-                            content_preview = str(msg.get("content", ""))[:30].replace("\n", " ")
-                            
-                            filename = safe_filename(f"{idx:03d}_{role}_{content_preview}", msg_id)
-                            filename = ensure_unique_name(filename, used_names)
-                            
-                            content = exporter.build_single_message_markdown(msg)
-                            
-                            file_path = str(topic_dir / f"{filename}.md")
-                            created_at = msg.get("createdAt")
-                            modified_at = msg.get("updatedAt") or created_at
-                            write_file_with_timestamp(file_path, content, created_at, modified_at)
-                            file_count += 1
+                        def run():
+                            with open_export_target(topic_dir, archive_format, self.app.export_jobs.log) as target:
+                                file_count = 0
+                                used_names = set()
+                                
+                                for idx, msg in enumerate(messages, 1):
+                                    msg_id = msg.get("id", f"msg_{idx}")
+                                    role = msg.get("role", "unknown")
+                                    content_preview = str(msg.get("content", ""))[:30].replace("\n", " ")
+                                    
+                                    filename = safe_filename(f"{idx:03d}_{role}_{content_preview}", msg_id)
+                                    filename = ensure_unique_name(filename, used_names)
+                                    
+                                    content = exporter.build_single_message_markdown(msg)
+                                    
+                                    file_path = str(topic_dir / f"{filename}.md")
+                                    created_at = msg.get("createdAt")
+                                    modified_at = msg.get("updatedAt") or created_at
+                                    target.write_text(file_path, content, created_at, modified_at, sources=[msg.get("id")])
+                                    file_count += 1
+                            return file_count
+                        
+                        def on_success(file_count):
+                            self.app.log_message(f"✅ 主题已按消息分割导出: {file_count}个Markdown文件", "SUCCESS")
+                            messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{output_path}")
                         
-                        self.app.log_message(f"✅ 主题已按消息分割导出: {file_count}个Markdown文件", "SUCCESS")
-                        messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{topic_dir}")
+                        self.app.export_jobs.submit(f"主题按消息分割导出: {topic_label}", run, on_success)
                         return
     
     # ---------- 会话按主题分割 ----------
@@ -749,37 +794,44 @@ class ContextMenuManager:
                         return
                     
                     session_dir = Path(output_dir) / safe_filename(session_label, session_id)
-                    session_dir.mkdir(exist_ok=True)
+                    archive_format = self._archive_format()
+                    output_path = self._output_path(session_dir)
+                    schema_hash = self.app.parsed_data["raw"].get("schemaHash", "")
                     
-                    exporter = JSONExporter(self.app.parsed_data)
-                    file_count = 0
-                    used_names = set()
+                    def run():
+                        with open_export_target(session_dir, archive_format, self.app.export_jobs.log) as target:
+                            file_count = 0
+                            used_names = set()
+                            
+                            for topic_group in topics:
+                                topic_id = topic_group["topicId"]
+                                topic_label = topic_group["topicLabel"]
+                                topic = topic_group.get("topic")
+                                messages = topic_group.get("messages", [])
+                                
+                                filename = safe_filename(topic_label, topic_id)
+                                filename = ensure_unique_name(filename, used_names)
+                                
+                                topic_data = {
+                                    "mode": "postgres",
+                                    "schemaHash": schema_hash,
+                                    "data": {
+                                        "topics": [topic] if topic else [],
+                                        "messages": messages
+                                    }
+                                }
+                                
+                                file_path = str(session_dir / f"{filename}.json")
+                                created_at, modified_at = self._get_topic_time_info(topic_group)
+                                target.write_json(file_path, topic_data, created_at, modified_at, sources=[topic_id])
+                                file_count += 1
+                        return file_count
                     
-                    for topic_group in topics:
-                        topic_id = topic_group["topicId"]
-                        topic_label = topic_group["topicLabel"]
-                        topic = topic_group.get("topic")
-                        messages = topic_group.get("messages", [])
-                        
-                        filename = safe_filename(topic_label, topic_id)
-                        filename = ensure_unique_name(filename, used_names)
-                        
-                        topic_data = {
-                            "mode": "postgres",
-                            "schemaHash": self.app.parsed_data["raw"].get("schemaHash", ""),
-                            "data": {
-                                "topics": [topic] if topic else [],
-                                "messages": messages
-                            }
-                        }
-                        
-                        file_path = str(session_dir / f"{filename}.json")
-                        created_at, modified_at = self._get_topic_time_info(topic_group)
-                        write_json_with_timestamp(file_path, topic_data, created_at, modified_at)
-                        file_count += 1
+                    def on_success(file_count):
+                        self.app.log_message(f"✅ 会话已按主题分割导出: {file_count}个JSON文件", "SUCCESS")
+                        messagebox.showinfo("导出成功", f"已导出{file_count}个JSON文件到:\n{output_path}")
                     
-                    self.app.log_message(f"✅ 会话已按主题分割导出: {file_count}个JSON文件", "SUCCESS")
-                    messagebox.showinfo("导出成功", f"已导出{file_count}个JSON文件到:\n{session_dir}")
+                    self.app.export_jobs.submit(f"会话按主题分割导出: {session_label}", run, on_success)
                     return
     
     def export_session_split_md(self):
@@ -807,34 +859,41 @@ class ContextMenuManager:
                         return
                     
                     session_dir = Path(output_dir) / safe_filename(session_label, session_id)
-                    session_dir.mkdir(exist_ok=True)
-                    
+                    archive_format = self._archive_format()
+                    output_path = self._output_path(session_dir)
                     exporter = MarkdownExporter(self.app.parsed_data)
-                    file_count = 0
-                    used_names = set()
                     
-                    for topic_group in topics:
-                        topic_id = topic_group["topicId"]
-                        topic_label = topic_group["topicLabel"]
-                        
-                        filename = safe_filename(topic_label, topic_id)
-                        filename = ensure_unique_name(filename, used_names)
-                        
-                        content = exporter.build_topic_markdown(
-                            group.get("agent"),
-                            session_group.get("session"),
-                            topic_group,
-                            group["agentLabel"],
-                            True, True
-                        )
-                        
-                        file_path = str(session_dir / f"{filename}.md")
-                        created_at, modified_at = self._get_topic_time_info(topic_group)
-                        write_file_with_timestamp(file_path, content, created_at, modified_at)
-                        file_count += 1
+                    def run():
+                        with open_export_target(session_dir, archive_format, self.app.export_jobs.log) as target:
+                            file_count = 0
+                            used_names = set()
+                            
+                            for topic_group in topics:
+                                topic_id = topic_group["topicId"]
+                                topic_label = topic_group["topicLabel"]
+                                
+                                filename = safe_filename(topic_label, topic_id)
+                                filename = ensure_unique_name(filename, used_names)
+                                
+                                content = exporter.build_topic_markdown(
+                                    group.get("agent"),
+                                    session_group.get("session"),
+                                    topic_group,
+                                    group["agentLabel"],
+                                    True, True
+                                )
+                                
+                                file_path = str(session_dir / f"{filename}.md")
+                                created_at, modified_at = self._get_topic_time_info(topic_group)
+                                target.write_text(file_path, content, created_at, modified_at, sources=[topic_id])
+                                file_count += 1
+                        return file_count
                     
-                    self.app.log_message(f"✅ 会话已按主题分割导出: {file_count}个Markdown文件", "SUCCESS")
-                    messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{session_dir}")
+                    def on_success(file_count):
+                        self.app.log_message(f"✅ 会话已按主题分割导出: {file_count}个Markdown文件", "SUCCESS")
+                        messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{output_path}")
+                    
+                    self.app.export_jobs.submit(f"会话按主题分割导出: {session_label}", run, on_success)
                     return
     
     # ---------- 助手按会话分割 ----------
@@ -863,49 +922,57 @@ class ContextMenuManager:
                     return
                 
                 agent_dir = Path(output_dir) / safe_filename(agent_label, agent_id)
-                agent_dir.mkdir(exist_ok=True)
+                archive_format = self._archive_format()
+                output_path = self._output_path(agent_dir)
+                schema_hash = self.app.parsed_data["raw"].get("schemaHash", "")
                 
-                file_count = 0
-                used_names = set()
+                def run():
+                    with open_export_target(agent_dir, archive_format, self.app.export_jobs.log) as target:
+                        file_count = 0
+                        used_names = set()
+                        
+                        for session_group in sessions:
+                            session_id = session_group["sessionId"]
+                            session_label = session_group["sessionLabel"]
+                            session = session_group.get("session")
+                            
+                            # 收集会话下所有主题和消息
+                            session_topics = []
+                            session_messages = []
+                            
+                            for topic_group in session_group.get("topics", []):
+                                topic = topic_group.get("topic")
+                                if topic:
+                                    session_topics.append(topic)
+                                messages = topic_group.get("messages", [])
+                                session_messages.extend(messages)
+                            
+                            filename = safe_filename(session_label, session_id)
+                            filename = ensure_unique_name(filename, used_names)
+                            
+                            session_data = {
+                                "mode": "postgres",
+                                "schemaHash": schema_hash,
+                                "data": {
+                                    "sessions": [session] if session else [],
+                                    "topics": session_topics,
+                                    "messages": session_messages
+                                }
+                            }
+                            
+                            file_path = str(agent_dir / f"{filename}.json")
+                            created_at, modified_at = get_time_range_from_messages(session_messages)
+                            if not created_at and session:
+                                created_at = session.get("createdAt")
+                            target.write_json(file_path, session_data, created_at, modified_at, sources=[session_id])
+                            file_count += 1
+                    return file_count
                 
-                for session_group in sessions:
-                    session_id = session_group["sessionId"]
-                    session_label = session_group["sessionLabel"]
-                    session = session_group.get("session")
-                    
-                    # 收集会话下所有主题和消息
-                    session_topics = []
-                    session_messages = []
-                    
-                    for topic_group in session_group.get("topics", []):
-                        topic = topic_group.get("topic")
-                        if topic:
-                            session_topics.append(topic)
-                        messages = topic_group.get("messages", [])
-                        session_messages.extend(messages)
-                    
-                    filename = safe_filename(session_label, session_id)
-                    filename = ensure_unique_name(filename, used_names)
-                    
-                    session_data = {
-                        "mode": "postgres",
-                        "schemaHash": self.app.parsed_data["raw"].get("schemaHash", ""),
-                        "data": {
-                            "sessions": [session] if session else [],
-                            "topics": session_topics,
-                            "messages": session_messages
-                        }
-                    }
-                    
-                    file_path = str(agent_dir / f"{filename}.json")
-                    created_at, modified_at = get_time_range_from_messages(session_messages)
-                    if not created_at and session:
-                        created_at = session.get("createdAt")
-                    write_json_with_timestamp(file_path, session_data, created_at, modified_at)
-                    file_count += 1
+                def on_success(file_count):
+                    self.app.log_message(f"✅ 助手已按会话分割导出: {file_count}个JSON文件", "SUCCESS")
+                    messagebox.showinfo("导出成功", f"已导出{file_count}个JSON文件到:\n{output_path}")
                 
-                self.app.log_message(f"✅ 助手已按会话分割导出: {file_count}个JSON文件", "SUCCESS")
-                messagebox.showinfo("导出成功", f"已导出{file_count}个JSON文件到:\n{agent_dir}")
+                self.app.export_jobs.submit(f"助手按会话分割导出: {agent_label}", run, on_success)
                 return
     
     def export_agent_split_by_session_md(self):
@@ -932,36 +999,44 @@ class ContextMenuManager:
                     return
                 
                 agent_dir = Path(output_dir) / safe_filename(agent_label, agent_id)
-                agent_dir.mkdir(exist_ok=True)
-                
+                archive_format = self._archive_format()
+                output_path = self._output_path(agent_dir)
                 exporter = MarkdownExporter(self.app.parsed_data)
-                file_count = 0
-                used_names = set()
                 
-                for session_group in sessions:
-                    session_id = session_group["sessionId"]
-                    session_label = session_group["sessionLabel"]
-                    
-                    filename = safe_filename(session_label, session_id)
-                    filename = ensure_unique_name(filename, used_names)
-                    
-                    content = exporter.build_session_markdown(group, session_group)
-                    
-                    # 获取会话的时间信息
-                    all_messages = []
-                    for topic_group in session_group.get("topics", []):
-                        all_messages.extend(topic_group.get("messages", []))
-                    
-                    file_path = str(agent_dir / f"{filename}.md")
-                    created_at, modified_at = get_time_range_from_messages(all_messages)
-                    session = session_group.get("session")
-                    if not created_at and session:
-                        created_at = session.get("createdAt")
-                    write_file_with_timestamp(file_path, content, created_at, modified_at)
-                    file_count += 1
+                def run():
+                    with open_export_target(agent_dir, archive_format, self.app.export_jobs.log) as target:
+                        file_count = 0
+                        used_names = set()
+                        
+                        for session_group in sessions:
+                            session_id = session_group["sessionId"]
+                            session_label = session_group["sessionLabel"]
+                            
+                            filename = safe_filename(session_label, session_id)
+                            filename = ensure_unique_name(filename, used_names)
+                            
+                            # 获取会话的时间信息
+                            all_messages = []
+                            for topic_group in session_group.get("topics", []):
+                                all_messages.extend(topic_group.get("messages", []))
+                            
+                            file_path = str(agent_dir / f"{filename}.md")
+                            created_at, modified_at = get_time_range_from_messages(all_messages)
+                            session = session_group.get("session")
+                            if not created_at and session:
+                                created_at = session.get("createdAt")
+                            target.write_lines(
+                                file_path, exporter.iter_session_markdown(group, session_group),
+                                created_at, modified_at, sources=[session_id]
+                            )
+                            file_count += 1
+                    return file_count
                 
-                self.app.log_message(f"✅ 助手已按会话分割导出: {file_count}个Markdown文件", "SUCCESS")
-                messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{agent_dir}")
+                def on_success(file_count):
+                    self.app.log_message(f"✅ 助手已按会话分割导出: {file_count}个Markdown文件", "SUCCESS")
+                    messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{output_path}")
+                
+                self.app.export_jobs.submit(f"助手按会话分割导出: {agent_label}", run, on_success)
                 return
     
     # ---------- 助手按主题分割 ----------
@@ -985,41 +1060,48 @@ class ContextMenuManager:
                     return
                 
                 agent_dir = Path(output_dir) / safe_filename(agent_label, agent_id)
-                agent_dir.mkdir(exist_ok=True)
-                
-                file_count = 0
-                used_names = set()
+                archive_format = self._archive_format()
+                output_path = self._output_path(agent_dir)
+                schema_hash = self.app.parsed_data["raw"].get("schemaHash", "")
                 
-                for session_group in group["sessions"]:
-                    for topic_group in session_group["topics"]:
-                        topic_id = topic_group["topicId"]
-                        topic_label = topic_group["topicLabel"]
-                        topic = topic_group.get("topic")
-                        messages = topic_group.get("messages", [])
-                        
-                        filename = safe_filename(topic_label, topic_id)
-                        filename = ensure_unique_name(filename, used_names)
-                        
-                        topic_data = {
-                            "mode": "postgres",
-                            "schemaHash": self.app.parsed_data["raw"].get("schemaHash", ""),
-                            "data": {
-                                "topics": [topic] if topic else [],
-                                "messages": messages
-                            }
-                        }
+                def run():
+                    with open_export_target(agent_dir, archive_format, self.app.export_jobs.log) as target:
+                        file_count = 0
+                        used_names = set()
                         
-                        file_path = str(agent_dir / f"{filename}.json")
-                        created_at, modified_at = self._get_topic_time_info(topic_group)
-                        write_json_with_timestamp(file_path, topic_data, created_at, modified_at)
-                        file_count += 1
+                        for session_group in group["sessions"]:
+                            for topic_group in session_group["topics"]:
+                                topic_id = topic_group["topicId"]
+                                topic_label = topic_group["topicLabel"]
+                                topic = topic_group.get("topic")
+                                messages = topic_group.get("messages", [])
+                                
+                                filename = safe_filename(topic_label, topic_id)
+                                filename = ensure_unique_name(filename, used_names)
+                                
+                                topic_data = {
+                                    "mode": "postgres",
+                                    "schemaHash": schema_hash,
+                                    "data": {
+                                        "topics": [topic] if topic else [],
+                                        "messages": messages
+                                    }
+                                }
+                                
+                                file_path = str(agent_dir / f"{filename}.json")
+                                created_at, modified_at = self._get_topic_time_info(topic_group)
+                                target.write_json(file_path, topic_data, created_at, modified_at, sources=[topic_id])
+                                file_count += 1
+                    return file_count
                 
-                if file_count == 0:
-                    messagebox.showinfo("提示", "该助手没有主题可导出")
-                    return
+                def on_success(file_count):
+                    if file_count == 0:
+                        messagebox.showinfo("提示", "该助手没有主题可导出")
+                        return
+                    self.app.log_message(f"✅ 助手已按主题分割导出: {file_count}个JSON文件", "SUCCESS")
+                    messagebox.showinfo("导出成功", f"已导出{file_count}个JSON文件到:\n{output_path}")
                 
-                self.app.log_message(f"✅ 助手已按主题分割导出: {file_count}个JSON文件", "SUCCESS")
-                messagebox.showinfo("导出成功", f"已导出{file_count}个JSON文件到:\n{agent_dir}")
+                self.app.export_jobs.submit(f"助手按主题分割导出: {agent_label}", run, on_success)
                 return
     
     def export_agent_split_by_topic_md(self):
@@ -1082,22 +1164,27 @@ class ContextMenuManager:
             if not file_path:
                 return
             
-            # 从批量数据中获取时间范围
-            all_messages = batch_data["data"].get("messages", [])
-            created_at, modified_at = get_time_range_from_messages(all_messages)
-            
-            # 写入文件并设置时间戳
-            write_json_with_timestamp(file_path, batch_data, created_at, modified_at)
-            
-            stats = batch_data["stats"]
-            self.app.log_message(
-                f"✅ 批量导出成功 - "
-                f"{stats['agentCount']}助手, {stats['sessionCount']}会话, "
-                f"{stats['topicCount']}主题, {stats['messageCount']}消息",
-                "SUCCESS"
-            )
-            messagebox.showinfo("导出成功", f"已导出到:\n{file_path}")
+            def run():
+                # 从批量数据中获取时间范围
+                all_messages = batch_data["data"].get("messages", [])
+                created_at, modified_at = get_time_range_from_messages(all_messages)
+                
+                # 写入文件并设置时间戳
+                if not write_json_with_timestamp(file_path, batch_data, created_at, modified_at):
+                    raise OSError(f"写入失败: {file_path}")
+            
+            def on_success(_):
+                stats = batch_data["stats"]
+                self.app.log_message(
+                    f"✅ 批量导出成功 - "
+                    f"{stats['agentCount']}助手, {stats['sessionCount']}会话, "
+                    f"{stats['topicCount']}主题, {stats['messageCount']}消息",
+                    "SUCCESS"
+                )
+                messagebox.showinfo("导出成功", f"已导出到:\n{file_path}")
             
+            self.app.export_jobs.submit("批量导出JSON", run, on_success)
+        
         except Exception as e:
             self.app.log_message(f"批量导出失败: {str(e)}", "ERROR")
             messagebox.showerror("批量导出失败", str(e))
@@ -1127,33 +1214,52 @@ class ContextMenuManager:
             # 类型映射：中文→英文
             type_map = {"消息": "message", "主题": "topic", "会话": "session", "助手": "agent"}
             
-            with zipfile.ZipFile(file_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                used_names = set()
-                file_count = 0
+            # 在界面线程中读取选中项，后台任务中不访问树形视图
+            items = []
+            for item in selection:
+                values = self.app.data_tree.item(item, "values")
+                if not values:
+                    continue
                 
-                for item in selection:
-                    values = self.app.data_tree.item(item, "values")
-                    if not values:
-                        continue
-                    
-                    item_name = self.app.data_tree.item(item, "text")
-                    item_id = self._get_item_id(values)
-                    item_type_cn = values[0]  # 中文类型
-                    item_type_en = type_map.get(item_type_cn, item_type_cn)  # 转换为英文
-                    
-                    md_content = self._build_markdown_for_item(item, item_type_en)
-                    if not md_content:
-                        continue
-                    
-                    filename = safe_filename(item_name, item_id)
-                    filename = ensure_unique_name(filename, used_names)
-                    
-                    zipf.writestr(f"{filename}.md", md_content.encode('utf-8'))
-                    file_count += 1
+                item_name = self.app.data_tree.item(item, "text")
+                item_id = self._get_item_id(values)
+                item_type_cn = values[0]  # 中文类型
+                item_type_en = type_map.get(item_type_cn, item_type_cn)  # 转换为英文
+                items.append((item_name, item_id, item_type_en))
             
-            self.app.log_message(f"✅ 批量导出成功 - 共{file_count}个Markdown文件", "SUCCESS")
-            messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{file_path}")
+            # 提交时取得数据，后台任务不读取运行期间可能被替换的 self.app.parsed_data
+            parsed_data = self.app.parsed_data
             
+            def run():
+                try:
+                    with zipfile.ZipFile(file_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                        used_names = set()
+                        file_count = 0
+                        
+                        for item_name, item_id, item_type_en in items:
+                            md_content = self._build_markdown_by_id(item_id, item_type_en, parsed_data)
+                            if not md_content:
+                                continue
+                            
+                            filename = safe_filename(item_name, item_id)
+                            filename = ensure_unique_name(filename, used_names)
+                            
+                            data = md_content.encode('utf-8')
+                            zipf.writestr(f"{filename}.md", data)
+                            file_count += 1
+                            record_file(len(data))
+                except BaseException:
+                    # 取消或失败时不保留不完整的压缩包
+                    Path(file_path).unlink(missing_ok=True)
+                    raise
+                return file_count
+            
+            def on_success(file_count):
+                self.app.log_message(f"✅ 批量导出成功 - 共{file_count}个Markdown文件", "SUCCESS")
+                messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{file_path}")
+            
+            self.app.export_jobs.submit("批量导出Markdown", run, on_success)
+        
         except Exception as e:
             self.app.log_message(f"批量导出失败: {str(e)}", "ERROR")
             messagebox.showerror("批量导出失败", str(e))
@@ -1299,6 +1405,9 @@ class ContextMenuManager:
         sessions_set = set()
         topics_set = set()
         messages_set = set()
+        relations_set = set()  # 已添加的 (助手ID, 会话ID)
+        
+        index = get_data_index(self.app.parsed_data)
         
         for item in selection:
             values = self.app.data_tree.item(item, "values")
@@ -1321,22 +1430,15 @@ class ContextMenuManager:
                 
                 # 如果是默认对话（topicId以default_开头），从groups中获取消息
                 if not messages and item_id.startswith("default_"):
-                    for group in self.app.parsed_data["groups"]:
-                        for session_group in group["sessions"]:
-                            for topic_group in session_group["topics"]:
-                                if topic_group["topicId"] == item_id:
-                                    messages = topic_group.get("messages", [])
-                                    # 如果topic不在标准字典中，从topic_group获取
-                                    if not topic and topic_group.get("topic"):
-                                        topic = topic_group["topic"]
-                                        if item_id not in topics_set:
-                                            all_topics.append(topic)
-                                            topics_set.add(item_id)
-                                    break
-                            if messages:
-                                break
-                        if messages:
-                            break
+                    _, _, topic_group = index.get_topic_group(item_id)
+                    if topic_group:
+                        messages = topic_group.get("messages", [])
+                        # 如果topic不在标准字典中，从topic_group获取
+                        if not topic and topic_group.get("topic"):
+                            topic = topic_group["topic"]
+                            if item_id not in topics_set:
+                                all_topics.append(topic)
+                                topics_set.add(item_id)
                 
                 for msg in messages:
                     msg_id = msg.get("id")
@@ -1352,8 +1454,8 @@ class ContextMenuManager:
                     sessions_set.add(item_id)
                 
                 # 找到该会话的所有主题
-                for topic_id, topic in self.app.parsed_data["topics"].items():
-                    if topic.get("sessionId") == item_id and topic_id not in topics_set:
+                for topic_id, topic in index.get_session_topics(item_id):
+                    if topic_id not in topics_set:
                         all_topics.append(topic)
                         topics_set.add(topic_id)
                         
@@ -1373,74 +1475,48 @@ class ContextMenuManager:
                     agents_set.add(item_id)
                 
                 # 找到该助手的所有数据
-                for group in self.app.parsed_data["groups"]:
-                    if group["agentId"] == item_id:
-                        for session_group in group["sessions"]:
-                            session_id = session_group["sessionId"]
-                            session = session_group.get("session")
-                            
-                            if session and session_id not in sessions_set:
-                                all_sessions.append(session)
-                                sessions_set.add(session_id)
+                group = index.get_agent_group(item_id)
+                if group:
+                    for session_group in group["sessions"]:
+                        session_id = session_group["sessionId"]
+                        session = session_group.get("session")
+                        
+                        if session and session_id not in sessions_set:
+                            all_sessions.append(session)
+                            sessions_set.add(session_id)
+                        
+                        # 添加关联关系
+                        rel_key = (item_id, session_id)
+                        if rel_key not in relations_set:
+                            relations_set.add(rel_key)
+                            all_agents_to_sessions.append({
+                                "agentId": item_id,
+                                "sessionId": session_id
+                            })
+                        
+                        # 该会话的所有主题和消息
+                        for topic_group in session_group["topics"]:
+                            topic_id = topic_group["topicId"]
+                            topic = topic_group.get("topic")
                             
-                            # 添加关联关系
-                            rel_key = f"{item_id}_{session_id}"
-                            if rel_key not in {f"{r['agentId']}_{r['sessionId']}" for r in all_agents_to_sessions}:
-                                all_agents_to_sessions.append({
-                                    "agentId": item_id,
-                                    "sessionId": session_id
-                                })
+                            if topic and topic_id not in topics_set:
+                                all_topics.append(topic)
+                                topics_set.add(topic_id)
                             
-                            # 该会话的所有主题和消息
-                            for topic_group in session_group["topics"]:
-                                topic_id = topic_group["topicId"]
-                                topic = topic_group.get("topic")
-                                
-                                if topic and topic_id not in topics_set:
-                                    all_topics.append(topic)
-                                    topics_set.add(topic_id)
-                                
-                                # 该主题的所有消息
-                                messages = topic_group.get("messages", [])
-                                for msg in messages:
-                                    msg_id = msg.get("id")
-                                    if msg_id and msg_id not in messages_set:
-                                        all_messages.append(msg)
-                                        messages_set.add(msg_id)
-                        break
+                            # 该主题的所有消息
+                            messages = topic_group.get("messages", [])
+                            for msg in messages:
+                                msg_id = msg.get("id")
+                                if msg_id and msg_id not in messages_set:
+                                    all_messages.append(msg)
+                                    messages_set.add(msg_id)
             
             elif item_type == "消息":
-                # 添加单条消息 - 先从标准messagesByTopic获取
-                found = False
-                for topic_id, messages in self.app.parsed_data["messagesByTopic"].items():
-                    for msg in messages:
-                        if msg.get("id") == item_id:
-                            if item_id not in messages_set:
-                                all_messages.append(msg)
-                                messages_set.add(item_id)
-                            found = True
-                            break
-                    if found:
-                        break
-                
-                # 如果没找到，从groups中获取（可能是默认对话的消息）
-                if not found:
-                    for group in self.app.parsed_data["groups"]:
-                        for session_group in group["sessions"]:
-                            for topic_group in session_group["topics"]:
-                                for msg in topic_group.get("messages", []):
-                                    if msg.get("id") == item_id:
-                                        if item_id not in messages_set:
-                                            all_messages.append(msg)
-                                            messages_set.add(item_id)
-                                        found = True
-                                        break
-                                if found:
-                                    break
-                            if found:
-                                break
-                        if found:
-                            break
+                # 添加单条消息（索引包含默认对话的消息）
+                msg = index.get_message(item_id)
+                if msg and item_id not in messages_set:
+                    all_messages.append(msg)
+                    messages_set.add(item_id)
         
         return {
             "mode": "postgres",
@@ -1476,63 +1552,72 @@ class ContextMenuManager:
                 return
             
             export_dir = Path(output_dir) / f"batch_agents_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            export_dir.mkdir(exist_ok=True)
-            
-            file_count = 0
-            agent_ids_set = {a.get("id") for a in batch_data["data"]["agents"]}
-            used_names = set()
+            archive_format = self._archive_format()
+            output_path = self._output_path(export_dir)
+            schema_hash = self.app.parsed_data["raw"].get("schemaHash", "")
+            groups = self.app.parsed_data["groups"]
             
-            for group in self.app.parsed_data["groups"]:
-                agent_id = group["agentId"]
-                if agent_id not in agent_ids_set:
-                    continue
-                
-                agent_label = group["agentLabel"]
-                agent = group.get("agent")
-                
-                # 收集助手的所有数据
-                agent_sessions = []
-                agent_topics = []
-                agent_messages = []
-                agent_relations = []
-                
-                for session_group in group["sessions"]:
-                    session = session_group.get("session")
-                    if session:
-                        agent_sessions.append(session)
-                        agent_relations.append({"agentId": agent_id, "sessionId": session_group["sessionId"]})
+            def run():
+                with open_export_target(export_dir, archive_format, self.app.export_jobs.log) as target:
+                    file_count = 0
+                    agent_ids_set = {a.get("id") for a in batch_data["data"]["agents"]}
+                    used_names = set()
                     
-                    for topic_group in session_group["topics"]:
-                        topic = topic_group.get("topic")
-                        if topic:
-                            agent_topics.append(topic)
-                        agent_messages.extend(topic_group.get("messages", []))
-                
-                filename = safe_filename(agent_label, agent_id)
-                filename = ensure_unique_name(filename, used_names)
-                
-                agent_data = {
-                    "mode": "postgres",
-                    "schemaHash": self.app.parsed_data["raw"].get("schemaHash", ""),
-                    "data": {
-                        "agents": [agent] if agent else [],
-                        "sessions": agent_sessions,
-                        "topics": agent_topics,
-                        "messages": agent_messages,
-                        "agentsToSessions": agent_relations
-                    }
-                }
-                
-                file_path = str(export_dir / f"{filename}.json")
-                created_at, modified_at = get_time_range_from_messages(agent_messages)
-                if not created_at and agent:
-                    created_at = agent.get("createdAt")
-                write_json_with_timestamp(file_path, agent_data, created_at, modified_at)
-                file_count += 1
+                    for group in groups:
+                        agent_id = group["agentId"]
+                        if agent_id not in agent_ids_set:
+                            continue
+                        
+                        agent_label = group["agentLabel"]
+                        agent = group.get("agent")
+                        
+                        # 收集助手的所有数据
+                        agent_sessions = []
+                        agent_topics = []
+                        agent_messages = []
+                        agent_relations = []
+                        
+                        for session_group in group["sessions"]:
+                            session = session_group.get("session")
+                            if session:
+                                agent_sessions.append(session)
+                                agent_relations.append({"agentId": agent_id, "sessionId": session_group["sessionId"]})
+                            
+                            for topic_group in session_group["topics"]:
+                                topic = topic_group.get("topic")
+                                if topic:
+                                    agent_topics.append(topic)
+                                agent_messages.extend(topic_group.get("messages", []))
+                        
+                        filename = safe_filename(agent_label, agent_id)
+                        filename = ensure_unique_name(filename, used_names)
+                        
+                        agent_data = {
+                            "mode": "postgres",
+                            "schemaHash": schema_hash,
+                            "data": {
+                                "agents": [agent] if agent else [],
+                                "sessions": agent_sessions,
+                                "topics": agent_topics,
+                                "messages": agent_messages,
+                                "agentsToSessions": agent_relations
+                            }
+                        }
+                        
+                        file_path = str(export_dir / f"{filename}.json")
+                        created_at, modified_at = get_time_range_from_messages(agent_messages)
+                        if not created_at and agent:
+                            created_at = agent.get("createdAt")
+                        target.write_json(file_path, agent_data, created_at, modified_at)
+                        file_count += 1
+                return file_count
             
-            self.app.log_message(f"✅ 批量按助手分割导出: {file_count}个JSON文件", "SUCCESS")
-            messagebox.showinfo("导出成功", f"已导出{file_count}个JSON文件到:\n{export_dir}")
+            def on_success(file_count):
+                self.app.log_message(f"✅ 批量按助手分割导出: {file_count}个JSON文件", "SUCCESS")
+                messagebox.showinfo("导出成功", f"已导出{file_count}个JSON文件到:\n{output_path}")
             
+            self.app.export_jobs.submit("批量按助手分割导出JSON", run, on_success)
+        
         except Exception as e:
             self.app.log_message(f"批量分割导出失败: {str(e)}", "ERROR")
             messagebox.showerror("导出失败", str(e))
@@ -1551,43 +1636,52 @@ class ContextMenuManager:
                 return
             
             export_dir = Path(output_dir) / f"batch_agents_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            export_dir.mkdir(exist_ok=True)
-            
+            archive_format = self._archive_format()
+            output_path = self._output_path(export_dir)
             exporter = MarkdownExporter(self.app.parsed_data)
-            file_count = 0
-            agent_ids_set = {a.get("id") for a in batch_data["data"]["agents"]}
-            used_names = set()
+            groups = self.app.parsed_data["groups"]
             
-            for group in self.app.parsed_data["groups"]:
-                agent_id = group["agentId"]
-                if agent_id not in agent_ids_set:
-                    continue
-                
-                agent_label = group["agentLabel"]
-                agent = group.get("agent")
-                
-                filename = safe_filename(agent_label, agent_id)
-                filename = ensure_unique_name(filename, used_names)
-                
-                content = exporter.build_agent_merged_markdown(group, True, True)
-                
-                file_path = str(export_dir / f"{filename}.md")
-                
-                # 获取时间范围
-                all_messages = []
-                for session_group in group["sessions"]:
-                    for topic_group in session_group["topics"]:
-                        all_messages.extend(topic_group.get("messages", []))
-                
-                created_at, modified_at = get_time_range_from_messages(all_messages)
-                if not created_at and agent:
-                    created_at = agent.get("createdAt")
-                write_file_with_timestamp(file_path, content, created_at, modified_at)
-                file_count += 1
+            def run():
+                with open_export_target(export_dir, archive_format, self.app.export_jobs.log) as target:
+                    file_count = 0
+                    agent_ids_set = {a.get("id") for a in batch_data["data"]["agents"]}
+                    used_names = set()
+                    
+                    for group in groups:
+                        agent_id = group["agentId"]
+                        if agent_id not in agent_ids_set:
+                            continue
+                        
+                        agent_label = group["agentLabel"]
+                        agent = group.get("agent")
+                        
+                        filename = safe_filename(agent_label, agent_id)
+                        filename = ensure_unique_name(filename, used_names)
+                        
+                        file_path = str(export_dir / f"{filename}.md")
+                        
+                        # 获取时间范围
+                        all_messages = []
+                        for session_group in group["sessions"]:
+                            for topic_group in session_group["topics"]:
+                                all_messages.extend(topic_group.get("messages", []))
+                        
+                        created_at, modified_at = get_time_range_from_messages(all_messages)
+                        if not created_at and agent:
+                            created_at = agent.get("createdAt")
+                        target.write_lines(
+                            file_path, exporter.iter_agent_merged_markdown(group, True, True),
+                            created_at, modified_at
+                        )
+                        file_count += 1
+                return file_count
             
-            self.app.log_message(f"✅ 批量按助手分割导出: {file_count}个Markdown文件", "SUCCESS")
-            messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{export_dir}")
+            def on_success(file_count):
+                self.app.log_message(f"✅ 批量按助手分割导出: {file_count}个Markdown文件", "SUCCESS")
+                messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{output_path}")
             
+            self.app.export_jobs.submit("批量按助手分割导出Markdown", run, on_success)
+        
         except Exception as e:
             self.app.log_message(f"批量分割导出失败: {str(e)}", "ERROR")
             messagebox.showerror("导出失败", str(e))
@@ -1606,50 +1700,58 @@ class ContextMenuManager:
                 return
             
             export_dir = Path(output_dir) / f"batch_topics_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            export_dir.mkdir(exist_ok=True)
-            
-            file_count = 0
-            topic_ids_set = {t.get("id") for t in batch_data["data"]["topics"]}
+            archive_format = self._archive_format()
+            output_path = self._output_path(export_dir)
+            schema_hash = self.app.parsed_data["raw"].get("schemaHash", "")
+            groups = self.app.parsed_data["groups"]
             
-            for group in self.app.parsed_data["groups"]:
-                agent_label = group["agentLabel"]
-                agent_id = group["agentId"]
-                agent_dir_name = safe_filename(agent_label, agent_id)
-                agent_dir = None  # 延迟创建
-                used_names = set()
-                
-                for session_group in group["sessions"]:
-                    for topic_group in session_group["topics"]:
-                        topic_id = topic_group["topicId"]
-                        if topic_id not in topic_ids_set:
-                            continue
-                        
-                        # 延迟创建助手目录
-                        if agent_dir is None:
-                            agent_dir = export_dir / agent_dir_name
-                            agent_dir.mkdir(exist_ok=True)
-                        
-                        topic = topic_group.get("topic")
-                        messages = topic_group.get("messages", [])
-                        topic_label = topic_group["topicLabel"]
-                        
-                        filename = safe_filename(topic_label, topic_id)
-                        filename = ensure_unique_name(filename, used_names)
-                        
-                        topic_data = {
-                            "mode": "postgres",
-                            "schemaHash": self.app.parsed_data["raw"].get("schemaHash", ""),
-                            "data": {"topics": [topic] if topic else [], "messages": messages}
-                        }
+            def run():
+                with open_export_target(export_dir, archive_format, self.app.export_jobs.log) as target:
+                    file_count = 0
+                    topic_ids_set = {t.get("id") for t in batch_data["data"]["topics"]}
+                    
+                    for group in groups:
+                        agent_label = group["agentLabel"]
+                        agent_id = group["agentId"]
+                        agent_dir_name = safe_filename(agent_label, agent_id)
+                        agent_dir = None  # 延迟创建
+                        used_names = set()
                         
-                        file_path = str(agent_dir / f"{filename}.json")
-                        created_at, modified_at = self._get_topic_time_info(topic_group)
-                        write_json_with_timestamp(file_path, topic_data, created_at, modified_at)
-                        file_count += 1
+                        for session_group in group["sessions"]:
+                            for topic_group in session_group["topics"]:
+                                topic_id = topic_group["topicId"]
+                                if topic_id not in topic_ids_set:
+                                    continue
+                                
+                                # 延迟创建助手目录
+                                if agent_dir is None:
+                                    agent_dir = export_dir / agent_dir_name
+                                
+                                topic = topic_group.get("topic")
+                                messages = topic_group.get("messages", [])
+                                topic_label = topic_group["topicLabel"]
+                                
+                                filename = safe_filename(topic_label, topic_id)
+                                filename = ensure_unique_name(filename, used_names)
+                                
+                                topic_data = {
+                                    "mode": "postgres",
+                                    "schemaHash": schema_hash,
+                                    "data": {"topics": [topic] if topic else [], "messages": messages}
+                                }
+                                
+                                file_path = str(agent_dir / f"{filename}.json")
+                                created_at, modified_at = self._get_topic_time_info(topic_group)
+                                target.write_json(file_path, topic_data, created_at, modified_at)
+                                file_count += 1
+                return file_count
             
-            self.app.log_message(f"✅ 批量按主题分割导出: {file_count}个JSON文件", "SUCCESS")
-            messagebox.showinfo("导出成功", f"已导出{file_count}个JSON文件到:\n{export_dir}")
+            def on_success(file_count):
+                self.app.log_message(f"✅ 批量按主题分割导出: {file_count}个JSON文件", "SUCCESS")
+                messagebox.showinfo("导出成功", f"已导出{file_count}个JSON文件到:\n{output_path}")
             
+            self.app.export_jobs.submit("批量按主题分割导出JSON", run, on_success)
+        
         except Exception as e:
             self.app.log_message(f"批量分割导出失败: {str(e)}", "ERROR")
             messagebox.showerror("导出失败", str(e))
@@ -1668,46 +1770,53 @@ class ContextMenuManager:
                 return
             
             export_dir = Path(output_dir) / f"batch_topics_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            export_dir.mkdir(exist_ok=True)
-            
+            archive_format = self._archive_format()
+            output_path = self._output_path(export_dir)
             exporter = MarkdownExporter(self.app.parsed_data)
-            file_count = 0
-            topic_ids_set = {t.get("id") for t in batch_data["data"]["topics"]}
-            
-            for group in self.app.parsed_data["groups"]:
-                agent_label = group["agentLabel"]
-                agent_id = group["agentId"]
-                agent_dir_name = safe_filename(agent_label, agent_id)
-                agent_dir = None
-                used_names = set()
-                
-                for session_group in group["sessions"]:
-                    for topic_group in session_group["topics"]:
-                        topic_id = topic_group["topicId"]
-                        if topic_id not in topic_ids_set:
-                            continue
-                        
-                        if agent_dir is None:
-                            agent_dir = export_dir / agent_dir_name
-                            agent_dir.mkdir(exist_ok=True)
-                        
-                        topic_label = topic_group["topicLabel"]
-                        filename = safe_filename(topic_label, topic_id)
-                        filename = ensure_unique_name(filename, used_names)
-                        
-                        content = exporter.build_topic_markdown(
-                            group.get("agent"), session_group.get("session"),
-                            topic_group, group["agentLabel"], True, True
-                        )
+            groups = self.app.parsed_data["groups"]
+            
+            def run():
+                with open_export_target(export_dir, archive_format, self.app.export_jobs.log) as target:
+                    file_count = 0
+                    topic_ids_set = {t.get("id") for t in batch_data["data"]["topics"]}
+                    
+                    for group in groups:
+                        agent_label = group["agentLabel"]
+                        agent_id = group["agentId"]
+                        agent_dir_name = safe_filename(agent_label, agent_id)
+                        agent_dir = None
+                        used_names = set()
                         
-                        file_path = str(agent_dir / f"{filename}.md")
-                        created_at, modified_at = self._get_topic_time_info(topic_group)
-                        write_file_with_timestamp(file_path, content, created_at, modified_at)
-                        file_count += 1
+                        for session_group in group["sessions"]:
+                            for topic_group in session_group["topics"]:
+                                topic_id = topic_group["topicId"]
+                                if topic_id not in topic_ids_set:
+                                    continue
+                                
+                                if agent_dir is None:
+                                    agent_dir = export_dir / agent_dir_name
+                                
+                                topic_label = topic_group["topicLabel"]
+                                filename = safe_filename(topic_label, topic_id)
+                                filename = ensure_unique_name(filename, used_names)
+                                
+                                content = exporter.build_topic_markdown(
+                                    group.get("agent"), session_group.get("session"),
+                                    topic_group, group["agentLabel"], True, True
+                                )
+                                
+                                file_path = str(agent_dir / f"{filename}.md")
+                                created_at, modified_at = self._get_topic_time_info(topic_group)
+                                target.write_text(file_path, content, created_at, modified_at)
+                                file_count += 1
+                return file_count
             
-            self.app.log_message(f"✅ 批量按主题分割导出: {file_count}个Markdown文件", "SUCCESS")
-            messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{export_dir}")
+            def on_success(file_count):
+                self.app.log_message(f"✅ 批量按主题分割导出: {file_count}个Markdown文件", "SUCCESS")
+                messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{output_path}")
             
+            self.app.export_jobs.submit("批量按主题分割导出Markdown", run, on_success)
+        
         except Exception as e:
             self.app.log_message(f"批量分割导出失败: {str(e)}", "ERROR")
             messagebox.showerror("导出失败", str(e))
@@ -1726,63 +1835,70 @@ class ContextMenuManager:
                 return
             
             export_dir = Path(output_dir) / f"batch_messages_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            export_dir.mkdir(exist_ok=True)
-            
-            file_count = 0
-            msg_ids_set = {m.get("id") for m in batch_data["data"]["messages"]}
+            archive_format = self._archive_format()
+            output_path = self._output_path(export_dir)
+            schema_hash = self.app.parsed_data["raw"].get("schemaHash", "")
+            groups = self.app.parsed_data["groups"]
             
-            for group in self.app.parsed_data["groups"]:
-                agent_label = group["agentLabel"]
-                agent_id = group["agentId"]
-                agent_dir_name = safe_filename(agent_label, agent_id)
-                agent_dir = None
-                used_topic_names = set()
-                
-                for session_group in group["sessions"]:
-                    for topic_group in session_group["topics"]:
-                        topic_label = topic_group["topicLabel"]
-                        topic_id = topic_group["topicId"]
-                        topic_dir = None
-                        used_msg_names = set()
-                        msg_idx = 0
+            def run():
+                with open_export_target(export_dir, archive_format, self.app.export_jobs.log) as target:
+                    file_count = 0
+                    msg_ids_set = {m.get("id") for m in batch_data["data"]["messages"]}
+                    
+                    for group in groups:
+                        agent_label = group["agentLabel"]
+                        agent_id = group["agentId"]
+                        agent_dir_name = safe_filename(agent_label, agent_id)
+                        agent_dir = None
+                        used_topic_names = set()
                         
-                        for msg in topic_group.get("messages", []):
-                            if msg.get("id") not in msg_ids_set:
-                                continue
-                            
-                            if agent_dir is None:
-                                agent_dir = export_dir / agent_dir_name
-                                agent_dir.mkdir(exist_ok=True)
-                            
-                            if topic_dir is None:
-                                topic_dir_name = safe_filename(topic_label, topic_id)
-                                topic_dir_name = ensure_unique_name(topic_dir_name, used_topic_names)
-                                topic_dir = agent_dir / topic_dir_name
-                                topic_dir.mkdir(exist_ok=True)
-                            
-                            msg_idx += 1
-                            msg_id = msg.get("id", f"msg_{msg_idx}")
-                            role = msg.get("role", "unknown")
-                            content_preview = str(msg.get("content", ""))[:30].replace("\n", " ")
-                            
-                            filename = safe_filename(f"{msg_idx:03d}_{role}_{content_preview}", msg_id)
-                            filename = ensure_unique_name(filename, used_msg_names)
-                            
-                            msg_data = {
-                                "mode": "postgres",
-                                "schemaHash": self.app.parsed_data["raw"].get("schemaHash", ""),
-                                "data": {"messages": [msg]}
-                            }
-                            
-                            file_path = str(topic_dir / f"{filename}.json")
-                            created_at = msg.get("createdAt")
-                            modified_at = msg.get("updatedAt") or created_at
-                            write_json_with_timestamp(file_path, msg_data, created_at, modified_at)
-                            file_count += 1
-            
-            self.app.log_message(f"✅ 批量按消息分割导出: {file_count}个JSON文件", "SUCCESS")
-            messagebox.showinfo("导出成功", f"已导出{file_count}个JSON文件到:\n{export_dir}")
-            
+                        for session_group in group["sessions"]:
+                            for topic_group in session_group["topics"]:
+                                topic_label = topic_group["topicLabel"]
+                                topic_id = topic_group["topicId"]
+                                topic_dir = None
+                                used_msg_names = set()
+                                msg_idx = 0
+                                
+                                for msg in topic_group.get("messages", []):
+                                    if msg.get("id") not in msg_ids_set:
+                                        continue
+                                    
+                                    if agent_dir is None:
+                                        agent_dir = export_dir / agent_dir_name
+                                    
+                                    if topic_dir is None:
+                                        topic_dir_name = safe_filename(topic_label, topic_id)
+                                        topic_dir_name = ensure_unique_name(topic_dir_name, used_topic_names)
+                                        topic_dir = agent_dir / topic_dir_name
+                                    
+                                    msg_idx += 1
+                                    msg_id = msg.get("id", f"msg_{msg_idx}")
+                                    role = msg.get("role", "unknown")
+                                    content_preview = str(msg.get("content", ""))[:30].replace("\n", " ")
+                                    
+                                    filename = safe_filename(f"{msg_idx:03d}_{role}_{content_preview}", msg_id)
+                                    filename = ensure_unique_name(filename, used_msg_names)
+                                    
+                                    msg_data = {
+                                        "mode": "postgres",
+                                        "schemaHash": schema_hash,
+                                        "data": {"messages": [msg]}
+                                    }
+                                    
+                                    file_path = str(topic_dir / f"{filename}.json")
+                                    created_at = msg.get("createdAt")
+                                    modified_at = msg.get("updatedAt") or created_at
+                                    target.write_json(file_path, msg_data, created_at, modified_at)
+                                    file_count += 1
+                return file_count
+            
+            def on_success(file_count):
+                self.app.log_message(f"✅ 批量按消息分割导出: {file_count}个JSON文件", "SUCCESS")
+                messagebox.showinfo("导出成功", f"已导出{file_count}个JSON文件到:\n{output_path}")
+            
+            self.app.export_jobs.submit("批量按消息分割导出JSON", run, on_success)
+        
         except Exception as e:
             self.app.log_message(f"批量分割导出失败: {str(e)}", "ERROR")
             messagebox.showerror("导出失败", str(e))
@@ -1801,60 +1917,66 @@ class ContextMenuManager:
                 return
             
             export_dir = Path(output_dir) / f"batch_messages_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            export_dir.mkdir(exist_ok=True)
-            
+            archive_format = self._archive_format()
+            output_path = self._output_path(export_dir)
             exporter = MarkdownExporter(self.app.parsed_data)
-            file_count = 0
-            msg_ids_set = {m.get("id") for m in batch_data["data"]["messages"]}
-            
-            for group in self.app.parsed_data["groups"]:
-                agent_label = group["agentLabel"]
-                agent_id = group["agentId"]
-                agent_dir_name = safe_filename(agent_label, agent_id)
-                agent_dir = None
-                used_topic_names = set()
-                
-                for session_group in group["sessions"]:
-                    for topic_group in session_group["topics"]:
-                        topic_label = topic_group["topicLabel"]
-                        topic_id = topic_group["topicId"]
-                        topic_dir = None
-                        used_msg_names = set()
-                        msg_idx = 0
-                        
-                        for msg in topic_group.get("messages", []):
-                            if msg.get("id") not in msg_ids_set:
-                                continue
-                            
-                            if agent_dir is None:
-                                agent_dir = export_dir / agent_dir_name
-                                agent_dir.mkdir(exist_ok=True)
-                            
-                            if topic_dir is None:
-                                topic_dir_name = safe_filename(topic_label, topic_id)
-                                topic_dir_name = ensure_unique_name(topic_dir_name, used_topic_names)
-                                topic_dir = agent_dir / topic_dir_name
-                                topic_dir.mkdir(exist_ok=True)
-                            
-                            msg_idx += 1
-                            msg_id = msg.get("id", f"msg_{msg_idx}")
-                            role = msg.get("role", "unknown")
-                            content_preview = str(msg.get("content", ""))[:30].replace("\n", " ")
-                            
-                            filename = safe_filename(f"{msg_idx:03d}_{role}_{content_preview}", msg_id)
-                            filename = ensure_unique_name(filename, used_msg_names)
-                            
-                            content = exporter.build_single_message_markdown(msg)
-                            
-                            file_path = str(topic_dir / f"{filename}.md")
-                            created_at = msg.get("createdAt")
-                            modified_at = msg.get("updatedAt") or created_at
-                            write_file_with_timestamp(file_path, content, created_at, modified_at)
-                            file_count += 1
-            
-            self.app.log_message(f"✅ 批量按消息分割导出: {file_count}个Markdown文件", "SUCCESS")
-            messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{export_dir}")
+            groups = self.app.parsed_data["groups"]
             
+            def run():
+                with open_export_target(export_dir, archive_format, self.app.export_jobs.log) as target:
+                    file_count = 0
+                    msg_ids_set = {m.get("id") for m in batch_data["data"]["messages"]}
+                    
+                    for group in groups:
+                        agent_label = group["agentLabel"]
+                        agent_id = group["agentId"]
+                        agent_dir_name = safe_filename(agent_label, agent_id)
+                        agent_dir = None
+                        used_topic_names = set()
+                        
+                        for session_group in group["sessions"]:
+                            for topic_group in session_group["topics"]:
+                                topic_label = topic_group["topicLabel"]
+                                topic_id = topic_group["topicId"]
+                                topic_dir = None
+                                used_msg_names = set()
+                                msg_idx = 0
+                                
+                                for msg in topic_group.get("messages", []):
+                                    if msg.get("id") not in msg_ids_set:
+                                        continue
+                                    
+                                    if agent_dir is None:
+                                        agent_dir = export_dir / agent_dir_name
+                                    
+                                    if topic_dir is None:
+                                        topic_dir_name = safe_filename(topic_label, topic_id)
+                                        topic_dir_name = ensure_unique_name(topic_dir_name, used_topic_names)
+                                        topic_dir = agent_dir / topic_dir_name
+                                    
+                                    msg_idx += 1
+                                    msg_id = msg.get("id", f"msg_{msg_idx}")
+                                    role = msg.get("role", "unknown")
+                                    content_preview = str(msg.get("content", ""))[:30].replace("\n", " ")
+                                    
+                                    filename = safe_filename(f"{msg_idx:03d}_{role}_{content_preview}", msg_id)
+                                    filename = ensure_unique_name(filename, used_msg_names)
+                                    
+                                    content = exporter.build_single_message_markdown(msg)
+                                    
+                                    file_path = str(topic_dir / f"{filename}.md")
+                                    created_at = msg.get("createdAt")
+                                    modified_at = msg.get("updatedAt") or created_at
+                                    target.write_text(file_path, content, created_at, modified_at)
+                                    file_count += 1
+                return file_count
+            
+            def on_success(file_count):
+                self.app.log_message(f"✅ 批量按消息分割导出: {file_count}个Markdown文件", "SUCCESS")
+                messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{output_path}")
+            
+            self.app.export_jobs.submit("批量按消息分割导出Markdown", run, on_success)
+        
         except Exception as e:
             self.app.log_message(f"批量分割导出失败: {str(e)}", "ERROR")
             messagebox.showerror("导出失败", str(e))
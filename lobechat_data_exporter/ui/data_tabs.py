@@ -10,9 +10,17 @@ import ttkbootstrap as ttk_boot
 from ttkbootstrap.constants import *
 import json
 import re
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator, Tuple
 from pathlib import Path
 
+from ..config import JSON_EXPORT_COMPACT
+from ..utils.json_stream import write_export_json
+from ..exporters.ndjson_writer import export_ndjson
+from ..exporters.parquet_writer import export_parquet
+from ..exporters.sqlite_writer import export_sqlite
+from ..exporters.excel_writer import export_tables_to_excel
+from ..exporters.csv_writer import export_csv, configured_columns
+from ..core.sqlite_source import search_message_ids
 from .json_editor import JSONEditor
 from .tree_view import TreeViewController
 from .table_views import (
@@ -516,9 +524,9 @@ class DataTabsController:
         topics_dict = {topic.get("id"): topic for topic in topics}
         
         # 搜索消息内容
+        matches = self._message_matcher(keyword_lower)
         for msg in messages:
-            content = msg.get("content", "")
-            if isinstance(content, str) and keyword_lower in content.lower():
+            if matches(msg):
                 topic_id = msg.get("topicId")
                 
                 # 尝试在树形视图中定位到对应的话题或消息
@@ -533,6 +541,29 @@ class DataTabsController:
         
         return False
     
+    def _message_matcher(self, keyword_lower: str):
+        """
+        创建消息内容匹配函数
+        
+        数据来自 SQLite 导出时用其中的全文索引一次查出匹配的消息ID，否则逐条比较消息内容。
+        
+        Args:
+            keyword_lower: 小写的搜索关键词
+            
+        Returns:
+            matches(msg) -> bool
+        """
+        sqlite_source = self.parsed_data.get("sqliteSource") if self.parsed_data else None
+        matched_ids = search_message_ids(sqlite_source, keyword_lower) if sqlite_source else None
+        if matched_ids is not None:
+            return lambda msg: msg.get("id") in matched_ids
+        
+        def matches(msg: Dict) -> bool:
+            content = msg.get("content", "")
+            return isinstance(content, str) and keyword_lower in content.lower()
+        
+        return matches
+    
     def _locate_topic_in_tree(self, topic_id: str, topic_title: str) -> bool:
         """
         在树形视图中定位到指定话题
@@ -680,11 +711,12 @@ class DataTabsController:
                 default_agent_id = agent.get("id")
                 break
         
+        matches = self._message_matcher(keyword_lower)
         for msg in messages:
             content = msg.get("content", "")
             
             # 搜索全部内容
-            if isinstance(content, str) and keyword_lower in content.lower():
+            if matches(msg):
                 session_id = msg.get("sessionId")
                 topic_id = msg.get("topicId")
                 
@@ -800,6 +832,7 @@ class DataTabsController:
         # 统计每个话题下匹配的消息数和总消息数、Token等统计
         topic_stats = {}
         
+        matches = self._message_matcher(keyword_lower)
         for msg in messages:
             topic_id = msg.get("topicId")
             if not topic_id or topic_id not in topics_dict:
@@ -820,8 +853,7 @@ class DataTabsController:
             stats["msg_count"] += 1
             
             # 检查消息内容是否匹配
-            content = msg.get("content", "")
-            if isinstance(content, str) and keyword_lower in content.lower():
+            if matches(msg):
                 stats["matched_count"] += 1
             
             # 统计 Token 和费用
@@ -954,6 +986,7 @@ class DataTabsController:
         # 统计每个助手下的消息统计
         agent_stats = {}
         
+        matches = self._message_matcher(keyword_lower)
         for msg in messages:
             session_id = msg.get("sessionId")
             topic_id = msg.get("topicId")
@@ -986,8 +1019,7 @@ class DataTabsController:
             stats["msg_count"] += 1
             
             # 检查消息内容是否匹配
-            content = msg.get("content", "")
-            if isinstance(content, str) and keyword_lower in content.lower():
+            if matches(msg):
                 stats["matched_count"] += 1
             
             # 统计 Token 和费用
@@ -1105,6 +1137,7 @@ class DataTabsController:
         # 找出包含匹配消息的助手ID
         matched_agent_ids = set()
         
+        matches = self._message_matcher(keyword_lower)
         for msg in messages:
             session_id = msg.get("sessionId")
             topic_id = msg.get("topicId")
@@ -1122,8 +1155,7 @@ class DataTabsController:
                 continue
             
             # 检查消息内容是否匹配
-            content = msg.get("content", "")
-            if isinstance(content, str) and keyword_lower in content.lower():
+            if matches(msg):
                 matched_agent_ids.add(agent_id)
         
         # 为每个匹配的助手创建结果
@@ -1167,14 +1199,14 @@ class DataTabsController:
         # 找出包含匹配消息的主题ID
         matched_topic_ids = set()
         
+        matches = self._message_matcher(keyword_lower)
         for msg in messages:
             topic_id = msg.get("topicId")
             if not topic_id or topic_id not in topics_dict:
                 continue
             
             # 检查消息内容是否匹配
-            content = msg.get("content", "")
-            if isinstance(content, str) and keyword_lower in content.lower():
+            if matches(msg):
                 matched_topic_ids.add(topic_id)
         
         # 为每个匹配的主题创建结果
@@ -1235,9 +1267,15 @@ class DataTabsController:
             return
         
         try:
-            tree = tab_info["controller"].tree if tab_info["type"] == "table" else tab_info["controller"].tree
-            columns = tab_info["columns"]
-            export_table_to_csv(tree, columns, file_path)
+            controller = tab_info["controller"]
+            if tab_info["type"] == "table" and self.parsed_data:
+                # 从原始数据流式导出完整值（不读取表格中截断的显示值）
+                export_csv(
+                    file_path, controller.export_columns(), controller.iter_rows(self.parsed_data),
+                    configured_columns(current_key), log_callback=self.app.log_message
+                )
+            else:
+                export_table_to_csv(controller.tree, tab_info["columns"], file_path)
             self.app.log_message(f"✅ CSV导出成功: {file_path}", "SUCCESS")
             messagebox.showinfo("导出成功", f"已导出到:\n{file_path}")
         except Exception as e:
@@ -1267,9 +1305,16 @@ class DataTabsController:
             return
         
         try:
-            tree = tab_info["controller"].tree if tab_info["type"] == "table" else tab_info["controller"].tree
-            columns = tab_info["columns"]
-            export_table_to_excel(tree, columns, file_path, current_key)
+            controller = tab_info["controller"]
+            if tab_info["type"] == "table" and self.parsed_data:
+                # 从原始数据导出带类型的完整值（不读取表格中截断的显示值）
+                export_tables_to_excel(
+                    file_path,
+                    [(current_key, controller.export_columns(), controller.iter_rows(self.parsed_data))],
+                    log_callback=self.app.log_message
+                )
+            else:
+                export_table_to_excel(controller.tree, tab_info["columns"], file_path, current_key)
             self.app.log_message(f"✅ Excel导出成功: {file_path}", "SUCCESS")
             messagebox.showinfo("导出成功", f"已导出到:\n{file_path}")
         except ImportError:
@@ -1306,10 +1351,17 @@ class DataTabsController:
                 if key in self.tabs:
                     tab_info = self.tabs[key]
                     if tab_info["type"] == "table":
-                        tables_data[name] = {
-                            "tree": tab_info["controller"].tree,
-                            "columns": tab_info["columns"]
-                        }
+                        controller = tab_info["controller"]
+                        if self.parsed_data:
+                            tables_data[name] = {
+                                "rows": controller.iter_rows(self.parsed_data),
+                                "columns": controller.export_columns()
+                            }
+                        else:
+                            tables_data[name] = {
+                                "tree": controller.tree,
+                                "columns": tab_info["columns"]
+                            }
             
             # 添加搜索结果表（如果有数据）
             if "search_results" in self.tabs:
@@ -1444,6 +1496,20 @@ class DataTabsController:
             bootstyle="primary-round-toggle"
         ).pack(anchor=W, pady=2)
         
+        # 输出目标：目录或压缩包（右键菜单的分割导出同样适用）
+        self.export_archive_format = tk.StringVar(value="")
+        target_frame = ttk.Frame(options_frame)
+        target_frame.pack(anchor=W, pady=(8, 2))
+        ttk.Label(target_frame, text="输出为:").pack(side=LEFT)
+        for value, label in (("", "📁 文件夹"), ("zip", "🗜️ ZIP 压缩包"), ("tar.zst", "🗜️ tar.zst 压缩包")):
+            ttk.Radiobutton(
+                target_frame,
+                text=label,
+                variable=self.export_archive_format,
+                value=value,
+                bootstyle="primary"
+            ).pack(side=LEFT, padx=(8, 0))
+        
         # 导出按钮
         btn_frame = ttk.Frame(md_frame)
         btn_frame.pack(fill=X, padx=20, pady=20)
@@ -1558,6 +1624,30 @@ class DataTabsController:
             width=20
         ).pack(side=LEFT, padx=10)
         
+        ttk.Button(
+            export_btn_frame,
+            text="📄 导出 JSON Lines",
+            command=self.export_ndjson_file,
+            bootstyle="success-outline",
+            width=20
+        ).pack(side=LEFT, padx=10)
+        
+        ttk.Button(
+            export_btn_frame,
+            text="📊 导出 Parquet",
+            command=self.export_parquet_files,
+            bootstyle="success-outline",
+            width=20
+        ).pack(side=LEFT, padx=10)
+        
+        ttk.Button(
+            export_btn_frame,
+            text="🗄️ 导出 SQLite",
+            command=self.export_sqlite_file,
+            bootstyle="success-outline",
+            width=20
+        ).pack(side=LEFT, padx=10)
+        
         ttk.Button(
             export_btn_frame,
             text="📋 复制当前选项卡JSON",
@@ -1655,9 +1745,18 @@ class DataTabsController:
         Returns:
             导出的完整JSON数据
         """
-        export_data = {}
+        return {
+            "mode": self.original_mode,
+            "schemaHash": self.original_schema_hash,
+            "data": dict(self.iter_export_modules())
+        }
+    
+    def iter_export_modules(self) -> Iterator[Tuple[str, Any]]:
+        """
+        按order顺序逐个生成选中模块的 (模块键, 数据)
         
-        # 按order顺序遍历模块
+        流式导出时每个模块在写到它时才从编辑器读取，前面的模块已经写入文件。
+        """
         for module in sorted([m for m in MODULES_CONFIG if m["in_export"]], key=lambda x: x["order"]):
             module_key = module["key"]
             
@@ -1671,17 +1770,11 @@ class DataTabsController:
             # 获取模块数据
             try:
                 module_data = self._get_module_data(module_key)
-                if module_data is not None:
-                    export_data[module_key] = module_data
             except Exception as e:
                 self.app.log_message(f"获取 {module_key} 数据失败: {str(e)}", "ERROR")
                 raise
-        
-        return {
-            "mode": self.original_mode,
-            "schemaHash": self.original_schema_hash,
-            "data": export_data
-        }
+            if module_data is not None:
+                yield module_key, module_data
     
     def _get_module_data(self, module_key: str) -> Any:
         """获取单个模块的数据"""
@@ -1728,24 +1821,34 @@ class DataTabsController:
             # 验证所有模块数据
             self._validate_all_modules()
             
-            # 获取导出数据
-            export_data = self.get_export_data()
+            # 流式写入文件（逐个模块读取并写出）
+            module_keys = []
             
-            # 写入文件
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, indent=2, ensure_ascii=False)
+            def modules():
+                for module_key, module_data in self.iter_export_modules():
+                    module_keys.append(module_key)
+                    yield module_key, module_data
+            
+            try:
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    counts = write_export_json(
+                        f, self.original_mode, self.original_schema_hash, modules(), JSON_EXPORT_COMPACT
+                    )
+            except BaseException:
+                # 不保留写了一半的文件
+                Path(file_path).unlink(missing_ok=True)
+                raise
             
             # 统计信息
-            data_stats = export_data.get("data", {})
             stats_msg = "\n".join([
-                f"- {self.modules_dict.get(k, {}).get('label', k)}: {len(v) if isinstance(v, list) else 1} 项"
-                for k, v in data_stats.items()
+                f"- {self.modules_dict.get(k, {}).get('label', k)}: {counts.get(k, 1)} 项"
+                for k in module_keys
             ])
             
             self.app.log_message(f"✅ JSON导出成功: {file_path}", "SUCCESS")
             messagebox.showinfo(
                 "导出成功",
-                f"已导出包含 {len(data_stats)} 个模块的JSON文件\n\n{stats_msg}\n\n文件路径:\n{file_path}"
+                f"已导出包含 {len(module_keys)} 个模块的JSON文件\n\n{stats_msg}\n\n文件路径:\n{file_path}"
             )
             
         except ValueError as e:
@@ -1755,6 +1858,126 @@ class DataTabsController:
             self.app.log_message(f"导出失败: {str(e)}", "ERROR")
             messagebox.showerror("导出失败", str(e))
     
+    def export_ndjson_file(self):
+        """导出 JSON Lines 文件（每行一个实体，按配置大小分卷）"""
+        if not self.parsed_data:
+            messagebox.showwarning("警告", "请先解析JSON文件！")
+            return
+        
+        selected_count = sum(1 for var in self.module_vars.values() if var.get())
+        if selected_count == 0:
+            messagebox.showwarning("警告", "请至少选择一个模块！")
+            return
+        
+        source_filename = self.parsed_data.get("sourceFileName", "lobechat_backup")
+        default_filename = source_filename.replace(".json", "") + "_export.jsonl"
+        
+        file_path = filedialog.asksaveasfilename(
+            title="保存JSON Lines文件",
+            defaultextension=".jsonl",
+            filetypes=[("JSON Lines", "*.jsonl *.ndjson"), ("所有文件", "*.*")],
+            initialfile=default_filename
+        )
+        
+        if not file_path:
+            return
+        
+        self.app.log_message(f"开始导出JSON Lines，已选择 {selected_count} 个模块...", "INFO")
+        
+        try:
+            self._validate_all_modules()
+            
+            counts, files = export_ndjson(
+                Path(file_path), self.original_mode, self.original_schema_hash,
+                self.iter_export_modules(), log_callback=self.app.log_message
+            )
+            
+            stats_msg = "\n".join([
+                f"- {self.modules_dict.get(k, {}).get('label', k)}: {n} 行"
+                for k, n in counts.items()
+            ])
+            
+            self.app.log_message(f"✅ JSON Lines导出成功: {files[0]}（{len(files)}个文件）", "SUCCESS")
+            messagebox.showinfo(
+                "导出成功",
+                f"已导出包含 {len(counts)} 个模块的JSON Lines（{len(files)}个文件）\n\n{stats_msg}\n\n文件路径:\n{files[0]}"
+            )
+            
+        except ValueError as e:
+            self.app.log_message(f"数据验证失败: {str(e)}", "ERROR")
+            messagebox.showerror("验证失败", f"数据格式错误:\n{str(e)}\n\n请检查并修复后重试。")
+        except Exception as e:
+            self.app.log_message(f"导出失败: {str(e)}", "ERROR")
+            messagebox.showerror("导出失败", str(e))
+    
+    def export_parquet_files(self):
+        """导出消息、主题、助手为 Parquet 文件（供数据分析使用）"""
+        if not self.parsed_data:
+            messagebox.showwarning("警告", "请先解析JSON文件！")
+            return
+        
+        output_dir = filedialog.askdirectory(title="选择Parquet导出目录")
+        if not output_dir:
+            return
+        
+        source_filename = self.parsed_data.get("sourceFileName", "lobechat_backup")
+        export_path = Path(output_dir) / (source_filename.replace(".json", "") + "_parquet")
+        self.app.log_message("开始导出Parquet...", "INFO")
+        
+        try:
+            raw_data = self.parsed_data.get("raw", {}).get("data", {})
+            counts = export_parquet(export_path, raw_data.items(), log_callback=self.app.log_message)
+            
+            stats_msg = "\n".join([f"- {k}: {n} 行" for k, n in counts.items()])
+            self.app.log_message(f"✅ Parquet导出成功: {export_path}", "SUCCESS")
+            messagebox.showinfo("导出成功", f"已导出 {len(counts)} 个Parquet文件\n\n{stats_msg}\n\n目录:\n{export_path}")
+            
+        except ImportError as e:
+            self.app.log_message(str(e), "ERROR")
+            messagebox.showerror("导出失败", str(e))
+        except Exception as e:
+            self.app.log_message(f"导出失败: {str(e)}", "ERROR")
+            messagebox.showerror("导出失败", str(e))
+    
+    def export_sqlite_file(self):
+        """导出为单个可查询的 SQLite 文件（带索引和消息全文索引，可作为数据源重新打开）"""
+        if not self.parsed_data:
+            messagebox.showwarning("警告", "请先解析JSON文件！")
+            return
+        
+        source_filename = self.parsed_data.get("sourceFileName", "lobechat_backup")
+        default_filename = source_filename.replace(".json", "") + ".sqlite"
+        
+        file_path = filedialog.asksaveasfilename(
+            title="保存SQLite文件",
+            defaultextension=".sqlite",
+            filetypes=[("SQLite数据库", "*.sqlite *.sqlite3 *.db"), ("所有文件", "*.*")],
+            initialfile=default_filename
+        )
+        
+        if not file_path:
+            return
+        
+        self.app.log_message("开始导出SQLite...", "INFO")
+        
+        try:
+            raw = self.parsed_data.get("raw", {})
+            counts = export_sqlite(
+                Path(file_path), raw.get("mode"), raw.get("schemaHash"),
+                raw.get("data", {}).items(), log_callback=self.app.log_message
+            )
+            
+            self.app.log_message(f"✅ SQLite导出成功: {file_path}", "SUCCESS")
+            messagebox.showinfo(
+                "导出成功",
+                f"已导出SQLite文件\n\n- 消息: {counts.get('messages', 0)} 条\n- 主题: {counts.get('topics', 0)} 个\n"
+                f"- 助手: {counts.get('agents', 0)} 个\n\n文件路径:\n{file_path}"
+            )
+            
+        except Exception as e:
+            self.app.log_message(f"导出失败: {str(e)}", "ERROR")
+            messagebox.showerror("导出失败", str(e))
+    
     def copy_current_tab(self):
         """复制当前选项卡的JSON数据到剪贴板"""
         # 检查当前是在主标签页还是其他数据标签页
@@ -11,6 +11,7 @@ import threading
 from typing import Dict, Optional, Callable, List
 
 from ..core.db_connector import DBConfig, PostgreSQLConnector, test_connection
+from ..core.multi_user_export import list_users
 
 
 class DatabaseConnectionDialog:
@@ -187,6 +188,24 @@ class DatabaseConnectionDialog:
         )
         self.connect_btn.pack(side=LEFT, padx=5)
         
+        self.index_btn = ttk.Button(
+            btn_frame, 
+            text="🩺 索引建议", 
+            command=self._show_index_advisor,
+            bootstyle="warning-outline",
+            state="disabled"  # 测试连接成功后启用
+        )
+        self.index_btn.pack(side=LEFT, padx=5)
+        
+        self.multi_export_btn = ttk.Button(
+            btn_frame, 
+            text="👥 批量导出", 
+            command=self._show_multi_user_export,
+            bootstyle="primary-outline",
+            state="disabled"  # 测试连接成功且发现用户后启用
+        )
+        self.multi_export_btn.pack(side=LEFT, padx=5)
+        
         ttk.Button(
             btn_frame, 
             text="取消", 
@@ -289,33 +308,7 @@ class DatabaseConnectionDialog:
     
     def _query_users(self, connector: PostgreSQLConnector) -> List[Dict]:
         """查询用户列表"""
-        try:
-            query = """
-                SELECT u.id, u.email, u.full_name, u.created_at,
-                       COUNT(DISTINCT m.id) as message_count
-                FROM users u
-                LEFT JOIN messages m ON u.id = m.user_id
-                GROUP BY u.id
-                ORDER BY message_count DESC
-            """
-            return connector.execute_query(query)
-        except Exception as e:
-            # 如果users表不存在或查询失败，尝试从messages表获取用户
-            try:
-                query = """
-                    SELECT user_id as id, 
-                           user_id as email,
-                           '' as full_name,
-                           MIN(created_at) as created_at,
-                           COUNT(*) as message_count
-                    FROM messages
-                    WHERE user_id IS NOT NULL
-                    GROUP BY user_id
-                    ORDER BY message_count DESC
-                """
-                return connector.execute_query(query)
-            except:
-                return []
+        return list_users(connector)
     
     def _on_test_success(self, connector: PostgreSQLConnector, users: List[Dict]):
         """测试成功回调"""
@@ -323,6 +316,7 @@ class DatabaseConnectionDialog:
         
         self.users_list = users
         self.connector = connector
+        self.index_btn.configure(state="normal")
         
         if users:
             # 构建用户选项列表
@@ -357,12 +351,36 @@ class DatabaseConnectionDialog:
             
             # 启用连接按钮
             self.connect_btn.configure(state="normal")
+            self.multi_export_btn.configure(state="normal")
         else:
             self.user_hint_label.config(text="未找到用户数据，将加载全部数据")
             self._set_status("✅ 连接成功！未找到用户数据", "green")
             self.load_all_var.set(True)
             self.connect_btn.configure(state="normal")
     
+    def _show_index_advisor(self):
+        """显示索引建议对话框"""
+        if not self.connector or not self.connector.is_connected():
+            messagebox.showwarning("警告", "请先测试连接")
+            return
+        
+        # 使用当前选中的账号作为过滤条件，与数据库标签页的查询保持一致
+        user_id = None
+        if not self.load_all_var.get() and hasattr(self, 'user_id_map'):
+            user_id = self.user_id_map.get(self.selected_user_var.get())
+        
+        from .index_advisor_dialog import show_index_advisor_dialog
+        show_index_advisor_dialog(self.dialog, self.connector, user_id, self.log_callback)
+    
+    def _show_multi_user_export(self):
+        """显示多用户导出对话框"""
+        if not self.users_list:
+            messagebox.showwarning("警告", "请先测试连接")
+            return
+        
+        from .multi_user_export_dialog import show_multi_user_export_dialog
+        show_multi_user_export_dialog(self.dialog, self._get_config(), self.users_list, self.log_callback)
+    
     def _on_test_failed(self, message: str):
         """测试失败回调"""
         self._set_buttons_state("normal")
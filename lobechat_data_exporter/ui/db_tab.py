@@ -7,6 +7,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import ttkbootstrap as ttk_boot
 from ttkbootstrap.constants import *
+import os
 import threading
 import json
 from typing import Dict, List, Any, Optional, Callable
@@ -14,11 +15,26 @@ from datetime import datetime
 from pathlib import Path
 
 from ..core.db_connector import PostgreSQLConnector, DBConfig
-from ..config import THEME_DARK
+from ..core.entity_cache import EntityCache
+from ..core.prefetch import PrefetchScheduler
+from ..core import export_progress
+from ..core.cancellation import CancelToken, OperationCancelled
+from ..core.conversation_stream import ConversationStream, LatestTime
+from ..core.adaptive_batch import AdaptiveBatcher
+from ..core.query_stats import estimate_rows_bytes
+from ..exporters.excel_writer import export_tables_to_excel
+from ..exporters.csv_writer import export_csv, configured_columns
+from ..config import (
+    THEME_DARK, DB_CACHE_BUDGET_MB,
+    ENABLE_PREFETCH, PREFETCH_TOPIC_COUNT, PREFETCH_ADJACENT_AGENTS, PREFETCH_QUEUE_SIZE,
+    LONG_OPERATION_STATEMENT_TIMEOUT_MS, SEARCH_STATEMENT_TIMEOUT_MS, CANCELLABLE_POLL_MS,
+    LOAD_ALL_INITIAL_BATCH, LOAD_ALL_MIN_BATCH, LOAD_ALL_MAX_BATCH,
+    LOAD_ALL_TARGET_BATCH_SECONDS, LOAD_ALL_BATCH_MEMORY_MB
+)
 from ..utils.file_utils import (
-    safe_filename, ensure_unique_name,
-    write_file_with_timestamp, write_json_with_timestamp
+    safe_filename, ensure_unique_name, set_file_times, write_lines
 )
+from ..utils.json_stream import write_json_stream
 
 
 class DatabaseTabController:
@@ -100,6 +116,21 @@ class DatabaseTabController:
         ],
     }
     
+    # CSV/Excel 导出时各表格的数据来源（连接器的流式查询方法）
+    EXPORT_FETCHERS = {
+        "models": "get_all_ai_models",
+        "providers": "get_all_ai_providers",
+        "agents": "get_all_agents",
+        "topics": "get_all_topics",
+        "messages": "get_all_messages",
+    }
+    
+    # 表格查询中截断为预览的列（LEFT(...)），写入实体缓存时不覆盖已缓存的完整值
+    PREVIEW_FIELDS = {
+        "topic": ("history_summary",),
+        "message": ("content",),
+    }
+    
     def __init__(self, parent, app):
         """初始化数据库标签页控制器"""
         self.parent = parent
@@ -108,16 +139,22 @@ class DatabaseTabController:
         self.db_config = None
         self.user_id = None
         
+        # 主题/消息实体缓存 - 同一行只存一份，超出内存预算时按LRU淘汰
+        self.entity_cache = EntityCache(
+            DB_CACHE_BUDGET_MB * 1024 * 1024,
+            getattr(app, 'log_message', None)
+        )
+        
+        # 对话树预取调度器 - 后台预先加载用户可能展开的节点
+        self.prefetcher = PrefetchScheduler(PREFETCH_QUEUE_SIZE, getattr(app, 'log_message', None))
+        self.prefetcher.enabled = ENABLE_PREFETCH
+        self._prefetch_anchor = None  # 当前预取所围绕的顶层节点
+        
+        # 执行中的可取消数据库操作的取消令牌（见 _run_cancellable），同一时间只允许一个
+        self._cancellable_token: Optional[CancelToken] = None
+        
         # 数据缓存 - 所有数据存储在这里，各标签页共享
-        self.cache = {
-            "agents": [],           # 完整助手列表
-            "agents_full": [],      # 助手完整字段
-            "topics": {},           # {agent_id: [topics]}
-            "default_topics": [],   # 默认对话主题
-            "messages": {},         # {topic_id: [messages]}
-            "models": [],           # 模型列表
-            "providers": [],        # 提供商列表
-        }
+        self.cache = self._new_cache()
         
         # 排序状态 {table_type: (column, reverse)}
         self.sort_state = {}
@@ -129,12 +166,27 @@ class DatabaseTabController:
         self._selected_column = {}  # {table_type: column_index}
         
         # 分批加载的offset记录
-        self._batch_offset = {"topics": 0, "messages": 0}
+        self._batch_after = {"topics": None, "messages": None}
         self._batch_data = {"topics": [], "messages": []}  # 累积的数据
         
         # 创建UI
         self._create_ui()
     
+    def _new_cache(self) -> Dict:
+        """创建空的数据缓存（同时清空实体缓存和排队中的预取任务）"""
+        self.prefetcher.cancel()
+        self._prefetch_anchor = None
+        self.entity_cache.clear()
+        return {
+            "agents": [],           # 完整助手列表
+            "agents_full": [],      # 助手完整字段
+            "topics": self.entity_cache.namespace("topics", "topic"),        # {agent_id: [topics]}
+            "default_topics": [],   # 默认对话主题
+            "messages": self.entity_cache.namespace("messages", "message"),  # {topic_id: [messages]}
+            "models": [],           # 模型列表
+            "providers": [],        # 提供商列表
+        }
+    
     def _create_ui(self):
         """创建UI"""
         # 顶部工具栏（所有子标签页之上）
@@ -244,6 +296,12 @@ class DatabaseTabController:
         self.search_frame = ttk.Frame(self.notebook)
         self.notebook.add(self.search_frame, text="🔍 搜索")
         self._create_search_tab()
+        
+        # 查询统计标签页
+        self.query_stats_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.query_stats_frame, text="📈 查询统计")
+        self._create_query_stats_tab()
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_notebook_tab_changed)
     
     def _create_conversations_tab(self):
         """创建全部对话标签页"""
@@ -305,6 +363,9 @@ class DatabaseTabController:
         # 绑定展开事件（懒加载）
         self.conv_tree.bind("<<TreeviewOpen>>", self._on_tree_expand)
         
+        # 绑定选中事件（预取相邻助手）
+        self.conv_tree.bind("<<TreeviewSelect>>", self._on_conv_tree_select)
+        
         # 绑定右键菜单
         self.conv_tree.bind("<Button-3>", self._show_conv_context_menu)
     
@@ -546,6 +607,14 @@ class DatabaseTabController:
             bootstyle="primary"
         ).pack(side=LEFT, padx=5)
         
+        self.search_stop_btn = ttk.Button(
+            search_toolbar, text="⏹ 停止",
+            command=self._cancel_search,
+            bootstyle="danger-outline",
+            state="disabled"
+        )
+        self.search_stop_btn.pack(side=LEFT, padx=5)
+        
         self.search_status_label = ttk.Label(search_toolbar, text="", foreground="gray")
         self.search_status_label.pack(side=RIGHT, padx=5)
         
@@ -577,6 +646,194 @@ class DatabaseTabController:
         
         self.search_offset = 0
         self.search_keyword = ""
+        self._search_token = None  # 当前数据库搜索的取消令牌
+    
+    # 查询统计表列配置 (列ID, 显示名称, 默认宽度, 统计字段, 格式)
+    QUERY_STATS_COLUMNS = [
+        ("query", "查询", 320, "query", "str"),
+        ("site", "调用位置", 200, "callSite", "str"),
+        ("count", "次数", 60, "count", "int"),
+        ("avg", "平均ms", 70, "avgMs", "ms"),
+        ("server", "服务器ms", 75, "avgServerMs", "ms"),
+        ("p50", "P50", 60, "p50Ms", "ms"),
+        ("p95", "P95", 60, "p95Ms", "ms"),
+        ("p99", "P99", 60, "p99Ms", "ms"),
+        ("max", "最大ms", 70, "maxMs", "ms"),
+        ("total", "总耗时ms", 80, "totalMs", "ms"),
+        ("rows", "行数", 70, "rows", "int"),
+        ("bytes", "数据量", 80, "bytes", "bytes"),
+        ("errors", "错误", 50, "errors", "int"),
+        ("last", "最近执行", 130, "lastTime", "str"),
+    ]
+    
+    def _create_query_stats_tab(self):
+        """创建查询统计标签页"""
+        toolbar = ttk.Frame(self.query_stats_frame)
+        toolbar.pack(fill=X, pady=5)
+        
+        ttk.Button(
+            toolbar, text="🔄 刷新",
+            command=self._refresh_query_stats,
+            bootstyle="info-outline"
+        ).pack(side=LEFT, padx=2)
+        
+        ttk.Button(
+            toolbar, text="🗑️ 清空统计",
+            command=self._reset_query_stats,
+            bootstyle="secondary-outline"
+        ).pack(side=LEFT, padx=2)
+        
+        ttk.Label(toolbar, text="|", foreground="gray").pack(side=LEFT, padx=2)
+        ttk.Label(toolbar, text="慢查询阈值(ms):").pack(side=LEFT, padx=2)
+        
+        from ..config import SLOW_QUERY_THRESHOLD_MS
+        self.slow_threshold_var = tk.StringVar(value=str(SLOW_QUERY_THRESHOLD_MS))
+        threshold_entry = ttk.Entry(toolbar, textvariable=self.slow_threshold_var, width=8)
+        threshold_entry.pack(side=LEFT, padx=2)
+        threshold_entry.bind("<Return>", lambda e: self._apply_slow_threshold())
+        
+        ttk.Button(
+            toolbar, text="应用",
+            command=self._apply_slow_threshold,
+            bootstyle="primary-outline"
+        ).pack(side=LEFT, padx=2)
+        
+        self.query_stats_status_label = ttk.Label(toolbar, text="", foreground="gray")
+        self.query_stats_status_label.pack(side=RIGHT, padx=5)
+        
+        table_container = ttk.Frame(self.query_stats_frame)
+        table_container.pack(fill=BOTH, expand=YES)
+        
+        y_scroll = ttk.Scrollbar(table_container, orient=VERTICAL)
+        y_scroll.pack(side=RIGHT, fill=Y)
+        
+        x_scroll = ttk.Scrollbar(table_container, orient=HORIZONTAL)
+        x_scroll.pack(side=BOTTOM, fill=X)
+        
+        columns = tuple(col[0] for col in self.QUERY_STATS_COLUMNS)
+        self.query_stats_tree = ttk.Treeview(
+            table_container,
+            columns=columns,
+            show="headings",
+            yscrollcommand=y_scroll.set,
+            xscrollcommand=x_scroll.set
+        )
+        self.query_stats_tree.pack(fill=BOTH, expand=YES)
+        
+        y_scroll.config(command=self.query_stats_tree.yview)
+        x_scroll.config(command=self.query_stats_tree.xview)
+        
+        for col_id, col_name, col_width, _, col_format in self.QUERY_STATS_COLUMNS:
+            self.query_stats_tree.heading(
+                col_id, text=col_name, anchor=W,
+                command=lambda c=col_id: self._sort_query_stats(c)
+            )
+            anchor = W if col_format == "str" else E
+            self.query_stats_tree.column(col_id, width=col_width, minwidth=40, anchor=anchor)
+        
+        # 默认按总耗时降序
+        self.sort_state["query_stats"] = ("total", True)
+    
+    def _on_notebook_tab_changed(self, event):
+        """子标签页切换 - 切换到查询统计时自动刷新"""
+        try:
+            if self.notebook.select() == str(self.query_stats_frame):
+                self._refresh_query_stats()
+        except Exception:
+            pass
+    
+    def _format_query_stat_value(self, value, col_format: str) -> str:
+        """格式化查询统计单元格"""
+        if col_format == "ms":
+            return f"{value:.1f}"
+        if col_format == "bytes":
+            if value >= 1024 * 1024:
+                return f"{value / 1024 / 1024:.1f}MB"
+            if value >= 1024:
+                return f"{value / 1024:.1f}KB"
+            return f"{value}B"
+        return str(value)
+    
+    def _refresh_query_stats(self):
+        """刷新查询统计表"""
+        tree = self.query_stats_tree
+        for item in tree.get_children():
+            tree.delete(item)
+        
+        if not self.connector:
+            self.query_stats_status_label.config(text="未连接")
+            return
+        
+        stats = self.connector.query_stats.get_stats()
+        
+        # 按当前排序状态排序
+        sort_col, reverse = self.sort_state.get("query_stats", ("total", True))
+        field_map = {c[0]: c[3] for c in self.QUERY_STATS_COLUMNS}
+        sort_field = field_map.get(sort_col, "totalMs")
+        if sort_field in ("query", "callSite", "lastTime"):
+            stats.sort(key=lambda x: str(x.get(sort_field, "")).lower(), reverse=reverse)
+        else:
+            stats.sort(key=lambda x: x.get(sort_field, 0), reverse=reverse)
+        
+        for stat in stats:
+            values = []
+            for _, _, _, stat_field, col_format in self.QUERY_STATS_COLUMNS:
+                value = stat.get(stat_field, "")
+                if stat_field == "callSite" and stat.get("callSiteCount", 0) > 1:
+                    value = f"{value} (+{stat['callSiteCount'] - 1})"
+                values.append(self._format_query_stat_value(value, col_format))
+            tree.insert("", END, values=values)
+        
+        summary = self.connector.query_stats.get_summary()
+        self.query_stats_status_label.config(
+            text=f"{summary['queries']}次查询, {summary['fingerprints']}类, "
+                 f"总耗时{summary['totalMs'] / 1000:.1f}s, "
+                 f"慢查询{summary['slow']}次, 错误{summary['errors']}次"
+        )
+        self._update_query_stats_headings()
+    
+    def _sort_query_stats(self, col: str):
+        """点击表头排序查询统计"""
+        current_col, reverse = self.sort_state.get("query_stats", (None, False))
+        if current_col == col:
+            reverse = not reverse
+        else:
+            # 数值列默认降序
+            col_format = next((c[4] for c in self.QUERY_STATS_COLUMNS if c[0] == col), "str")
+            reverse = col_format != "str"
+        self.sort_state["query_stats"] = (col, reverse)
+        self._refresh_query_stats()
+    
+    def _update_query_stats_headings(self):
+        """更新查询统计表头箭头"""
+        sort_col, reverse = self.sort_state.get("query_stats", (None, False))
+        for col_id, col_name, _, _, _ in self.QUERY_STATS_COLUMNS:
+            if col_id == sort_col:
+                arrow = " ▼" if reverse else " ▲"
+                self.query_stats_tree.heading(col_id, text=col_name + arrow)
+            else:
+                self.query_stats_tree.heading(col_id, text=col_name)
+    
+    def _reset_query_stats(self):
+        """清空查询统计"""
+        if self.connector:
+            self.connector.query_stats.reset()
+        self._refresh_query_stats()
+    
+    def _apply_slow_threshold(self):
+        """应用慢查询阈值"""
+        try:
+            threshold = float(self.slow_threshold_var.get())
+            if threshold < 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showwarning("提示", "慢查询阈值必须是非负数字（毫秒）")
+            return
+        
+        if self.connector:
+            self.connector.query_stats.slow_threshold_ms = threshold
+        if self.app and hasattr(self.app, 'log_message'):
+            self.app.log_message(f"慢查询阈值已设置为 {threshold:.0f}ms", "INFO")
     
     # ==================== 连接管理 ====================
     
@@ -586,16 +843,14 @@ class DatabaseTabController:
         self.db_config = config
         self.user_id = config.get("user_id")
         
+        # 同步慢查询阈值设置
+        try:
+            connector.query_stats.slow_threshold_ms = float(self.slow_threshold_var.get())
+        except ValueError:
+            pass
+        
         # 清空缓存
-        self.cache = {
-            "agents": [],
-            "agents_full": [],
-            "topics": {},
-            "default_topics": [],
-            "messages": {},
-            "models": [],
-            "providers": [],
-        }
+        self.cache = self._new_cache()
         self.sort_state = {}
         
         # 加载所有数据
@@ -618,13 +873,14 @@ class DatabaseTabController:
         # 【修复】保存分批加载的数据
         batch_topics_data = list(self._batch_data.get("topics", []))  # 复制列表
         batch_messages_data = list(self._batch_data.get("messages", []))
-        batch_topics_offset = self._batch_offset.get("topics", 0)
-        batch_messages_offset = self._batch_offset.get("messages", 0)
+        batch_topics_after = self._batch_after.get("topics")
+        batch_messages_after = self._batch_after.get("messages")
         
         # 【修复】保存已缓存的主题和消息数据（通过懒加载获得的）
-        cached_topics = dict(self.cache.get("topics", {}))  # {agent_id: [topics]}
+        # 主题/消息缓存由实体缓存管理，加载过程中不会被清空，直接引用即可
+        cached_topics = self.cache["topics"]  # {agent_id: [topics]}
         cached_default_topics = list(self.cache.get("default_topics", []) or [])
-        cached_messages = dict(self.cache.get("messages", {}))  # {topic_id: [messages]}
+        cached_messages = self.cache["messages"]  # {topic_id: [messages]}
         
         def load_thread():
             try:
@@ -646,11 +902,10 @@ class DatabaseTabController:
                 elif batch_topics_data:
                     # 【修复】恢复分批加载的数据
                     self._batch_data["topics"] = batch_topics_data
-                    self._batch_offset["topics"] = batch_topics_offset
+                    self._batch_after["topics"] = batch_topics_after
                     self._sync_topics_to_conversation_cache(batch_topics_data)
                 elif cached_topics or cached_default_topics:
                     # 【修复】恢复懒加载的缓存数据
-                    self.cache["topics"] = cached_topics
                     self.cache["default_topics"] = cached_default_topics if cached_default_topics else None
                     # 更新助手的 topic_count
                     for agent in self.cache["agents"]:
@@ -671,11 +926,10 @@ class DatabaseTabController:
                 elif batch_messages_data:
                     # 【修复】恢复分批加载的数据
                     self._batch_data["messages"] = batch_messages_data
-                    self._batch_offset["messages"] = batch_messages_offset
+                    self._batch_after["messages"] = batch_messages_after
                     self._sync_messages_to_conversation_cache(batch_messages_data)
                 elif cached_messages:
                     # 【修复】恢复懒加载的缓存数据
-                    self.cache["messages"] = cached_messages
                     # 更新主题的 message_count
                     for agent_id, topics in self.cache.get("topics", {}).items():
                         for topic in topics:
@@ -792,8 +1046,9 @@ class DatabaseTabController:
     def _query_topics_for_agent(self, agent_id: str) -> List[Dict]:
         """查询助手的所有主题 - 延迟统计消息数量"""
         # 先检查缓存
-        if agent_id in self.cache["topics"]:
-            return self.cache["topics"][agent_id]
+        cached = self.cache["topics"].get(agent_id)
+        if cached is not None:
+            return cached
         
         # 只查询主题基本信息，不统计消息数量
         query = """
@@ -814,14 +1069,14 @@ class DatabaseTabController:
         for topic in topics:
             topic['message_count'] = None
         
-        self.cache["topics"][agent_id] = topics
-        return topics
+        return self.cache["topics"].put(agent_id, topics)
     
     def _query_messages_for_topic(self, topic_id: str) -> List[Dict]:
         """查询主题的消息"""
         # 先检查缓存
-        if topic_id in self.cache["messages"]:
-            return self.cache["messages"][topic_id]
+        cached = self.cache["messages"].get(topic_id)
+        if cached is not None:
+            return cached
         
         query = """
             SELECT id, role, content, model, created_at
@@ -835,8 +1090,7 @@ class DatabaseTabController:
         query += " ORDER BY created_at"
         
         messages = self.connector.execute_query(query, tuple(params))
-        self.cache["messages"][topic_id] = messages
-        return messages
+        return self.cache["messages"].put(topic_id, messages)
     
     def _query_all_topics(self) -> List[Dict]:
         """查询全部主题（用于主题表）"""
@@ -1117,6 +1371,10 @@ class DatabaseTabController:
     
     def _load_children_async(self, node_id: str, type_info: str):
         """异步加载子节点"""
+        # 已缓存（通常来自预取）时直接在主线程插入，无需等待后台线程
+        if self._insert_cached_children(node_id, type_info):
+            return
+        
         def load_thread():
             try:
                 # 特殊处理："default:chat" 表示默认对话节点
@@ -1138,14 +1396,19 @@ class DatabaseTabController:
                 node_type, item_id = parts[0], parts[1]
                 
                 if node_type == "agent":
+                    # 正在预取同一节点时等待其完成，避免重复查询
+                    self.prefetcher.wait(("topics", item_id))
                     topics = self._query_topics_for_agent(item_id)
                     self.parent.after(0, lambda: self._insert_topics(node_id, topics))
                     # 同步刷新主题表
                     self.parent.after(100, lambda: self._sync_topics_table())
                     # 更新状态栏
                     self.parent.after(0, self._update_conv_status_label)
+                    # 预取前几个主题的消息
+                    self._schedule_topic_prefetch(topics)
                     
                 elif node_type == "topic":
+                    self.prefetcher.wait(("messages", item_id))
                     messages = self._query_messages_for_topic(item_id)
                     self.parent.after(0, lambda: self._insert_messages(node_id, messages))
                     # 同步刷新消息表
@@ -1158,6 +1421,103 @@ class DatabaseTabController:
         
         threading.Thread(target=load_thread, daemon=True).start()
     
+    def _insert_cached_children(self, node_id: str, type_info: str) -> bool:
+        """
+        从缓存直接插入子节点
+        
+        Returns:
+            缓存命中并已插入时返回 True
+        """
+        parts = type_info.split(":")
+        if len(parts) < 2 or parts[0] not in ("agent", "topic"):
+            return False
+        
+        node_type, item_id = parts[0], parts[1]
+        namespace = "topics" if node_type == "agent" else "messages"
+        # 先用不计入统计的检查，避免未命中被重复统计
+        if item_id not in self.cache[namespace]:
+            return False
+        cached = self.cache[namespace].get(item_id)
+        if cached is None:
+            return False
+        
+        if node_type == "agent":
+            self._insert_topics(node_id, cached)
+            self.parent.after(100, lambda: self._sync_topics_table())
+            self._schedule_topic_prefetch(cached)
+        else:
+            self._insert_messages(node_id, cached)
+            self.parent.after(100, lambda: self._sync_messages_table())
+        self._update_conv_status_label()
+        return True
+    
+    # ==================== 预取 ====================
+    
+    def _can_prefetch(self) -> bool:
+        """是否可以执行预取"""
+        return self.prefetcher.enabled and self.connector is not None and self.connector.is_connected()
+    
+    def _prefetch_topics(self, agent_id: str):
+        """预取助手的主题（后台线程执行）"""
+        if not self._can_prefetch() or agent_id in self.cache["topics"]:
+            return
+        self._query_topics_for_agent(agent_id)
+    
+    def _prefetch_messages(self, topic_id: str):
+        """预取主题的消息（后台线程执行）"""
+        if not self._can_prefetch() or topic_id in self.cache["messages"]:
+            return
+        self._query_messages_for_topic(topic_id)
+    
+    def _schedule_topic_prefetch(self, topics: List[Dict]):
+        """助手主题加载后，预取前 N 个主题的消息"""
+        if not self._can_prefetch():
+            return
+        scheduled = 0
+        for topic in topics:
+            if scheduled >= PREFETCH_TOPIC_COUNT:
+                break
+            topic_id = topic.get("id")
+            # message_count 为 0 表示已知没有消息
+            if not topic_id or topic.get("message_count") == 0:
+                continue
+            if topic_id not in self.cache["messages"]:
+                self.prefetcher.submit(("messages", topic_id), self._prefetch_messages, topic_id)
+            scheduled += 1
+    
+    def _on_conv_tree_select(self, event):
+        """对话树选中事件 - 切换到其他助手时取消旧的预取，并预取相邻助手的主题"""
+        node_id = self.conv_tree.focus()
+        if not node_id:
+            return
+        
+        # 找到所属的顶层节点（助手或默认对话）
+        top_node = node_id
+        while self.conv_tree.parent(top_node):
+            top_node = self.conv_tree.parent(top_node)
+        
+        if top_node == self._prefetch_anchor:
+            return
+        self._prefetch_anchor = top_node
+        
+        # 用户离开了原来的位置，排队中的预取已不再相关
+        self.prefetcher.cancel()
+        if not self._can_prefetch():
+            return
+        
+        siblings = list(self.conv_tree.get_children(""))
+        index = siblings.index(top_node)
+        start = max(0, index - PREFETCH_ADJACENT_AGENTS)
+        end = min(len(siblings), index + PREFETCH_ADJACENT_AGENTS + 1)
+        # 先预取选中的助手本身，再预取相邻助手
+        for sibling in [top_node] + siblings[start:index] + siblings[index + 1:end]:
+            type_info = self.conv_tree.set(sibling, "type")
+            if not type_info.startswith("agent:"):
+                continue
+            agent_id = type_info.split(":")[1]
+            if agent_id not in self.cache["topics"]:
+                self.prefetcher.submit(("topics", agent_id), self._prefetch_topics, agent_id)
+    
     def _insert_default_topics(self, parent_id: str, topics: List[Dict]):
         """插入默认主题节点"""
         # 清除"加载中..."占位符
@@ -1488,18 +1848,41 @@ class DatabaseTabController:
         
         scope = self.search_scope_var.get()
         
+        # 新的搜索会取消仍在执行的旧搜索
+        self._cancel_search()
+        token = CancelToken()
+        self._search_token = token
+        self.search_stop_btn.configure(state="normal")
+        self.search_status_label.config(text="正在搜索...")
+        
         def search_thread():
             try:
-                results = self._search_database(
-                    self.search_keyword, scope, count, self.search_offset
-                )
+                with self.connector.operation(token, SEARCH_STATEMENT_TIMEOUT_MS):
+                    results = self._search_database(
+                        self.search_keyword, scope, count, self.search_offset
+                    )
                 self.search_offset += len(results)
                 self.parent.after(0, lambda: self._update_search_results(results))
+            except OperationCancelled:
+                self.parent.after(0, lambda: self.search_status_label.config(text="搜索已取消"))
             except Exception as e:
                 self.parent.after(0, lambda: self._show_error(f"搜索失败: {e}"))
+            finally:
+                self.parent.after(0, lambda: self._on_search_finished(token))
         
         threading.Thread(target=search_thread, daemon=True).start()
     
+    def _cancel_search(self):
+        """取消正在执行的数据库搜索"""
+        if self._search_token is not None:
+            self._search_token.cancel()
+    
+    def _on_search_finished(self, token: CancelToken):
+        """搜索线程结束回调"""
+        if self._search_token is token:
+            self._search_token = None
+            self.search_stop_btn.configure(state="disabled")
+    
     def _update_search_results(self, results: List[Dict]):
         """更新搜索结果"""
         for row in results:
@@ -1886,442 +2269,557 @@ class DatabaseTabController:
         
         return {"agents": agent_ids, "topics": topic_ids, "messages": message_ids, "default": has_default}
     
-    def _get_selected_conv_data(self):
-        """获取选中的对话数据 - 从数据库现读完整数据"""
+    def _with_selected_conv_data(self, callback: Callable[[Optional[Dict]], None]):
+        """
+        读取选中的对话数据 - 从数据库现读完整数据，读完后在界面线程中调用 callback(数据)
+        
+        读取在后台线程执行，期间显示可取消的进度对话框；未选中时立即调用 callback(None)，
+        用户取消或读取失败时不调用。
+        """
         if not self.connector or not self.connector.is_connected():
             messagebox.showwarning("警告", "请先连接数据库")
-            return None
+            return
         
         ids = self._get_selected_ids()
         if not ids["agents"] and not ids["topics"] and not ids["messages"] and not ids["default"]:
-            return None
+            callback(None)
+            return
         
-        all_agents = []
-        all_topics = []
-        all_messages = []
+        def on_cancelled():
+            if self.app and hasattr(self.app, 'log_message'):
+                self.app.log_message("已取消读取对话数据", "WARNING")
         
-        # 处理选中的助手
-        for agent_id in ids["agents"]:
-            # 从数据库读取助手完整数据
-            agent = self._query_full_agent_data(agent_id)
-            if agent:
-                all_agents.append(agent)
-            
-            # 从数据库读取该助手的所有主题
-            topics = self._query_full_topics_for_agent(agent_id)
-            for topic in topics:
-                all_topics.append(topic)
-                # 从数据库读取该主题的所有消息
-                topic_id = topic.get("id")
-                messages = self._query_full_messages_for_topic(topic_id)
-                all_messages.extend(messages)
+        self._run_cancellable(
+            "读取数据",
+            "正在从数据库读取选中的对话数据...\n可以随时取消。",
+            self._read_conv_data, ids,
+            on_success=callback, on_cancelled=on_cancelled
+        )
+    
+    def _read_conv_data(self, token: CancelToken, report: Callable, ids: Dict) -> Dict:
+        """
+        从数据库读取选中的对话数据（后台线程执行）
         
-        # 处理默认对话
-        if ids["default"]:
-            topics = self._query_full_default_topics()
-            for topic in topics:
-                all_topics.append(topic)
-                topic_id = topic.get("id")
-                messages = self._query_full_messages_for_topic(topic_id)
-                all_messages.extend(messages)
+        所有读取在同一个一致性快照中执行，导出期间的新写入不会造成主题或消息缺失。
         
-        # 处理单独选中的主题
-        for topic_id in ids["topics"]:
-            # 检查是否已经添加
-            if any(t.get("id") == topic_id for t in all_topics):
-                continue
+        Args:
+            token: 取消令牌
+            report: 进度文本回调
+            ids: _get_selected_ids() 的结果
+        """
+        # 暂停预取：快照期间共用连接的查询出错会提前结束快照事务
+        self.prefetcher.cancel()
+        
+        with self.connector.snapshot():
+            all_agents = []
+            all_topics = []
+            all_messages = []
             
-            topic = self._query_full_topic_data(topic_id)
-            if topic:
-                all_topics.append(topic)
-                messages = self._query_full_messages_for_topic(topic_id)
-                all_messages.extend(messages)
-        
-        # 处理单独选中的消息
-        for msg_id in ids["messages"]:
-            # 检查是否已经添加
-            if any(m.get("id") == msg_id for m in all_messages):
-                continue
+            # 处理选中的助手
+            for agent_id in ids["agents"]:
+                token.raise_if_cancelled()
+                report(f"正在读取助手数据... 已读取 {len(all_topics)} 个主题, {len(all_messages)} 条消息")
+                # 从数据库读取助手完整数据
+                agent = self._query_full_agent_data(agent_id)
+                if agent:
+                    all_agents.append(agent)
+                
+                # 从数据库读取该助手的所有主题
+                topics = self._query_full_topics_for_agent(agent_id)
+                for topic in topics:
+                    all_topics.append(topic)
+                    # 从数据库读取该主题的所有消息
+                    topic_id = topic.get("id")
+                    messages = self._query_full_messages_for_topic(topic_id)
+                    all_messages.extend(messages)
             
-            # 从缓存或数据库获取消息
-            msg = self._query_full_message_by_id(msg_id)
-            if msg:
-                all_messages.append(msg)
-        
-        return {
-            "agents": all_agents,
-            "topics": all_topics,
-            "messages": all_messages,
-            "stats": {
-                "agentCount": len(all_agents),
-                "topicCount": len(all_topics),
-                "messageCount": len(all_messages)
+            # 处理默认对话
+            if ids["default"]:
+                report(f"正在读取默认对话... 已读取 {len(all_topics)} 个主题, {len(all_messages)} 条消息")
+                topics = self._query_full_default_topics()
+                for topic in topics:
+                    token.raise_if_cancelled()
+                    all_topics.append(topic)
+                    topic_id = topic.get("id")
+                    messages = self._query_full_messages_for_topic(topic_id)
+                    all_messages.extend(messages)
+            
+            # 处理单独选中的主题
+            for topic_id in ids["topics"]:
+                token.raise_if_cancelled()
+                # 检查是否已经添加
+                if any(t.get("id") == topic_id for t in all_topics):
+                    continue
+                
+                topic = self._query_full_topic_data(topic_id)
+                if topic:
+                    all_topics.append(topic)
+                    messages = self._query_full_messages_for_topic(topic_id)
+                    all_messages.extend(messages)
+            
+            # 处理单独选中的消息
+            for msg_id in ids["messages"]:
+                # 检查是否已经添加
+                if any(m.get("id") == msg_id for m in all_messages):
+                    continue
+                
+                # 从缓存或数据库获取消息
+                msg = self._query_full_message_by_id(msg_id)
+                if msg:
+                    all_messages.append(msg)
+            
+            return {
+                "agents": all_agents,
+                "topics": all_topics,
+                "messages": all_messages,
+                "stats": {
+                    "agentCount": len(all_agents),
+                    "topicCount": len(all_topics),
+                    "messageCount": len(all_messages)
+                }
             }
-        }
     
-    def _conv_split_by_agent_json(self):
-        """按助手分割导出JSON - 从数据库现读完整数据"""
-        data = self._get_selected_conv_data()
-        if not data or not data["agents"]:
-            messagebox.showinfo("提示", "请先选择包含助手的数据")
+    def _run_cancellable(self, title: str, message: str, func: Callable, *args,
+                         on_success: Callable[[Any], None],
+                         on_cancelled: Optional[Callable[[], None]] = None,
+                         on_error: Optional[Callable[[Exception], None]] = None):
+        """
+        在后台线程执行数据库操作，显示可取消的进度对话框，结束后在界面线程中回调
+        
+        界面线程用 after() 定时检查后台线程的状态，不阻塞事件循环。进度对话框独占输入，
+        同一时间只允许一个这样的操作（见 _cancellable_busy）。
+        取消时向服务器发送取消请求，正在执行的查询会立即中止。
+        
+        Args:
+            title: 对话框标题
+            message: 提示信息
+            func: 操作函数，签名为 func(token, report, *args)
+            *args: 操作参数
+            on_success: 成功后调用 on_success(func 的返回值)
+            on_cancelled: 用户取消后调用
+            on_error: 失败后调用 on_error(异常)，None 时显示错误
+        """
+        from .progress_dialog import ProgressDialog
+        
+        if self._cancellable_busy():
+            return
+        
+        progress = ProgressDialog(self.parent, title, message, 0)
+        progress.set_indeterminate()
+        token = progress.cancel_token
+        self._cancellable_token = token
+        state = {"done": False, "result": None, "error": None, "status": None, "shown": None}
+        
+        def report(text: str):
+            state["status"] = text
+        
+        def worker():
+            try:
+                with self.connector.operation(token, LONG_OPERATION_STATEMENT_TIMEOUT_MS):
+                    state["result"] = func(token, report, *args)
+            except Exception as e:
+                state["error"] = e
+            finally:
+                state["done"] = True
+        
+        def poll():
+            if not state["done"]:
+                if state["status"] != state["shown"] and not token.is_cancelled:
+                    state["shown"] = state["status"]
+                    progress.set_message(state["shown"])
+                self.parent.after(CANCELLABLE_POLL_MS, poll)
+                return
+            
+            self._cancellable_token = None
+            progress.close()
+            error = state["error"]
+            if isinstance(error, OperationCancelled) or token.is_cancelled:
+                if on_cancelled:
+                    on_cancelled()
+            elif error is not None:
+                if on_error:
+                    on_error(error)
+                else:
+                    self._show_error(f"{title}失败: {error}")
+            else:
+                on_success(state["result"])
+        
+        threading.Thread(target=worker, daemon=True).start()
+        self.parent.after(CANCELLABLE_POLL_MS, poll)
+    
+    def _cancellable_busy(self) -> bool:
+        """是否有可取消的数据库操作正在执行（有时提示用户，调用方不再发起新的操作）"""
+        if self._cancellable_token is None:
+            return False
+        messagebox.showinfo("提示", "有数据库操作正在执行，请等待完成或取消后再试")
+        return True
+    
+    # ==================== 对话树分割导出 - 从数据库流式读取 ====================
+    
+    @staticmethod
+    def _role_icon(role: str) -> str:
+        """消息角色的标题"""
+        return "👤 User" if role == "user" else "🤖 Assistant" if role == "assistant" else "⚙️ System"
+    
+    @staticmethod
+    def _write_export_file(file_path: Path, write: Callable, created_at: Optional[str],
+                           latest: LatestTime):
+        """
+        流式写入一个导出文件并设置时间戳
+        
+        Args:
+            file_path: 文件路径
+            write: 写入函数 write(f)，写入过程中更新 latest
+            created_at: 创建时间
+            latest: 最新修改时间（写完后作为文件的修改时间）
+        """
+        try:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                write(f)
+        except BaseException:
+            # 出错或取消时不保留写了一半的文件
+            file_path.unlink(missing_ok=True)
+            raise
+        set_file_times(str(file_path), created_at, latest.value)
+    
+    def _conv_split_export(self, unit: str, fmt: str):
+        """
+        按助手/主题/消息分割导出 - 从数据库流式读取完整数据
+        
+        选中的对话在一个一致性快照中用服务端游标按 助手 → 主题 → 消息 的顺序读取，
+        每个文件在所属分组读完时立即写出，内存中最多只保留一个主题的消息。
+        导出在后台线程执行，期间显示可取消的进度对话框。
+        
+        Args:
+            unit: 分割单位 "agent" / "topic" / "message"
+            fmt: 文件格式 "json" / "md"
+        """
+        if not self.connector or not self.connector.is_connected():
+            messagebox.showwarning("警告", "请先连接数据库")
+            return
+        if self._cancellable_busy():
+            return
+        
+        unit_names = {"agent": "助手", "topic": "主题", "message": "消息"}
+        empty_hints = {
+            "agent": "请先选择包含助手的数据",
+            "topic": "请先选择包含主题的数据",
+            "message": "请先选择包含消息的数据（需要先展开主题节点加载消息）",
+        }
+        format_name = "JSON" if fmt == "json" else "Markdown"
+        
+        ids = self._get_selected_ids()
+        if unit == "agent":
+            # 按助手分割只导出选中的助手
+            ids = {"agents": ids["agents"], "topics": [], "messages": [], "default": False}
+        if not ids["agents"] and not ids["topics"] and not ids["messages"] and not ids["default"]:
+            messagebox.showinfo("提示", empty_hints[unit])
             return
         
         output_dir = filedialog.askdirectory(title="选择导出目录")
         if not output_dir:
             return
         
-        export_dir = Path(output_dir) / f"db_agents_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        export_dir = Path(output_dir) / f"db_{unit}s_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         export_dir.mkdir(exist_ok=True)
         
+        writer = {
+            ("agent", "json"): self._write_agent_json_files,
+            ("agent", "md"): self._write_agent_md_files,
+            ("topic", "json"): self._write_topic_json_files,
+            ("topic", "md"): self._write_topic_md_files,
+            ("message", "json"): self._write_message_json_files,
+            ("message", "md"): self._write_message_md_files,
+        }[(unit, fmt)]
+        
+        def on_success(file_count: int):
+            if file_count == 0:
+                try:
+                    export_dir.rmdir()
+                except OSError:
+                    pass
+                messagebox.showinfo("提示", empty_hints[unit])
+                return
+            
+            if self.app and hasattr(self.app, 'log_message'):
+                suffix = "（完整数据）" if unit != "message" else ""
+                self.app.log_message(f"✅ 按{unit_names[unit]}分割导出: {file_count}个{format_name}文件{suffix}", "SUCCESS")
+            messagebox.showinfo("导出成功", f"已导出{file_count}个{format_name}文件到:\n{export_dir}")
+        
+        def on_cancelled():
+            if self.app and hasattr(self.app, 'log_message'):
+                self.app.log_message(f"已取消按{unit_names[unit]}分割导出，已写出的文件保留在: {export_dir}", "WARNING")
+        
+        def on_error(e: Exception):
+            if self.app and hasattr(self.app, 'log_message'):
+                self.app.log_message(f"按{unit_names[unit]}分割导出失败: {e}", "ERROR")
+            messagebox.showerror("错误", f"导出失败: {e}")
+        
+        self._run_cancellable(
+            "导出数据",
+            "正在从数据库流式导出选中的对话...\n可以随时取消。",
+            self._stream_split_export, ids, export_dir, writer,
+            on_success=on_success, on_cancelled=on_cancelled, on_error=on_error
+        )
+    
+    def _stream_split_export(self, token: CancelToken, report: Callable, ids: Dict,
+                             export_dir: Path, writer: Callable) -> int:
+        """
+        在一致性快照中流式读取选中的对话并写出文件（后台线程执行）
+        
+        Returns:
+            写出的文件数
+        """
+        # 使用独立连接：快照事务和服务端游标不受界面连接上预取、浏览等查询的影响
+        with self.connector.clone() as connector, \
+                connector.operation(token, LONG_OPERATION_STATEMENT_TIMEOUT_MS), \
+                connector.snapshot():
+            stream = ConversationStream(connector, ids, self.user_id)
+            return writer(stream, export_dir, token, report)
+    
+    def _write_agent_json_files(self, stream: ConversationStream, export_dir: Path,
+                                token: CancelToken, report: Callable) -> int:
+        """每个助手一个JSON文件 {"agent", "topics", "messages"}，主题和消息逐条写出"""
         file_count = 0
         used_names = set()
         
-        # 为每个助手收集其主题和消息（使用已从数据库读取的完整数据）
-        for agent in data["agents"]:
+        for agent, topics, messages in stream.agent_rows():
+            token.raise_if_cancelled()
+            report(f"正在导出助手... 已写出 {file_count} 个文件")
             agent_id = agent.get("id", "")
             agent_title = agent.get("title") or agent.get("slug") or agent_id[:8]
             
-            # 从已查询的数据中筛选该助手的主题
-            agent_topics = [t for t in data["topics"] 
-                          if self._is_topic_belong_to_agent(t, agent_id)]
-            
-            # 从已查询的数据中筛选该助手的消息
-            topic_ids = {t.get("id") for t in agent_topics}
-            agent_messages = [m for m in data["messages"] 
-                            if m.get("topic_id") in topic_ids]
-            
             filename = safe_filename(agent_title, agent_id)
             filename = ensure_unique_name(filename, used_names)
             
+            created_at = agent.get("created_at")
+            latest = LatestTime(agent.get("updated_at") or created_at)
             agent_data = {
                 "agent": agent,
-                "topics": agent_topics,
-                "messages": agent_messages
+                "topics": topics,
+                "messages": latest.track(messages)
             }
-            
-            # 获取时间范围（数据库字段是蛇形命名）
-            created_at = agent.get("created_at")
-            modified_at = agent.get("updated_at") or created_at
-            
-            # 从消息中获取最新的修改时间
-            if agent_messages:
-                for msg in agent_messages:
-                    msg_updated = msg.get("updated_at") or msg.get("created_at")
-                    if msg_updated:
-                        if not modified_at or msg_updated > modified_at:
-                            modified_at = msg_updated
-            
-            file_path = str(export_dir / f"{filename}.json")
-            write_json_with_timestamp(file_path, agent_data, created_at, modified_at)
+            self._write_export_file(
+                export_dir / f"{filename}.json",
+                lambda f: write_json_stream(f, agent_data, default=str),
+                created_at, latest
+            )
             file_count += 1
         
-        if self.app and hasattr(self.app, 'log_message'):
-            self.app.log_message(f"✅ 按助手分割导出: {file_count}个JSON文件（完整数据）", "SUCCESS")
-        messagebox.showinfo("导出成功", f"已导出{file_count}个JSON文件到:\n{export_dir}")
-    
-    def _is_topic_belong_to_agent(self, topic: Dict, agent_id: str) -> bool:
-        """检查主题是否属于指定助手"""
-        # 查询 session_id -> agent_id 映射
-        session_id = topic.get("session_id")
-        if not session_id:
-            return False
-        
-        # 查数据库获取映射关系
-        if not self.connector or not self.connector.is_connected():
-            return False
-        
-        query = "SELECT 1 FROM agents_to_sessions WHERE session_id = %s AND agent_id = %s"
-        result = self.connector.execute_query(query, (session_id, agent_id))
-        return len(result) > 0
+        return file_count
     
-    def _conv_split_by_agent_md(self):
-        """按助手分割导出Markdown - 从数据库现读完整数据"""
-        data = self._get_selected_conv_data()
-        if not data or not data["agents"]:
-            messagebox.showinfo("提示", "请先选择包含助手的数据")
-            return
-        
-        output_dir = filedialog.askdirectory(title="选择导出目录")
-        if not output_dir:
-            return
-        
-        export_dir = Path(output_dir) / f"db_agents_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        export_dir.mkdir(exist_ok=True)
-        
+    def _write_agent_md_files(self, stream: ConversationStream, export_dir: Path,
+                              token: CancelToken, report: Callable) -> int:
+        """每个助手一个Markdown文件，逐个主题渲染写出"""
         file_count = 0
         used_names = set()
         
-        for agent in data["agents"]:
+        for agent, groups in stream.agent_topic_groups():
+            token.raise_if_cancelled()
+            report(f"正在导出助手... 已写出 {file_count} 个文件")
             agent_id = agent.get("id", "")
             agent_title = agent.get("title") or agent.get("slug") or agent_id[:8]
             
-            # 从已查询的数据中筛选该助手的主题
-            agent_topics = [t for t in data["topics"] 
-                          if self._is_topic_belong_to_agent(t, agent_id)]
-            
-            # 构建主题ID到消息的映射
-            topic_ids = {t.get("id") for t in agent_topics}
-            messages_by_topic = {}
-            for msg in data["messages"]:
-                tid = msg.get("topic_id")
-                if tid in topic_ids:
-                    if tid not in messages_by_topic:
-                        messages_by_topic[tid] = []
-                    messages_by_topic[tid].append(msg)
-            
             filename = safe_filename(agent_title, agent_id)
             filename = ensure_unique_name(filename, used_names)
             
-            # 构建Markdown内容
-            md_lines = [f"# {agent_title}", ""]
-            
-            for topic in agent_topics:
-                topic_id = topic.get("id")
-                topic_title = topic.get("title") or "未命名主题"
-                md_lines.append(f"## {topic_title}")
-                md_lines.append("")
-                
-                for msg in messages_by_topic.get(topic_id, []):
-                    role = msg.get("role", "unknown")
-                    content = msg.get("content", "")
-                    role_icon = "👤 User" if role == "user" else "🤖 Assistant" if role == "assistant" else "⚙️ System"
-                    md_lines.append(f"### {role_icon}")
-                    md_lines.append("")
-                    md_lines.append(content)
-                    md_lines.append("")
-                
-                md_lines.append("---")
-                md_lines.append("")
-            
-            # 获取时间范围（数据库字段是蛇形命名）
-            agent_messages = [m for tid, msgs in messages_by_topic.items() for m in msgs if tid in topic_ids]
             created_at = agent.get("created_at")
-            modified_at = agent.get("updated_at") or created_at
+            latest = LatestTime(agent.get("updated_at") or created_at)
             
-            # 从消息中获取最新的修改时间
-            if agent_messages:
-                for msg in agent_messages:
-                    msg_updated = msg.get("updated_at") or msg.get("created_at")
-                    if msg_updated:
-                        if not modified_at or msg_updated > modified_at:
-                            modified_at = msg_updated
+            def lines():
+                yield f"# {agent_title}"
+                yield ""
+                for topic, messages in groups:
+                    token.raise_if_cancelled()
+                    yield f"## {topic.get('title') or '未命名主题'}"
+                    yield ""
+                    for msg in latest.track(messages):
+                        yield f"### {self._role_icon(msg.get('role', 'unknown'))}"
+                        yield ""
+                        yield msg.get("content") or ""
+                        yield ""
+                    yield "---"
+                    yield ""
             
-            file_path = str(export_dir / f"{filename}.md")
-            write_file_with_timestamp(file_path, "\n".join(md_lines), created_at, modified_at)
+            self._write_export_file(
+                export_dir / f"{filename}.md",
+                lambda f: write_lines(f, lines()),
+                created_at, latest
+            )
             file_count += 1
         
-        if self.app and hasattr(self.app, 'log_message'):
-            self.app.log_message(f"✅ 按助手分割导出: {file_count}个Markdown文件（完整数据）", "SUCCESS")
-        messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{export_dir}")
+        return file_count
     
-    def _conv_split_by_topic_json(self):
-        """按主题分割导出JSON - 使用已从数据库读取的完整数据"""
-        data = self._get_selected_conv_data()
-        if not data or not data["topics"]:
-            messagebox.showinfo("提示", "请先选择包含主题的数据")
-            return
-        
-        output_dir = filedialog.askdirectory(title="选择导出目录")
-        if not output_dir:
-            return
-        
-        export_dir = Path(output_dir) / f"db_topics_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        export_dir.mkdir(exist_ok=True)
-        
-        # 构建主题ID到消息的映射
-        messages_by_topic = {}
-        for msg in data["messages"]:
-            tid = msg.get("topic_id")
-            if tid:
-                if tid not in messages_by_topic:
-                    messages_by_topic[tid] = []
-                messages_by_topic[tid].append(msg)
-        
+    def _write_topic_json_files(self, stream: ConversationStream, export_dir: Path,
+                                token: CancelToken, report: Callable) -> int:
+        """每个主题一个JSON文件 {"topic", "messages"}"""
         file_count = 0
         used_names = set()
         
-        for topic in data["topics"]:
+        for _, topic, messages in stream.topic_groups():
+            token.raise_if_cancelled()
+            if file_count % 20 == 0:
+                report(f"正在导出主题... 已写出 {file_count} 个文件")
             topic_id = topic.get("id", "")
             topic_title = topic.get("title") or "未命名主题"
             
-            # 获取该主题的消息（从已查询的完整数据）
-            messages = messages_by_topic.get(topic_id, [])
-            
             filename = safe_filename(topic_title, topic_id)
             filename = ensure_unique_name(filename, used_names)
             
+            created_at = topic.get("created_at")
+            latest = LatestTime(topic.get("updated_at") or created_at)
             topic_data = {
                 "topic": topic,
-                "messages": messages
+                "messages": latest.track(iter(messages))
             }
-            
-            # 获取时间信息（数据库字段是蛇形命名）
-            created_at = topic.get("created_at")
-            modified_at = topic.get("updated_at") or created_at
-            
-            # 从消息中获取最新的修改时间
-            if messages:
-                for msg in messages:
-                    msg_updated = msg.get("updated_at") or msg.get("created_at")
-                    if msg_updated:
-                        if not modified_at or msg_updated > modified_at:
-                            modified_at = msg_updated
-            
-            file_path = str(export_dir / f"{filename}.json")
-            write_json_with_timestamp(file_path, topic_data, created_at, modified_at)
+            self._write_export_file(
+                export_dir / f"{filename}.json",
+                lambda f: write_json_stream(f, topic_data, default=str),
+                created_at, latest
+            )
             file_count += 1
         
-        if self.app and hasattr(self.app, 'log_message'):
-            self.app.log_message(f"✅ 按主题分割导出: {file_count}个JSON文件（完整数据）", "SUCCESS")
-        messagebox.showinfo("导出成功", f"已导出{file_count}个JSON文件到:\n{export_dir}")
+        return file_count
     
-    def _conv_split_by_topic_md(self):
-        """按主题分割导出Markdown - 使用已从数据库读取的完整数据"""
-        data = self._get_selected_conv_data()
-        if not data or not data["topics"]:
-            messagebox.showinfo("提示", "请先选择包含主题的数据")
-            return
-        
-        output_dir = filedialog.askdirectory(title="选择导出目录")
-        if not output_dir:
-            return
-        
-        export_dir = Path(output_dir) / f"db_topics_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        export_dir.mkdir(exist_ok=True)
-        
-        # 构建主题ID到消息的映射
-        messages_by_topic = {}
-        for msg in data["messages"]:
-            tid = msg.get("topic_id")
-            if tid:
-                if tid not in messages_by_topic:
-                    messages_by_topic[tid] = []
-                messages_by_topic[tid].append(msg)
-        
+    def _write_topic_md_files(self, stream: ConversationStream, export_dir: Path,
+                              token: CancelToken, report: Callable) -> int:
+        """每个主题一个Markdown文件"""
         file_count = 0
         used_names = set()
         
-        for topic in data["topics"]:
+        for _, topic, messages in stream.topic_groups():
+            token.raise_if_cancelled()
+            if file_count % 20 == 0:
+                report(f"正在导出主题... 已写出 {file_count} 个文件")
             topic_id = topic.get("id", "")
             topic_title = topic.get("title") or "未命名主题"
             
-            # 获取该主题的消息（从已查询的完整数据）
-            messages = messages_by_topic.get(topic_id, [])
-            
             filename = safe_filename(topic_title, topic_id)
             filename = ensure_unique_name(filename, used_names)
             
-            md_lines = [f"# {topic_title}", ""]
-            for msg in messages:
-                role = msg.get("role", "unknown")
-                content = msg.get("content", "")
-                role_icon = "👤 User" if role == "user" else "🤖 Assistant" if role == "assistant" else "⚙️ System"
-                md_lines.append(f"## {role_icon}")
-                md_lines.append("")
-                md_lines.append(content)
-                md_lines.append("")
-            
-            # 获取时间信息（数据库字段是蛇形命名）
             created_at = topic.get("created_at")
-            modified_at = topic.get("updated_at") or created_at
+            latest = LatestTime(topic.get("updated_at") or created_at)
             
-            # 从消息中获取最新的修改时间
-            if messages:
-                for msg in messages:
-                    msg_updated = msg.get("updated_at") or msg.get("created_at")
-                    if msg_updated:
-                        if not modified_at or msg_updated > modified_at:
-                            modified_at = msg_updated
+            def lines():
+                yield f"# {topic_title}"
+                yield ""
+                for msg in latest.track(messages):
+                    yield f"## {self._role_icon(msg.get('role', 'unknown'))}"
+                    yield ""
+                    yield msg.get("content") or ""
+                    yield ""
             
-            file_path = str(export_dir / f"{filename}.md")
-            write_file_with_timestamp(file_path, "\n".join(md_lines), created_at, modified_at)
+            self._write_export_file(
+                export_dir / f"{filename}.md",
+                lambda f: write_lines(f, lines()),
+                created_at, latest
+            )
             file_count += 1
         
-        if self.app and hasattr(self.app, 'log_message'):
-            self.app.log_message(f"✅ 按主题分割导出: {file_count}个Markdown文件（完整数据）", "SUCCESS")
-        messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{export_dir}")
+        return file_count
     
-    def _conv_split_by_message_json(self):
-        """按消息分割导出JSON"""
-        data = self._get_selected_conv_data()
-        if not data or not data["messages"]:
-            messagebox.showinfo("提示", "请先选择包含消息的数据（需要先展开主题节点加载消息）")
-            return
-        
-        output_dir = filedialog.askdirectory(title="选择导出目录")
-        if not output_dir:
-            return
-        
-        export_dir = Path(output_dir) / f"db_messages_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        export_dir.mkdir(exist_ok=True)
-        
+    def _write_message_json_files(self, stream: ConversationStream, export_dir: Path,
+                                  token: CancelToken, report: Callable) -> int:
+        """每条消息一个JSON文件"""
         file_count = 0
         used_names = set()
         
-        for idx, msg in enumerate(data["messages"], 1):
-            msg_id = msg.get("id", f"msg_{idx}")
+        for idx, msg in enumerate(stream.messages(), 1):
+            token.raise_if_cancelled()
+            if file_count % 100 == 0:
+                report(f"正在导出消息... 已写出 {file_count} 个文件")
+            msg_id = msg.get("id") or f"msg_{idx}"
             role = msg.get("role", "unknown")
-            content_preview = str(msg.get("content", ""))[:30].replace("\n", " ")
+            content_preview = str(msg.get("content") or "")[:30].replace("\n", " ")
             
             filename = safe_filename(f"{idx:03d}_{role}_{content_preview}", msg_id)
             filename = ensure_unique_name(filename, used_names)
             
-            # 获取消息时间
             created_at = msg.get("created_at")
-            modified_at = msg.get("updated_at") or created_at
-            
-            file_path = str(export_dir / f"{filename}.json")
-            write_json_with_timestamp(file_path, msg, created_at, modified_at)
+            self._write_export_file(
+                export_dir / f"{filename}.json",
+                lambda f: write_json_stream(f, msg, default=str),
+                created_at, LatestTime(msg.get("updated_at") or created_at)
+            )
             file_count += 1
         
-        if self.app and hasattr(self.app, 'log_message'):
-            self.app.log_message(f"✅ 按消息分割导出: {file_count}个JSON文件", "SUCCESS")
-        messagebox.showinfo("导出成功", f"已导出{file_count}个JSON文件到:\n{export_dir}")
+        return file_count
     
-    def _conv_split_by_message_md(self):
-        """按消息分割导出Markdown"""
-        data = self._get_selected_conv_data()
-        if not data or not data["messages"]:
-            messagebox.showinfo("提示", "请先选择包含消息的数据（需要先展开主题节点加载消息）")
-            return
-        
-        output_dir = filedialog.askdirectory(title="选择导出目录")
-        if not output_dir:
-            return
-        
-        export_dir = Path(output_dir) / f"db_messages_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        export_dir.mkdir(exist_ok=True)
-        
+    def _write_message_md_files(self, stream: ConversationStream, export_dir: Path,
+                                token: CancelToken, report: Callable) -> int:
+        """每条消息一个Markdown文件"""
         file_count = 0
         used_names = set()
         
-        for idx, msg in enumerate(data["messages"], 1):
-            msg_id = msg.get("id", f"msg_{idx}")
+        for idx, msg in enumerate(stream.messages(), 1):
+            token.raise_if_cancelled()
+            if file_count % 100 == 0:
+                report(f"正在导出消息... 已写出 {file_count} 个文件")
+            msg_id = msg.get("id") or f"msg_{idx}"
             role = msg.get("role", "unknown")
-            content = msg.get("content", "")
+            content = msg.get("content") or ""
             content_preview = content[:30].replace("\n", " ")
             
             filename = safe_filename(f"{idx:03d}_{role}_{content_preview}", msg_id)
             filename = ensure_unique_name(filename, used_names)
             
-            role_icon = "👤 User" if role == "user" else "🤖 Assistant" if role == "assistant" else "⚙️ System"
-            md_content = f"# {role_icon}\n\n{content}\n"
+            md_content = f"# {self._role_icon(role)}\n\n{content}\n"
             
-            # 获取消息时间
             created_at = msg.get("created_at")
-            modified_at = msg.get("updated_at") or created_at
-            
-            file_path = str(export_dir / f"{filename}.md")
-            write_file_with_timestamp(file_path, md_content, created_at, modified_at)
+            self._write_export_file(
+                export_dir / f"{filename}.md",
+                lambda f: f.write(md_content),
+                created_at, LatestTime(msg.get("updated_at") or created_at)
+            )
             file_count += 1
         
-        if self.app and hasattr(self.app, 'log_message'):
-            self.app.log_message(f"✅ 按消息分割导出: {file_count}个Markdown文件", "SUCCESS")
-        messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{export_dir}")
+        return file_count
+    
+    def _conv_split_by_agent_json(self):
+        """按助手分割导出JSON - 从数据库流式读取完整数据"""
+        self._conv_split_export("agent", "json")
+    
+    def _is_topic_belong_to_agent(self, topic: Dict, agent_id: str) -> bool:
+        """检查主题是否属于指定助手"""
+        # 查询 session_id -> agent_id 映射
+        session_id = topic.get("session_id")
+        if not session_id:
+            return False
+        
+        # 查数据库获取映射关系
+        if not self.connector or not self.connector.is_connected():
+            return False
+        
+        query = "SELECT 1 FROM agents_to_sessions WHERE session_id = %s AND agent_id = %s"
+        result = self.connector.execute_query(query, (session_id, agent_id))
+        return len(result) > 0
+    
+    def _conv_split_by_agent_md(self):
+        """按助手分割导出Markdown - 从数据库流式读取完整数据"""
+        self._conv_split_export("agent", "md")
+    
+    def _conv_split_by_topic_json(self):
+        """按主题分割导出JSON - 从数据库流式读取完整数据"""
+        self._conv_split_export("topic", "json")
+    
+    def _conv_split_by_topic_md(self):
+        """按主题分割导出Markdown - 从数据库流式读取完整数据"""
+        self._conv_split_export("topic", "md")
+    
+    def _conv_split_by_message_json(self):
+        """按消息分割导出JSON"""
+        self._conv_split_export("message", "json")
+    
+    def _conv_split_by_message_md(self):
+        """按消息分割导出Markdown"""
+        self._conv_split_export("message", "md")
     
     def _conv_copy_json(self):
         """复制JSON到剪贴板"""
-        data = self._get_selected_conv_data()
+        self._with_selected_conv_data(self._conv_copy_json_data)
+    
+    def _conv_copy_json_data(self, data: Optional[Dict]):
+        """复制JSON到剪贴板（读取完成后调用）"""
         if not data:
             messagebox.showinfo("提示", "请先选择数据")
             return
@@ -2340,7 +2838,10 @@ class DatabaseTabController:
     
     def _conv_copy_md(self):
         """复制Markdown到剪贴板"""
-        data = self._get_selected_conv_data()
+        self._with_selected_conv_data(self._conv_copy_md_data)
+    
+    def _conv_copy_md_data(self, data: Optional[Dict]):
+        """复制Markdown到剪贴板（读取完成后调用）"""
         if not data:
             messagebox.showinfo("提示", "请先选择数据")
             return
@@ -2439,7 +2940,10 @@ class DatabaseTabController:
     
     def _conv_copy_message_content(self):
         """复制消息内容到剪贴板（纯文本）"""
-        data = self._get_selected_conv_data()
+        self._with_selected_conv_data(self._conv_copy_message_content_data)
+    
+    def _conv_copy_message_content_data(self, data: Optional[Dict]):
+        """复制消息内容到剪贴板（纯文本）（读取完成后调用）"""
         if not data or not data["messages"]:
             messagebox.showinfo("提示", "请先选择包含消息的数据（需要先展开主题节点加载消息）")
             return
@@ -2478,6 +2982,8 @@ class DatabaseTabController:
         if not self.connector or not self.connector.is_connected():
             messagebox.showwarning("警告", "请先连接数据库")
             return
+        if self._cancellable_busy():
+            return
         
         selection = self.conv_tree.selection()
         if not selection:
@@ -2529,7 +3035,7 @@ class DatabaseTabController:
                     for topic in default_topics:
                         topic_id = topic.get("id")
                         messages = self._query_messages_for_topic_fresh(topic_id)
-                        self.cache["messages"][topic_id] = messages
+                        messages = self.cache["messages"].put(topic_id, messages)
                         topic["message_count"] = len(messages)
                         reloaded_messages += len(messages)
                 
@@ -2537,7 +3043,7 @@ class DatabaseTabController:
                 for agent_id in reload_agents:
                     # 重新查询该助手的主题
                     topics = self._query_topics_for_agent_fresh(agent_id)
-                    self.cache["topics"][agent_id] = topics
+                    topics = self.cache["topics"].put(agent_id, topics)
                     reloaded_agents += 1
                     reloaded_topics += len(topics)
                     
@@ -2551,14 +3057,14 @@ class DatabaseTabController:
                     for topic in topics:
                         topic_id = topic.get("id")
                         messages = self._query_messages_for_topic_fresh(topic_id)
-                        self.cache["messages"][topic_id] = messages
+                        messages = self.cache["messages"].put(topic_id, messages)
                         topic["message_count"] = len(messages)
                         reloaded_messages += len(messages)
                 
                 # 重载单独选中的主题（包含其消息）
                 for topic_id in reload_topics:
                     messages = self._query_messages_for_topic_fresh(topic_id)
-                    self.cache["messages"][topic_id] = messages
+                    messages = self.cache["messages"].put(topic_id, messages)
                     reloaded_messages += len(messages)
                     
                     # 更新主题的 message_count
@@ -2698,7 +3204,7 @@ class DatabaseTabController:
                     # 重载选中的主题及其消息
                     for topic_id in selected_ids:
                         messages = self._query_messages_for_topic_fresh(topic_id)
-                        self.cache["messages"][topic_id] = messages
+                        messages = self.cache["messages"].put(topic_id, messages)
                         
                         # 更新主题的 message_count
                         for agent_id, topics in self.cache["topics"].items():
@@ -2719,11 +3225,12 @@ class DatabaseTabController:
                         msg = self._query_message_by_id(msg_id)
                         if msg:
                             topic_id = msg.get("topic_id")
-                            if topic_id and topic_id in self.cache["messages"]:
-                                # 更新缓存中的消息
-                                for i, cached_msg in enumerate(self.cache["messages"][topic_id]):
+                            cached_messages = self.cache["messages"].get(topic_id) if topic_id else None
+                            if cached_messages is not None:
+                                # 更新缓存中的消息（缓存行是共享字典，原地更新）
+                                for cached_msg in cached_messages:
                                     if cached_msg.get("id") == msg_id:
-                                        self.cache["messages"][topic_id][i] = msg
+                                        cached_msg.update(msg)
                                         break
                             reloaded_count += 1
                 
@@ -2731,7 +3238,7 @@ class DatabaseTabController:
                     # 重载选中的助手及其所有主题和消息
                     for agent_id in selected_ids:
                         topics = self._query_topics_for_agent_fresh(agent_id)
-                        self.cache["topics"][agent_id] = topics
+                        topics = self.cache["topics"].put(agent_id, topics)
                         
                         # 更新助手的 topic_count
                         for agent in self.cache["agents"]:
@@ -2743,7 +3250,7 @@ class DatabaseTabController:
                         for topic in topics:
                             topic_id = topic.get("id")
                             messages = self._query_messages_for_topic_fresh(topic_id)
-                            self.cache["messages"][topic_id] = messages
+                            messages = self.cache["messages"].put(topic_id, messages)
                             topic["message_count"] = len(messages)
                         
                         reloaded_count += 1
@@ -2784,7 +3291,10 @@ class DatabaseTabController:
     
     def _conv_show_stats(self):
         """显示选中统计"""
-        data = self._get_selected_conv_data()
+        self._with_selected_conv_data(self._conv_show_stats_data)
+    
+    def _conv_show_stats_data(self, data: Optional[Dict]):
+        """显示选中统计（读取完成后调用）"""
         if not data:
             messagebox.showinfo("统计信息", "没有选中任何数据")
             return
@@ -2825,28 +3335,29 @@ class DatabaseTabController:
         type_name = "主题" if table_type == "topics" else "消息"
         status_label = getattr(self, f"{table_type}_status_label", None)
         
-        # 获取当前 offset
-        current_offset = self._batch_offset.get(table_type, 0)
+        # 从上一批最后一行之后继续加载
+        loaded = len(self._batch_data[table_type])
+        after = self._batch_after.get(table_type)
         
         if status_label:
-            status_label.config(text=f"正在加载第{current_offset + 1}-{current_offset + count}条{type_name}...")
+            status_label.config(text=f"正在加载第{loaded + 1}-{loaded + count}条{type_name}...")
         
         def load_thread():
             try:
                 if table_type == "topics":
-                    data = self._query_topics_batch(current_offset, count)
+                    data = self._query_topics_batch(count, after)
                 else:  # messages
-                    data = self._query_messages_batch(current_offset, count)
+                    data = self._query_messages_batch(count, after)
                 
                 # 在主线程中更新UI
-                self.parent.after(0, lambda: self._on_batch_data_loaded(table_type, data, current_offset))
+                self.parent.after(0, lambda: self._on_batch_data_loaded(table_type, data))
                 
             except Exception as e:
                 self.parent.after(0, lambda: self._show_error(f"加载失败: {e}"))
         
         threading.Thread(target=load_thread, daemon=True).start()
     
-    def _on_batch_data_loaded(self, table_type: str, new_data: List[Dict], offset: int):
+    def _on_batch_data_loaded(self, table_type: str, new_data: List[Dict]):
         """分批数据加载完成回调（追加模式）"""
         type_name = "主题" if table_type == "topics" else "消息"
         
@@ -2854,11 +3365,14 @@ class DatabaseTabController:
             messagebox.showinfo("提示", f"没有更多{type_name}数据了")
             return
         
-        # 追加到累积数据
-        self._batch_data[table_type].extend(new_data)
+        # 记录分页位置：下一批从本批最后一行之后开始
+        self._batch_after[table_type] = self._page_key(new_data)
         
-        # 更新 offset
-        self._batch_offset[table_type] = offset + len(new_data)
+        # 追加到累积数据（登记到实体缓存，与对话树共享同一份行数据）
+        kind = "topic" if table_type == "topics" else "message"
+        self._batch_data[table_type] = self.entity_cache.pin(
+            f"batch_{table_type}", kind, self._batch_data[table_type] + new_data, self.PREVIEW_FIELDS[kind]
+        )
         
         # 更新表格 - 使用累积的全部数据
         self._update_table_data(table_type, self._batch_data[table_type])
@@ -2945,31 +3459,61 @@ class DatabaseTabController:
                     self.parent.after(0, lambda: messagebox.showerror("错误", "无法创建进度对话框"))
                     return
                 
-                # 分批加载
-                batch_size = 100
-                loaded_count = 0
-                
-                all_data = []
-                
-                for offset in range(0, total, batch_size):
-                    # 检查是否取消
-                    if progress.is_cancelled:
-                        break
+                # 分批加载（取消时中止服务器上正在执行的查询）
+                with self.connector.operation(progress.cancel_token, LONG_OPERATION_STATEMENT_TIMEOUT_MS):
+                    # 批大小按实际耗时自适应调整，使每批耗时接近目标值
+                    batcher = AdaptiveBatcher(
+                        target_seconds=LOAD_ALL_TARGET_BATCH_SECONDS,
+                        initial_size=LOAD_ALL_INITIAL_BATCH,
+                        min_size=LOAD_ALL_MIN_BATCH,
+                        max_size=LOAD_ALL_MAX_BATCH,
+                        max_batch_bytes=LOAD_ALL_BATCH_MEMORY_MB * 1024 * 1024
+                    )
+                    loaded_count = 0
+                    after = None
                     
-                    # 暂停控制
-                    progress.wait_if_paused()
+                    all_data = []
                     
-                    # 查询这一批数据
-                    if table_type == "topics":
-                        data = self._query_topics_batch(offset, batch_size)
-                    else:  # messages
-                        data = self._query_messages_batch(offset, batch_size)
-                    
-                    all_data.extend(data)
-                    loaded_count += len(data)
+                    while True:
+                        # 检查是否取消
+                        if progress.is_cancelled:
+                            break
+                        
+                        # 暂停控制
+                        progress.wait_if_paused()
+                        
+                        # 查询这一批数据
+                        batch_size = batcher.next_size()
+                        batch_start = time.perf_counter()
+                        if table_type == "topics":
+                            data = self._query_topics_batch(batch_size, after)
+                        else:  # messages
+                            data = self._query_messages_batch(batch_size, after)
+                        batcher.record(len(data), time.perf_counter() - batch_start, estimate_rows_bytes(data))
+                        
+                        if not data:
+                            break
+                        
+                        all_data.extend(data)
+                        loaded_count += len(data)
+                        after = self._page_key(data)
+                        
+                        # 更新进度
+                        progress.update_progress(loaded_count, f"已加载: {loaded_count} / {total}")
+                        rate = batcher.rows_per_second
+                        eta = batcher.eta_seconds(total - loaded_count)
+                        detail = f"批大小: {batcher.next_size()}"
+                        self.parent.after(0, lambda r=rate, e=eta, d=detail: progress.update_rate(r, e, d))
+                        
+                        if len(data) < batch_size:
+                            break
                     
-                    # 更新进度
-                    progress.update_progress(loaded_count, f"已加载: {loaded_count} / {total}")
+                    if self.app and hasattr(self.app, 'log_message'):
+                        self.app.log_message(
+                            f"全部加载{type_name}: {loaded_count}条, {batcher.batches}批, "
+                            f"耗时{batcher.elapsed:.1f}秒, 平均{loaded_count / max(batcher.elapsed, 0.001):,.0f}行/秒",
+                            "DEBUG"
+                        )
                 
                 # 关闭进度对话框
                 self.parent.after(0, lambda: progress.close())
@@ -2980,6 +3524,7 @@ class DatabaseTabController:
                     if table_type == "topics":
                         # 写入缓存 - 使用特殊key表示全部加载的数据
                         self.cache["_all_topics_loaded"] = True
+                        all_data = self.entity_cache.pin("all_topics", "topic", all_data, self.PREVIEW_FIELDS["topic"])
                         self.cache["_all_topics_data"] = all_data
                         
                         # 同步到对话树缓存 - 按session_id分类主题
@@ -2988,6 +3533,8 @@ class DatabaseTabController:
                     else:  # messages
                         # 写入缓存 - 使用特殊key表示全部加载的数据
                         self.cache["_all_messages_loaded"] = True
+                        all_data = self.entity_cache.pin("all_messages", "message", all_data,
+                                                         self.PREVIEW_FIELDS["message"])
                         self.cache["_all_messages_data"] = all_data
                         
                         # 同步到对话树缓存 - 按topic_id分类消息
@@ -3003,6 +3550,10 @@ class DatabaseTabController:
                     
                     self.parent.after(0, update_ui)
                 
+            except OperationCancelled:
+                self.parent.after(0, lambda: progress.close())
+                if self.app and hasattr(self.app, 'log_message'):
+                    self.app.log_message(f"已取消加载全部{type_name}", "WARNING")
             except Exception as e:
                 if 'progress' in locals() and progress:
                     self.parent.after(0, lambda: progress.close())
@@ -3022,31 +3573,55 @@ class DatabaseTabController:
         )
         setattr(self, f"_{table_type}_progress_dialog", progress)
     
-    def _query_topics_batch(self, offset: int, limit: int) -> List[Dict]:
-        """分批查询主题"""
-        query = """SELECT id, title, session_id, favorite, 
-                   LEFT(history_summary, 100) as history_summary, metadata::text,
-                   user_id, created_at, updated_at FROM topics"""
+    @staticmethod
+    def _page_key(rows: List[Dict]) -> Optional[tuple]:
+        """分页位置：最后一行的 (created_at, id)"""
+        if not rows:
+            return None
+        last = rows[-1]
+        return last["created_at"], last["id"]
+    
+    def _keyset_page(self, query: str, limit: int, after: Optional[tuple]) -> List[Dict]:
+        """
+        按 (created_at, id) 倒序分页查询
+        
+        用上一页最后一行作为起点（keyset 分页），每页的开销不随已加载的行数增长；
+        id 参与排序，created_at 相同的行也不会在两页之间重复或遗漏。
+        
+        Args:
+            query: 不含 WHERE / ORDER BY 的查询语句
+            limit: 本页行数
+            after: 上一页的 _page_key()，None 表示第一页
+        """
+        conditions = []
         params = []
         if self.user_id:
-            query += " WHERE user_id = %s"
+            conditions.append("user_id = %s")
             params.append(self.user_id)
-        query += f" ORDER BY created_at DESC LIMIT {limit} OFFSET {offset}"
+        if after:
+            # 冗余的 created_at 条件让只有 created_at 索引时也能做范围扫描
+            conditions.append("created_at <= %s AND (created_at, id) < (%s, %s)")
+            params.extend((after[0],) + tuple(after))
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created_at DESC, id DESC LIMIT %s"
+        params.append(limit)
         
         return self.connector.execute_query(query, tuple(params))
     
-    def _query_messages_batch(self, offset: int, limit: int) -> List[Dict]:
-        """分批查询消息"""
+    def _query_topics_batch(self, limit: int, after: Optional[tuple] = None) -> List[Dict]:
+        """分批查询主题（after 为上一批的 _page_key()）"""
+        query = """SELECT id, title, session_id, favorite, 
+                   LEFT(history_summary, 100) as history_summary, metadata::text,
+                   user_id, created_at, updated_at FROM topics"""
+        return self._keyset_page(query, limit, after)
+    
+    def _query_messages_batch(self, limit: int, after: Optional[tuple] = None) -> List[Dict]:
+        """分批查询消息（after 为上一批的 _page_key()）"""
         query = """SELECT id, role, LEFT(content, 200) as content, model, provider,
                    session_id, topic_id, parent_id, tools::text, metadata::text,
                    reasoning::text, user_id, created_at, updated_at FROM messages"""
-        params = []
-        if self.user_id:
-            query += " WHERE user_id = %s"
-            params.append(self.user_id)
-        query += f" ORDER BY created_at DESC LIMIT {limit} OFFSET {offset}"
-        
-        return self.connector.execute_query(query, tuple(params))
+        return self._keyset_page(query, limit, after)
     
     # ==================== 缓存同步方法 ====================
     
@@ -3089,7 +3664,7 @@ class DatabaseTabController:
                 default_topics.append(topic)
         
         # 更新缓存
-        self.cache["topics"] = agent_topics
+        self.cache["topics"].replace(agent_topics, self.PREVIEW_FIELDS["topic"])
         self.cache["default_topics"] = default_topics
         
         # 更新助手的 topic_count
@@ -3118,7 +3693,7 @@ class DatabaseTabController:
                 topic_messages[topic_id].append(msg)
         
         # 更新缓存
-        self.cache["messages"] = topic_messages
+        self.cache["messages"].replace(topic_messages, self.PREVIEW_FIELDS["message"])
         
         # 更新主题的 message_count
         # 更新 agent_topics 中的主题
@@ -3177,7 +3752,16 @@ class DatabaseTabController:
         topic_display = str(topic_count) if topic_loaded else "?"
         message_display = str(message_count) if message_loaded else "?"
         
-        self.conv_status_label.config(text=f"✅ {topic_display}个主题, {message_display}条消息")
+        # 实体缓存占用与命中率
+        stats = self.entity_cache.get_stats()
+        cache_display = (
+            f"缓存 {stats['groupBytes'] / 1024 / 1024:.1f}MB/{DB_CACHE_BUDGET_MB}MB "
+            f"命中率 {stats['hitRate'] * 100:.0f}% 淘汰 {stats['evictions']}"
+        )
+        
+        self.conv_status_label.config(
+            text=f"✅ {topic_display}个主题, {message_display}条消息 | {cache_display}"
+        )
     
     def _format_datetime(self, dt) -> str:
         """格式化日期时间"""
@@ -3221,17 +3805,9 @@ class DatabaseTabController:
         self.disconnect()
         
         # 清空缓存
-        self.cache = {
-            "agents": [],
-            "agents_full": [],
-            "topics": {},
-            "default_topics": [],
-            "messages": {},
-            "models": [],
-            "providers": [],
-        }
+        self.cache = self._new_cache()
         self._batch_data = {"topics": [], "messages": []}
-        self._batch_offset = {"topics": 0, "messages": 0}
+        self._batch_after = {"topics": None, "messages": None}
         
         # 清空所有表格
         for item in self.conv_tree.get_children():
@@ -3276,17 +3852,10 @@ class DatabaseTabController:
             return
         
         # 清空缓存
-        self.cache = {
-            "agents": [],
-            "agents_full": [],
-            "topics": {},
-            "default_topics": None,  # None 表示未加载
-            "messages": {},
-            "models": [],
-            "providers": [],
-        }
+        self.cache = self._new_cache()
+        self.cache["default_topics"] = None  # None 表示未加载
         self._batch_data = {"topics": [], "messages": []}
-        self._batch_offset = {"topics": 0, "messages": 0}
+        self._batch_after = {"topics": None, "messages": None}
         
         # 显示状态
         self.conv_status_label.config(text="正在重载全部数据...")
@@ -3337,6 +3906,10 @@ class DatabaseTabController:
     
     def disconnect(self):
         """断开数据库连接"""
+        self.prefetcher.cancel()
+        if self._cancellable_token is not None:
+            # 执行中的读取/导出随之取消，不在关闭的连接上继续查询
+            self._cancellable_token.cancel()
         if self.connector:
             try:
                 self.connector.disconnect()
@@ -3381,26 +3954,20 @@ class DatabaseTabController:
         if not file_path:
             return
         
-        try:
-            import csv
-            
-            columns_config = self.COLUMNS_CONFIG.get(table_type, [])
-            headers = [col[1] for col in columns_config]
-            
-            with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
-                writer = csv.writer(f)
-                writer.writerow(headers)
-                
-                for item in tree.get_children():
-                    values = tree.item(item, "values")
-                    writer.writerow(values)
-            
-            if self.app and hasattr(self.app, 'log_message'):
-                self.app.log_message(f"✅ 已导出CSV: {file_path}", "SUCCESS")
-            messagebox.showinfo("导出成功", f"已导出CSV文件到:\n{file_path}")
-            
-        except Exception as e:
-            self._show_error(f"导出CSV失败: {e}")
+        if table_type not in self.EXPORT_FETCHERS:
+            # 搜索结果等没有对应数据表的视图，导出表格中显示的值
+            try:
+                columns = [(col, tree.heading(col)["text"]) for col in tree["columns"]]
+                rows = (tree.item(item, "values") for item in tree.get_children())
+                export_csv(file_path, columns, rows)
+                if self.app and hasattr(self.app, 'log_message'):
+                    self.app.log_message(f"✅ 已导出CSV: {file_path}", "SUCCESS")
+                messagebox.showinfo("导出成功", f"已导出CSV文件到:\n{file_path}")
+            except Exception as e:
+                self._show_error(f"导出CSV失败: {e}")
+            return
+        
+        self._export_tables_in_background(file_path, [table_type], "csv")
     
     def _export_current_table_excel(self):
         """导出当前选中标签页的表格为Excel"""
@@ -3441,30 +4008,20 @@ class DatabaseTabController:
         if not file_path:
             return
         
-        try:
-            from openpyxl import Workbook
-            
-            wb = Workbook()
-            ws = wb.active
-            ws.title = table_type.capitalize()
-            
-            columns_config = self.COLUMNS_CONFIG.get(table_type, [])
-            headers = [col[1] for col in columns_config]
-            
-            ws.append(headers)
-            
-            for item in tree.get_children():
-                values = tree.item(item, "values")
-                ws.append(list(values))
-            
-            wb.save(file_path)
-            
-            if self.app and hasattr(self.app, 'log_message'):
-                self.app.log_message(f"✅ 已导出Excel: {file_path}", "SUCCESS")
-            messagebox.showinfo("导出成功", f"已导出Excel文件到:\n{file_path}")
-            
-        except Exception as e:
-            self._show_error(f"导出Excel失败: {e}")
+        if table_type not in self.EXPORT_FETCHERS:
+            # 搜索结果等没有对应数据表的视图，导出表格中显示的值
+            try:
+                columns = [(col, tree.heading(col)["text"]) for col in tree["columns"]]
+                rows = (tree.item(item, "values") for item in tree.get_children())
+                export_tables_to_excel(file_path, [(table_type.capitalize(), columns, rows)])
+                if self.app and hasattr(self.app, 'log_message'):
+                    self.app.log_message(f"✅ 已导出Excel: {file_path}", "SUCCESS")
+                messagebox.showinfo("导出成功", f"已导出Excel文件到:\n{file_path}")
+            except Exception as e:
+                self._show_error(f"导出Excel失败: {e}")
+            return
+        
+        self._export_tables_in_background(file_path, [table_type], "excel")
     
     def _export_all_tables(self):
         """导出所有表格到一个Excel文件"""
@@ -3487,49 +4044,89 @@ class DatabaseTabController:
         if not file_path:
             return
         
-        try:
-            from openpyxl import Workbook
-            
-            wb = Workbook()
-            wb.remove(wb.active)
-            
-            table_types = ["models", "providers", "agents", "topics", "messages"]
-            exported_count = 0
-            
-            for table_type in table_types:
-                tree = getattr(self, f"{table_type}_tree", None)
-                if not tree:
-                    continue
-                
-                ws = wb.create_sheet(title=table_type.capitalize())
-                
-                columns_config = self.COLUMNS_CONFIG.get(table_type, [])
-                headers = [col[1] for col in columns_config]
-                
-                ws.append(headers)
-                
-                row_count = 0
-                for item in tree.get_children():
-                    values = tree.item(item, "values")
-                    ws.append(list(values))
-                    row_count += 1
-                
-                if row_count > 0:
-                    exported_count += 1
-            
-            if exported_count == 0:
-                messagebox.showinfo("提示", "没有可导出的数据")
-                return
-            
-            wb.save(file_path)
-            
-            if self.app and hasattr(self.app, 'log_message'):
-                self.app.log_message(f"✅ 已导出全部表格({exported_count}个): {file_path}", "SUCCESS")
-            messagebox.showinfo("导出成功", f"已导出{exported_count}个表格到:\n{file_path}")
-            
-        except Exception as e:
-            self._show_error(f"导出全部表格失败: {e}")
-            self._show_error(f"导出全部表格失败: {e}")
+        self._export_tables_in_background(file_path, ["models", "providers", "agents", "topics", "messages"], "excel")
+    
+    def _export_columns(self, table_type: str, export_format: str) -> List[tuple]:
+        """
+        导出的列配置：CSV 按 CSV_EXPORT_COLUMNS 配置的列（可以是表格中没有显示的数据库列），否则为表格的列
+        """
+        columns_config = self.COLUMNS_CONFIG.get(table_type, [])
+        column_ids = configured_columns(table_type) if export_format == "csv" else None
+        if not column_ids:
+            return columns_config
+        headers = {col[0]: col[1] for col in columns_config}
+        return [(col_id, headers.get(col_id, col_id)) for col_id in column_ids]
+    
+    def _iter_db_table_rows(self, connector: PostgreSQLConnector, user_id: Optional[str],
+                            table_type: str, columns: List[tuple]):
+        """
+        用服务端游标从数据库逐批读取表格的完整行（值与列配置对应，保留原始类型，缺少的列为空）
+        
+        需要在 connector.snapshot() 中使用；每批读完后更新导出任务的状态并检查取消。
+        """
+        column_ids = [col[0] for col in columns]
+        fetch_method = getattr(connector, self.EXPORT_FETCHERS[table_type])
+        count = 0
+        for description, rows in fetch_method(user_id, stream=True):
+            names = [col[0] for col in description]
+            positions = [names.index(col) if col in names else None for col in column_ids]
+            for row in rows:
+                yield tuple(row[i] if i is not None else None for i in positions)
+            count += len(rows)
+            export_progress.set_status(f"正在导出 {table_type}... 已读取 {count} 行")
+            export_progress.check_cancelled()
+    
+    def _export_tables_in_background(self, file_path: str, table_types: List[str], export_format: str):
+        """
+        作为后台导出任务直接从数据库流式导出表格（不经过表格控件，不受显示截断影响）
+        
+        在独立连接的一致性快照中读取，不占用界面连接；进度、取消和错误由导出任务窗口处理。
+        
+        Args:
+            file_path: 输出文件路径
+            table_types: 表格类型列表（CSV 只导出第一个）
+            export_format: "csv" 或 "excel"（只写模式，超出行数上限时自动拆分工作表）
+        """
+        if not self.connector or not self.connector.is_connected():
+            messagebox.showwarning("警告", "请先连接数据库")
+            return
+        
+        format_name = "CSV" if export_format == "csv" else "Excel"
+        export_jobs = self.app.export_jobs
+        
+        # 提交时读取连接、用户和列配置，后台任务不访问界面状态
+        connector = self.connector
+        user_id = self.user_id
+        tables = [(table_type, self._export_columns(table_type, export_format)) for table_type in table_types]
+        
+        def run():
+            progress = export_progress.active_progress()
+            token = progress.cancel_token if progress else None
+            with connector.clone() as export_connector, \
+                    export_connector.operation(token, LONG_OPERATION_STATEMENT_TIMEOUT_MS), \
+                    export_connector.snapshot():
+                if export_format == "csv":
+                    # export_csv 自行记录写出的文件
+                    table_type, columns = tables[0]
+                    rows = self._iter_db_table_rows(export_connector, user_id, table_type, columns)
+                    return {table_type.capitalize(): export_csv(file_path, columns, rows,
+                                                                log_callback=export_jobs.log)}
+                counts = export_tables_to_excel(
+                    file_path,
+                    ((table_type.capitalize(), columns,
+                      self._iter_db_table_rows(export_connector, user_id, table_type, columns))
+                     for table_type, columns in tables),
+                    log_callback=export_jobs.log
+                )
+            export_progress.record_file(os.path.getsize(file_path))
+            return counts
+        
+        def on_success(counts: Dict[str, int]):
+            total = sum(counts.values())
+            self.app.log_message(f"✅ 已导出{format_name}({len(counts)}个表格, {total}行): {file_path}", "SUCCESS")
+            messagebox.showinfo("导出成功", f"已导出{len(counts)}个表格（{total}行）到:\n{file_path}")
+        
+        export_jobs.submit(f"导出{format_name}: {', '.join(table_types)}", run, on_success)
     
     def _auto_fit_columns(self):
         """自动适配当前表格的列宽"""
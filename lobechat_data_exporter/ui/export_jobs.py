@@ -0,0 +1,353 @@
+"""
+后台导出任务
+导出按提交顺序排队，在一个后台线程中依次执行；共用一个非模态进度窗口，
+显示当前任务、已写出的文件数和字节数、文件/秒和字节/秒，可取消当前任务或全部任务。
+界面线程只负责定时刷新进度和处理完成的任务，导出期间界面保持响应
+"""
+
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox
+import ttkbootstrap as ttk_boot
+from ttkbootstrap.constants import *
+from typing import Any, Callable, List, Optional
+
+from ..config import EXPORT_JOB_POLL_MS, EXPORT_JOB_RATE_WINDOW_SECONDS
+from ..core import export_progress
+from ..core.cancellation import OperationCancelled
+from ..core.export_progress import ExportProgress, format_bytes, format_duration
+
+
+class ExportJob:
+    """一个导出任务"""
+
+    def __init__(self, title: str, func: Callable[[], Any],
+                 on_success: Optional[Callable[[Any], None]] = None):
+        """
+        初始化导出任务
+
+        Args:
+            title: 任务名称
+            func: 导出函数（在后台线程中执行，不能访问界面控件），返回值传给 on_success
+            on_success: 成功后在界面线程中调用 on_success(返回值)
+        """
+        self.title = title
+        self.func = func
+        self.on_success = on_success
+        self.progress = ExportProgress(rate_window=EXPORT_JOB_RATE_WINDOW_SECONDS)
+        self.state = "queued"  # queued / running / done / failed / cancelled
+        self.result = None
+        self.error: Optional[Exception] = None
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self.progress.cancel_token.is_cancelled
+
+    def cancel(self):
+        """取消任务（执行中的任务在下一次写出时停止）"""
+        self.progress.cancel_token.cancel()
+
+
+class ExportJobRunner:
+    """
+    导出任务执行器
+
+    submit() 把任务加入队列；后台线程依次执行，执行期间登记任务进度（core.export_progress），
+    写文件的公共函数据此统计进度并响应取消。完成的任务由界面线程定时取出处理：
+    成功时调用 on_success，失败时记录日志并弹出错误，取消时记录日志。
+    """
+
+    def __init__(self, master, log_callback: Optional[Callable] = None):
+        """
+        初始化执行器
+
+        Args:
+            master: 主窗口
+            log_callback: 日志回调函数（只在界面线程中调用）
+        """
+        self.master = master
+        self.log_callback = log_callback
+        self.dialog: Optional[ExportJobDialog] = None
+        self.current: Optional[ExportJob] = None
+        self.pending: List[ExportJob] = []  # 排队中的任务（显示用，与队列同步）
+
+        self._queue: "queue.Queue[ExportJob]" = queue.Queue()
+        self._finished: "queue.Queue[ExportJob]" = queue.Queue()
+        self._logs: "queue.Queue[tuple]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._polling = False
+        self._handling = False
+
+    def log(self, message: str, level: str = "INFO"):
+        """记录日志（可在后台线程中调用，由界面线程转发）"""
+        if threading.current_thread() is threading.main_thread():
+            if self.log_callback:
+                self.log_callback(message, level)
+        else:
+            self._logs.put((message, level))
+
+    @property
+    def busy(self) -> bool:
+        """是否有执行中或排队中的任务"""
+        with self._lock:
+            return self.current is not None or bool(self.pending)
+
+    def submit(self, title: str, func: Callable[[], Any],
+               on_success: Optional[Callable[[Any], None]] = None) -> ExportJob:
+        """
+        提交导出任务（界面线程调用）
+
+        Args:
+            title: 任务名称
+            func: 导出函数，在后台线程中执行；需要的界面选项应在提交前读取
+            on_success: 成功后在界面线程中调用 on_success(返回值)
+
+        Returns:
+            导出任务
+        """
+        job = ExportJob(title, func, on_success)
+        with self._lock:
+            queued_behind = self.current is not None or bool(self.pending)
+            self.pending.append(job)
+        self._queue.put(job)
+
+        if queued_behind:
+            self.log(f"已加入导出队列: {title}", "INFO")
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="export-jobs", daemon=True)
+            self._worker.start()
+
+        self._show_dialog()
+        if not self._polling:
+            self._polling = True
+            self.master.after(EXPORT_JOB_POLL_MS, self._poll)
+        return job
+
+    def cancel_current(self):
+        """取消当前任务"""
+        job = self.current
+        if job is not None:
+            job.cancel()
+
+    def cancel_all(self):
+        """取消当前任务和所有排队中的任务"""
+        with self._lock:
+            jobs = list(self.pending)
+            if self.current is not None:
+                jobs.append(self.current)
+        for job in jobs:
+            job.cancel()
+
+    def _run(self):
+        """后台线程：依次执行队列中的任务"""
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                if job in self.pending:
+                    self.pending.remove(job)
+                self.current = job
+
+            if job.is_cancelled:
+                job.state = "cancelled"
+            else:
+                job.state = "running"
+                export_progress.activate(job.progress)
+                try:
+                    job.result = job.func()
+                    job.state = "cancelled" if job.is_cancelled else "done"
+                except OperationCancelled:
+                    job.state = "cancelled"
+                except Exception as e:
+                    job.error = e
+                    job.state = "cancelled" if job.is_cancelled else "failed"
+                finally:
+                    export_progress.activate(None)
+
+            # 先放入完成队列再清除当前任务，界面线程不会在两者之间误判为空闲
+            self._finished.put(job)
+            with self._lock:
+                self.current = None
+
+    def _poll(self):
+        """界面线程定时：转发日志、刷新进度窗口、处理完成的任务"""
+        while not self._logs.empty():
+            message, level = self._logs.get_nowait()
+            if self.log_callback:
+                self.log_callback(message, level)
+
+        if self.dialog is not None:
+            self.dialog.refresh(self.current, list(self.pending))
+
+        if not self.busy and self._finished.empty():
+            self._polling = False
+            if self.dialog is not None:
+                self.dialog.hide()
+            return
+
+        # 先安排下一次刷新：完成回调中弹出的消息框（嵌套事件循环）打开期间进度窗口继续刷新
+        self.master.after(EXPORT_JOB_POLL_MS, self._poll)
+        if self._handling:
+            return
+        self._handling = True
+        try:
+            while not self._finished.empty():
+                self._on_finished(self._finished.get_nowait())
+        finally:
+            self._handling = False
+
+    def _on_finished(self, job: ExportJob):
+        """处理完成的任务（界面线程）"""
+        progress = job.progress
+        summary = f"{progress.files}个文件, {format_bytes(progress.bytes)}, 用时 {format_duration(progress.elapsed)}"
+        if job.state == "done":
+            self.log(f"导出任务完成: {job.title}（{summary}）", "INFO")
+            if job.on_success:
+                job.on_success(job.result)
+        elif job.state == "cancelled":
+            self.log(f"已取消导出任务: {job.title}（已写出 {summary}）", "WARNING")
+        else:
+            self.log(f"导出失败: {job.error}", "ERROR")
+            messagebox.showerror("导出失败", f"{job.title}\n\n{job.error}")
+
+    def _show_dialog(self):
+        """显示进度窗口（已关闭时重新创建）"""
+        if self.dialog is None or not self.dialog.exists():
+            self.dialog = ExportJobDialog(self.master, self)
+        self.dialog.show()
+
+
+class ExportJobDialog:
+    """导出任务进度窗口（非模态，关闭时只是隐藏，任务继续执行）"""
+
+    def __init__(self, parent, runner: ExportJobRunner):
+        """
+        初始化进度窗口
+
+        Args:
+            parent: 父窗口
+            runner: 导出任务执行器
+        """
+        self.runner = runner
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("📤 导出任务")
+        self.dialog.geometry("520x320")
+        self.dialog.transient(parent)
+
+        self._create_ui()
+
+        # 居中显示
+        self.dialog.update_idletasks()
+        x = (self.dialog.winfo_screenwidth() - 520) // 2
+        y = (self.dialog.winfo_screenheight() - 320) // 2
+        self.dialog.geometry(f"520x320+{x}+{y}")
+
+        self.dialog.protocol("WM_DELETE_WINDOW", self.hide)
+
+    def _create_ui(self):
+        """创建UI"""
+        main_frame = ttk.Frame(self.dialog, padding=15)
+        main_frame.pack(fill=BOTH, expand=YES)
+
+        self.title_label = ttk.Label(main_frame, text="", font=("Arial", 10, "bold"), wraplength=480)
+        self.title_label.pack(anchor=W, pady=(0, 5))
+
+        self.status_label = ttk.Label(main_frame, text="", font=("Arial", 9), wraplength=480)
+        self.status_label.pack(anchor=W, pady=(0, 5))
+
+        self.progress_bar = ttk.Progressbar(main_frame, length=480, mode='indeterminate', bootstyle="success")
+        self.progress_bar.pack(fill=X, pady=(0, 5))
+
+        # 已写出 / 速度
+        self.total_label = ttk.Label(main_frame, text="", font=("Arial", 9))
+        self.total_label.pack(anchor=W)
+        self.rate_label = ttk.Label(main_frame, text="", font=("Arial", 9), foreground="gray")
+        self.rate_label.pack(anchor=W, pady=(0, 5))
+
+        # 排队中的任务
+        self.queue_label = ttk.Label(main_frame, text="", font=("Arial", 9))
+        self.queue_label.pack(anchor=W)
+        self.queue_list = tk.Listbox(main_frame, height=4)
+        self.queue_list.pack(fill=BOTH, expand=YES, pady=(0, 10))
+
+        btn_frame = ttk.Frame(main_frame)
+        btn_frame.pack(fill=X)
+
+        ttk.Button(
+            btn_frame,
+            text="✕ 取消当前",
+            command=self.runner.cancel_current,
+            bootstyle="danger",
+            width=12
+        ).pack(side=LEFT, padx=(0, 5))
+
+        ttk.Button(
+            btn_frame,
+            text="✕ 取消全部",
+            command=self.runner.cancel_all,
+            bootstyle="danger-outline",
+            width=12
+        ).pack(side=LEFT, padx=5)
+
+        ttk.Button(
+            btn_frame,
+            text="隐藏",
+            command=self.hide,
+            bootstyle="secondary",
+            width=8
+        ).pack(side=RIGHT)
+
+    def exists(self) -> bool:
+        try:
+            return bool(self.dialog.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def show(self):
+        """显示窗口"""
+        try:
+            self.dialog.deiconify()
+            self.dialog.lift()
+            self.progress_bar.start(10)
+        except tk.TclError:
+            pass
+
+    def hide(self):
+        """隐藏窗口（任务继续在后台执行）"""
+        try:
+            self.progress_bar.stop()
+            self.dialog.withdraw()
+        except tk.TclError:
+            pass
+
+    def refresh(self, job: Optional[ExportJob], pending: List[ExportJob]):
+        """刷新当前任务的进度和排队列表"""
+        try:
+            if job is not None:
+                progress = job.progress
+                files_per_second, bytes_per_second = progress.rates()
+                state = "正在取消..." if job.is_cancelled else (progress.status or "正在导出...")
+                self.title_label.config(text=f"当前任务: {job.title}")
+                self.status_label.config(text=state)
+                self.total_label.config(
+                    text=f"已写出: {progress.files:,} 个文件, {format_bytes(progress.bytes)}"
+                         f" | 用时: {format_duration(progress.elapsed)}"
+                )
+                self.rate_label.config(
+                    text=f"速度: {files_per_second:,.1f} 文件/秒 | {format_bytes(bytes_per_second)}/秒"
+                )
+            else:
+                self.title_label.config(text="没有执行中的任务")
+                self.status_label.config(text="")
+                self.total_label.config(text="")
+                self.rate_label.config(text="")
+
+            self.queue_label.config(text=f"排队中: {len(pending)} 个任务")
+            titles = [f"{'(已取消) ' if p.is_cancelled else ''}{p.title}" for p in pending]
+            if list(self.queue_list.get(0, END)) != titles:
+                self.queue_list.delete(0, END)
+                for title in titles:
+                    self.queue_list.insert(END, title)
+        except tk.TclError:
+            pass
@@ -0,0 +1,240 @@
+"""
+索引建议对话框
+显示典型查询的执行计划分析结果，并可在确认后创建建议的索引
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+import ttkbootstrap as ttk_boot
+from ttkbootstrap.constants import *
+import threading
+from typing import Dict, List, Optional, Callable
+
+from ..core.index_advisor import IndexAdvisor
+
+
+class IndexAdvisorDialog:
+    """索引建议对话框"""
+
+    def __init__(self, parent, connector, user_id: Optional[str] = None,
+                 log_callback: Callable = None):
+        """
+        初始化索引建议对话框
+
+        Args:
+            parent: 父窗口
+            connector: 已连接的 PostgreSQLConnector
+            user_id: 分析时使用的用户ID过滤
+            log_callback: 日志回调函数
+        """
+        self.parent = parent
+        self.connector = connector
+        self.user_id = user_id
+        self.log_callback = log_callback
+        self.advisor = IndexAdvisor(connector, log_callback)
+        self.proposals = {}  # {tree_item: proposal}
+
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("🩺 索引建议")
+        self.dialog.geometry("860x480")
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+
+        self._create_ui()
+
+        # 居中显示
+        self.dialog.update_idletasks()
+        x = (self.dialog.winfo_screenwidth() - 860) // 2
+        y = (self.dialog.winfo_screenheight() - 480) // 2
+        self.dialog.geometry(f"860x480+{x}+{y}")
+
+        self._run_analysis()
+
+    def _create_ui(self):
+        """创建UI"""
+        main_frame = ttk.Frame(self.dialog, padding=10)
+        main_frame.pack(fill=BOTH, expand=YES)
+
+        ttk.Label(
+            main_frame,
+            text="对数据库标签页的懒加载查询执行 EXPLAIN，标记大表顺序扫描和排序",
+            foreground="gray"
+        ).pack(anchor=W, pady=(0, 5))
+
+        tree_container = ttk.Frame(main_frame)
+        tree_container.pack(fill=BOTH, expand=YES)
+
+        y_scroll = ttk.Scrollbar(tree_container, orient=VERTICAL)
+        y_scroll.pack(side=RIGHT, fill=Y)
+
+        self.tree = ttk.Treeview(
+            tree_container,
+            columns=("cost", "detail", "status"),
+            show="tree headings",
+            yscrollcommand=y_scroll.set
+        )
+        self.tree.pack(fill=BOTH, expand=YES)
+        y_scroll.config(command=self.tree.yview)
+
+        self.tree.heading("#0", text="查询 / 建议索引", anchor=W)
+        self.tree.heading("cost", text="估算成本", anchor=W)
+        self.tree.heading("detail", text="问题 / 语句", anchor=W)
+        self.tree.heading("status", text="状态", anchor=W)
+
+        self.tree.column("#0", width=220, minwidth=150)
+        self.tree.column("cost", width=80, anchor=E)
+        self.tree.column("detail", width=440)
+        self.tree.column("status", width=80, anchor=CENTER)
+
+        self.status_var = tk.StringVar(value="正在分析...")
+        self.status_label = ttk.Label(main_frame, textvariable=self.status_var, foreground="gray")
+        self.status_label.pack(anchor=W, pady=5)
+
+        btn_frame = ttk.Frame(main_frame)
+        btn_frame.pack(fill=X)
+
+        self.reanalyze_btn = ttk.Button(
+            btn_frame,
+            text="🔄 重新分析",
+            command=self._run_analysis,
+            bootstyle="info"
+        )
+        self.reanalyze_btn.pack(side=LEFT, padx=(0, 5))
+
+        self.apply_btn = ttk.Button(
+            btn_frame,
+            text="🛠️ 创建选中索引",
+            command=self._apply_selected,
+            bootstyle="warning",
+            state="disabled"
+        )
+        self.apply_btn.pack(side=LEFT, padx=5)
+
+        ttk.Button(
+            btn_frame,
+            text="关闭",
+            command=self.dialog.destroy,
+            bootstyle="secondary"
+        ).pack(side=RIGHT)
+
+    def _set_status(self, text: str, color: str = "gray"):
+        """设置状态文本"""
+        self.status_var.set(text)
+        self.status_label.configure(foreground=color)
+
+    def _run_analysis(self):
+        """在后台线程中执行分析"""
+        self._set_status("正在分析执行计划...", "blue")
+        self.reanalyze_btn.configure(state="disabled")
+        self.apply_btn.configure(state="disabled")
+
+        def analyze_thread():
+            try:
+                results = self.advisor.analyze(self.user_id)
+                self.dialog.after(0, lambda: self._show_results(results))
+            except Exception as e:
+                error = str(e)
+                self.dialog.after(0, lambda: self._on_analysis_failed(error))
+
+        threading.Thread(target=analyze_thread, daemon=True).start()
+
+    def _on_analysis_failed(self, message: str):
+        """分析失败回调"""
+        self.reanalyze_btn.configure(state="normal")
+        self._set_status(f"❌ 分析失败: {message}", "red")
+
+    def _show_results(self, results: List[Dict]):
+        """显示分析结果"""
+        self.reanalyze_btn.configure(state="normal")
+
+        for item in self.tree.get_children():
+            self.tree.delete(item)
+        self.proposals = {}
+
+        proposal_count = 0
+        for result in results:
+            if result["error"]:
+                status = "❌ 失败"
+                detail = result["error"]
+            elif result["issues"]:
+                status = "⚠️ 待优化"
+                detail = "; ".join(issue["detail"] for issue in result["issues"])
+            else:
+                status = "✅ 正常"
+                detail = "使用索引"
+
+            parent_item = self.tree.insert(
+                "", END,
+                text=result["name"],
+                values=(f"{result['cost']:.0f}", detail, status),
+                open=bool(result["proposals"])
+            )
+
+            for proposal in result["proposals"]:
+                child = self.tree.insert(
+                    parent_item, END,
+                    text=f"💡 {proposal['name']}",
+                    values=("", proposal["sql"], "建议")
+                )
+                self.proposals[child] = proposal
+                proposal_count += 1
+
+        if proposal_count:
+            self.apply_btn.configure(state="normal")
+            self._set_status(f"发现 {proposal_count} 条索引建议，选中后可创建", "orange")
+        else:
+            self._set_status("✅ 所有典型查询均已有合适索引", "green")
+
+    def _apply_selected(self):
+        """创建选中的索引（需确认）"""
+        selected = [self.proposals[item] for item in self.tree.selection() if item in self.proposals]
+        if not selected:
+            messagebox.showinfo("提示", "请先选中要创建的索引建议", parent=self.dialog)
+            return
+
+        statements = "\n".join(p["sql"] for p in selected)
+        confirm = messagebox.askyesno(
+            "确认创建索引",
+            f"将在数据库上执行以下语句：\n\n{statements}\n\n"
+            "CONCURRENTLY 模式不会阻塞写入，但大表上可能需要较长时间。\n确定继续吗？",
+            parent=self.dialog
+        )
+        if not confirm:
+            return
+
+        self.apply_btn.configure(state="disabled")
+        self.reanalyze_btn.configure(state="disabled")
+        self._set_status("正在创建索引...", "blue")
+
+        def apply_thread():
+            errors = []
+            for proposal in selected:
+                try:
+                    self.advisor.apply_proposal(proposal)
+                except Exception as e:
+                    errors.append(f"{proposal['name']}: {str(e)}")
+            self.dialog.after(0, lambda: self._on_apply_done(len(selected), errors))
+
+        threading.Thread(target=apply_thread, daemon=True).start()
+
+    def _on_apply_done(self, total: int, errors: List[str]):
+        """创建完成回调"""
+        if errors:
+            messagebox.showerror("部分索引创建失败", "\n".join(errors), parent=self.dialog)
+        else:
+            messagebox.showinfo("完成", f"已创建 {total} 个索引", parent=self.dialog)
+        self._run_analysis()
+
+
+def show_index_advisor_dialog(parent, connector, user_id: Optional[str] = None,
+                              log_callback: Callable = None):
+    """
+    显示索引建议对话框
+
+    Args:
+        parent: 父窗口
+        connector: 已连接的 PostgreSQLConnector
+        user_id: 用户ID过滤
+        log_callback: 日志回调函数
+    """
+    return IndexAdvisorDialog(parent, connector, user_id, log_callback)
@@ -18,17 +18,22 @@ from ..config import *
 from ..core.parser import LobeChatParser
 from ..core.db_connector import DBConfig, PostgreSQLConnector
 from ..core.db_parser import DatabaseParser
-from ..exporters.markdown_exporter import MarkdownExporter
+from ..core.ndjson_reader import is_ndjson_file, load_ndjson
+from ..core.sqlite_source import is_sqlite_file, load_sqlite
+from ..core.export_progress import ProgressWriter, record_file
+from ..exporters.markdown_writer import (
+    export_markdown_single_file, export_markdown_agent_files,
+    export_markdown_directory, export_markdown_message_files
+)
+from ..exporters.archive_writer import archive_path_for
 from ..exporters.json_exporter import JSONExporter
 from ..utils.clipboard import ClipboardManager
-from ..utils.file_utils import (
-    safe_filename, ensure_unique_name, format_datetime, get_app_path,
-    write_file_with_timestamp, get_time_range_from_messages
-)
+from ..utils.file_utils import get_app_path
 from .components import create_toolbar, create_file_selector, create_stats_area, create_export_options, create_log_area
 from .tree_view import TreeViewController
 from .context_menu import ContextMenuManager
 from .data_tabs import DataTabsController
+from .export_jobs import ExportJobRunner
 
 
 class LobeChatDataExporter:
@@ -57,6 +62,8 @@ class LobeChatDataExporter:
         self.clipboard_manager = None
         self.tree_controller = None
         self.context_menu_manager = None
+        # 后台导出任务（排队执行，共用进度窗口）
+        self.export_jobs = ExportJobRunner(self.master, self.log_message)
         
         # 创建UI
         self.create_ui()
@@ -84,7 +91,7 @@ class LobeChatDataExporter:
     
     def handle_file_drop(self, file_path: str):
         """处理文件拖拽"""
-        if file_path and file_path.lower().endswith('.json'):
+        if file_path and (file_path.lower().endswith('.json') or is_ndjson_file(file_path) or is_sqlite_file(file_path)):
             self.file_path_var.set(file_path)
             self.log_message(f"已拖入文件: {os.path.basename(file_path)}", "INFO")
             self.master.after(100, self.parse_json_file)
@@ -157,13 +164,19 @@ class LobeChatDataExporter:
         else:
             self.md_include_system_prompt = tk.BooleanVar(value=True)
         
+        if hasattr(self.data_tabs_controller, 'export_archive_format'):
+            self.export_archive_format = self.data_tabs_controller.export_archive_format
+        else:
+            self.export_archive_format = tk.StringVar(value="")
+        
         self.json_export_vars = {}
     
     def browse_file(self):
         """浏览选择文件"""
         file_path = filedialog.askopenfilename(
             title="选择LobeChat备份文件",
-            filetypes=[("JSON文件", "*.json"), ("所有文件", "*.*")]
+            filetypes=[("JSON文件", "*.json"), ("JSON Lines", "*.jsonl *.ndjson"),
+                       ("SQLite导出", "*.sqlite *.sqlite3 *.db"), ("所有文件", "*.*")]
         )
         if file_path:
             self.file_path_var.set(file_path)
@@ -186,12 +199,22 @@ class LobeChatDataExporter:
         self.log_message(f"开始解析文件: {os.path.basename(file_path)}", "INFO")
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                raw_data = json.load(f)
+            if is_ndjson_file(file_path):
+                # JSON Lines 导出（分卷时自动读取同组全部分卷）
+                raw_data = load_ndjson(file_path)
+            elif is_sqlite_file(file_path):
+                # SQLite 导出
+                raw_data = load_sqlite(file_path)
+            else:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    raw_data = json.load(f)
             
             # 使用解析器
             parser = LobeChatParser(log_callback=self.log_message)
             self.parsed_data = parser.parse(raw_data, file_path)
+            if is_sqlite_file(file_path):
+                # 全文搜索使用 SQLite 中的 FTS5 索引
+                self.parsed_data["sqliteSource"] = file_path
             self.json_file_path = file_path
             
             # 更新UI
@@ -252,8 +275,24 @@ class LobeChatDataExporter:
         elif mode == "agent_separate":
             messagebox.showinfo("提示", "请在左侧树形视图中右键点击助手节点进行分离导出")
     
+    def _export_output_path(self, export_path) -> Path:
+        """实际输出位置（选择了压缩包时为同名压缩包）"""
+        archive_format = self.export_archive_format.get()
+        if archive_format:
+            return archive_path_for(Path(export_path), archive_format)
+        return Path(export_path)
+    
+    def _markdown_export_options(self) -> Dict:
+        """提交后台任务前读取导出选项（界面变量只能在界面线程读取）"""
+        return {
+            "include_metadata": self.md_include_metadata.get(),
+            "include_system_prompt": self.md_include_system_prompt.get(),
+            "log_callback": self.export_jobs.log,
+            "archive_format": self.export_archive_format.get() or None,
+        }
+    
     def export_markdown_single_file(self):
-        """导出所有对话为单个Markdown文件"""
+        """导出所有对话为单个Markdown文件（后台任务）"""
         file_path = filedialog.asksaveasfilename(
             title="保存Markdown文件",
             defaultextension=".md",
@@ -266,453 +305,64 @@ class LobeChatDataExporter:
         
         self.log_message("开始导出Markdown（全部为一个文件）...", "INFO")
         
-        try:
-            exporter = MarkdownExporter(self.parsed_data)
-            include_metadata = self.md_include_metadata.get()
-            include_system_prompt = self.md_include_system_prompt.get()
-            
-            lines = [
-                "# LobeChat 全部对话",
-                "",
-                f"- **源文件**: `{self.parsed_data['sourceFileName']}`",
-                f"- **助手数**: {self.parsed_data['stats']['agentCount']}",
-                f"- **主题数**: {self.parsed_data['stats']['topicCount']}",
-                f"- **消息数**: {self.parsed_data['stats']['messageCount']}",
-                "",
-                "---",
-                ""
-            ]
-            
-            for group in self.parsed_data["groups"]:
-                # 助手标题
-                lines.append(f"# 助手: {group['agentLabel']}")
-                lines.append("")
-                
-                # 助手系统提示词
-                if include_system_prompt:
-                    agent = group.get("agent")
-                    if agent:
-                        system_role = agent.get("systemRole", "")
-                        if system_role:
-                            lines.append("## 系统提示词")
-                            lines.append("")
-                            lines.append("```")
-                            lines.append(system_role)
-                            lines.append("```")
-                            lines.append("")
-                
-                # 遍历主题
-                for session_group in group["sessions"]:
-                    for topic_group in session_group["topics"]:
-                        lines.append(f"## 主题: {topic_group['topicLabel']}")
-                        lines.append("")
-                        
-                        messages = topic_group.get("messages", [])
-                        for msg in messages:
-                            role = msg.get("role", "unknown")
-                            content = msg.get("content", "")
-                            
-                            role_label = "👤 用户" if role == "user" else "🤖 助手" if role == "assistant" else f"⚙️ {role}"
-                            
-                            lines.append(f"### {role_label}")
-                            
-                            if include_metadata:
-                                created_at = msg.get("createdAt")
-                                model = msg.get("model", "")
-                                if created_at or model:
-                                    meta_parts = []
-                                    if created_at:
-                                        meta_parts.append(f"时间: {format_datetime(created_at)}")
-                                    if model:
-                                        meta_parts.append(f"模型: {model}")
-                                    lines.append(f"*{' | '.join(meta_parts)}*")
-                            
-                            lines.append("")
-                            lines.append(content if content else "(空)")
-                            lines.append("")
-                        
-                        lines.append("---")
-                        lines.append("")
-                
-                lines.append("")
-            
-            # 写入文件
-            content = "\n".join(lines)
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            
-            self.log_message(f"✅ 导出完成！文件: {file_path}", "SUCCESS")
-            messagebox.showinfo("导出成功", f"已导出到:\n{file_path}")
-            
-        except Exception as e:
-            self.log_message(f"导出失败: {str(e)}", "ERROR")
-            messagebox.showerror("导出失败", str(e))
-    
-    def export_markdown_agent_files(self):
-        """导出每个助手为单独的Markdown文件"""
-        output_dir = filedialog.askdirectory(title="选择导出目录")
-        if not output_dir:
-            return
+        parsed_data = self.parsed_data
+        options = self._markdown_export_options()
+        output_path = self._export_output_path(file_path)
         
-        self.log_message("开始导出Markdown（每个助手一个文件）...", "INFO")
+        def on_success(_):
+            self.log_message(f"✅ 导出完成！文件: {output_path}", "SUCCESS")
+            messagebox.showinfo("导出成功", f"已导出到:\n{output_path}")
         
-        try:
-            export_path = Path(output_dir) / f"{self.parsed_data['sourceFileName'].replace('.json', '')}_agents"
-            export_path.mkdir(exist_ok=True)
-            
-            exporter = MarkdownExporter(self.parsed_data)
-            include_metadata = self.md_include_metadata.get()
-            include_system_prompt = self.md_include_system_prompt.get()
-            
-            file_count = 0
-            index_lines = [
-                "# LobeChat 助手列表",
-                "",
-                f"- **源文件**: `{self.parsed_data['sourceFileName']}`",
-                ""
-            ]
-            
-            used_names = set()
-            for group in self.parsed_data["groups"]:
-                # 文件名
-                filename = safe_filename(group["agentLabel"], group["agentId"])
-                filename = ensure_unique_name(filename, used_names)
-                
-                lines = [
-                    f"# {group['agentLabel']}",
-                    "",
-                ]
-                
-                # 助手系统提示词
-                if include_system_prompt:
-                    agent = group.get("agent")
-                    if agent:
-                        system_role = agent.get("systemRole", "")
-                        if system_role:
-                            lines.append("## 系统提示词")
-                            lines.append("")
-                            lines.append("```")
-                            lines.append(system_role)
-                            lines.append("```")
-                            lines.append("")
-                
-                # 统计信息
-                topic_count = sum(len(s["topics"]) for s in group["sessions"])
-                message_count = sum(sum(len(t["messages"]) for t in s["topics"]) for s in group["sessions"])
-                
-                lines.append(f"- **主题数**: {topic_count}")
-                lines.append(f"- **消息数**: {message_count}")
-                lines.append("")
-                lines.append("---")
-                lines.append("")
-                
-                # 遍历主题
-                for session_group in group["sessions"]:
-                    for topic_group in session_group["topics"]:
-                        lines.append(f"## {topic_group['topicLabel']}")
-                        lines.append("")
-                        
-                        messages = topic_group.get("messages", [])
-                        for msg in messages:
-                            role = msg.get("role", "unknown")
-                            content = msg.get("content", "")
-                            
-                            role_label = "👤 用户" if role == "user" else "🤖 助手" if role == "assistant" else f"⚙️ {role}"
-                            
-                            lines.append(f"### {role_label}")
-                            
-                            if include_metadata:
-                                created_at = msg.get("createdAt")
-                                model = msg.get("model", "")
-                                if created_at or model:
-                                    meta_parts = []
-                                    if created_at:
-                                        meta_parts.append(f"时间: {format_datetime(created_at)}")
-                                    if model:
-                                        meta_parts.append(f"模型: {model}")
-                                    lines.append(f"*{' | '.join(meta_parts)}*")
-                            
-                            lines.append("")
-                            lines.append(content if content else "(空)")
-                            lines.append("")
-                        
-                        lines.append("---")
-                        lines.append("")
-                
-                # 写入文件
-                file_path = export_path / f"{filename}.md"
-                content = "\n".join(lines)
-                
-                # 获取时间信息
-                agent_all_messages = []
-                for session_group in group["sessions"]:
-                    for topic_group in session_group["topics"]:
-                        agent_all_messages.extend(topic_group.get("messages", []))
-                
-                agent_created_at, agent_modified_at = get_time_range_from_messages(agent_all_messages)
-                agent = group.get("agent")
-                if agent and agent.get("createdAt"):
-                    agent_created_at = agent.get("createdAt")
-                
-                write_file_with_timestamp(str(file_path), content, agent_created_at, agent_modified_at)
-                file_count += 1
-                
-                # 索引
-                index_lines.append(f"- [{group['agentLabel']}]({filename}.md) - {topic_count}主题, {message_count}消息")
-            
-            # 写入索引
-            (export_path / "index.md").write_text("\n".join(index_lines), encoding='utf-8')
-            file_count += 1
-            
-            self.log_message(f"✅ 导出完成！共{file_count}个文件", "SUCCESS")
-            messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{export_path}")
-            
-        except Exception as e:
-            self.log_message(f"导出失败: {str(e)}", "ERROR")
-            messagebox.showerror("导出失败", str(e))
+        self.export_jobs.submit(
+            "导出Markdown（全部为一个文件）",
+            lambda: export_markdown_single_file(parsed_data, file_path, **options),
+            on_success
+        )
     
-    def export_markdown_directory(self):
-        """按目录结构导出Markdown"""
+    def _submit_markdown_directory_export(self, title: str, export_func, suffix: str):
+        """
+        选择目录后把目录结构的Markdown导出提交为后台任务
+        
+        Args:
+            title: 任务名称（如 "每个助手一个文件"）
+            export_func: markdown_writer 中的导出函数
+            suffix: 导出目录名后缀
+        """
         output_dir = filedialog.askdirectory(title="选择导出目录")
         if not output_dir:
             return
         
-        self.log_message("开始按目录结构导出Markdown...", "INFO")
+        self.log_message(f"开始导出Markdown（{title}）...", "INFO")
         
-        try:
-            export_path = Path(output_dir) / f"{self.parsed_data['sourceFileName'].replace('.json', '')}_markdown"
-            export_path.mkdir(exist_ok=True)
-            
-            exporter = MarkdownExporter(self.parsed_data)
-            include_metadata = self.md_include_metadata.get()
-            include_system_prompt = self.md_include_system_prompt.get()
-            
-            file_count = 0
-            index_lines = [
-                "# LobeChat 对话索引",
-                "",
-                f"- **源文件**: `{self.parsed_data['sourceFileName']}`",
-                ""
-            ]
-            
-            for group in self.parsed_data["groups"]:
-                # 创建助手目录
-                agent_dir_name = safe_filename(group["agentLabel"], group["agentId"])
-                agent_dir = export_path / agent_dir_name
-                agent_dir.mkdir(exist_ok=True)
-                
-                # README - 使用助手的时间信息
-                readme_content = exporter.build_agent_readme(group, include_metadata, include_system_prompt)
-                readme_path = str(agent_dir / "README.md")
-                
-                # 收集助手所有消息以获取时间范围
-                agent_all_messages = []
-                for session_group in group["sessions"]:
-                    for topic_group in session_group["topics"]:
-                        agent_all_messages.extend(topic_group.get("messages", []))
-                
-                agent_created_at, agent_modified_at = get_time_range_from_messages(agent_all_messages)
-                agent = group.get("agent")
-                if agent and agent.get("createdAt"):
-                    agent_created_at = agent.get("createdAt")
-                
-                write_file_with_timestamp(readme_path, readme_content, agent_created_at, agent_modified_at)
-                file_count += 1
-                
-                # 索引
-                session_count = len(group["sessions"])
-                topic_count = sum(len(s["topics"]) for s in group["sessions"])
-                message_count = sum(sum(len(t["messages"]) for t in s["topics"]) for s in group["sessions"])
-                
-                index_lines.append(
-                    f"- [{group['agentLabel']}]({agent_dir_name}/README.md) - "
-                    f"{session_count}会话, {topic_count}主题, {message_count}消息"
-                )
-                
-                # 导出主题
-                used_names = set()
-                for session_group in group["sessions"]:
-                    for topic_group in session_group["topics"]:
-                        filename = safe_filename(topic_group["topicLabel"], topic_group["topicId"])
-                        filename = ensure_unique_name(filename, used_names)
-                        
-                        content = exporter.build_topic_markdown(
-                            group.get("agent"), session_group["session"], topic_group,
-                            group["agentLabel"], include_metadata, include_system_prompt
-                        )
-                        
-                        file_path = str(agent_dir / f"{filename}.md")
-                        
-                        # 获取主题的时间信息
-                        topic = topic_group.get("topic")
-                        messages = topic_group.get("messages", [])
-                        created_at = topic.get("createdAt") if topic else None
-                        _, latest_modified = get_time_range_from_messages(messages)
-                        modified_at = latest_modified or (topic.get("updatedAt") if topic else None) or created_at
-                        
-                        write_file_with_timestamp(file_path, content, created_at, modified_at)
-                        file_count += 1
-            
-            # 写入索引
-            (export_path / "index.md").write_text("\n".join(index_lines), encoding='utf-8')
-            file_count += 1
-            
+        parsed_data = self.parsed_data
+        options = self._markdown_export_options()
+        export_path = Path(output_dir) / f"{parsed_data['sourceFileName'].replace('.json', '')}_{suffix}"
+        output_path = self._export_output_path(export_path)
+        
+        def on_success(file_count):
             self.log_message(f"✅ 导出完成！共{file_count}个文件", "SUCCESS")
-            messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{export_path}")
-            
-        except Exception as e:
-            self.log_message(f"导出失败: {str(e)}", "ERROR")
-            messagebox.showerror("导出失败", str(e))
+            messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{output_path}")
+        
+        self.export_jobs.submit(
+            f"导出Markdown（{title}）",
+            lambda: export_func(parsed_data, export_path, **options),
+            on_success
+        )
+    
+    def export_markdown_agent_files(self):
+        """导出每个助手为单独的Markdown文件（后台任务）"""
+        self._submit_markdown_directory_export("每个助手一个文件", export_markdown_agent_files, "agents")
+    
+    def export_markdown_directory(self):
+        """按目录结构导出Markdown（后台任务）"""
+        self._submit_markdown_directory_export("每个主题一个文件", export_markdown_directory, "markdown")
     
     def export_markdown_message_files(self):
-        """按对话导出Markdown - 每个对话一个文件（三级目录结构：助手/主题/对话.md）"""
-        output_dir = filedialog.askdirectory(title="选择导出目录")
-        if not output_dir:
-            return
-        
-        self.log_message("开始导出Markdown（每个对话一个文件）...", "INFO")
-        
-        try:
-            export_path = Path(output_dir) / f"{self.parsed_data['sourceFileName'].replace('.json', '')}_messages"
-            export_path.mkdir(exist_ok=True)
-            
-            exporter = MarkdownExporter(self.parsed_data)
-            include_metadata = self.md_include_metadata.get()
-            include_system_prompt = self.md_include_system_prompt.get()
-            
-            file_count = 0
-            index_lines = [
-                "# LobeChat 对话索引",
-                "",
-                f"- **源文件**: `{self.parsed_data['sourceFileName']}`",
-                f"- **导出模式**: 每个对话一个文件",
-                ""
-            ]
-            
-            for group in self.parsed_data["groups"]:
-                # 创建助手目录
-                agent_dir_name = safe_filename(group["agentLabel"], group["agentId"])
-                agent_dir = export_path / agent_dir_name
-                agent_dir.mkdir(exist_ok=True)
-                
-                # 助手 README
-                readme_content = exporter.build_agent_readme(group, include_metadata, include_system_prompt)
-                readme_path = str(agent_dir / "README.md")
-                
-                agent_all_messages = []
-                for session_group in group["sessions"]:
-                    for topic_group in session_group["topics"]:
-                        agent_all_messages.extend(topic_group.get("messages", []))
-                
-                agent_created_at, agent_modified_at = get_time_range_from_messages(agent_all_messages)
-                agent = group.get("agent")
-                if agent and agent.get("createdAt"):
-                    agent_created_at = agent.get("createdAt")
-                
-                write_file_with_timestamp(readme_path, readme_content, agent_created_at, agent_modified_at)
-                file_count += 1
-                
-                # 索引
-                session_count = len(group["sessions"])
-                topic_count = sum(len(s["topics"]) for s in group["sessions"])
-                message_count = sum(sum(len(t["messages"]) for t in s["topics"]) for s in group["sessions"])
-                
-                index_lines.append(
-                    f"- [{group['agentLabel']}]({agent_dir_name}/README.md) - "
-                    f"{session_count}会话, {topic_count}主题, {message_count}消息"
-                )
-                
-                # 遍历主题
-                used_topic_names = set()
-                for session_group in group["sessions"]:
-                    for topic_group in session_group["topics"]:
-                        # 创建主题目录
-                        topic_dir_name = safe_filename(topic_group["topicLabel"], topic_group["topicId"])
-                        topic_dir_name = ensure_unique_name(topic_dir_name, used_topic_names)
-                        topic_dir = agent_dir / topic_dir_name
-                        topic_dir.mkdir(exist_ok=True)
-                        
-                        # 主题 README
-                        topic = topic_group.get("topic")
-                        messages = topic_group.get("messages", [])
-                        
-                        topic_readme_lines = [
-                            f"# {topic_group['topicLabel']}",
-                            "",
-                            f"- **消息数**: {len(messages)}",
-                        ]
-                        if topic and topic.get("createdAt"):
-                            topic_readme_lines.append(f"- **创建时间**: {format_datetime(topic.get('createdAt'))}")
-                        
-                        topic_readme_lines.append("")
-                        topic_readme_lines.append("## 对话列表")
-                        topic_readme_lines.append("")
-                        
-                        # 导出每条消息为单独文件
-                        for i, msg in enumerate(messages):
-                            role = msg.get("role", "unknown")
-                            content = msg.get("content", "")
-                            created_at = msg.get("createdAt")
-                            model = msg.get("model", "")
-                            
-                            # 生成文件名：序号_角色_时间
-                            time_str = format_datetime(created_at).replace(":", "-").replace(" ", "_") if created_at else ""
-                            msg_filename = f"{i+1:04d}_{role}_{time_str}"
-                            msg_filename = safe_filename(msg_filename, msg.get("id", ""))
-                            
-                            # 构建消息内容
-                            msg_lines = [
-                                f"# 消息 #{i+1}",
-                                "",
-                                f"- **角色**: {role}",
-                                f"- **时间**: {format_datetime(created_at) if created_at else '-'}",
-                            ]
-                            if model:
-                                msg_lines.append(f"- **模型**: {model}")
-                            
-                            if include_metadata:
-                                metadata = msg.get("metadata") or {}
-                                tokens = metadata.get("totalTokens", 0)
-                                if tokens:
-                                    msg_lines.append(f"- **Token**: {tokens}")
-                            
-                            msg_lines.append("")
-                            msg_lines.append("## 内容")
-                            msg_lines.append("")
-                            msg_lines.append(content if content else "(空)")
-                            
-                            # 写入文件
-                            msg_file_path = str(topic_dir / f"{msg_filename}.md")
-                            msg_content = "\n".join(msg_lines)
-                            write_file_with_timestamp(msg_file_path, msg_content, created_at, created_at)
-                            file_count += 1
-                            
-                            # 添加到主题README索引
-                            role_emoji = "👤" if role == "user" else "🤖" if role == "assistant" else "⚙️"
-                            preview = content[:50].replace("\n", " ") + "..." if len(content) > 50 else content.replace("\n", " ")
-                            topic_readme_lines.append(f"- {role_emoji} [{msg_filename}]({msg_filename}.md) - {preview}")
-                        
-                        # 写入主题README
-                        topic_readme_path = str(topic_dir / "README.md")
-                        topic_readme_content = "\n".join(topic_readme_lines)
-                        topic_created = topic.get("createdAt") if topic else None
-                        _, topic_modified = get_time_range_from_messages(messages)
-                        write_file_with_timestamp(topic_readme_path, topic_readme_content, topic_created, topic_modified)
-                        file_count += 1
-            
-            # 写入总索引
-            (export_path / "index.md").write_text("\n".join(index_lines), encoding='utf-8')
-            file_count += 1
-            
-            self.log_message(f"✅ 导出完成！共{file_count}个文件", "SUCCESS")
-            messagebox.showinfo("导出成功", f"已导出{file_count}个Markdown文件到:\n{export_path}")
-            
-        except Exception as e:
-            self.log_message(f"导出失败: {str(e)}", "ERROR")
-            messagebox.showerror("导出失败", str(e))
+        """按对话导出Markdown - 每个对话一个文件（三级目录结构：助手/主题/对话.md，后台任务）"""
+        self._submit_markdown_directory_export("每个对话一个文件", export_markdown_message_files, "messages")
     
     def export_custom_json(self):
-        """导出自定义JSON"""
+        """导出自定义JSON（后台任务）"""
         if not self.parsed_data:
             messagebox.showwarning("警告", "请先解析JSON文件！")
             return
@@ -735,19 +385,25 @@ class LobeChatDataExporter:
         
         self.log_message(f"开始导出自定义JSON，包含模块: {', '.join(selected_modules)}", "INFO")
         
-        try:
-            exporter = JSONExporter(self.parsed_data)
-            export_data = exporter.build_custom_json(selected_modules)
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, indent=2, ensure_ascii=False)
-            
+        exporter = JSONExporter(self.parsed_data)
+        
+        def run():
+            # 先写临时文件，取消或失败时不覆盖已有文件
+            partial_path = Path(file_path + ".partial")
+            try:
+                with open(partial_path, 'w', encoding='utf-8') as f:
+                    exporter.write_custom_json(ProgressWriter(f), selected_modules)
+                os.replace(partial_path, file_path)
+                record_file()
+            except BaseException:
+                partial_path.unlink(missing_ok=True)
+                raise
+        
+        def on_success(_):
             self.log_message(f"✅ 自定义JSON导出成功: {file_path}", "SUCCESS")
             messagebox.showinfo("导出成功", f"已导出包含 {len(selected_modules)} 个模块的JSON文件")
-            
-        except Exception as e:
-            self.log_message(f"导出失败: {str(e)}", "ERROR")
-            messagebox.showerror("导出失败", str(e))
+        
+        self.export_jobs.submit("导出自定义JSON", run, on_success)
     
     def toggle_all_json_modules(self, select_all: bool):
         """切换所有JSON模块选择"""
@@ -0,0 +1,339 @@
+"""
+多用户导出对话框
+选择要导出的用户，并行导出到各自的目录，实时显示每个用户的状态
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+import ttkbootstrap as ttk_boot
+from ttkbootstrap.constants import *
+import threading
+from typing import Dict, List, Callable
+
+from ..config import MULTI_USER_EXPORT_WORKERS
+from ..core.db_connector import DBConfig
+from ..core.cancellation import CancelToken
+from ..core.multi_user_export import (
+    MultiUserExporter,
+    STATUS_PENDING, STATUS_RUNNING, STATUS_DONE,
+    STATUS_SKIPPED, STATUS_FAILED, STATUS_CANCELLED
+)
+
+
+# 状态显示文本
+STATUS_TEXT = {
+    STATUS_PENDING: "⏳ 等待",
+    STATUS_RUNNING: "🔄 导出中",
+    STATUS_DONE: "✅ 完成",
+    STATUS_SKIPPED: "⏭️ 已完成",
+    STATUS_FAILED: "❌ 失败",
+    STATUS_CANCELLED: "⛔ 已取消",
+}
+
+
+class MultiUserExportDialog:
+    """多用户导出对话框"""
+
+    def __init__(self, parent, db_config: DBConfig, users: List[Dict],
+                 log_callback: Callable = None):
+        """
+        初始化多用户导出对话框
+
+        Args:
+            parent: 父窗口
+            db_config: 数据库配置
+            users: 用户列表
+            log_callback: 日志回调函数
+        """
+        self.parent = parent
+        self.db_config = db_config
+        self.users = users
+        self.log_callback = log_callback
+        self.cancel_token = None
+        self.running = False
+        self.user_items = {}  # {user_id: tree_item}
+
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("👥 批量导出用户")
+        self.dialog.geometry("820x520")
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        self.dialog.protocol("WM_DELETE_WINDOW", self._on_close)
+
+        self._create_ui()
+
+        # 居中显示
+        self.dialog.update_idletasks()
+        x = (self.dialog.winfo_screenwidth() - 820) // 2
+        y = (self.dialog.winfo_screenheight() - 520) // 2
+        self.dialog.geometry(f"820x520+{x}+{y}")
+
+    def _create_ui(self):
+        """创建UI"""
+        main_frame = ttk.Frame(self.dialog, padding=10)
+        main_frame.pack(fill=BOTH, expand=YES)
+
+        # 输出目录
+        dir_frame = ttk.Frame(main_frame)
+        dir_frame.pack(fill=X, pady=(0, 5))
+        ttk.Label(dir_frame, text="导出目录:").pack(side=LEFT)
+        self.output_var = tk.StringVar()
+        ttk.Entry(dir_frame, textvariable=self.output_var).pack(side=LEFT, fill=X, expand=YES, padx=5)
+        ttk.Button(
+            dir_frame,
+            text="📁 浏览",
+            command=self._choose_dir,
+            bootstyle="secondary-outline"
+        ).pack(side=LEFT)
+
+        # 选项
+        option_frame = ttk.Frame(main_frame)
+        option_frame.pack(fill=X, pady=5)
+
+        ttk.Label(option_frame, text="并行连接:").pack(side=LEFT)
+        self.workers_var = tk.IntVar(value=MULTI_USER_EXPORT_WORKERS)
+        ttk.Spinbox(option_frame, from_=1, to=16, width=4, textvariable=self.workers_var).pack(side=LEFT, padx=(5, 15))
+
+        self.json_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(option_frame, text="JSON", variable=self.json_var, bootstyle="round-toggle").pack(side=LEFT, padx=5)
+        self.ndjson_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(option_frame, text="JSON Lines", variable=self.ndjson_var, bootstyle="round-toggle").pack(side=LEFT, padx=5)
+        self.parquet_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(option_frame, text="Parquet", variable=self.parquet_var, bootstyle="round-toggle").pack(side=LEFT, padx=5)
+        self.sqlite_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(option_frame, text="SQLite", variable=self.sqlite_var, bootstyle="round-toggle").pack(side=LEFT, padx=5)
+        self.markdown_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(option_frame, text="Markdown", variable=self.markdown_var, bootstyle="round-toggle").pack(side=LEFT, padx=5)
+        # 默认重新导出全部用户；续跑只跳过上次中断的导出中已完成且数据未变化的用户
+        self.resume_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(option_frame, text="续跑上次中断的导出", variable=self.resume_var, bootstyle="round-toggle").pack(side=LEFT, padx=5)
+
+        # 用户列表
+        tree_container = ttk.Frame(main_frame)
+        tree_container.pack(fill=BOTH, expand=YES, pady=5)
+
+        y_scroll = ttk.Scrollbar(tree_container, orient=VERTICAL)
+        y_scroll.pack(side=RIGHT, fill=Y)
+
+        self.tree = ttk.Treeview(
+            tree_container,
+            columns=("messages", "status", "detail"),
+            show="tree headings",
+            selectmode="extended",
+            yscrollcommand=y_scroll.set
+        )
+        self.tree.pack(fill=BOTH, expand=YES)
+        y_scroll.config(command=self.tree.yview)
+
+        self.tree.heading("#0", text="用户", anchor=W)
+        self.tree.heading("messages", text="消息数", anchor=W)
+        self.tree.heading("status", text="状态", anchor=W)
+        self.tree.heading("detail", text="详情", anchor=W)
+
+        self.tree.column("#0", width=260, minwidth=150)
+        self.tree.column("messages", width=70, anchor=E)
+        self.tree.column("status", width=90, anchor=CENTER)
+        self.tree.column("detail", width=340)
+
+        for user in self.users:
+            user_id = str(user.get("id", ""))
+            label = user.get("email") or user_id
+            if user.get("full_name"):
+                label = f"{user['full_name']} ({label})"
+            item = self.tree.insert(
+                "", END,
+                text=label,
+                values=(user.get("message_count", 0), "", "")
+            )
+            self.user_items[user_id] = item
+        self.tree.selection_set(list(self.user_items.values()))
+
+        # 进度
+        self.progress = ttk.Progressbar(main_frame, mode="determinate", bootstyle="success-striped")
+        self.progress.pack(fill=X, pady=5)
+
+        self.status_var = tk.StringVar(value=f"共 {len(self.users)} 个用户，选中的用户将被导出")
+        self.status_label = ttk.Label(main_frame, textvariable=self.status_var, foreground="gray")
+        self.status_label.pack(anchor=W)
+
+        # 按钮
+        btn_frame = ttk.Frame(main_frame)
+        btn_frame.pack(fill=X, pady=(5, 0))
+
+        ttk.Button(
+            btn_frame,
+            text="全选",
+            command=lambda: self.tree.selection_set(list(self.user_items.values())),
+            bootstyle="secondary-outline"
+        ).pack(side=LEFT, padx=(0, 5))
+
+        self.start_btn = ttk.Button(
+            btn_frame,
+            text="📦 开始导出",
+            command=self._start_export,
+            bootstyle="success"
+        )
+        self.start_btn.pack(side=LEFT, padx=5)
+
+        self.cancel_btn = ttk.Button(
+            btn_frame,
+            text="⏹ 停止",
+            command=self._cancel_export,
+            bootstyle="danger",
+            state="disabled"
+        )
+        self.cancel_btn.pack(side=LEFT, padx=5)
+
+        ttk.Button(
+            btn_frame,
+            text="关闭",
+            command=self._on_close,
+            bootstyle="secondary"
+        ).pack(side=RIGHT)
+
+    def _set_status(self, text: str, color: str = "gray"):
+        """设置状态文本"""
+        self.status_var.set(text)
+        self.status_label.configure(foreground=color)
+
+    def _choose_dir(self):
+        """选择导出目录"""
+        path = filedialog.askdirectory(title="选择导出目录", parent=self.dialog)
+        if path:
+            self.output_var.set(path)
+
+    def _start_export(self):
+        """开始导出选中的用户"""
+        output_dir = self.output_var.get().strip()
+        if not output_dir:
+            messagebox.showwarning("警告", "请选择导出目录", parent=self.dialog)
+            return
+
+        item_users = {self.user_items[str(u.get("id", ""))]: u for u in self.users}
+        selected = [item_users[item] for item in self.tree.get_children() if item in self.tree.selection()]
+        if not selected:
+            messagebox.showwarning("警告", "请至少选择一个用户", parent=self.dialog)
+            return
+
+        formats = []
+        if self.json_var.get():
+            formats.append("json")
+        if self.ndjson_var.get():
+            formats.append("ndjson")
+        if self.parquet_var.get():
+            formats.append("parquet")
+        if self.sqlite_var.get():
+            formats.append("sqlite")
+        if self.markdown_var.get():
+            formats.append("markdown")
+        if not formats:
+            messagebox.showwarning("警告", "请至少选择一种导出格式", parent=self.dialog)
+            return
+
+        try:
+            workers = max(1, int(self.workers_var.get()))
+        except (tk.TclError, ValueError):
+            workers = MULTI_USER_EXPORT_WORKERS
+
+        for user in self.users:
+            self.tree.set(self.user_items[str(user.get("id", ""))], "status", "")
+            self.tree.set(self.user_items[str(user.get("id", ""))], "detail", "")
+
+        self.running = True
+        self.cancel_token = CancelToken()
+        self.start_btn.configure(state="disabled")
+        self.cancel_btn.configure(state="normal")
+        self.progress.configure(maximum=len(selected), value=0)
+        self._finished_count = 0
+        self._set_status(f"正在导出 {len(selected)} 个用户（{workers} 个并行连接）...", "blue")
+
+        exporter = MultiUserExporter(
+            self.db_config, output_dir,
+            workers=workers,
+            formats=formats,
+            log_callback=self.log_callback,
+            progress_callback=lambda uid, status, detail: self.dialog.after(
+                0, lambda: self._on_user_progress(uid, status, detail)
+            )
+        )
+        resume = self.resume_var.get()
+        token = self.cancel_token
+
+        def export_thread():
+            try:
+                summary = exporter.run(selected, token, resume)
+                self.dialog.after(0, lambda: self._on_export_done(summary, output_dir))
+            except Exception as e:
+                error = str(e)
+                self.dialog.after(0, lambda: self._on_export_failed(error))
+
+        threading.Thread(target=export_thread, daemon=True).start()
+
+    def _on_user_progress(self, user_id: str, status: str, detail: str):
+        """单个用户的进度更新"""
+        item = self.user_items.get(user_id)
+        if not item or not self.dialog.winfo_exists():
+            return
+        self.tree.set(item, "status", STATUS_TEXT.get(status, status))
+        self.tree.set(item, "detail", detail)
+        if status in (STATUS_DONE, STATUS_SKIPPED, STATUS_FAILED, STATUS_CANCELLED):
+            self._finished_count += 1
+            self.progress.configure(value=self._finished_count)
+        elif status == STATUS_RUNNING:
+            self.tree.see(item)
+
+    def _cancel_export(self):
+        """停止导出（正在执行的查询会在服务器端取消）"""
+        if self.cancel_token:
+            self.cancel_token.cancel()
+            self.cancel_btn.configure(state="disabled")
+            self._set_status("正在停止...", "orange")
+
+    def _on_export_done(self, summary: Dict, output_dir: str):
+        """导出完成回调"""
+        self.running = False
+        if not self.dialog.winfo_exists():
+            return
+        self.start_btn.configure(state="normal")
+        self.cancel_btn.configure(state="disabled")
+
+        counts = summary["counts"]
+        text = (f"成功 {counts[STATUS_DONE]}，跳过 {counts[STATUS_SKIPPED]}，"
+                f"失败 {counts[STATUS_FAILED]}，取消 {counts[STATUS_CANCELLED]}，耗时 {summary['seconds']} 秒")
+        if counts[STATUS_FAILED]:
+            self._set_status(f"⚠️ {text}（失败的用户可重新导出）", "orange")
+        else:
+            self._set_status(f"✅ {text}", "green")
+
+        messagebox.showinfo("导出完成", f"{text}\n\n导出目录: {output_dir}", parent=self.dialog)
+
+    def _on_export_failed(self, message: str):
+        """导出失败回调"""
+        self.running = False
+        if not self.dialog.winfo_exists():
+            return
+        self.start_btn.configure(state="normal")
+        self.cancel_btn.configure(state="disabled")
+        self._set_status(f"❌ 导出失败: {message}", "red")
+
+    def _on_close(self):
+        """关闭对话框（导出中需确认并取消）"""
+        if self.running:
+            if not messagebox.askyesno("确认", "导出仍在进行，确定停止并关闭吗？", parent=self.dialog):
+                return
+            self._cancel_export()
+        self.dialog.destroy()
+
+
+def show_multi_user_export_dialog(parent, db_config: DBConfig, users: List[Dict],
+                                  log_callback: Callable = None):
+    """
+    显示多用户导出对话框
+
+    Args:
+        parent: 父窗口
+        db_config: 数据库配置
+        users: 用户列表
+        log_callback: 日志回调函数
+    """
+    return MultiUserExportDialog(parent, db_config, users, log_callback)
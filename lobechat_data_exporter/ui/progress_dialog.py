@@ -8,6 +8,9 @@ from tkinter import ttk
 import ttkbootstrap as ttk_boot
 from ttkbootstrap.constants import *
 
+from ..core.cancellation import CancelToken
+from ..core.export_progress import format_duration
+
 
 class ProgressDialog:
     """进度对话框类"""
@@ -27,11 +30,13 @@ class ProgressDialog:
         self.current = 0
         self.is_paused = False
         self.is_cancelled = False
+        # 取消令牌 - 取消时会中止服务器上正在执行的查询
+        self.cancel_token = CancelToken()
         
         # 创建对话框
         self.dialog = tk.Toplevel(parent)
         self.dialog.title(title)
-        self.dialog.geometry("500x200")
+        self.dialog.geometry("500x225")
         self.dialog.resizable(False, False)
         self.dialog.transient(parent)
         self.dialog.grab_set()
@@ -39,8 +44,8 @@ class ProgressDialog:
         # 居中显示
         self.dialog.update_idletasks()
         x = (self.dialog.winfo_screenwidth() - 500) // 2
-        y = (self.dialog.winfo_screenheight() - 200) // 2
-        self.dialog.geometry(f"500x200+{x}+{y}")
+        y = (self.dialog.winfo_screenheight() - 225) // 2
+        self.dialog.geometry(f"500x225+{x}+{y}")
         
         # 创建UI
         self._create_ui(message)
@@ -69,7 +74,16 @@ class ProgressDialog:
             text=f"进度: 0 / {self.total}",
             font=("Arial", 9)
         )
-        self.progress_label.pack(pady=(0, 10))
+        self.progress_label.pack(pady=(0, 5))
+        
+        # 吞吐量 / 剩余时间
+        self.rate_label = ttk.Label(
+            main_frame,
+            text="",
+            font=("Arial", 9),
+            foreground="gray"
+        )
+        self.rate_label.pack(pady=(0, 5))
         
         # 进度条
         self.progress_bar = ttk.Progressbar(
@@ -123,6 +137,38 @@ class ProgressDialog:
         
         self.dialog.update_idletasks()
     
+    def update_rate(self, rows_per_second: float, eta_seconds: float = None, detail: str = ""):
+        """
+        更新吞吐量和剩余时间显示
+        
+        Args:
+            rows_per_second: 吞吐量（行/秒）
+            eta_seconds: 预计剩余时间（秒），None 表示未知
+            detail: 附加信息（如当前批大小）
+        """
+        text = f"速度: {rows_per_second:,.0f} 行/秒"
+        if eta_seconds is not None:
+            text += f" | 剩余: {format_duration(eta_seconds)}"
+        if detail:
+            text += f" | {detail}"
+        try:
+            self.rate_label.config(text=text)
+        except tk.TclError:
+            pass
+    
+    def set_message(self, message: str):
+        """只更新状态文本"""
+        try:
+            self.progress_label.config(text=message)
+        except tk.TclError:
+            pass
+    
+    def set_indeterminate(self):
+        """切换为不确定进度模式（总量未知时使用），并禁用暂停"""
+        self.progress_bar.configure(mode='indeterminate')
+        self.progress_bar.start(10)
+        self.pause_button.configure(state="disabled")
+    
     def toggle_pause(self):
         """切换暂停/继续状态"""
         self.is_paused = not self.is_paused
@@ -134,6 +180,7 @@ class ProgressDialog:
     def cancel(self):
         """取消操作"""
         self.is_cancelled = True
+        self.cancel_token.cancel()
         self.close()
     
     def close(self):
@@ -7,9 +7,11 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from ttkbootstrap.constants import *
 from typing import Dict, List, Any, Optional, Callable
-import csv
 import re
 
+from ..exporters.csv_writer import export_csv
+from ..exporters.excel_writer import export_tables_to_excel
+
 
 class MultiSelectListbox(ttk.Frame):
     """多选列表框组件（下拉式）"""
@@ -606,88 +608,35 @@ class DynamicSearchResultsTable(ttk.Frame):
 SearchResultsTable = DynamicSearchResultsTable
 
 
+def _iter_tree_values(tree: ttk.Treeview):
+    """逐行读取表格中显示的值"""
+    for item in tree.get_children():
+        yield tree.item(item, "values")
+
+
 def export_table_to_csv(tree: ttk.Treeview, columns: List[tuple], file_path: str):
-    """导出表格到CSV文件"""
-    with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
-        writer = csv.writer(f)
-        headers = [col[1] if len(col) > 1 else col[0] for col in columns]
-        writer.writerow(headers)
-        for item in tree.get_children():
-            values = tree.item(item, "values")
-            writer.writerow(values)
+    """导出表格（显示的值）到CSV文件；有原始数据时应使用 export_csv 导出完整数据"""
+    export_csv(file_path, columns, _iter_tree_values(tree))
 
 
 def export_table_to_excel(tree: ttk.Treeview, columns: List[tuple], file_path: str, sheet_name: str = "Sheet1"):
-    """导出表格到Excel文件"""
-    try:
-        import openpyxl
-        from openpyxl.styles import Font, Alignment, PatternFill
-    except ImportError:
-        raise ImportError("需要安装openpyxl库: pip install openpyxl")
-    
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = sheet_name
-    
-    headers = [col[1] if len(col) > 1 else col[0] for col in columns]
-    for col_idx, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_idx, value=header)
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill(start_color="DAEEF3", end_color="DAEEF3", fill_type="solid")
-        cell.alignment = Alignment(horizontal="center")
-    
-    for row_idx, item in enumerate(tree.get_children(), 2):
-        values = tree.item(item, "values")
-        for col_idx, value in enumerate(values, 1):
-            ws.cell(row=row_idx, column=col_idx, value=value)
-    
-    for col_idx, col in enumerate(columns, 1):
-        width = col[2] if len(col) > 2 else 100
-        ws.column_dimensions[openpyxl.utils.get_column_letter(col_idx)].width = max(width // 7, 10)
-    
-    wb.save(file_path)
+    """导出表格（显示的值）到Excel文件；有原始数据时应使用 export_tables_to_excel 导出带类型的完整数据"""
+    export_tables_to_excel(file_path, [(sheet_name, columns, _iter_tree_values(tree))])
 
 
 def export_all_tables_to_excel(tables_data: Dict[str, Dict], file_path: str):
-    """导出所有表格到Excel文件（多工作表）"""
-    try:
-        import openpyxl
-        from openpyxl.styles import Font, Alignment, PatternFill
-    except ImportError:
-        raise ImportError("需要安装openpyxl库: pip install openpyxl")
+    """
+    导出所有表格到Excel文件（多工作表）
     
-    wb = openpyxl.Workbook()
-    default_sheet = wb.active
-    
-    first_sheet = True
+    tables_data: {表名: {"columns": 列配置, "rows": 原始行} 或 {"columns": 列配置, "tree": 表格}}，
+    有 rows 时导出带类型的原始行，否则导出表格中显示的值
+    """
+    tables = []
     for table_name, table_info in tables_data.items():
-        tree = table_info.get("tree")
         columns = table_info.get("columns", [])
-        
-        if not tree:
-            continue
-        
-        if first_sheet:
-            ws = default_sheet
-            ws.title = table_name[:31]
-            first_sheet = False
-        else:
-            ws = wb.create_sheet(title=table_name[:31])
-        
-        headers = [col[1] if len(col) > 1 else col[0] for col in columns]
-        for col_idx, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_idx, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="DAEEF3", end_color="DAEEF3", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center")
-        
-        for row_idx, item in enumerate(tree.get_children(), 2):
-            values = tree.item(item, "values")
-            for col_idx, value in enumerate(values, 1):
-                ws.cell(row=row_idx, column=col_idx, value=value)
-        
-        for col_idx, col in enumerate(columns, 1):
-            width = col[2] if len(col) > 2 else 100
-            ws.column_dimensions[openpyxl.utils.get_column_letter(col_idx)].width = max(width // 7, 10)
+        if table_info.get("rows") is not None:
+            tables.append((table_name, columns, table_info["rows"]))
+        elif table_info.get("tree"):
+            tables.append((table_name, columns, _iter_tree_values(table_info["tree"])))
     
-    wb.save(file_path)
+    export_tables_to_excel(file_path, tables)
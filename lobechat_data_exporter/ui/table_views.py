@@ -10,8 +10,8 @@ from tkinter import ttk
 from ttkbootstrap.constants import *
 from collections import defaultdict
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Set, Tuple
-from ..utils.file_utils import format_datetime
+from typing import Dict, List, Any, Iterator, Optional, Set, Tuple
+from ..utils.file_utils import parse_datetime
 from ..config import THEME_DARK, THEME_LIGHT
 
 
@@ -21,6 +21,26 @@ AGENT_NAME_MAPPING = {
 }
 
 
+def _dash(value: Any) -> Any:
+    """空值显示为 "-" """
+    return "-" if value is None else value
+
+
+def _format_dt(dt: Optional[datetime]) -> str:
+    """datetime 显示为 "YYYY-MM-DD HH:MM"，空值为 "-" """
+    return dt.strftime("%Y-%m-%d %H:%M") if dt else "-"
+
+
+def _format_cost(cost: float) -> str:
+    """费用显示（为 0 时为 "-"）"""
+    return f"${cost:.4f}" if cost > 0 else "-"
+
+
+def _positive_or_dash(value: Any) -> Any:
+    """大于 0 时显示数值，否则为 "-" """
+    return value if value > 0 else "-"
+
+
 def get_agent_display_name(agent: Dict) -> str:
     """获取助手的显示名称"""
     if not agent:
@@ -416,6 +436,9 @@ class CellSelectionManager:
 class BaseTableViewController:
     """表格视图基类"""
     
+    # 导出时替换的列标题 {列ID: 标题}（显示内容被截断的列导出完整内容）
+    EXPORT_HEADERS: Dict[str, str] = {}
+    
     def __init__(self, parent, app, columns: List[tuple]):
         """
         初始化表格视图控制器
@@ -513,6 +536,42 @@ class BaseTableViewController:
         if hasattr(self, 'cell_selection_manager'):
             self.cell_selection_manager._clear_selection()
     
+    def update_table(self, parsed_data: Dict):
+        """
+        更新表格数据
+        
+        Args:
+            parsed_data: 解析后的数据
+        """
+        self.clear_table()
+        
+        if not parsed_data:
+            return
+        
+        for row in self.iter_rows(parsed_data):
+            self.tree.insert("", "end", values=self.format_row(row))
+    
+    def iter_rows(self, parsed_data: Dict) -> Iterator[tuple]:
+        """
+        生成表格的原始行（与 columns 对应的带类型的值：数值、datetime、完整文本，空值为 None），
+        表格显示和Excel导出共用
+        
+        Args:
+            parsed_data: 解析后的数据
+        """
+        return iter(())
+    
+    def format_row(self, row: tuple) -> tuple:
+        """原始行 → 表格显示的值"""
+        return tuple("" if value is None else value for value in row)
+    
+    def export_columns(self) -> List[tuple]:
+        """导出使用的列配置（EXPORT_HEADERS 中的列使用导出标题）"""
+        return [
+            (col[0], self.EXPORT_HEADERS.get(col[0], col[1]), *col[2:])
+            for col in self.columns
+        ]
+    
     def sort_by_column(self, col, is_numeric):
         """
         点击表头排序
@@ -587,18 +646,8 @@ class ModelsTableViewController(BaseTableViewController):
         """初始化模型表视图"""
         super().__init__(parent, app, self.COLUMNS)
     
-    def update_table(self, parsed_data: Dict):
-        """
-        更新模型表数据
-        
-        Args:
-            parsed_data: 解析后的数据
-        """
-        self.clear_table()
-        
-        if not parsed_data:
-            return
-        
+    def iter_rows(self, parsed_data: Dict) -> Iterator[tuple]:
+        """生成模型表的原始行"""
         # 获取原始消息数据
         raw_data = parsed_data.get("raw", {})
         messages = raw_data.get("data", {}).get("messages", [])
@@ -609,25 +658,37 @@ class ModelsTableViewController(BaseTableViewController):
         # 按模型聚合统计
         model_stats = self._aggregate_model_stats(messages)
         
-        # 填充表格
         for model_name, stats in model_stats.items():
-            self.tree.insert(
-                "",
-                "end",
-                values=(
-                    model_name,
-                    stats["call_count"],
-                    f"${stats['total_cost']:.4f}" if stats['total_cost'] > 0 else "-",
-                    f"{stats['avg_tps']:.2f}" if stats['avg_tps'] > 0 else "-",
-                    stats["total_tokens"],
-                    stats["input_tokens"],
-                    stats["output_tokens"],
-                    stats["first_call"] or "-",
-                    stats["last_call"] or "-",
-                    stats["usage_days"]
-                )
+            yield (
+                model_name,
+                stats["call_count"],
+                stats["total_cost"],
+                stats["avg_tps"],
+                stats["total_tokens"],
+                stats["input_tokens"],
+                stats["output_tokens"],
+                stats["first_call_dt"],
+                stats["last_call_dt"],
+                stats["usage_days"],
             )
     
+    def format_row(self, row: tuple) -> tuple:
+        """模型表显示值"""
+        (model_name, call_count, total_cost, avg_tps, total_tokens, input_tokens,
+         output_tokens, first_call, last_call, usage_days) = row
+        return (
+            model_name,
+            call_count,
+            _format_cost(total_cost),
+            f"{avg_tps:.2f}" if avg_tps > 0 else "-",
+            total_tokens,
+            input_tokens,
+            output_tokens,
+            _format_dt(first_call),
+            _format_dt(last_call),
+            usage_days,
+        )
+    
     def _aggregate_model_stats(self, messages: List[Dict]) -> Dict[str, Dict]:
         """
         聚合模型统计数据
@@ -741,13 +802,8 @@ class ProvidersTableViewController(BaseTableViewController):
         """初始化提供商表视图"""
         super().__init__(parent, app, self.COLUMNS)
     
-    def update_table(self, parsed_data: Dict):
-        """更新提供商表数据"""
-        self.clear_table()
-        
-        if not parsed_data:
-            return
-        
+    def iter_rows(self, parsed_data: Dict) -> Iterator[tuple]:
+        """生成提供商表的原始行"""
         raw_data = parsed_data.get("raw", {})
         providers = raw_data.get("data", {}).get("aiProviders", [])
         models = raw_data.get("data", {}).get("aiModels", [])
@@ -789,24 +845,39 @@ class ProvidersTableViewController(BaseTableViewController):
             settings = provider.get("settings", {}) or {}
             stats = provider_stats.get(provider_id, {})
             
-            self.tree.insert(
-                "",
-                "end",
-                values=(
-                    provider.get("name", "") or provider_id,
-                    provider_id,
-                    "✓ 启用" if provider.get("enabled") else "✗ 禁用",
-                    provider.get("source", "-"),
-                    settings.get("sdkType", "-"),
-                    provider_model_count.get(provider_id, 0),
-                    f"${stats.get('total_cost', 0):.4f}" if stats.get('total_cost', 0) > 0 else "-",
-                    stats.get("total_tokens", 0) if stats.get("total_tokens", 0) > 0 else "-",
-                    stats.get("input_tokens", 0) if stats.get("input_tokens", 0) > 0 else "-",
-                    stats.get("output_tokens", 0) if stats.get("output_tokens", 0) > 0 else "-",
-                    format_datetime(provider.get("createdAt")) or "-",
-                    format_datetime(provider.get("updatedAt")) or "-",
-                )
+            yield (
+                provider.get("name", "") or provider_id,
+                provider_id,
+                bool(provider.get("enabled")),
+                provider.get("source"),
+                settings.get("sdkType"),
+                provider_model_count.get(provider_id, 0),
+                stats.get("total_cost", 0),
+                stats.get("total_tokens", 0),
+                stats.get("input_tokens", 0),
+                stats.get("output_tokens", 0),
+                parse_datetime(provider.get("createdAt")),
+                parse_datetime(provider.get("updatedAt")),
             )
+    
+    def format_row(self, row: tuple) -> tuple:
+        """提供商表显示值"""
+        (name, provider_id, enabled, source, sdk_type, model_count, total_cost,
+         total_tokens, input_tokens, output_tokens, created_at, updated_at) = row
+        return (
+            name,
+            provider_id,
+            "✓ 启用" if enabled else "✗ 禁用",
+            _dash(source),
+            _dash(sdk_type),
+            model_count,
+            _format_cost(total_cost),
+            _positive_or_dash(total_tokens),
+            _positive_or_dash(input_tokens),
+            _positive_or_dash(output_tokens),
+            _format_dt(created_at),
+            _format_dt(updated_at),
+        )
 
 
 class AgentsTableViewController(BaseTableViewController):
@@ -891,13 +962,8 @@ class AgentsTableViewController(BaseTableViewController):
         
         self.app.log_message("未找到该助手的数据", "WARNING")
     
-    def update_table(self, parsed_data: Dict):
-        """更新助手表数据"""
-        self.clear_table()
-        
-        if not parsed_data:
-            return
-        
+    def iter_rows(self, parsed_data: Dict) -> Iterator[tuple]:
+        """生成助手表的原始行"""
         raw_data = parsed_data.get("raw", {})
         agents = raw_data.get("data", {}).get("agents", [])
         topics = raw_data.get("data", {}).get("topics", [])
@@ -1001,25 +1067,41 @@ class AgentsTableViewController(BaseTableViewController):
             agent_id = agent.get("id", "")
             stats = agent_stats[agent_id]
             
-            self.tree.insert(
-                "",
-                "end",
-                values=(
-                    get_agent_display_name(agent),
-                    agent_id,
-                    agent.get("model", "-"),
-                    agent.get("provider", "-"),
-                    stats["topic_count"],
-                    stats["msg_count"],
-                    f"${stats['total_cost']:.4f}" if stats['total_cost'] > 0 else "-",
-                    stats["total_tokens"] if stats["total_tokens"] > 0 else "-",
-                    stats["input_tokens"] if stats["input_tokens"] > 0 else "-",
-                    stats["output_tokens"] if stats["output_tokens"] > 0 else "-",
-                    len(stats["call_dates"]),
-                    format_datetime(agent.get("createdAt")) or "-",
-                    format_datetime(agent.get("accessedAt")) or "-",
-                )
+            yield (
+                get_agent_display_name(agent),
+                agent_id,
+                agent.get("model"),
+                agent.get("provider"),
+                stats["topic_count"],
+                stats["msg_count"],
+                stats["total_cost"],
+                stats["total_tokens"],
+                stats["input_tokens"],
+                stats["output_tokens"],
+                len(stats["call_dates"]),
+                parse_datetime(agent.get("createdAt")),
+                parse_datetime(agent.get("accessedAt")),
             )
+    
+    def format_row(self, row: tuple) -> tuple:
+        """助手表显示值"""
+        (name, agent_id, model, provider, topic_count, msg_count, total_cost, total_tokens,
+         input_tokens, output_tokens, usage_days, created_at, accessed_at) = row
+        return (
+            name,
+            agent_id,
+            _dash(model),
+            _dash(provider),
+            topic_count,
+            msg_count,
+            _format_cost(total_cost),
+            _positive_or_dash(total_tokens),
+            _positive_or_dash(input_tokens),
+            _positive_or_dash(output_tokens),
+            usage_days,
+            _format_dt(created_at),
+            _format_dt(accessed_at),
+        )
 
 
 class TopicsTableViewController(BaseTableViewController):
@@ -1046,13 +1128,8 @@ class TopicsTableViewController(BaseTableViewController):
         """初始化话题表视图"""
         super().__init__(parent, app, self.COLUMNS)
     
-    def update_table(self, parsed_data: Dict):
-        """更新话题表数据"""
-        self.clear_table()
-        
-        if not parsed_data:
-            return
-        
+    def iter_rows(self, parsed_data: Dict) -> Iterator[tuple]:
+        """生成话题表的原始行"""
         raw_data = parsed_data.get("raw", {})
         agents = raw_data.get("data", {}).get("agents", [])
         topics = raw_data.get("data", {}).get("topics", [])
@@ -1113,14 +1190,9 @@ class TopicsTableViewController(BaseTableViewController):
         for topic in topics:
             topic_id = topic.get("id", "")
             session_id = topic.get("sessionId")
-            title = topic.get("title", "")
-            
-            # 截断过长的标题
-            if len(title) > 50:
-                title = title[:50] + "..."
             
             # 确定所属助手
-            agent_name = "-"
+            agent_name = None
             if session_id and session_id in session_to_agent:
                 agent_id = session_to_agent[session_id]
                 agent = agents_dict.get(agent_id)
@@ -1135,25 +1207,43 @@ class TopicsTableViewController(BaseTableViewController):
             
             stats = topic_stats.get(topic_id, {})
             
-            self.tree.insert(
-                "",
-                "end",
-                values=(
-                    title or "未命名话题",
-                    agent_name,
-                    topic_id,
-                    session_id or "-",
-                    stats.get("msg_count", 0),
-                    stats.get("total_tokens", 0) if stats.get("total_tokens", 0) > 0 else "-",
-                    stats.get("input_tokens", 0) if stats.get("input_tokens", 0) > 0 else "-",
-                    stats.get("output_tokens", 0) if stats.get("output_tokens", 0) > 0 else "-",
-                    f"${stats.get('total_cost', 0):.4f}" if stats.get('total_cost', 0) > 0 else "-",
-                    len(stats.get("call_dates", set())),
-                    "★" if topic.get("favorite") else "",
-                    format_datetime(topic.get("createdAt")) or "-",
-                    format_datetime(topic.get("updatedAt")) or "-",
-                )
+            yield (
+                topic.get("title") or "未命名话题",
+                agent_name,
+                topic_id,
+                session_id or None,
+                stats.get("msg_count", 0),
+                stats.get("total_tokens", 0),
+                stats.get("input_tokens", 0),
+                stats.get("output_tokens", 0),
+                stats.get("total_cost", 0),
+                len(stats.get("call_dates", set())),
+                bool(topic.get("favorite")),
+                parse_datetime(topic.get("createdAt")),
+                parse_datetime(topic.get("updatedAt")),
             )
+    
+    def format_row(self, row: tuple) -> tuple:
+        """话题表显示值（标题截断）"""
+        (title, agent_name, topic_id, session_id, msg_count, total_tokens, input_tokens,
+         output_tokens, total_cost, usage_days, favorite, created_at, updated_at) = row
+        if len(title) > 50:
+            title = title[:50] + "..."
+        return (
+            title,
+            _dash(agent_name),
+            topic_id,
+            _dash(session_id),
+            msg_count,
+            _positive_or_dash(total_tokens),
+            _positive_or_dash(input_tokens),
+            _positive_or_dash(output_tokens),
+            _format_cost(total_cost),
+            usage_days,
+            "★" if favorite else "",
+            _format_dt(created_at),
+            _format_dt(updated_at),
+        )
 
 
 class MessagesTableViewController(BaseTableViewController):
@@ -1173,17 +1263,15 @@ class MessagesTableViewController(BaseTableViewController):
         ("created_at", "创建时间", 150, False),
     ]
     
+    # 显示为内容预览，导出完整内容
+    EXPORT_HEADERS = {"content_preview": "内容"}
+    
     def __init__(self, parent, app):
         """初始化消息表视图"""
         super().__init__(parent, app, self.COLUMNS)
     
-    def update_table(self, parsed_data: Dict):
-        """更新消息表数据"""
-        self.clear_table()
-        
-        if not parsed_data:
-            return
-        
+    def iter_rows(self, parsed_data: Dict) -> Iterator[tuple]:
+        """生成消息表的原始行（内容为完整内容）"""
         raw_data = parsed_data.get("raw", {})
         agents = raw_data.get("data", {}).get("agents", [])
         topics = raw_data.get("data", {}).get("topics", [])
@@ -1218,20 +1306,11 @@ class MessagesTableViewController(BaseTableViewController):
                 break
         
         for msg in messages:
-            content = msg.get("content", "")
-            # 生成内容预览
-            if isinstance(content, str):
-                preview = content.strip().replace("\n", " ")[:60]
-                if len(content) > 60:
-                    preview += "..."
-            else:
-                preview = str(content)[:60] + "..."
-            
             session_id = msg.get("sessionId")
             topic_id = msg.get("topicId")
             
             # 确定所属助手
-            agent_name = "-"
+            agent_name = None
             if session_id and session_id in session_to_agent:
                 agent_id = session_to_agent[session_id]
                 agent = agents_dict.get(agent_id)
@@ -1251,32 +1330,49 @@ class MessagesTableViewController(BaseTableViewController):
                         agent_name = get_agent_display_name(agent)
             
             # 确定所属话题
-            topic_title = "-"
+            topic_title = None
             if topic_id and topic_id in topics_dict:
-                topic = topics_dict[topic_id]
-                title = topic.get("title", "")
-                if len(title) > 30:
-                    title = title[:30] + "..."
-                topic_title = title or "未命名话题"
+                topic_title = topics_dict[topic_id].get("title") or "未命名话题"
             
             metadata = msg.get("metadata") or {}
-            total_tokens = metadata.get("totalTokens", 0) or 0
-            cost = metadata.get("cost", 0) or 0
-            tps = metadata.get("tps", 0) or 0
             
-            self.tree.insert(
-                "",
-                "end",
-                values=(
-                    msg.get("role", "-"),
-                    preview or "(空)",
-                    agent_name,
-                    topic_title,
-                    msg.get("model", "-"),
-                    total_tokens if total_tokens > 0 else "-",
-                    f"${cost:.4f}" if cost > 0 else "-",
-                    f"{tps:.1f}" if tps > 0 else "-",
-                    topic_id or "-",
-                    format_datetime(msg.get("createdAt")) or "-",
-                )
+            yield (
+                msg.get("role"),
+                msg.get("content", ""),
+                agent_name,
+                topic_title,
+                msg.get("model"),
+                metadata.get("totalTokens", 0) or 0,
+                metadata.get("cost", 0) or 0,
+                metadata.get("tps", 0) or 0,
+                topic_id or None,
+                parse_datetime(msg.get("createdAt")),
             )
+    
+    def format_row(self, row: tuple) -> tuple:
+        """消息表显示值（内容预览、话题标题截断）"""
+        role, content, agent_name, topic_title, model, total_tokens, cost, tps, topic_id, created_at = row
+        
+        # 生成内容预览
+        if isinstance(content, str):
+            preview = content.strip().replace("\n", " ")[:60]
+            if len(content) > 60:
+                preview += "..."
+        else:
+            preview = str(content)[:60] + "..."
+        
+        if topic_title and len(topic_title) > 30:
+            topic_title = topic_title[:30] + "..."
+        
+        return (
+            _dash(role),
+            preview or "(空)",
+            _dash(agent_name),
+            _dash(topic_title),
+            _dash(model),
+            _positive_or_dash(total_tokens),
+            _format_cost(cost),
+            f"{tps:.1f}" if tps > 0 else "-",
+            _dash(topic_id),
+            _format_dt(created_at),
+        )
@@ -8,8 +8,10 @@ import re
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Set, Tuple
-from ..config import INVALID_FILENAME_CHARS, MAX_FILENAME_LENGTH
+from typing import Iterable, Optional, Set, TextIO, Tuple
+from ..config import INVALID_FILENAME_CHARS, MAX_FILENAME_LENGTH, STREAM_WRITE_CHUNK_LINES
+from ..core.cancellation import OperationCancelled
+from ..core import export_progress
 
 
 def safe_filename(text: str, fallback: str, max_length: int = MAX_FILENAME_LENGTH) -> str:
@@ -72,6 +74,25 @@ def ensure_unique_name(name: str, used_names: Set[str]) -> str:
         counter += 1
 
 
+def parse_datetime(dt_str: Optional[str]) -> Optional[datetime]:
+    """
+    解析 ISO 格式的日期时间
+    
+    Args:
+        dt_str: ISO格式的日期时间字符串
+    
+    Returns:
+        datetime，为空或无法解析时返回 None
+    """
+    if not dt_str:
+        return None
+    
+    try:
+        return datetime.fromisoformat(dt_str.replace('Z', '+00:00'))
+    except:
+        return None
+
+
 def format_datetime(dt_str: Optional[str]) -> str:
     """
     格式化日期时间
@@ -277,20 +298,91 @@ def write_file_with_timestamp(file_path: str, content: str,
     Returns:
         是否成功
     """
+    export_progress.check_cancelled()
     try:
         Path(file_path).write_text(content, encoding=encoding)
         set_file_times(file_path, created_at, modified_at)
-        return True
     except Exception:
         return False
+    export_progress.record_file(len(content.encode(encoding, "surrogatepass")))
+    return True
 
 
-def write_json_with_timestamp(file_path: str, data: dict,
+def write_lines(f: TextIO, lines: Iterable[str], chunk_lines: int = STREAM_WRITE_CHUNK_LINES) -> int:
+    """
+    把逐行生成的内容流式写入文件对象（结果与 "\\n".join(lines) 相同）
+
+    每累计 chunk_lines 行合并写入一次，不在内存中拼接整个文档。
+
+    Args:
+        f: 文本文件对象
+        lines: 行迭代器
+        chunk_lines: 每次合并写入的行数
+
+    Returns:
+        写入的行数
+    """
+    count = 0
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        count += 1
+        if len(buffer) >= chunk_lines:
+            # 块之间的换行写在后一块开头，保证末尾没有多余换行
+            if count > len(buffer):
+                f.write("\n")
+            chunk = "\n".join(buffer)
+            f.write(chunk)
+            # 后台导出任务的取消检查（字节数由实际编码写出的文件对象统计，见 ProgressWriter）
+            export_progress.check_cancelled()
+            buffer = []
+    if buffer:
+        if count > len(buffer):
+            f.write("\n")
+        chunk = "\n".join(buffer)
+        f.write(chunk)
+        export_progress.check_cancelled()
+    return count
+
+
+def write_lines_with_timestamp(file_path: str, lines: Iterable[str],
                                created_at: Optional[str] = None,
                                modified_at: Optional[str] = None,
                                encoding: str = 'utf-8') -> bool:
     """
-    写入JSON文件并设置时间戳
+    流式写入逐行生成的内容并设置时间戳（write_file_with_timestamp 的流式版本）
+
+    Args:
+        file_path: 文件路径
+        lines: 行迭代器
+        created_at: 创建时间（ISO格式字符串）
+        modified_at: 修改时间（ISO格式字符串）
+        encoding: 文件编码
+
+    Returns:
+        是否成功
+    """
+    try:
+        with open(file_path, 'w', encoding=encoding) as f:
+            write_lines(export_progress.ProgressWriter(f), lines)
+        set_file_times(file_path, created_at, modified_at)
+    except OperationCancelled:
+        # 取消时不保留写了一半的文件
+        Path(file_path).unlink(missing_ok=True)
+        raise
+    except Exception:
+        return False
+    export_progress.record_file()
+    return True
+
+
+def write_json_with_timestamp(file_path: str, data: dict,
+                               created_at: Optional[str] = None,
+                               modified_at: Optional[str] = None,
+                               encoding: str = 'utf-8',
+                               compact: bool = False) -> bool:
+    """
+    写入JSON文件并设置时间戳（流式写出，数组可以是迭代器）
     
     Args:
         file_path: 文件路径
@@ -298,15 +390,18 @@ def write_json_with_timestamp(file_path: str, data: dict,
         created_at: 创建时间（ISO格式字符串）
         modified_at: 修改时间（ISO格式字符串）
         encoding: 文件编码
+        compact: 紧凑模式（无缩进）
     
     Returns:
         是否成功
     """
-    import json
+    from .json_stream import write_json_stream
+    export_progress.check_cancelled()
     try:
         with open(file_path, 'w', encoding=encoding) as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+            write_json_stream(f, data, compact)
         set_file_times(file_path, created_at, modified_at)
-        return True
     except Exception:
         return False
+    export_progress.record_file(os.path.getsize(file_path))
+    return True
@@ -0,0 +1,157 @@
+"""
+流式 JSON 写出
+按层级逐个写出字典的键值和数组元素，数组可以是生成器（如数据库游标），
+不需要先在内存中构建完整的输出；默认输出与 json.dump(indent=2, ensure_ascii=False) 完全相同
+"""
+
+import json
+from collections.abc import Iterator
+from typing import Any, Callable, Dict, Iterable, Optional, TextIO, Tuple
+
+
+INDENT = 2
+
+
+def _is_stream(value: Any) -> bool:
+    """是否按元素逐个写出的数组（列表、元组或迭代器）"""
+    return isinstance(value, (list, tuple, Iterator))
+
+
+class ObjectStream:
+    """按 (键, 值) 逐个生成的对象，值可以是迭代器；写出时不需要先构建字典"""
+
+    def __init__(self, items: Iterable[Tuple[str, Any]]):
+        self.items = items
+
+
+class JSONStreamWriter:
+    """
+    流式 JSON 写出器
+
+    字典逐个键写出、数组逐个元素写出（数组元素本身整体编码），
+    写出的同时统计每个数组的元素数量。
+    """
+
+    def __init__(self, f: TextIO, compact: bool = False,
+                 default: Optional[Callable[[Any], Any]] = None):
+        """
+        初始化写出器
+
+        Args:
+            f: 文本文件对象
+            compact: 紧凑模式（无缩进和空格，与 separators=(",", ":") 相同）
+            default: 无法序列化的对象的转换函数（同 json.dumps 的 default）
+        """
+        self.f = f
+        self.compact = compact
+        self.default = default
+        self.counts: Dict[str, int] = {}  # 数组元素数量 {路径: 数量}，路径如 "data.messages"
+
+    def _encode(self, value: Any, level: int) -> str:
+        """整体编码一个值（缩进模式下续行加上当前层级的缩进）"""
+        if self.compact:
+            return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=self.default)
+        text = json.dumps(value, indent=INDENT, ensure_ascii=False, default=self.default)
+        if level and "\n" in text:
+            # JSON 字符串中的换行已转义，这里的换行都是结构换行
+            text = text.replace("\n", "\n" + " " * (INDENT * level))
+        return text
+
+    def _newline(self, level: int) -> str:
+        """换行并缩进到指定层级（紧凑模式为空）"""
+        return "" if self.compact else "\n" + " " * (INDENT * level)
+
+    def write(self, value: Any, level: int = 0, path: str = ""):
+        """
+        写出一个值
+
+        Args:
+            value: 字典/ObjectStream（逐个键写出）、列表/迭代器（逐个元素写出）或其他可编码的值
+            level: 当前缩进层级
+            path: 当前值的键路径（用于元素计数）
+        """
+        if isinstance(value, dict):
+            self._write_items(value.items(), level, path)
+        elif isinstance(value, ObjectStream):
+            self._write_items(value.items, level, path)
+        elif _is_stream(value):
+            self._write_array(value, level, path)
+        else:
+            self.f.write(self._encode(value, level))
+
+    def _write_items(self, items: Iterable[Tuple[str, Any]], level: int, path: str):
+        """逐个写出对象的键值"""
+        write = self.f.write
+        separator = ":" if self.compact else ": "
+        first = True
+        for key, value in items:
+            write("{" if first else ",")
+            write(self._newline(level + 1))
+            write(json.dumps(str(key), ensure_ascii=False))
+            write(separator)
+            self.write(value, level + 1, f"{path}.{key}" if path else str(key))
+            first = False
+        write("{}" if first else self._newline(level) + "}")
+
+    def _write_array(self, values: Iterable[Any], level: int, path: str):
+        """逐个写出数组元素"""
+        write = self.f.write
+        inner = self._newline(level + 1)
+        count = 0
+        for value in values:
+            write("[" if count == 0 else ",")
+            write(inner)
+            write(self._encode(value, level + 1))
+            count += 1
+        write("[]" if count == 0 else self._newline(level) + "]")
+        if path:
+            self.counts[path] = count
+
+
+def write_json_stream(f: TextIO, data: Any, compact: bool = False,
+                      default: Optional[Callable[[Any], Any]] = None) -> Dict[str, int]:
+    """
+    把数据流式写入文件（数组可以是迭代器）
+
+    Args:
+        f: 文本文件对象
+        data: 要写出的数据
+        compact: 紧凑模式
+        default: 无法序列化的对象的转换函数
+
+    Returns:
+        各数组的元素数量 {键路径: 数量}
+    """
+    writer = JSONStreamWriter(f, compact, default)
+    writer.write(data)
+    return writer.counts
+
+
+def write_export_json(f: TextIO, mode: Any, schema_hash: Any,
+                      modules: Iterable[Tuple[str, Any]], compact: bool = False,
+                      default: Optional[Callable[[Any], Any]] = None) -> Dict[str, int]:
+    """
+    流式写出 LobeChat 导出格式 {"mode", "schemaHash", "data": {模块: [...]}}
+
+    模块按 (模块键, 数据) 逐个生成，数据为迭代器时逐条写出，读取一个模块时前面的模块已经写入文件。
+
+    Args:
+        f: 文本文件对象
+        mode: 导出模式
+        schema_hash: 结构哈希
+        modules: (模块键, 数据) 的可迭代对象
+        compact: 紧凑模式
+        default: 无法序列化的对象的转换函数
+
+    Returns:
+        各模块数组的元素数量 {模块键: 数量}
+    """
+    writer = JSONStreamWriter(f, compact, default)
+    writer.write({
+        "mode": mode,
+        "schemaHash": schema_hash,
+        "data": ObjectStream(modules),
+    })
+    prefix = "data."
+    return {path[len(prefix):]: count for path, count in writer.counts.items() if path.startswith(prefix)}
+
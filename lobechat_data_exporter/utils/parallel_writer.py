@@ -0,0 +1,150 @@
+"""
+并行文件写出
+渲染线程把文件内容放入有界队列，由工作线程并发完成建目录、写入和设置时间戳，
+用于一次写出大量小文件的导出模式（按主题 / 按对话导出）
+"""
+
+import os
+import queue
+import threading
+from typing import Callable, List, Optional, Set
+
+from ..config import PARALLEL_WRITER_WORKERS, PARALLEL_WRITER_QUEUE_SIZE
+from .file_utils import write_file_with_timestamp
+from ..core import export_progress
+
+
+# 队列结束标记
+_STOP = object()
+
+
+class ParallelFileWriter:
+    """
+    并行文件写出器
+
+    submit() 在队列满时阻塞，渲染速度不会超过磁盘太多，内存占用有上限。
+    用作上下文管理器，退出时等待所有文件写完；with 块内抛出异常时丢弃未写出的文件。
+    写出线程遇到的异常不会结束线程：文件记入 failed，写入失败（OSError）以外的第一个异常
+    在下一次 submit() 或 close() 时重新抛出。
+    """
+
+    def __init__(self, workers: int = PARALLEL_WRITER_WORKERS,
+                 queue_size: int = PARALLEL_WRITER_QUEUE_SIZE,
+                 encoding: str = 'utf-8'):
+        """
+        初始化写出器
+
+        Args:
+            workers: 工作线程数
+            queue_size: 等待写出的文件数上限
+            encoding: 文件编码
+        """
+        self.workers = max(1, workers)
+        self.encoding = encoding
+        self.written = 0
+        self.unchanged = 0  # before_write 判定无需写入的文件数
+        self.failed: List[str] = []  # 写入失败的文件路径
+        self.error: Optional[BaseException] = None  # 写出线程中第一个非 OSError 的异常
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        self._lock = threading.Lock()
+        self._created_dirs: Set[str] = set()
+        self._aborted = False
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"md-writer-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def __enter__(self) -> 'ParallelFileWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._aborted = True
+        self.close()
+        return False
+
+    def submit(self, file_path: str, content: str,
+               created_at: Optional[str] = None,
+               modified_at: Optional[str] = None,
+               before_write: Optional[Callable[[str, str], bool]] = None,
+               after_write: Optional[Callable[[str], None]] = None):
+        """
+        提交一个文件（父目录不存在时由工作线程创建）
+
+        Args:
+            file_path: 文件路径
+            content: 文件内容
+            created_at: 创建时间（ISO格式字符串）
+            modified_at: 修改时间（ISO格式字符串）
+            before_write: 在工作线程中写入前调用 before_write(file_path, content)，返回 False 时跳过写入
+            after_write: 在工作线程中写入成功后调用 after_write(file_path)
+        """
+        if self._closed:
+            raise RuntimeError("写出器已关闭")
+        self._raise_worker_error()
+        export_progress.check_cancelled()
+        self._queue.put((str(file_path), content, created_at, modified_at, before_write, after_write))
+
+    def close(self):
+        """等待队列中的文件全部写完并停止工作线程"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        if not self._aborted:
+            self._raise_worker_error()
+
+    def _raise_worker_error(self):
+        """重新抛出写出线程中的异常"""
+        if self.error is not None:
+            raise self.error
+
+    def _ensure_dir(self, directory: str):
+        """创建父目录（每个目录只创建一次）"""
+        if not directory or directory in self._created_dirs:
+            return
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self._created_dirs.add(directory)
+
+    def _worker(self):
+        """工作线程：建目录、写入、设置时间戳"""
+        while True:
+            task = self._queue.get()
+            if task is _STOP:
+                return
+            if self._aborted:
+                continue
+
+            file_path, content, created_at, modified_at, before_write, after_write = task
+            try:
+                if before_write is not None and not before_write(file_path, content):
+                    with self._lock:
+                        self.unchanged += 1
+                    export_progress.record_file()
+                    continue
+                self._ensure_dir(os.path.dirname(file_path))
+                ok = write_file_with_timestamp(file_path, content, created_at, modified_at, self.encoding)
+                if ok and after_write is not None:
+                    after_write(file_path)
+            except OSError:
+                ok = False
+            except Exception as e:
+                # 其他异常（如 before_write 或编码错误）也不能结束线程，否则队列满后 submit() 永远阻塞
+                ok = False
+                with self._lock:
+                    if self.error is None:
+                        self.error = e
+
+            with self._lock:
+                if ok:
+                    self.written += 1
+                else:
+                    self.failed.append(file_path)